@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# @Author  : YY
+# @FileName: export_benchmark.py
+# @Time    : 2026-02-27 10:41:18
+"""
+导出性能基准：xlsx 与 csv、csv.gz 对比
+
+生成指定规模的销量数据写入内存 SQLite 代替 MySQL，不需要 Redis，
+与导出接口相同，通过服务端游标（SalesMapper.iter_sales_list）流式读取后用 ExcelUtil.write_stream 分别导出为
+xlsx、csv、csv.gz，统计耗时分位数（p50/p95/p99）、峰值内存、文件大小和每秒导出行数，
+结果输出为 JSON，可与上一个版本的结果对比发现性能回退。
+
+示例：
+    python bin/export_benchmark.py --rows 100k,1000k --output result.json
+    python bin/export_benchmark.py --rows 100k --baseline result.json
+"""
+
+import argparse
+import contextlib
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import platform
+import random
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import numpy as np
+
+from recommend_benchmark import create_benchmark_app, measure, _git_commit, _int_list
+from statistics_benchmark import generate_sales_rows, load_database
+
+EXPORT_FORMATS = ["xlsx", "csv", "csv.gz"]
+SHEET_NAME = "销量信息数据"
+
+
+def _count_csv_rows(output, export_format: str) -> int:
+    """
+    统计 csv、csv.gz 导出文件的数据行数（不含表头）
+    """
+    output.seek(0)
+    binary = gzip.GzipFile(fileobj=output, mode="rb") if export_format == "csv.gz" else output
+    text = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+    try:
+        return sum(1 for _ in csv.reader(text)) - 1
+    finally:
+        text.detach()
+
+
+def run_case(size: int, month_num: int, repeat: int, seed: int) -> List[Dict]:
+    """
+    执行一组规模的基准测试，返回各导出格式的统计结果
+    """
+    from ruoyi_car.domain.entity import Sales
+    from ruoyi_car.mapper.sales_mapper import SalesMapper
+    from ruoyi_common.utils.base import ExcelUtil
+
+    rng = random.Random(seed)
+    rows = generate_sales_rows(size, month_num, rng)
+    # 补充导出中常见的文本列
+    for row in rows:
+        row["series_name"] = f"车系{row['series_id']}"
+        row["city_name"] = row["city_full_name"].split(" ")[-1]
+    load_database(rows)
+    del rows
+    excel_util = ExcelUtil(Sales)
+
+    def export(export_format: str, check: bool = False) -> int:
+        output = excel_util.write_stream(SalesMapper.iter_sales_list(Sales()), SHEET_NAME, export_format)
+        try:
+            if check and export_format != "xlsx":
+                exported = _count_csv_rows(output, export_format)
+                if exported != size:
+                    raise AssertionError(f"导出行数不一致: rows={size} {export_format} 导出={exported}")
+            return output.seek(0, os.SEEK_END)
+        finally:
+            output.close()
+
+    results = []
+    xlsx_p50 = None
+    for export_format in EXPORT_FORMATS:
+        # 第一次导出校验行数，不计入耗时
+        file_size = export(export_format, check=True)
+        result = {"rows": size, "format": export_format, "file_size_kb": round(file_size / 1024, 1)}
+        result.update(measure(export, [(export_format,)] * max(1, repeat)))
+        result["rows_per_s"] = round(size / (result["p50_ms"] / 1000), 1) if result["p50_ms"] else None
+        if export_format == "xlsx":
+            xlsx_p50 = result["p50_ms"]
+        else:
+            result["speedup_p50"] = round(xlsx_p50 / result["p50_ms"], 2) if result["p50_ms"] else None
+        results.append(result)
+        print(f"rows={size:<8} {export_format:<7} p50={result['p50_ms']:>11.1f}ms "
+              f"size={result['file_size_kb']:>11.1f}KB peak={result['peak_memory_kb']:>10.1f}KB "
+              f"x{result.get('speedup_p50', 1.0)}", file=sys.stderr)
+    return results
+
+
+def compare_baseline(results: List[Dict], baseline_path: str, tolerance: float) -> List[Dict]:
+    """
+    与基线结果按 (行数, 导出格式) 对比 p95 耗时，超过容忍比例的记为回退
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    baseline_index = {(item["rows"], item["format"]): item for item in baseline["results"]}
+    regressions = []
+    for item in results:
+        base = baseline_index.get((item["rows"], item["format"]))
+        if not base or not base.get("p95_ms"):
+            continue
+        ratio = item["p95_ms"] / base["p95_ms"]
+        item["baseline_p95_ms"] = base["p95_ms"]
+        item["p95_ratio"] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(item)
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="导出性能基准（xlsx 与 csv、csv.gz 对比）")
+    parser.add_argument("--rows", type=_int_list, default=_int_list("100k,1000k"),
+                        help="导出行数，逗号分隔，支持 k 后缀，默认 100k,1000k")
+    parser.add_argument("--months", type=int, default=24, help="数据覆盖的月份数，默认 24")
+    parser.add_argument("--repeat", type=int, default=1, help="每种格式重复导出次数，默认 1")
+    parser.add_argument("--seed", type=int, default=20260123, help="随机种子")
+    parser.add_argument("--output", help="结果 JSON 文件，默认输出到标准输出")
+    parser.add_argument("--baseline", help="基线结果 JSON 文件，对比 p95 耗时")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="p95 允许增长的比例，默认 0.2")
+    args = parser.parse_args(argv)
+
+    app = create_benchmark_app()
+    from ruoyi_system.service.sys_dict_type import DictCacheUtil
+    # 不连接 Redis：字典标签视为不存在，导出原值
+    app.logger.setLevel(logging.ERROR)
+    DictCacheUtil.get_dict_label_map = classmethod(lambda cls, dict_type: {})
+    results = []
+    with app.app_context():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for size in args.rows:
+                results.extend(run_case(size, args.months, args.repeat, args.seed))
+
+    report = {
+        "meta": {
+            "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "months": args.months,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    regressions = compare_baseline(results, args.baseline, args.tolerance) if args.baseline else []
+    if args.baseline:
+        report["regressions"] = [
+            {key: item[key] for key in ("rows", "format", "baseline_p95_ms", "p95_ms", "p95_ratio")}
+            for item in regressions
+        ]
+
+    content = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(content)
+    else:
+        print(content)
+    for item in regressions:
+        print(f"性能回退: rows={item['rows']} {item['format']} "
+              f"p95 {item['baseline_p95_ms']}ms -> {item['p95_ms']}ms", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
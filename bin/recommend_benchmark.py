@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+# @Author  : YY
+# @FileName: recommend_benchmark.py
+# @Time    : 2026-02-15 16:20:44
+"""
+推荐算法性能基准
+
+生成指定规模的车系、浏览、点赞数据，写入内存 SQLite 代替 MySQL，不需要 Redis，
+按阶段统计推荐链路的耗时分位数（p50/p95/p99）、吞吐量和峰值内存，结果输出为 JSON，
+可与上一个版本的结果对比发现性能回退。
+
+示例：
+    python bin/recommend_benchmark.py --series 1000,10000 --interactions 10,100,1000 --output result.json
+    python bin/recommend_benchmark.py --series 1000 --interactions 100 --baseline result.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import numpy as np
+from flask import Flask
+from sqlalchemy import insert
+
+from ruoyi_common.ruoyi.extension import FlaskRuoYi
+
+COUNTRIES = ["中国", "德国", "日本", "美国", "韩国", "法国", "英国", "意大利", "瑞典"]
+MODEL_TYPES = ["轿车", "SUV", "MPV", "跑车", "皮卡", "微面"]
+ENERGY_TYPES = ["汽油", "纯电动", "插电式混合动力", "增程式", "油电混合", "柴油"]
+SCORE_FIELDS = ["overall_score", "exterior_score", "interior_score", "space_score",
+                "handling_score", "comfort_score", "power_score", "configuration_score"]
+DEFAULT_WEIGHTS = {"country": 5, "brand": 30, "model_type": 15, "energy_type": 6, "price": 21.0, "score": 1.0}
+DEFAULT_PRICE_RANGE = [100000, 200000, 300000, 500000, 1000000, 2000000]
+
+
+def create_benchmark_app() -> Flask:
+    """
+    创建只加载模块、使用内存 SQLite 的应用，不连接 MySQL 和 Redis
+    """
+    app = Flask("ruoyi_admin.app", root_path=os.path.join(PROJECT_ROOT, "ruoyi_admin"))
+    FlaskRuoYi().init_app(app, PROJECT_ROOT)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {}
+    app.config["SQLALCHEMY_ECHO"] = False
+    from ruoyi_admin.ext import db
+    db.init_app(app)
+    return app
+
+
+def _multi_value(rng: random.Random, items: List[str], multi_ratio: float) -> str:
+    if rng.random() < multi_ratio:
+        return "/".join(rng.sample(items, 2))
+    return rng.choice(items)
+
+
+def generate_series_rows(size: int, rng: random.Random) -> List[Dict]:
+    """
+    生成车系数据，品牌数随目录规模增长，部分车系的国家、车型、能源类型为多值
+    """
+    brands = [f"品牌{i}" for i in range(max(20, size // 50))]
+    now = datetime.now()
+    rows = []
+    for i in range(size):
+        min_price = rng.randint(50000, 2500000)
+        overall = round(rng.uniform(3.0, 5.0), 2)
+        row = {
+            "id": i + 1,
+            "series_id": 100000 + i,
+            "series_name": f"车系{i}",
+            "country": _multi_value(rng, COUNTRIES, 0.05),
+            "brand_name": rng.choice(brands),
+            "model_type": _multi_value(rng, MODEL_TYPES, 0.1),
+            "energy_type": _multi_value(rng, ENERGY_TYPES, 0.2),
+            "min_price": min_price,
+            "max_price": min_price + rng.randint(0, 300000),
+            "city_total_sales": rng.randint(0, 200000),
+            "month_total_sales": rng.randint(0, 20000),
+            "create_time": now,
+        }
+        for field in SCORE_FIELDS:
+            # 约 5% 的评分缺失
+            row[field] = None if rng.random() < 0.05 else round(min(5.0, max(1.0, overall + rng.uniform(-0.8, 0.8))), 2)
+        row["overall_score"] = overall
+        rows.append(row)
+    return rows
+
+
+def generate_interaction_rows(series_rows: List[Dict], user_num: int, interaction_num: int,
+                              rng: random.Random, like_ratio: float = 0.2) -> Tuple[List[Dict], List[Dict]]:
+    """
+    为每个用户生成浏览、点赞记录，记录中的车系属性取自车系数据，时间分布在最近 90 天
+    """
+    now = datetime.now()
+    views, likes = [], []
+    for user_id in range(1, user_num + 1):
+        # 每个用户偏好少数几个品牌，模拟真实的集中分布
+        favourite = rng.sample(series_rows, min(len(series_rows), 30))
+        for _ in range(interaction_num):
+            series = rng.choice(favourite) if rng.random() < 0.7 else rng.choice(series_rows)
+            is_like = rng.random() < like_ratio
+            target = likes if is_like else views
+            row = {
+                "id": len(target) + 1,
+                "user_id": user_id,
+                "user_name": f"user{user_id}",
+                "series_id": series["series_id"],
+                "country": series["country"],
+                "brand_name": series["brand_name"],
+                "series_name": series["series_name"],
+                "model_type": series["model_type"],
+                "energy_type": series["energy_type"],
+                "price": series["min_price"],
+                "score": 15 if is_like else 1,
+                "create_time": now - timedelta(days=rng.randint(0, 90), seconds=rng.randint(0, 86400)),
+            }
+            for field in SCORE_FIELDS:
+                row[field] = series[field]
+            target.append(row)
+    return views, likes
+
+
+def load_database(series_rows: List[Dict], view_rows: List[Dict], like_rows: List[Dict]) -> None:
+    """
+    重建内存 SQLite 中的车系、浏览、点赞表并写入数据
+    """
+    from ruoyi_admin.ext import db
+    from ruoyi_car.domain.po import SeriesPo, ViewPo, LikePo
+    tables = [SeriesPo.__table__, ViewPo.__table__, LikePo.__table__]
+    db.session.remove()
+    db.metadata.drop_all(db.engine, tables=tables)
+    db.metadata.create_all(db.engine, tables=tables)
+    for po, rows in ((SeriesPo, series_rows), (ViewPo, view_rows), (LikePo, like_rows)):
+        for offset in range(0, len(rows), 5000):
+            db.session.execute(insert(po), rows[offset:offset + 5000])
+    db.session.commit()
+
+
+def measure(func: Callable, runs: List[tuple]) -> Dict:
+    """
+    依次执行每组参数并统计耗时，再取第一组参数单独执行一次统计峰值内存
+    """
+    latencies = []
+    start = time.perf_counter()
+    for args in runs:
+        begin = time.perf_counter()
+        func(*args)
+        latencies.append((time.perf_counter() - begin) * 1000)
+    total = time.perf_counter() - start
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    func(*runs[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]).tolist()
+    return {
+        "runs": len(latencies),
+        "mean_ms": round(float(np.mean(latencies)), 3),
+        "p50_ms": round(p50, 3),
+        "p95_ms": round(p95, 3),
+        "p99_ms": round(p99, 3),
+        "max_ms": round(max(latencies), 3),
+        "throughput_per_s": round(len(latencies) / total, 3) if total > 0 else None,
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def run_case(series_num: int, interaction_num: int, user_num: int, repeat: int, seed: int) -> List[Dict]:
+    """
+    执行一组规模的基准测试，返回各阶段的统计结果
+    """
+    from ruoyi_car.mapper.like_mapper import LikeMapper
+    from ruoyi_car.mapper.series_mapper import SeriesMapper
+    from ruoyi_car.mapper.view_mapper import ViewMapper
+    from ruoyi_car.service.recommend_service import RecommendService
+    from ruoyi_car.service.series_catalog import SeriesCatalogSnapshot
+
+    rng = random.Random(seed)
+    series_rows = generate_series_rows(series_num, rng)
+    view_rows, like_rows = generate_interaction_rows(series_rows, user_num, interaction_num, rng)
+    load_database(series_rows, view_rows, like_rows)
+    now = datetime.now()
+
+    series_list = SeriesMapper.select_all_series()
+    catalog = SeriesCatalogSnapshot(0, series_list)
+    engine = catalog.engine(DEFAULT_PRICE_RANGE, RecommendService._get_price_range_label)
+    avg_scores = catalog.avg_scores(2.5)
+    user_ids = list(range(1, user_num + 1))
+    records = {
+        user_id: (ViewMapper.select_user_views_by_user_num_new(user_id, interaction_num),
+                  LikeMapper.select_user_likes_by_user_num_new(user_id, interaction_num))
+        for user_id in user_ids
+    }
+
+    def load_interactions(user_id):
+        ViewMapper.select_user_views_by_user_num_new(user_id, interaction_num)
+        LikeMapper.select_user_likes_by_user_num_new(user_id, interaction_num)
+
+    def user_preference(user_id):
+        views, likes = records[user_id]
+        return RecommendService._calculate_user_preference(
+            views, likes, defaultdict(lambda: defaultdict(float)), 0.95, avg_scores, 15, 1,
+            DEFAULT_PRICE_RANGE, now)
+
+    preferences = {user_id: user_preference(user_id) for user_id in user_ids}
+
+    def series_score(user_id):
+        return RecommendService._calculate_series_score(
+            series_list, preferences[user_id], DEFAULT_WEIGHTS, 2.5, avg_scores, DEFAULT_PRICE_RANGE, 3000, engine)
+
+    def generate(user_id):
+        views, likes = records[user_id]
+        return RecommendService.generate_user_recommendation(
+            DEFAULT_WEIGHTS, defaultdict(lambda: defaultdict(float)), 0.95, 3000, series_list, likes, views,
+            2.5, 15, 1, DEFAULT_PRICE_RANGE, now, catalog=catalog)
+
+    catalog_runs = [()] * max(1, min(repeat, 3))
+    user_runs = [(user_id,) for _ in range(repeat) for user_id in user_ids]
+    stages = [
+        ("load_series", SeriesMapper.select_all_series, catalog_runs),
+        ("encode_catalog", lambda: SeriesCatalogSnapshot(0, series_list).engine(
+            DEFAULT_PRICE_RANGE, RecommendService._get_price_range_label), catalog_runs),
+        ("load_interactions", load_interactions, user_runs),
+        ("user_preference", user_preference, user_runs),
+        ("series_score", series_score, user_runs),
+        ("generate_user_recommendation", generate, user_runs),
+    ]
+    results = []
+    for stage, func, runs in stages:
+        result = {"series": series_num, "interactions": interaction_num, "users": user_num, "stage": stage}
+        result.update(measure(func, runs))
+        results.append(result)
+        print(f"series={series_num:<7} interactions={interaction_num:<6} {stage:<30} "
+              f"p50={result['p50_ms']:>10.3f}ms p95={result['p95_ms']:>10.3f}ms p99={result['p99_ms']:>10.3f}ms "
+              f"peak={result['peak_memory_kb']:>10.1f}KB", file=sys.stderr)
+    return results
+
+
+def compare_baseline(results: List[Dict], baseline_path: str, tolerance: float) -> List[Dict]:
+    """
+    与基线结果按 (车系数, 互动数, 阶段) 对比 p95 耗时，超过容忍比例的记为回退
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    baseline_index = {(item["series"], item["interactions"], item["stage"]): item for item in baseline["results"]}
+    regressions = []
+    for item in results:
+        base = baseline_index.get((item["series"], item["interactions"], item["stage"]))
+        if not base or not base.get("p95_ms"):
+            continue
+        ratio = item["p95_ms"] / base["p95_ms"]
+        item["baseline_p95_ms"] = base["p95_ms"]
+        item["p95_ratio"] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(item)
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item.replace("k", "000")) for item in value.split(",") if item.strip()]
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="推荐算法性能基准")
+    parser.add_argument("--series", type=_int_list, default=_int_list("1k,10k,100k"),
+                        help="车系数，逗号分隔，支持 k 后缀，默认 1k,10k,100k")
+    parser.add_argument("--interactions", type=_int_list, default=_int_list("10,100,1k,10k"),
+                        help="每个用户的浏览+点赞数，逗号分隔，默认 10,100,1k,10k")
+    parser.add_argument("--users", type=int, default=20, help="每组规模的用户数，默认 20")
+    parser.add_argument("--repeat", type=int, default=3, help="每个用户重复执行次数，默认 3")
+    parser.add_argument("--seed", type=int, default=20260123, help="随机种子")
+    parser.add_argument("--output", help="结果 JSON 文件，默认输出到标准输出")
+    parser.add_argument("--baseline", help="基线结果 JSON 文件，对比 p95 耗时")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="p95 允许增长的比例，默认 0.2")
+    args = parser.parse_args(argv)
+
+    app = create_benchmark_app()
+    results = []
+    with app.app_context():
+        for series_num in args.series:
+            for interaction_num in args.interactions:
+                results.extend(run_case(series_num, interaction_num, args.users, args.repeat, args.seed))
+
+    report = {
+        "meta": {
+            "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "users": args.users,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    regressions = compare_baseline(results, args.baseline, args.tolerance) if args.baseline else []
+    if args.baseline:
+        report["regressions"] = [
+            {key: item[key] for key in ("series", "interactions", "stage", "baseline_p95_ms", "p95_ms", "p95_ratio")}
+            for item in regressions
+        ]
+
+    content = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(content)
+    else:
+        print(content)
+    for item in regressions:
+        print(f"性能回退: series={item['series']} interactions={item['interactions']} {item['stage']} "
+              f"p95 {item['baseline_p95_ms']}ms -> {item['p95_ms']}ms", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
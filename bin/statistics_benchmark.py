@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+# @Author  : YY
+# @FileName: statistics_benchmark.py
+# @Time    : 2026-02-18 15:02:51
+"""
+销量统计性能基准：SQL 查询 与 内存列式统计引擎 对比
+
+生成指定规模的销量数据写入内存 SQLite 代替 MySQL，不需要 Redis，
+对统计服务使用的各类查询条件和分组分别执行 StatisticsMapper（SQL）和 SalesAnalyticsEngine（内存），
+先校验两者结果一致，再统计耗时分位数（p50/p95/p99）和峰值内存，另统计引擎全量加载、增量刷新的耗时，
+结果输出为 JSON，可与上一个版本的结果对比发现性能回退。
+
+示例：
+    python bin/statistics_benchmark.py --rows 10k,100k --output result.json
+    python bin/statistics_benchmark.py --rows 100k --baseline result.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import random
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import numpy as np
+from sqlalchemy import insert
+
+from recommend_benchmark import COUNTRIES, MODEL_TYPES, ENERGY_TYPES, create_benchmark_app, measure, _git_commit, \
+    _int_list
+
+PROVINCES = ["江苏省", "广东省", "浙江省", "山东省", "河南省", "四川省", "湖北省", "湖南省", "河北省", "福建省"]
+# 统计服务实际使用的查询方法
+QUERY_METHODS = ["select_sales_map_statistics_raw", "select_price_sales_statistics", "energy_type_sales_statistics",
+                 "brand_sales_statistics", "country_sales_statistics", "model_type_sales_statistics",
+                 "series_sales_statistics", "sales_predict_statistics"]
+# 增量刷新的变更行数
+REFRESH_ROWS = 1000
+
+
+def generate_sales_rows(size: int, month_num: int, rng: random.Random) -> List[Dict]:
+    """
+    生成销量数据：车系 x 城市 x 月份，车系属性随车系固定，价格为万元整数
+    """
+    cities = [f"{province} 城市{i}" for province in PROVINCES for i in range(30)]
+    months = [(2024 + m // 12) * 100 + m % 12 + 1 for m in range(month_num)]
+    series_num = max(1, size // (len(cities) * month_num) + 1)
+    brands = [f"品牌{i}" for i in range(max(20, series_num // 10))]
+    series = [{
+        "series_id": 100000 + i,
+        "country": rng.choice(COUNTRIES),
+        "brand_name": rng.choice(brands),
+        "model_type": rng.choice(MODEL_TYPES),
+        "energy_type": rng.choice(ENERGY_TYPES),
+        "min_price": rng.randint(5, 250) * 10000,
+    } for i in range(series_num)]
+    now = datetime.now()
+    rows = []
+    for index in range(size):
+        item = series[index % series_num]
+        rest = index // series_num
+        city = cities[rest % len(cities)]
+        rows.append(dict(item, id=index + 1, city_full_name=city, province=city.split(' ')[0],
+                         month=months[rest // len(cities) % month_num], sales=rng.randint(0, 3000),
+                         create_time=now))
+    return rows
+
+
+def load_database(rows: List[Dict]) -> None:
+    """
+    重建内存 SQLite 中的销量表并写入数据
+    """
+    from ruoyi_admin.ext import db
+    from ruoyi_car.domain.po import SalesPo
+    tables = [SalesPo.__table__]
+    db.session.remove()
+    db.metadata.drop_all(db.engine, tables=tables)
+    db.metadata.create_all(db.engine, tables=tables)
+    for offset in range(0, len(rows), 5000):
+        db.session.execute(insert(SalesPo), rows[offset:offset + 5000])
+    db.session.commit()
+
+
+def build_requests(rows: List[Dict], months: int) -> List[Dict]:
+    """
+    统计服务常用的查询条件：全国、单月、按维度筛选、按价格区间、按省份、按车系
+    """
+    from ruoyi_car.domain.statistics.dto import CarStatisticsRequest
+    sample = rows[0]
+    all_months = sorted({row["month"] for row in rows})
+    start, end = all_months[max(0, len(all_months) - months)], all_months[-1]
+    return [
+        ("all", CarStatisticsRequest(start_time=start, end_time=end)),
+        ("month", CarStatisticsRequest(start_time=end, end_time=end)),
+        ("brand", CarStatisticsRequest(start_time=start, end_time=end, brand_name=sample["brand_name"])),
+        ("energy_type", CarStatisticsRequest(start_time=start, end_time=end, energy_type=sample["energy_type"])),
+        ("price", CarStatisticsRequest(start_time=start, end_time=end, min_price=200000, max_price=500000)),
+        ("province", CarStatisticsRequest(start_time=start, end_time=end, address=PROVINCES[0])),
+        ("series", CarStatisticsRequest(start_time=start, end_time=end, series_id=str(sample["series_id"]))),
+    ]
+
+
+def _normalize(result) -> List[str]:
+    return sorted(json.dumps(item.model_dump(), sort_keys=True, ensure_ascii=False) for item in result or [])
+
+
+def run_case(size: int, month_num: int, query_months: int, repeat: int, seed: int) -> List[Dict]:
+    """
+    执行一组规模的基准测试，返回各查询的统计结果
+    """
+    from ruoyi_admin.ext import db
+    from ruoyi_car.domain.po import SalesPo
+    from ruoyi_car.mapper.sales_mapper import SalesMapper
+    from ruoyi_car.mapper.statistics_mapper import StatisticsMapper
+    from ruoyi_car.service.sales_analytics_engine import SalesAnalyticsEngine, SalesColumnStore
+
+    rng = random.Random(seed)
+    rows = generate_sales_rows(size, month_num, rng)
+    load_database(rows)
+    requests = build_requests(rows, query_months)
+
+    def load_store():
+        return SalesColumnStore.load(0, 0, SalesMapper.iter_sales_analytics_rows())
+
+    # 修改一批销量后按ID回查并合并
+    changed_ids = rng.sample(range(1, size + 1), min(REFRESH_ROWS, size))
+    db.session.execute(SalesPo.__table__.update().where(SalesPo.id.in_(changed_ids)).values(sales=SalesPo.sales + 1))
+    db.session.commit()
+    SalesAnalyticsEngine._store = load_store()
+
+    def refresh_store():
+        changed_rows = SalesMapper.select_sales_analytics_rows_by_ids(changed_ids)
+        return SalesAnalyticsEngine._store.merge(0, len(changed_ids), changed_ids, changed_rows)
+
+    runs = [()] * max(1, repeat)
+    results = []
+    for stage, func in (("engine_load", load_store), ("engine_refresh", refresh_store)):
+        result = {"rows": size, "query": stage, "path": "engine"}
+        result.update(measure(func, runs))
+        results.append(result)
+
+    for method in QUERY_METHODS:
+        for name, request in requests:
+            sql_func = getattr(StatisticsMapper, method)
+            engine_func = getattr(SalesAnalyticsEngine, method)
+            expected, actual = _normalize(sql_func(request)), _normalize(engine_func(request))
+            if expected != actual:
+                raise AssertionError(f"结果不一致: rows={size} {method}[{name}] SQL={len(expected)} 引擎={len(actual)}")
+            case = {}
+            for path, func in (("sql", sql_func), ("engine", engine_func)):
+                result = {"rows": size, "query": f"{method}[{name}]", "path": path, "groups": len(expected)}
+                result.update(measure(func, [(request,)] * max(1, repeat)))
+                results.append(result)
+                case[path] = result
+            case["engine"]["speedup_p50"] = round(case["sql"]["p50_ms"] / case["engine"]["p50_ms"], 2) \
+                if case["engine"]["p50_ms"] else None
+            print(f"rows={size:<8} {method + '[' + name + ']':<50} groups={len(expected):<7} "
+                  f"sql p50={case['sql']['p50_ms']:>9.3f}ms engine p50={case['engine']['p50_ms']:>9.3f}ms "
+                  f"x{case['engine']['speedup_p50']}", file=sys.stderr)
+    return results
+
+
+def compare_baseline(results: List[Dict], baseline_path: str, tolerance: float) -> List[Dict]:
+    """
+    与基线结果按 (行数, 查询, 路径) 对比 p95 耗时，超过容忍比例的记为回退
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    baseline_index = {(item["rows"], item["query"], item["path"]): item for item in baseline["results"]}
+    regressions = []
+    for item in results:
+        base = baseline_index.get((item["rows"], item["query"], item["path"]))
+        if not base or not base.get("p95_ms"):
+            continue
+        ratio = item["p95_ms"] / base["p95_ms"]
+        item["baseline_p95_ms"] = base["p95_ms"]
+        item["p95_ratio"] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(item)
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="销量统计性能基准（SQL 与内存列式统计引擎对比）")
+    parser.add_argument("--rows", type=_int_list, default=_int_list("10k,100k"),
+                        help="销量行数，逗号分隔，支持 k 后缀，默认 10k,100k")
+    parser.add_argument("--months", type=int, default=24, help="数据覆盖的月份数，默认 24")
+    parser.add_argument("--query-months", type=int, default=12, help="查询的月份范围，默认最近 12 个月")
+    parser.add_argument("--repeat", type=int, default=5, help="每个查询重复执行次数，默认 5")
+    parser.add_argument("--seed", type=int, default=20260123, help="随机种子")
+    parser.add_argument("--output", help="结果 JSON 文件，默认输出到标准输出")
+    parser.add_argument("--baseline", help="基线结果 JSON 文件，对比 p95 耗时")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="p95 允许增长的比例，默认 0.2")
+    args = parser.parse_args(argv)
+
+    app = create_benchmark_app()
+    from ruoyi_car.service.sales_analytics_engine import SalesAnalyticsEngine
+    # 不连接 Redis：不使用销量汇总表，引擎快照由基准直接加载，读取变更状态视为没有变更
+    app.logger.setLevel(logging.ERROR)
+    SalesAnalyticsEngine._current_state = classmethod(lambda cls: None)
+    results = []
+    with app.app_context():
+        # StatisticsMapper 会打印 SQL 日志，不混入 JSON 输出
+        with contextlib.redirect_stdout(io.StringIO()):
+            for size in args.rows:
+                results.extend(run_case(size, args.months, args.query_months, args.repeat, args.seed))
+
+    report = {
+        "meta": {
+            "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "months": args.months,
+            "query_months": args.query_months,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    regressions = compare_baseline(results, args.baseline, args.tolerance) if args.baseline else []
+    if args.baseline:
+        report["regressions"] = [
+            {key: item[key] for key in ("rows", "query", "path", "baseline_p95_ms", "p95_ms", "p95_ratio")}
+            for item in regressions
+        ]
+
+    content = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(content)
+    else:
+        print(content)
+    for item in regressions:
+        print(f"性能回退: rows={item['rows']} {item['query']} {item['path']} "
+              f"p95 {item['baseline_p95_ms']}ms -> {item['p95_ms']}ms", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
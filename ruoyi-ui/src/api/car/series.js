@@ -25,6 +25,15 @@ export function getSeriesDetail(seriesId) {
   })
 }
 
+// 查询相似车系
+export function getSimilarSeries(seriesId, num) {
+  return request({
+    url: '/car/series/similar/' + seriesId,
+    method: 'get',
+    params: { num: num }
+  })
+}
+
 // 新增车系信息
 export function addSeries(data) {
   return request({
@@ -1,6 +1,7 @@
 # @Author  : YY
 
 import os
+import pickle
 from flask import Flask
 from ruoyi_common.base.signal import app_completed
 from ruoyi_common.ruoyi.extension import FlaskRuoYi
@@ -41,6 +42,35 @@ def create_app():
     return app
 
 
+def create_worker_app():
+    """
+    创建 spawn 启动的子进程使用的应用：加载模块，初始化数据库、Redis，子进程使用自己的连接；
+    不注册蓝图，也不发送应用完成信号，子进程中不会启动定时任务
+    """
+    app = Flask(__name__)
+    app.config.from_object(RuoYiConfig)
+    ruoyi.init_app(app, PROJECT_ROOT)
+
+    from ruoyi_admin.ext import fredis, db
+    fredis.init_app(app)
+    db.init_app(app)
+    return app
+
+
+def init_worker_process(initializer: bytes) -> None:
+    """
+    spawn 进程池的初始化函数：创建应用并推入应用上下文后，再执行业务的初始化函数
+    业务模块需在应用加载模块后才能导入，初始化函数与参数以 pickle 字节传入，在此之后才反序列化
+
+    Args:
+        initializer (bytes): pickle 序列化的 (初始化函数, 参数元组)
+    """
+    app = create_worker_app()
+    app.app_context().push()
+    func, args = pickle.loads(initializer)
+    func(*args)
+
+
 if __name__ == '__main__':
     app = create_app()
     app.run(debug=True)
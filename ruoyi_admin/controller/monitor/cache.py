@@ -4,6 +4,7 @@
 from ruoyi_common.base.model import AjaxResponse
 from ruoyi_common.descriptor.serializer import JsonSerializer
 from ruoyi_framework.domain.entity import RedisCache
+from ruoyi_framework.descriptor import cache_stats
 from ruoyi_framework.descriptor.permission import HasPerm, PreAuthorize
 from ruoyi_admin.ext import redis_cache
 from ... import reg
@@ -17,4 +18,5 @@ def monitor_cache():
         获取缓存信息
     '''
     cache = RedisCache.from_connection(redis_cache)
+    cache.cacheable_stats = cache_stats()
     return AjaxResponse.from_success(data = cache)
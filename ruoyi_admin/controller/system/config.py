@@ -9,10 +9,11 @@ from flask_login import login_required
 from ruoyi_common.base.transformer import ids_to_list
 from ruoyi_common.constant import UserConstants
 from ruoyi_common.base.model import AjaxResponse, TableResponse
-from ruoyi_common.descriptor.serializer import JsonSerializer
-from ruoyi_common.descriptor.validator import BodyValidator, QueryValidator, PathValidator
+from ruoyi_common.descriptor.serializer import BaseSerializer, JsonSerializer
+from ruoyi_common.descriptor.validator import BodyValidator, QueryValidator, PathValidator, FileDownloadValidator
 from ruoyi_common.domain.enum import BusinessType
 from ruoyi_common.utils import security_util as SecurityUtil
+from ruoyi_common.utils.base import ExcelUtil
 from ruoyi_system.domain.entity import SysConfig
 from ruoyi_system.service.sys_config import SysConfigService
 from ruoyi_framework.descriptor.log import Log
@@ -34,18 +35,17 @@ def system_config_list(dto:SysConfig):
 
 
 @reg.api.route("/system/config/export", methods=["POST"])
-@BodyValidator()
+@FileDownloadValidator()
 @PreAuthorize(HasPerm('system:config:export'))
 @Log(title="参数管理",business_type=BusinessType.EXPORT)
-@JsonSerializer()
+@BaseSerializer()
 def system_config_export(dto:SysConfig):
     '''
-        # todo
         导出配置项列表
     '''
-    rows = SysConfigService.select_user_list(dto)
-    table_response = TableResponse(rows=rows)
-    return table_response
+    rows = SysConfigService.select_config_list(dto)
+    excel_util = ExcelUtil(SysConfig)
+    return excel_util.export_response(rows, "参数数据")
 
 
 @reg.api.route("/system/config/<int:id>", methods=["GET"])
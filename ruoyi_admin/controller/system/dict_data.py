@@ -12,8 +12,9 @@ from ruoyi_common.constant import UserConstants
 from ruoyi_common.domain.entity import SysDictData
 from ruoyi_common.domain.enum import BusinessType
 from ruoyi_common.descriptor.serializer import BaseSerializer, JsonSerializer
-from ruoyi_common.descriptor.validator import BodyValidator, QueryValidator, PathValidator
+from ruoyi_common.descriptor.validator import BodyValidator, QueryValidator, PathValidator, FileDownloadValidator
 from ruoyi_common.utils import security_util as SecurityUtil
+from ruoyi_common.utils.base import ExcelUtil
 from ruoyi_system.service import SysDictDataService
 from ruoyi_system.service.sys_dict_type import SysDictTypeService
 from ruoyi_framework.descriptor.log import Log
@@ -34,17 +35,17 @@ def system_dict_data_list(dto:SysDictData):
 
 
 @reg.api.route("/system/dict/data/export", methods=["POST"])
-@BodyValidator()
+@FileDownloadValidator()
 @PreAuthorize(HasPerm("system:dict:export"))
 @Log(title = "字典数据", business_type = BusinessType.EXPORT)
 @BaseSerializer()
 def system_dict_data_export(dto:SysDictData):
     '''
-        # todo
         导出字典数据列表
     '''
     rows = SysDictDataService.select_dict_data_list(dto)
-    return TableResponse(rows=rows)
+    excel_util = ExcelUtil(SysDictData)
+    return excel_util.export_response(rows, "字典数据")
 
 
 @reg.api.route("/system/dict/data/<int:id>", methods=["GET"])
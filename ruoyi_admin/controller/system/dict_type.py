@@ -12,8 +12,9 @@ from ruoyi_common.constant import UserConstants
 from ruoyi_common.domain.entity import SysDictType
 from ruoyi_common.domain.enum import BusinessType
 from ruoyi_common.descriptor.serializer import BaseSerializer, JsonSerializer
-from ruoyi_common.descriptor.validator import BodyValidator, QueryValidator, PathValidator
+from ruoyi_common.descriptor.validator import BodyValidator, QueryValidator, PathValidator, FileDownloadValidator
 from ruoyi_common.utils import security_util as SecurityUtil
+from ruoyi_common.utils.base import ExcelUtil
 from ruoyi_system.service import SysDictTypeService
 from ruoyi_framework.descriptor.log import Log
 from ruoyi_framework.descriptor.permission import HasPerm, PreAuthorize
@@ -34,18 +35,17 @@ def system_dict_type_list(dto:SysDictType):
 
 
 @reg.api.route("/system/dict/type/export", methods=["POST"])
-@BodyValidator()
+@FileDownloadValidator()
 @PreAuthorize(HasPerm("system:dict:export"))
 @Log(title = "字典类型", business_type = BusinessType.EXPORT)
 @BaseSerializer()
 def system_dict_type_export(dto:SysDictType):
     '''
-        # todo
         导出字典类型列表
     '''
     rows = SysDictTypeService.select_dict_type_list(dto)
-    table_response = TableResponse(rows=rows)
-    return table_response
+    excel_util = ExcelUtil(SysDictType)
+    return excel_util.export_response(rows, "字典类型")
 
 
 @reg.api.route("/system/dict/type/<int:id>", methods=["GET"])
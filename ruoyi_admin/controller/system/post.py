@@ -9,8 +9,9 @@ from ruoyi_common.base.transformer import ids_to_list
 from ruoyi_common.base.model import AjaxResponse, TableResponse
 from ruoyi_common.domain.enum import BusinessType
 from ruoyi_common.descriptor.serializer import BaseSerializer, JsonSerializer
-from ruoyi_common.descriptor.validator import BodyValidator, QueryValidator, PathValidator
+from ruoyi_common.descriptor.validator import BodyValidator, QueryValidator, PathValidator, FileDownloadValidator
 from ruoyi_common.utils import security_util as SecurityUtil
+from ruoyi_common.utils.base import ExcelUtil
 from ruoyi_framework.descriptor.log import Log
 from ruoyi_framework.descriptor.permission import HasPerm, PreAuthorize
 from ruoyi_system.domain.entity import SysPost
@@ -32,18 +33,17 @@ def system_post_list(dto:SysPost):
 
 
 @reg.api.route("/system/post/export", methods=["POST"])
-@BodyValidator()
+@FileDownloadValidator()
 @PreAuthorize(HasPerm("system:post:export"))
 @Log(title = "岗位管理", business_type = BusinessType.EXPORT)
 @BaseSerializer()
 def system_post_export(dto:SysPost):
     '''
-        # todo
         导出岗位信息列表
     '''
     rows = SysPostService.select_post_list(dto)
-    table_response = TableResponse(rows=rows)
-    return table_response
+    excel_util = ExcelUtil(SysPost)
+    return excel_util.export_response(rows, "岗位数据")
 
 
 @reg.api.route("/system/post/<int:id>", methods=["GET"])
@@ -10,8 +10,9 @@ from ruoyi_common.base.model import AjaxResponse, TableResponse
 from ruoyi_common.domain.entity import SysRole
 from ruoyi_common.domain.enum import BusinessType
 from ruoyi_common.descriptor.serializer import BaseSerializer, JsonSerializer
-from ruoyi_common.descriptor.validator import BodyValidator, QueryValidator,PathValidator
+from ruoyi_common.descriptor.validator import BodyValidator, QueryValidator,PathValidator, FileDownloadValidator
 from ruoyi_common.utils import security_util as SecurityUtil
+from ruoyi_common.utils.base import ExcelUtil
 from ruoyi_system.domain.entity import SysUserRole
 from ruoyi_system.service import SysRoleService,SysUserService
 from ruoyi_framework.descriptor.log import Log
@@ -46,7 +47,7 @@ def system_role_detail(id:int):
 
 
 @reg.api.route("/system/role/export", methods=["POST"])
-@BodyValidator()
+@FileDownloadValidator()
 @PreAuthorize(HasPerm("system:role:export"))
 @Log(title="角色管理",business_type=BusinessType.EXPORT)
 @BaseSerializer()
@@ -54,10 +55,9 @@ def system_role_export(dto:SysRole):
     '''
         导出角色
     '''
-    # todo
     rows = SysRoleService.select_role_list(dto)
-    table_response = TableResponse(rows=rows)
-    return table_response
+    excel_util = ExcelUtil(SysRole)
+    return excel_util.export_response(rows, "角色数据")
 
 
 @reg.api.route("/system/role", methods=["POST"])
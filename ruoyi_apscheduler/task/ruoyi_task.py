@@ -2,8 +2,11 @@
 # @Author  : YY
 
 from flask import current_app, has_app_context
-from ruoyi_car.service import StatisticsService
+from ruoyi_car.service import StatisticsService, RecommendService
+from ruoyi_car.service.item_similarity_service import ItemSimilarityService
+from ruoyi_car.service.series_similarity_service import SeriesSimilarityService
 from ruoyi_admin.app import create_app
+from ruoyi_common.utils import StringUtil
 
 # 延迟创建 Flask 应用，避免模块导入阶段出错
 _app = None
@@ -30,9 +33,38 @@ def one_args(x):
 def no_args():
     print("无参方法")
 
-def auto_statistics():
+def auto_statistics(max_workers=None):
     print("自动统计")
     app=get_app()
     with app.app_context():
-        statistics_service.auto_statistics()
+        # 任务参数按字符串传入
+        statistics_service.auto_statistics(int(max_workers) if max_workers else None)
 
+
+def precompute_recommendations(max_workers=None):
+    print("预计算用户推荐")
+    app=get_app()
+    with app.app_context():
+        # 任务参数按字符串传入
+        RecommendService.precompute_recommendations(int(max_workers) if max_workers else None)
+
+
+def refresh_item_similarity(full_rebuild=False):
+    print("更新车系共现近邻")
+    app=get_app()
+    with app.app_context():
+        ItemSimilarityService.refresh(StringUtil.to_bool(full_rebuild) if isinstance(full_rebuild, str) else bool(full_rebuild))
+
+
+def refresh_series_similarity():
+    print("更新相似车系")
+    app=get_app()
+    with app.app_context():
+        SeriesSimilarityService.refresh()
+
+
+def rebuild_sales_rollup():
+    print("重建销量汇总")
+    app=get_app()
+    with app.app_context():
+        StatisticsService.rebuild_sales_rollup()
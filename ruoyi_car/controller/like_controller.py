@@ -142,10 +142,10 @@ def export_like(dto: Like):
     _clear_page_context()
     like_entity.page_num = None
     like_entity.page_size = None
-    likes = like_service.select_like_list(like_entity)
+    likes = like_service.iter_like_list(like_entity)
     # 使用ExcelUtil导出Excel文件
     excel_util = ExcelUtil(Like)
-    return excel_util.export_response(likes, "用户点赞数据")
+    return excel_util.export_stream_response(likes, "用户点赞数据")
 
 
 @gen.route('/importTemplate', methods=['POST'])
@@ -169,6 +169,6 @@ def import_data(
     """导入用户点赞数据"""
     file = file[0]
     excel_util = ExcelUtil(Like)
-    like_list = excel_util.import_file(file, sheetname="用户点赞数据")
-    msg = like_service.import_like(like_list, update_support)
+    like_chunks = excel_util.import_file_chunks(file, sheetname="用户点赞数据")
+    msg = like_service.import_like(like_chunks, update_support)
     return AjaxResponse.from_success(msg=msg)
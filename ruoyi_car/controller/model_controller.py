@@ -123,10 +123,10 @@ def export_model(dto: Model):
     _clear_page_context()
     model_entity.page_num = None
     model_entity.page_size = None
-    models = model_service.select_model_list(model_entity)
+    models = model_service.iter_model_list(model_entity)
     # 使用ExcelUtil导出Excel文件
     excel_util = ExcelUtil(Model)
-    return excel_util.export_response(models, "车型信息数据")
+    return excel_util.export_stream_response(models, "车型信息数据")
 
 @gen.route('/importTemplate', methods=['POST'])
 @login_required
@@ -147,6 +147,6 @@ def import_data(
     """导入车型信息数据"""
     file = file[0]
     excel_util = ExcelUtil(Model)
-    model_list = excel_util.import_file(file, sheetname="车型信息数据")
-    msg = model_service.import_model(model_list)
+    model_chunks = excel_util.import_file_chunks(file, sheetname="车型信息数据")
+    msg = model_service.import_model(model_chunks)
     return AjaxResponse.from_success(msg=msg)
\ No newline at end of file
@@ -142,10 +142,10 @@ def export_recommend(dto: Recommend):
     _clear_page_context()
     recommend_entity.page_num = None
     recommend_entity.page_size = None
-    recommends = recommend_service.select_recommend_list(recommend_entity)
+    recommends = recommend_service.iter_recommend_list(recommend_entity)
     # 使用ExcelUtil导出Excel文件
     excel_util = ExcelUtil(Recommend)
-    return excel_util.export_response(recommends, "用户推荐数据")
+    return excel_util.export_stream_response(recommends, "用户推荐数据")
 
 
 @gen.route('/importTemplate', methods=['POST'])
@@ -169,6 +169,6 @@ def import_data(
     """导入用户推荐数据"""
     file = file[0]
     excel_util = ExcelUtil(Recommend)
-    recommend_list = excel_util.import_file(file, sheetname="用户推荐数据")
-    msg = recommend_service.import_recommend(recommend_list, update_support)
+    recommend_chunks = excel_util.import_file_chunks(file, sheetname="用户推荐数据")
+    msg = recommend_service.import_recommend(recommend_chunks, update_support)
     return AjaxResponse.from_success(msg=msg)
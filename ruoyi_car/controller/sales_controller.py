@@ -123,10 +123,10 @@ def export_sales(dto: Sales):
     _clear_page_context()
     sales_entity.page_num = None
     sales_entity.page_size = None
-    saless = sales_service.select_sales_list(sales_entity)
+    saless = sales_service.iter_sales_list(sales_entity)
     # 使用ExcelUtil导出Excel文件
     excel_util = ExcelUtil(Sales)
-    return excel_util.export_response(saless, "销量信息数据")
+    return excel_util.export_stream_response(saless, "销量信息数据")
 
 @gen.route('/importTemplate', methods=['POST'])
 @login_required
@@ -147,6 +147,6 @@ def import_data(
     """导入销量信息数据"""
     file = file[0]
     excel_util = ExcelUtil(Sales)
-    sales_list = excel_util.import_file(file, sheetname="销量信息数据")
-    msg = sales_service.import_sales(sales_list)
+    sales_chunks = excel_util.import_file_chunks(file, sheetname="销量信息数据")
+    msg = sales_service.import_sales(sales_chunks)
     return AjaxResponse.from_success(msg=msg)
\ No newline at end of file
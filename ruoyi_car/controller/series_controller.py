@@ -1,6 +1,6 @@
 from typing import List
 
-from flask import g
+from flask import g, request
 from flask_login import login_required
 from werkzeug.datastructures import FileStorage
 
@@ -61,6 +61,16 @@ def get_series_detail(series_id: int):
     series_entity = series_service.select_series_detail_by_id(series_id)
     return AjaxResponse.from_success(data=series_entity)
 
+@gen.route('/similar/<int:seriesId>', methods=['GET'])
+@PathValidator()
+@PreAuthorize(HasPerm('car:series:query'))
+@JsonSerializer()
+def get_similar_series(series_id: int):
+    """获取相似车系"""
+    num = request.args.get('num', 10, type=int)
+    similar_list = series_service.select_similar_series(series_id, num)
+    return AjaxResponse.from_success(data=similar_list)
+
 @gen.route('', methods=['POST'])
 @BodyValidator()
 @PreAuthorize(HasPerm('car:series:add'))
@@ -129,10 +139,10 @@ def export_series(dto: Series):
     _clear_page_context()
     series_entity.page_num = None
     series_entity.page_size = None
-    seriess = series_service.select_series_list(series_entity)
+    seriess = series_service.iter_series_list(series_entity)
     # 使用ExcelUtil导出Excel文件
     excel_util = ExcelUtil(Series)
-    return excel_util.export_response(seriess, "车系信息数据")
+    return excel_util.export_stream_response(seriess, "车系信息数据")
 
 
 @gen.route('/importTemplate', methods=['POST'])
@@ -155,6 +165,6 @@ def import_data(
     """导入车系信息数据"""
     file = file[0]
     excel_util = ExcelUtil(Series)
-    series_list = excel_util.import_file(file, sheetname="车系信息数据")
-    msg = series_service.import_series(series_list)
+    series_chunks = excel_util.import_file_chunks(file, sheetname="车系信息数据")
+    msg = series_service.import_series(series_chunks)
     return AjaxResponse.from_success(msg=msg)
@@ -141,10 +141,10 @@ def export_statistics_info(dto: StatisticsInfo):
     _clear_page_context()
     statistics_info_entity.page_num = None
     statistics_info_entity.page_size = None
-    statistics_infos = statistics_info_service.select_statistics_info_list(statistics_info_entity)
+    statistics_infos = statistics_info_service.iter_statistics_info_list(statistics_info_entity)
     # 使用ExcelUtil导出Excel文件
     excel_util = ExcelUtil(StatisticsInfo)
-    return excel_util.export_response(statistics_infos, "统计信息数据")
+    return excel_util.export_stream_response(statistics_infos, "统计信息数据")
 
 
 @gen.route('/importTemplate', methods=['POST'])
@@ -168,6 +168,6 @@ def import_data(
     """导入统计信息数据"""
     file = file[0]
     excel_util = ExcelUtil(StatisticsInfo)
-    statistics_info_list = excel_util.import_file(file, sheetname="统计信息数据")
-    msg = statistics_info_service.import_statistics_info(statistics_info_list, update_support)
+    statistics_info_chunks = excel_util.import_file_chunks(file, sheetname="统计信息数据")
+    msg = statistics_info_service.import_statistics_info(statistics_info_chunks, update_support)
     return AjaxResponse.from_success(msg=msg)
@@ -123,10 +123,10 @@ def export_view(dto: View):
     _clear_page_context()
     view_entity.page_num = None
     view_entity.page_size = None
-    views = view_service.select_view_list(view_entity)
+    views = view_service.iter_view_list(view_entity)
     # 使用ExcelUtil导出Excel文件
     excel_util = ExcelUtil(View)
-    return excel_util.export_response(views, "用户浏览数据")
+    return excel_util.export_stream_response(views, "用户浏览数据")
 
 @gen.route('/importTemplate', methods=['POST'])
 @login_required
@@ -148,6 +148,6 @@ def import_data(
     """导入用户浏览数据"""
     file = file[0]
     excel_util = ExcelUtil(View)
-    view_list = excel_util.import_file(file, sheetname="用户浏览数据")
-    msg = view_service.import_view(view_list, update_support)
+    view_chunks = excel_util.import_file_chunks(file, sheetname="用户浏览数据")
+    msg = view_service.import_view(view_chunks, update_support)
     return AjaxResponse.from_success(msg=msg)
\ No newline at end of file
@@ -61,6 +61,11 @@ class StatisticsInfo(BaseEntity):
         VoField(query=True),
         ExcelField(name="统计内容")
     ]
+    # 统计内容（压缩编码），不参与接口输出和导出
+    payload: Annotated[
+        Optional[bytes],
+        Field(default=None, exclude=True, description="统计内容（压缩编码）")
+    ]
     # 额外内容
     extend_content: Annotated[
         Optional[str],
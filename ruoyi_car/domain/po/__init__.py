@@ -5,6 +5,7 @@ from .like_po import LikePo
 from .model_po import ModelPo
 from .recommend_po import RecommendPo
 from .sales_po import SalesPo
+from .sales_rollup_po import SalesRollupPo
 from .series_po import SeriesPo
 from .statistics_info_po import StatisticsInfoPo
 from .view_po import ViewPo
@@ -147,9 +147,24 @@ class SalesPo(db.Model):
         index=True,  # 添加索引，加速城市查询
         comment='省市'
     )
+    province: Mapped[Optional[str]] = mapped_column(
+        'province',
+        String(64),
+        nullable=True,
+        comment='省份（由省市拆分，写入时填充）'
+    )
+    price_bucket: Mapped[Optional[int]] = mapped_column(
+        'price_bucket',
+        Integer,
+        nullable=True,
+        comment='价格区间编码（按统计价格区间计算，见 SalesRollupMapper）'
+    )
     # 【性能优化】添加复合索引，优化 group_by(city_full_name, month) 查询
     __table_args__ = (
         Index('idx_month_city_full_name', 'month', 'city_full_name'),
+        # 按省份筛选、按价格区间分组的统计查询
+        Index('idx_province_month', 'province', 'month'),
+        Index('idx_month_price_bucket', 'month', 'price_bucket'),
     )
     create_time: Mapped[Optional[datetime]] = mapped_column(
         'create_time',
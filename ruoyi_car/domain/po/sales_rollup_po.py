@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# @Author  : YY
+# @FileName: sales_rollup_po.py
+# @Time    : 2026-02-17 09:42:16
+
+from typing import Optional
+
+from sqlalchemy import BigInteger, Integer, String, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ruoyi_admin.ext import db
+
+
+class SalesRollupPo(db.Model):
+    """
+    销量汇总PO对象
+
+    按 月份、省份、城市、国家、品牌、车型、能源类型、价格区间 预先汇总 tb_sales，
+    销量新增、修改、删除、导入时增量维护，统计查询条件可以被覆盖时代替原始销量表查询
+    """
+    __tablename__ = 'tb_sales_rollup'
+    __table_args__ = (
+        # 汇总维度的摘要，维度中可能有 NULL，唯一索引建在摘要上
+        Index('uk_rollup_key', 'rollup_key', unique=True),
+        # 【性能优化】统计查询按月份范围过滤、按城市分组
+        Index('idx_rollup_month_city', 'month', 'city_full_name'),
+        Index('idx_rollup_month_province', 'month', 'province'),
+        {'comment': '销量汇总'}
+    )
+    id: Mapped[int] = mapped_column(
+        'id',
+        BigInteger,
+        primary_key=True,
+        autoincrement=True,
+        nullable=False,
+        comment='编号'
+    )
+    rollup_key: Mapped[str] = mapped_column(
+        'rollup_key',
+        String(64),
+        nullable=False,
+        comment='汇总维度摘要'
+    )
+    month: Mapped[Optional[int]] = mapped_column(
+        'month',
+        Integer,
+        nullable=True,
+        comment='月份'
+    )
+    province: Mapped[Optional[str]] = mapped_column(
+        'province',
+        String(255),
+        nullable=True,
+        comment='省份'
+    )
+    city_full_name: Mapped[Optional[str]] = mapped_column(
+        'city_full_name',
+        String(255),
+        nullable=True,
+        comment='省市'
+    )
+    country: Mapped[Optional[str]] = mapped_column(
+        'country',
+        String(255),
+        nullable=True,
+        comment='国家'
+    )
+    brand_name: Mapped[Optional[str]] = mapped_column(
+        'brand_name',
+        String(255),
+        nullable=True,
+        comment='品牌名'
+    )
+    model_type: Mapped[Optional[str]] = mapped_column(
+        'model_type',
+        String(255),
+        nullable=True,
+        comment='车型'
+    )
+    energy_type: Mapped[Optional[str]] = mapped_column(
+        'energy_type',
+        String(255),
+        nullable=True,
+        comment='能源类型'
+    )
+    price_bucket: Mapped[Optional[int]] = mapped_column(
+        'price_bucket',
+        Integer,
+        nullable=True,
+        comment='价格区间'
+    )
+    sales: Mapped[int] = mapped_column(
+        'sales',
+        BigInteger,
+        nullable=False,
+        default=0,
+        comment='销量'
+    )
+    row_count: Mapped[int] = mapped_column(
+        'row_count',
+        Integer,
+        nullable=False,
+        default=0,
+        comment='汇总的销量记录数'
+    )
@@ -17,8 +17,8 @@ class StatisticsInfoPo(db.Model):
     """
     __tablename__ = 'tb_statistics_info'
     __table_args__ = (
-        # 【性能优化】给 statistics_key 添加索引，加速缓存查询
-        Index('idx_statistics_key', 'statistics_key'),
+        # 【性能优化】statistics_key 唯一，缓存按 Key 精确查询，批量写入时按 Key 覆盖
+        Index('uk_statistics_key', 'statistics_key', unique=True),
         # 【性能优化】给 common_key 添加索引
         Index('idx_common_key', 'common_key'),
         # 【性能优化】给 type 添加索引
@@ -63,6 +63,13 @@ class StatisticsInfoPo(db.Model):
         nullable=True,
         comment='统计内容'
     )
+    payload: Mapped[Optional[bytes]] = mapped_column(
+        'payload',
+        # MySQL 按长度建为 MEDIUMBLOB
+        LargeBinary(16 * 1024 * 1024 - 1),
+        nullable=True,
+        comment='统计内容（压缩编码）'
+    )
     extend_content: Mapped[Optional[str]] = mapped_column(
         'extend_content',
         Text,
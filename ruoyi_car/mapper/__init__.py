@@ -5,6 +5,7 @@ from .like_mapper import LikeMapper
 from .model_mapper import ModelMapper
 from .recommend_mapper import RecommendMapper
 from .sales_mapper import SalesMapper
+from .sales_rollup_mapper import SalesRollupMapper
 from .series_mapper import SeriesMapper
 from .statistics_info_mapper import StatisticsInfoMapper
 from .view_mapper import ViewMapper
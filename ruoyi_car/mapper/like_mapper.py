@@ -3,20 +3,26 @@
 # @FileName: like_mapper.py
 # @Time    : 2026-01-23 20:21:54
 
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 from datetime import datetime
 
 from flask import g
-from sqlalchemy import select, update, delete, and_
+from sqlalchemy import select, update, delete, and_, func
 
 from ruoyi_admin.ext import db
 from ruoyi_car.domain.entity import Like
 from ruoyi_car.domain.po import LikePo
+from ruoyi_common.sqlalchemy.bulk import BulkUpsert
 
 
 class LikeMapper:
     """用户点赞Mapper"""
 
+    # 导入时按主键批量新增、更新
+    # 导入时读取已存在记录的用户，修改了用户的记录导入后两个用户的画像都需要重建
+    BULK_UPSERT = BulkUpsert(db.session, LikePo, key_columns=("id",), fetch_columns=("user_id",),
+                             insert_now=("create_time",))
+
     @classmethod
     def select_like_list(cls, like: Like) -> List[Like]:
         """
@@ -29,58 +35,83 @@ class LikeMapper:
             List[like]: 用户点赞列表
         """
         try:
-            # 构建查询条件
-            stmt = select(LikePo)
+            stmt = cls._select_like_list_stmt(like)
+            if "criterian_meta" in g and g.criterian_meta.page:
+                g.criterian_meta.page.stmt = stmt
+            result = db.session.execute(stmt).scalars().all()
+            return [Like.model_validate(item) for item in result] if result else []
+        except Exception as e:
+            print(f"查询用户点赞列表出错: {e}")
+            return []
 
-            if like.id is not None:
-                stmt = stmt.where(LikePo.id == like.id)
+    @classmethod
+    def iter_like_list(cls, like: Like, batch_size: int = 1000) -> Iterator[Like]:
+        """
+        通过服务端游标分批读取用户点赞列表，用于流式导出
 
-            if like.user_id is not None:
-                stmt = stmt.where(LikePo.user_id == like.user_id)
+        Args:
+            like (like): 用户点赞对象
+            batch_size (int): 每批读取的行数
 
-            if like.user_name:
-                stmt = stmt.where(LikePo.user_name.like("%" + str(like.user_name) + "%"))
+        Returns:
+            Iterator[like]: 用户点赞迭代器
+        """
+        stmt = cls._select_like_list_stmt(like).execution_options(yield_per=batch_size)
+        # 生成器在首次取数时才打开游标，导出写入前的字典标签查询不会落在未缓冲的游标连接上
+        for item in db.session.execute(stmt).scalars():
+            yield Like.model_validate(item)
 
-            if like.series_id is not None:
-                stmt = stmt.where(LikePo.series_id == like.series_id)
+    @classmethod
+    def _select_like_list_stmt(cls, like: Like):
+        """
+        构建用户点赞列表的查询语句
+        """
+        # 构建查询条件
+        stmt = select(LikePo)
 
-            if like.country is not None:
-                stmt = stmt.where(LikePo.country == like.country)
+        if like.id is not None:
+            stmt = stmt.where(LikePo.id == like.id)
 
-            if like.brand_name:
-                stmt = stmt.where(LikePo.brand_name.like("%" + str(like.brand_name) + "%"))
+        if like.user_id is not None:
+            stmt = stmt.where(LikePo.user_id == like.user_id)
 
-            if like.series_name:
-                stmt = stmt.where(LikePo.series_name.like("%" + str(like.series_name) + "%"))
+        if like.user_name:
+            stmt = stmt.where(LikePo.user_name.like("%" + str(like.user_name) + "%"))
 
-            if like.model_type is not None:
-                stmt = stmt.where(LikePo.model_type == like.model_type)
+        if like.series_id is not None:
+            stmt = stmt.where(LikePo.series_id == like.series_id)
 
-            if like.energy_type is not None:
-                stmt = stmt.where(LikePo.energy_type == like.energy_type)
+        if like.country is not None:
+            stmt = stmt.where(LikePo.country == like.country)
 
-            _params = getattr(like, "params", {}) or {}
-            begin_val = _params.get("beginCreateTime")
-            end_val = _params.get("endCreateTime")
-            stmt=stmt.order_by(LikePo.create_time.desc())
-            if begin_val is not None:
-                stmt = stmt.where(LikePo.create_time >= begin_val)
-            if end_val is not None:
-                stmt = stmt.where(LikePo.create_time <= end_val)
+        if like.brand_name:
+            stmt = stmt.where(LikePo.brand_name.like("%" + str(like.brand_name) + "%"))
 
-            # 应用数据范围过滤（如果 DataScope 设置了有效的过滤条件）
-            if ("criterian_meta" in g and
-                    g.criterian_meta.scope is not None and
-                    g.criterian_meta.scope != [] and
-                    g.criterian_meta.scope != ()):
-                stmt = stmt.where(g.criterian_meta.scope)
-            if "criterian_meta" in g and g.criterian_meta.page:
-                g.criterian_meta.page.stmt = stmt
-            result = db.session.execute(stmt).scalars().all()
-            return [Like.model_validate(item) for item in result] if result else []
-        except Exception as e:
-            print(f"查询用户点赞列表出错: {e}")
-            return []
+        if like.series_name:
+            stmt = stmt.where(LikePo.series_name.like("%" + str(like.series_name) + "%"))
+
+        if like.model_type is not None:
+            stmt = stmt.where(LikePo.model_type == like.model_type)
+
+        if like.energy_type is not None:
+            stmt = stmt.where(LikePo.energy_type == like.energy_type)
+
+        _params = getattr(like, "params", {}) or {}
+        begin_val = _params.get("beginCreateTime")
+        end_val = _params.get("endCreateTime")
+        stmt=stmt.order_by(LikePo.create_time.desc())
+        if begin_val is not None:
+            stmt = stmt.where(LikePo.create_time >= begin_val)
+        if end_val is not None:
+            stmt = stmt.where(LikePo.create_time <= end_val)
+
+        # 应用数据范围过滤（如果 DataScope 设置了有效的过滤条件）
+        if ("criterian_meta" in g and
+                g.criterian_meta.scope is not None and
+                g.criterian_meta.scope != [] and
+                g.criterian_meta.scope != ()):
+            stmt = stmt.where(g.criterian_meta.scope)
+        return stmt
 
     @classmethod
     def select_like_by_id(cls, id: int) -> Optional[Like]:
@@ -308,3 +339,109 @@ class LikeMapper:
         except Exception as e:
             print(f"获取用户时间点后点赞记录出错: {e}")
             return []
+
+    @classmethod
+    def select_user_like_by_offset_new(cls, user_id, offset) -> Optional[Like]:
+        """
+        根据用户ID按时间倒序获取第 offset 条（从0开始）点赞记录，排序与 select_user_likes_by_user_num_new 一致
+
+        Args:
+            user_id (int): 用户ID
+            offset (int): 偏移量
+
+        Returns:
+            Optional[Like]: 用户点赞记录，不存在时返回 None
+        """
+        try:
+            stmt = select(LikePo).where(
+                LikePo.user_id == user_id
+            ).order_by(LikePo.create_time.desc()).offset(offset).limit(1)
+            result = db.session.execute(stmt).scalars().first()
+            return Like.model_validate(result) if result else None
+        except Exception as e:
+            print(f"获取用户指定位置点赞记录出错: {e}")
+            raise
+
+    @classmethod
+    def select_user_ids_by_ids(cls, ids: List[int]) -> List[int]:
+        """
+        查询指定点赞记录涉及的用户
+
+        Args:
+            ids (List[int]): ID列表
+
+        Returns:
+            List[int]: 用户ID列表
+        """
+        if not ids:
+            return []
+        try:
+            stmt = select(LikePo.user_id).where(LikePo.id.in_(ids)).distinct()
+            return [row[0] for row in db.session.execute(stmt).all() if row[0] is not None]
+        except Exception as e:
+            print(f"查询点赞记录用户出错: {e}")
+            return []
+
+    @classmethod
+    def select_max_like_id(cls) -> int:
+        """
+        查询当前最大的点赞记录ID
+
+        Returns:
+            int: 最大ID，没有记录时返回0
+        """
+        try:
+            return db.session.execute(select(func.max(LikePo.id))).scalar() or 0
+        except Exception as e:
+            print(f"查询最大点赞记录ID出错: {e}")
+            raise
+
+    @classmethod
+    def select_user_ids_by_id_range(cls, min_id: int, max_id: int) -> List[int]:
+        """
+        查询ID在 (min_id, max_id] 区间内的点赞记录涉及的用户
+
+        Args:
+            min_id (int): 起始ID（不包含）
+            max_id (int): 结束ID（包含）
+
+        Returns:
+            List[int]: 用户ID列表
+        """
+        try:
+            stmt = select(LikePo.user_id).where(
+                and_(
+                    LikePo.id > min_id,
+                    LikePo.id <= max_id
+                )
+            ).distinct()
+            return [row[0] for row in db.session.execute(stmt).all()]
+        except Exception as e:
+            print(f"查询区间内点赞用户出错: {e}")
+            raise
+
+    @classmethod
+    def select_interactions_by_user_ids(cls, user_ids: List[int], max_id: int) -> List[Tuple]:
+        """
+        查询指定用户ID不超过 max_id 的点赞记录，只返回计算共现需要的字段
+
+        Args:
+            user_ids (List[int]): 用户ID列表
+            max_id (int): 最大ID（包含）
+
+        Returns:
+            List[Tuple]: (ID, 用户ID, 车系ID, 分数, 创建时间) 列表
+        """
+        if not user_ids:
+            return []
+        try:
+            stmt = select(LikePo.id, LikePo.user_id, LikePo.series_id, LikePo.score, LikePo.create_time).where(
+                and_(
+                    LikePo.user_id.in_(user_ids),
+                    LikePo.id <= max_id
+                )
+            ).order_by(LikePo.id)
+            return [tuple(row) for row in db.session.execute(stmt).all()]
+        except Exception as e:
+            print(f"批量查询用户点赞记录出错: {e}")
+            raise
@@ -3,7 +3,7 @@
 # @FileName: model_mapper.py
 # @Time    : 2026-01-23 20:21:54
 
-from typing import List, Optional
+from typing import Iterator, List, Optional
 from datetime import datetime
 
 from flask import g
@@ -12,11 +12,21 @@ from sqlalchemy import select, update, delete
 from ruoyi_admin.ext import db
 from ruoyi_car.domain.entity import Model
 from ruoyi_car.domain.po import ModelPo
+from ruoyi_common.sqlalchemy.bulk import BulkUpsert
 
 
 class ModelMapper:
     """车型信息Mapper"""
 
+    # 导入时按 car_id 批量新增、更新，与 insert_model、update_model 一致不写入车型类型
+    BULK_UPSERT = BulkUpsert(db.session, ModelPo, key_columns=("car_id",),
+                             insert_columns=[column.name for column in ModelPo.__table__.columns
+                                             if column.name != "model_type"],
+                             update_columns=[column.name for column in ModelPo.__table__.columns
+                                             if column.name not in ("id", "model_type")],
+                             fetch_columns=("create_time", "create_by"),
+                             insert_now=("create_time", "update_time"), update_now=("update_time",))
+
     @classmethod
     def select_model_list(cls, model: Model) -> List[Model]:
         """
@@ -29,56 +39,80 @@ class ModelMapper:
             List[model]: 车型信息列表
         """
         try:
-            # 构建查询条件
-            stmt = select(ModelPo)
-            if model.id is not None:
-                stmt = stmt.where(ModelPo.id == model.id)
+            stmt = cls._select_model_list_stmt(model)
+            if "criterian_meta" in g and g.criterian_meta.page:
+                g.criterian_meta.page.stmt = stmt
+            result = db.session.execute(stmt).scalars().all()
+            return [Model.model_validate(item) for item in result] if result else []
+        except Exception as e:
+            print(f"查询车型信息列表出错: {e}")
+            return []
 
-            if model.country is not None:
-                stmt = stmt.where(ModelPo.country == model.country)
+    @classmethod
+    def iter_model_list(cls, model: Model, batch_size: int = 1000) -> Iterator[Model]:
+        """
+        通过服务端游标分批读取车型信息列表，用于流式导出
 
-            if model.brand_name:
-                stmt = stmt.where(ModelPo.brand_name.like("%" + str(model.brand_name) + "%"))
+        Args:
+            model (model): 车型信息对象
+            batch_size (int): 每批读取的行数
 
-            if model.series_name:
-                stmt = stmt.where(ModelPo.series_name.like("%" + str(model.series_name) + "%"))
+        Returns:
+            Iterator[model]: 车型信息迭代器
+        """
+        stmt = cls._select_model_list_stmt(model).execution_options(yield_per=batch_size)
+        # 生成器在首次取数时才打开游标，导出写入前的字典标签查询不会落在未缓冲的游标连接上
+        for item in db.session.execute(stmt).scalars():
+            yield Model.model_validate(item)
 
-            if model.car_name:
-                stmt = stmt.where(ModelPo.car_name.like("%" + str(model.car_name) + "%"))
+    @classmethod
+    def _select_model_list_stmt(cls, model: Model):
+        """
+        构建车型信息列表的查询语句
+        """
+        # 构建查询条件
+        stmt = select(ModelPo)
+        if model.id is not None:
+            stmt = stmt.where(ModelPo.id == model.id)
 
-            if model.series_id is not None:
-                stmt = stmt.where(ModelPo.series_id == model.series_id)
+        if model.country is not None:
+            stmt = stmt.where(ModelPo.country == model.country)
 
-            if model.car_id is not None:
-                stmt = stmt.where(ModelPo.car_id == model.car_id)
+        if model.brand_name:
+            stmt = stmt.where(ModelPo.brand_name.like("%" + str(model.brand_name) + "%"))
 
-            if model.engine_motor:
-                stmt = stmt.where(ModelPo.engine_motor.like("%" + str(model.engine_motor) + "%"))
+        if model.series_name:
+            stmt = stmt.where(ModelPo.series_name.like("%" + str(model.series_name) + "%"))
 
-            if model.energy_type:
-                stmt = stmt.where(ModelPo.energy_type.like("%" + str(model.energy_type) + "%"))
+        if model.car_name:
+            stmt = stmt.where(ModelPo.car_name.like("%" + str(model.car_name) + "%"))
 
-            if model.drive_type is not None:
-                stmt = stmt.where(ModelPo.drive_type == model.drive_type)
-            stmt = stmt.order_by(ModelPo.update_time.desc())
-            _params = getattr(model, "params", {}) or {}
-            begin_val = _params.get("beginCreateTime")
-            end_val = _params.get("endCreateTime")
-            if begin_val is not None:
-                stmt = stmt.where(ModelPo.create_time >= begin_val)
-            if end_val is not None:
-                stmt = stmt.where(ModelPo.create_time <= end_val)
+        if model.series_id is not None:
+            stmt = stmt.where(ModelPo.series_id == model.series_id)
 
-            if model.create_by:
-                stmt = stmt.where(ModelPo.create_by.like("%" + str(model.create_by) + "%"))
+        if model.car_id is not None:
+            stmt = stmt.where(ModelPo.car_id == model.car_id)
 
-            if "criterian_meta" in g and g.criterian_meta.page:
-                g.criterian_meta.page.stmt = stmt
-            result = db.session.execute(stmt).scalars().all()
-            return [Model.model_validate(item) for item in result] if result else []
-        except Exception as e:
-            print(f"查询车型信息列表出错: {e}")
-            return []
+        if model.engine_motor:
+            stmt = stmt.where(ModelPo.engine_motor.like("%" + str(model.engine_motor) + "%"))
+
+        if model.energy_type:
+            stmt = stmt.where(ModelPo.energy_type.like("%" + str(model.energy_type) + "%"))
+
+        if model.drive_type is not None:
+            stmt = stmt.where(ModelPo.drive_type == model.drive_type)
+        stmt = stmt.order_by(ModelPo.update_time.desc())
+        _params = getattr(model, "params", {}) or {}
+        begin_val = _params.get("beginCreateTime")
+        end_val = _params.get("endCreateTime")
+        if begin_val is not None:
+            stmt = stmt.where(ModelPo.create_time >= begin_val)
+        if end_val is not None:
+            stmt = stmt.where(ModelPo.create_time <= end_val)
+
+        if model.create_by:
+            stmt = stmt.where(ModelPo.create_by.like("%" + str(model.create_by) + "%"))
+        return stmt
 
     @classmethod
     def select_model_by_id(cls, id: int) -> Optional[Model]:
@@ -4,19 +4,23 @@
 # @Time    : 2026-01-23 20:21:53
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 
 from flask import g
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, insert, func, or_, union
 
 from ruoyi_admin.ext import db
 from ruoyi_car.domain.entity import Recommend
-from ruoyi_car.domain.po import RecommendPo
+from ruoyi_car.domain.po import RecommendPo, ViewPo, LikePo
+from ruoyi_common.sqlalchemy.bulk import BulkUpsert
 
 
 class RecommendMapper:
     """用户推荐Mapper"""
 
+    # 导入时按主键批量新增、更新
+    BULK_UPSERT = BulkUpsert(db.session, RecommendPo, key_columns=("id",), insert_now=("create_time",))
+
     @classmethod
     def select_recommend_list(cls, recommend: Recommend) -> List[Recommend]:
         """
@@ -29,34 +33,7 @@ class RecommendMapper:
             List[recommend]: 用户推荐列表
         """
         try:
-            # 构建查询条件
-            stmt = select(RecommendPo)
-
-            if recommend.id is not None:
-                stmt = stmt.where(RecommendPo.id == recommend.id)
-
-            if recommend.user_id is not None:
-                stmt = stmt.where(RecommendPo.user_id == recommend.user_id)
-
-            if recommend.user_name:
-                stmt = stmt.where(RecommendPo.user_name.like("%" + str(recommend.user_name) + "%"))
-
-            stmt = stmt.order_by(RecommendPo.create_time.desc())
-            _params = getattr(recommend, "params", {}) or {}
-            begin_val = _params.get("beginCreateTime")
-            end_val = _params.get("endCreateTime")
-            if begin_val is not None:
-                stmt = stmt.where(RecommendPo.create_time >= begin_val)
-            if end_val is not None:
-                stmt = stmt.where(RecommendPo.create_time <= end_val)
-
-            # 应用数据范围过滤（如果 DataScope 设置了有效的过滤条件）
-            if ("criterian_meta" in g and
-                    g.criterian_meta.scope is not None and
-                    g.criterian_meta.scope != [] and
-                    g.criterian_meta.scope != ()):
-                stmt = stmt.where(g.criterian_meta.scope)
-            stmt = stmt.order_by(RecommendPo.create_time.desc())
+            stmt = cls._select_recommend_list_stmt(recommend)
             if "criterian_meta" in g and g.criterian_meta.page:
                 g.criterian_meta.page.stmt = stmt
             result = db.session.execute(stmt).scalars().all()
@@ -65,6 +42,58 @@ class RecommendMapper:
             print(f"查询用户推荐列表出错: {e}")
             return []
 
+    @classmethod
+    def iter_recommend_list(cls, recommend: Recommend, batch_size: int = 1000) -> Iterator[Recommend]:
+        """
+        通过服务端游标分批读取用户推荐列表，用于流式导出
+
+        Args:
+            recommend (recommend): 用户推荐对象
+            batch_size (int): 每批读取的行数
+
+        Returns:
+            Iterator[recommend]: 用户推荐迭代器
+        """
+        stmt = cls._select_recommend_list_stmt(recommend).execution_options(yield_per=batch_size)
+        # 生成器在首次取数时才打开游标，导出写入前的字典标签查询不会落在未缓冲的游标连接上
+        for item in db.session.execute(stmt).scalars():
+            yield Recommend.model_validate(item)
+
+    @classmethod
+    def _select_recommend_list_stmt(cls, recommend: Recommend):
+        """
+        构建用户推荐列表的查询语句
+        """
+        # 构建查询条件
+        stmt = select(RecommendPo)
+
+        if recommend.id is not None:
+            stmt = stmt.where(RecommendPo.id == recommend.id)
+
+        if recommend.user_id is not None:
+            stmt = stmt.where(RecommendPo.user_id == recommend.user_id)
+
+        if recommend.user_name:
+            stmt = stmt.where(RecommendPo.user_name.like("%" + str(recommend.user_name) + "%"))
+
+        stmt = stmt.order_by(RecommendPo.create_time.desc())
+        _params = getattr(recommend, "params", {}) or {}
+        begin_val = _params.get("beginCreateTime")
+        end_val = _params.get("endCreateTime")
+        if begin_val is not None:
+            stmt = stmt.where(RecommendPo.create_time >= begin_val)
+        if end_val is not None:
+            stmt = stmt.where(RecommendPo.create_time <= end_val)
+
+        # 应用数据范围过滤（如果 DataScope 设置了有效的过滤条件）
+        if ("criterian_meta" in g and
+                g.criterian_meta.scope is not None and
+                g.criterian_meta.scope != [] and
+                g.criterian_meta.scope != ()):
+            stmt = stmt.where(g.criterian_meta.scope)
+        stmt = stmt.order_by(RecommendPo.create_time.desc())
+        return stmt
+
     @classmethod
     def select_recommend_by_id(cls, id: int) -> Optional[Recommend]:
         """
@@ -112,6 +141,67 @@ class RecommendMapper:
             print(f"新增用户推荐出错: {e}")
             return 0
 
+    @classmethod
+    def insert_recommend_batch(cls, recommend_list: List[Recommend]) -> int:
+        """
+        批量新增用户推荐，一次提交
+
+        Args:
+            recommend_list (List[Recommend]): 用户推荐列表
+
+        Returns:
+            int: 插入的记录数
+        """
+        if not recommend_list:
+            return 0
+        try:
+            now = datetime.now()
+            rows = [
+                {
+                    "user_id": recommend.user_id,
+                    "user_name": recommend.user_name,
+                    "model_info": recommend.model_info,
+                    "content": recommend.content,
+                    "create_time": recommend.create_time or now,
+                }
+                for recommend in recommend_list
+            ]
+            db.session.execute(insert(RecommendPo), rows)
+            db.session.commit()
+            return len(rows)
+        except Exception as e:
+            db.session.rollback()
+            print(f"批量新增用户推荐出错: {e}")
+            return 0
+
+    @classmethod
+    def select_users_with_new_activity(cls) -> List[Tuple[int, str]]:
+        """
+        查询上次推荐之后有新浏览或新点赞的用户，没有推荐记录但有浏览、点赞的用户也包含在内
+
+        Returns:
+            List[Tuple[int, str]]: 用户ID和用户名列表
+        """
+        try:
+            last_recommend = select(
+                RecommendPo.user_id,
+                func.max(RecommendPo.create_time).label("last_time")
+            ).group_by(RecommendPo.user_id).subquery()
+
+            def active_users(po):
+                return select(po.user_id, func.max(po.user_name).label("user_name")) \
+                    .outerjoin(last_recommend, last_recommend.c.user_id == po.user_id) \
+                    .where(or_(last_recommend.c.last_time.is_(None), po.create_time > last_recommend.c.last_time)) \
+                    .group_by(po.user_id)
+
+            users = union(active_users(ViewPo), active_users(LikePo)).subquery()
+            stmt = select(users.c.user_id, func.max(users.c.user_name)).group_by(users.c.user_id) \
+                .order_by(users.c.user_id)
+            return [(row[0], row[1]) for row in db.session.execute(stmt).all()]
+        except Exception as e:
+            print(f"查询有新行为的用户出错: {e}")
+            return []
+
     @classmethod
     def update_recommend(cls, recommend: Recommend) -> int:
         """
@@ -4,19 +4,31 @@
 # @Time    : 2026-01-23 20:21:54
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Collection, Dict, Iterator, List, Optional, Set, Tuple
 
 from flask import g
-from sqlalchemy import select, delete
+from sqlalchemy import bindparam, select, delete, insert, or_, update
 
 from ruoyi_admin.ext import db
 from ruoyi_car.domain.entity import Sales
 from ruoyi_car.domain.po import SalesPo
+from ruoyi_car.mapper.sales_rollup_mapper import SalesRollupMapper
 
 
 class SalesMapper:
     """销量信息Mapper"""
 
+    # 内存列式统计引擎加载的字段，顺序即返回行的字段顺序
+    ANALYTICS_COLUMNS = ("id", "month", "city_full_name", "country", "brand_name", "model_type", "energy_type",
+                         "series_id", "min_price", "sales")
+    # 批量写入时销量信息对应的字段（主键除外），province、price_bucket 写入时计算
+    WRITE_COLUMNS = ("country", "brand_name", "image", "series_name", "series_id", "model_type", "energy_type",
+                     "max_price", "min_price", "rank", "sales", "last_city_sales", "month_sales",
+                     "month_city_total_sales", "last_month_sales", "last_month_city_total_sales", "month",
+                     "month_date", "city_name", "city_full_name", "create_time", "create_by", "update_time", "remark")
+    # 批量写入时每条语句的行数
+    WRITE_BATCH_SIZE = 500
+
     @classmethod
     def select_sales_list(cls, sales: Sales) -> List[Sales]:
         """
@@ -29,54 +41,7 @@ class SalesMapper:
             List[sales]: 销量信息列表
         """
         try:
-            # 构建查询条件
-            stmt = select(SalesPo)
-
-            if sales.id is not None:
-                stmt = stmt.where(SalesPo.id == sales.id)
-
-            if sales.country is not None:
-                stmt = stmt.where(SalesPo.country == sales.country)
-
-            if sales.brand_name:
-                stmt = stmt.where(SalesPo.brand_name.like("%" + str(sales.brand_name) + "%"))
-
-            if sales.series_name:
-                stmt = stmt.where(SalesPo.series_name.like("%" + str(sales.series_name) + "%"))
-
-            if sales.series_id is not None:
-                stmt = stmt.where(SalesPo.series_id == sales.series_id)
-
-            if sales.model_type is not None:
-                stmt = stmt.where(SalesPo.model_type == sales.model_type)
-
-            if sales.energy_type is not None:
-                stmt = stmt.where(SalesPo.energy_type == sales.energy_type)
-            _params = getattr(sales, "params", {}) or {}
-            begin_val = _params.get("beginMonthDate")
-            end_val = _params.get("endMonthDate")
-            if begin_val is not None:
-                stmt = stmt.where(SalesPo.month_date >= begin_val)
-            if end_val is not None:
-                stmt = stmt.where(SalesPo.month_date <= end_val)
-
-            if sales.city_name:
-                stmt = stmt.where(SalesPo.city_name.like("%" + str(sales.city_name) + "%"))
-
-            if sales.city_full_name:
-                stmt = stmt.where(SalesPo.city_full_name.like("%" + str(sales.city_full_name) + "%"))
-
-            _params = getattr(sales, "params", {}) or {}
-            begin_val = _params.get("beginCreateTime")
-            end_val = _params.get("endCreateTime")
-            if begin_val is not None:
-                stmt = stmt.where(SalesPo.create_time >= begin_val)
-            if end_val is not None:
-                stmt = stmt.where(SalesPo.create_time <= end_val)
-
-            if sales.create_by:
-                stmt = stmt.where(SalesPo.create_by.like("%" + str(sales.create_by) + "%"))
-            stmt = stmt.order_by(SalesPo.month_date.desc())
+            stmt = cls._select_sales_list_stmt(sales)
             if "criterian_meta" in g and g.criterian_meta.page:
                 g.criterian_meta.page.stmt = stmt
             result = db.session.execute(stmt).scalars().all()
@@ -85,6 +50,78 @@ class SalesMapper:
             print(f"查询销量信息列表出错: {e}")
             return []
 
+    @classmethod
+    def iter_sales_list(cls, sales: Sales, batch_size: int = 1000) -> Iterator[Sales]:
+        """
+        通过服务端游标分批读取销量信息列表，用于流式导出
+
+        Args:
+            sales (sales): 销量信息对象
+            batch_size (int): 每批读取的行数
+
+        Returns:
+            Iterator[sales]: 销量信息迭代器
+        """
+        stmt = cls._select_sales_list_stmt(sales).execution_options(yield_per=batch_size)
+        # 生成器在首次取数时才打开游标，导出写入前的字典标签查询不会落在未缓冲的游标连接上
+        for item in db.session.execute(stmt).scalars():
+            yield Sales.model_validate(item)
+
+    @classmethod
+    def _select_sales_list_stmt(cls, sales: Sales):
+        """
+        构建销量信息列表的查询语句
+        """
+        # 构建查询条件
+        stmt = select(SalesPo)
+
+        if sales.id is not None:
+            stmt = stmt.where(SalesPo.id == sales.id)
+
+        if sales.country is not None:
+            stmt = stmt.where(SalesPo.country == sales.country)
+
+        if sales.brand_name:
+            stmt = stmt.where(SalesPo.brand_name.like("%" + str(sales.brand_name) + "%"))
+
+        if sales.series_name:
+            stmt = stmt.where(SalesPo.series_name.like("%" + str(sales.series_name) + "%"))
+
+        if sales.series_id is not None:
+            stmt = stmt.where(SalesPo.series_id == sales.series_id)
+
+        if sales.model_type is not None:
+            stmt = stmt.where(SalesPo.model_type == sales.model_type)
+
+        if sales.energy_type is not None:
+            stmt = stmt.where(SalesPo.energy_type == sales.energy_type)
+        _params = getattr(sales, "params", {}) or {}
+        begin_val = _params.get("beginMonthDate")
+        end_val = _params.get("endMonthDate")
+        if begin_val is not None:
+            stmt = stmt.where(SalesPo.month_date >= begin_val)
+        if end_val is not None:
+            stmt = stmt.where(SalesPo.month_date <= end_val)
+
+        if sales.city_name:
+            stmt = stmt.where(SalesPo.city_name.like("%" + str(sales.city_name) + "%"))
+
+        if sales.city_full_name:
+            stmt = stmt.where(SalesPo.city_full_name.like("%" + str(sales.city_full_name) + "%"))
+
+        _params = getattr(sales, "params", {}) or {}
+        begin_val = _params.get("beginCreateTime")
+        end_val = _params.get("endCreateTime")
+        if begin_val is not None:
+            stmt = stmt.where(SalesPo.create_time >= begin_val)
+        if end_val is not None:
+            stmt = stmt.where(SalesPo.create_time <= end_val)
+
+        if sales.create_by:
+            stmt = stmt.where(SalesPo.create_by.like("%" + str(sales.create_by) + "%"))
+        stmt = stmt.order_by(SalesPo.month_date.desc())
+        return stmt
+
     @classmethod
     def select_sales_by_id(cls, id: int) -> Optional[Sales]:
         """
@@ -128,6 +165,104 @@ class SalesMapper:
             print(f"根据车系ID、城市名称、月份查询销量信息出错: {e}")
             return None
 
+    @staticmethod
+    def sales_key(series_id, city_full_name: Optional[str], month) -> Tuple[int, Optional[str], int]:
+        """
+        车系ID、省市、月份 -> 唯一键，车系ID、月份统一为整数
+
+        Raises:
+            ValueError: 车系ID或月份不是整数
+        """
+        return int(series_id), city_full_name, int(month)
+
+    @classmethod
+    def select_sales_by_keys(cls, keys: Collection[Tuple[int, Optional[str], int]],
+                             for_update: bool = False) -> Dict[tuple, Any]:
+        """
+        根据多个 (车系ID, 省市, 月份) 一次查询已存在的销量信息，同一键有多条时取ID最小的一条
+
+        Args:
+            keys (Collection[tuple]): sales_key 得到的唯一键
+            for_update (bool): 是否加行锁（SELECT ... FOR UPDATE），写入前读取修改前数据时使用，
+                锁在当前事务提交或回滚时释放
+
+        Returns:
+            Dict[tuple, Row]: 唯一键 -> 行（id、series_id、create_time、create_by 以及 SalesRollupMapper.SOURCE_COLUMNS）
+        """
+        if not keys:
+            return {}
+        keys = set(keys)
+        columns = [SalesPo.id, SalesPo.series_id, SalesPo.create_time, SalesPo.create_by] + \
+                  [getattr(SalesPo, column) for column in SalesRollupMapper.SOURCE_COLUMNS]
+        cities = {city for _, city, _ in keys if city is not None}
+        city_condition = SalesPo.city_full_name.in_(cities)
+        if len(cities) < len({city for _, city, _ in keys}):
+            # 省市为空的数据同样按唯一键匹配，保证新增后能按唯一键回查ID
+            city_condition = or_(city_condition, SalesPo.city_full_name.is_(None))
+        # 按月份、省市走 idx_month_city_full_name 索引，车系ID在结果中精确匹配
+        stmt = select(*columns).where(
+            SalesPo.month.in_({month for _, _, month in keys}),
+            city_condition,
+            SalesPo.series_id.in_({series_id for series_id, _, _ in keys})
+        ).order_by(SalesPo.id)
+        if for_update:
+            stmt = stmt.with_for_update()
+        result = {}
+        for row in db.session.execute(stmt):
+            key = (row.series_id, row.city_full_name, row.month)
+            if key in keys:
+                result.setdefault(key, row)
+        return result
+
+    @classmethod
+    def iter_sales_analytics_rows(cls, batch_size: int = 50000) -> Iterator[List[tuple]]:
+        """
+        按ID顺序分批读取全部销量数据的统计字段，供内存列式统计引擎加载
+
+        Args:
+            batch_size (int): 每批行数
+
+        Returns:
+            Iterator[List[tuple]]: 每批 ANALYTICS_COLUMNS 字段的行
+        """
+        columns = [getattr(SalesPo, column) for column in cls.ANALYTICS_COLUMNS]
+        stmt = select(*columns).order_by(SalesPo.id).execution_options(yield_per=batch_size)
+        for partition in db.session.execute(stmt).partitions():
+            yield [tuple(row) for row in partition]
+
+    @classmethod
+    def select_sales_analytics_rows_by_ids(cls, ids: List[int]) -> List[tuple]:
+        """
+        根据ID查询销量数据的统计字段，已删除的ID不返回
+
+        Args:
+            ids (List[int]): ID列表
+
+        Returns:
+            List[tuple]: ANALYTICS_COLUMNS 字段的行
+        """
+        if not ids:
+            return []
+        columns = [getattr(SalesPo, column) for column in cls.ANALYTICS_COLUMNS]
+        return [tuple(row) for row in db.session.execute(select(*columns).where(SalesPo.id.in_(ids)))]
+
+    @classmethod
+    def select_sales_month_provinces(cls, ids: List[int]) -> Set[Tuple[int, Optional[str]]]:
+        """
+        根据ID查询销量数据所在的 (月份, 省份)，用于按变更范围清理统计缓存
+
+        Args:
+            ids (List[int]): ID列表
+
+        Returns:
+            Set[Tuple[int, Optional[str]]]: (月份, 省份) 集合
+        """
+        if not ids:
+            return set()
+        stmt = select(SalesPo.month, SalesPo.city_full_name).where(SalesPo.id.in_(ids)).distinct()
+        return {(month, SalesRollupMapper.province_of(city_full_name))
+                for month, city_full_name in db.session.execute(stmt)}
+
     @classmethod
     def insert_sales(cls, sales: Sales) -> int:
         """
@@ -167,7 +302,10 @@ class SalesMapper:
             new_po.create_by = sales.create_by
             new_po.update_time = sales.update_time or now
             new_po.remark = sales.remark
+            SalesRollupMapper.fill_derived_columns([new_po])
             db.session.add(new_po)
+            # 同一事务中更新销量汇总
+            SalesRollupMapper.apply_changes([], [SalesRollupMapper.capture(new_po)])
             db.session.commit()
             sales.id = new_po.id
             return 1
@@ -176,6 +314,98 @@ class SalesMapper:
             print(f"新增销量信息出错: {e}")
             return 0
 
+    @classmethod
+    def save_sales_batch(cls, inserts: List[Sales], updates: List[Sales]) -> int:
+        """
+        批量新增、修改销量信息，一个事务提交
+        写入前在同一事务中按唯一键加行锁重新读取修改前数据，据此区分新增、修改并计算汇总增量：
+        调用方查询后被删除的数据改为新增，被新增的数据改为修改（保留原有的创建时间和创建人）
+        新增为多行 INSERT，修改为按主键的批量 UPDATE（只更新已加锁的行，不会重新插入已删除的数据），
+        同一事务中更新销量汇总，
+        新增的ID回填到 Sales 对象
+
+        Args:
+            inserts (List[Sales]): 新增的销量信息
+            updates (List[Sales]): 修改的销量信息
+
+        Returns:
+            int: 写入的记录数，出错时返回 0
+        """
+        if not inserts and not updates:
+            return 0
+        try:
+            now = datetime.now()
+            locked = cls.select_sales_by_keys(
+                [cls.sales_key(sales.series_id, sales.city_full_name, sales.month) for sales in inserts + updates],
+                for_update=True
+            )
+            inserts, updates = cls._classify_locked(inserts + updates, locked)
+            insert_rows = [cls._write_row(sales, now) for sales in inserts]
+            update_rows = [dict(cls._write_row(sales, now), b_id=sales.id) for sales, _ in updates]
+            SalesRollupMapper.fill_derived_values(insert_rows + update_rows)
+
+            for start in range(0, len(insert_rows), cls.WRITE_BATCH_SIZE):
+                db.session.execute(insert(SalesPo.__table__), insert_rows[start:start + cls.WRITE_BATCH_SIZE])
+            if update_rows:
+                stmt = cls._update_statement()
+                for start in range(0, len(update_rows), cls.WRITE_BATCH_SIZE):
+                    db.session.execute(stmt, update_rows[start:start + cls.WRITE_BATCH_SIZE])
+            # 多行 INSERT 不返回自增ID，按唯一键回查
+            if inserts:
+                created = cls.select_sales_by_keys(
+                    [cls.sales_key(sales.series_id, sales.city_full_name, sales.month) for sales in inserts])
+                for sales in inserts:
+                    sales.id = created[cls.sales_key(sales.series_id, sales.city_full_name, sales.month)].id
+
+            # 同一事务中更新销量汇总
+            SalesRollupMapper.apply_changes(
+                [SalesRollupMapper.capture(old_row) for _, old_row in updates],
+                [SalesRollupMapper.capture(row) for row in insert_rows + update_rows]
+            )
+            db.session.commit()
+            return len(insert_rows) + len(update_rows)
+        except Exception as e:
+            db.session.rollback()
+            print(f"批量保存销量信息出错: {e}")
+            return 0
+
+    @classmethod
+    def _classify_locked(cls, sales_list: List[Sales], locked: Dict[tuple, Any]) \
+            -> Tuple[List[Sales], List[Tuple[Sales, Any]]]:
+        """
+        按加锁读取到的已存在数据区分新增、修改，返回 (新增, [(修改后的销量信息, 修改前数据)])
+        """
+        inserts, updates = [], []
+        for sales in sales_list:
+            old_row = locked.get(cls.sales_key(sales.series_id, sales.city_full_name, sales.month))
+            if old_row is None:
+                sales.id = None
+                inserts.append(sales)
+                continue
+            sales.id = old_row.id
+            sales.create_time = old_row.create_time
+            sales.create_by = old_row.create_by
+            updates.append((sales, old_row))
+        return inserts, updates
+
+    @classmethod
+    def _write_row(cls, sales: Sales, now: datetime) -> dict:
+        """
+        销量信息 -> 批量写入的行字典，创建、更新时间为空时取当前时间
+        """
+        row = {column: getattr(sales, column, None) for column in cls.WRITE_COLUMNS}
+        row["create_time"] = row["create_time"] or now
+        row["update_time"] = row["update_time"] or now
+        return row
+
+    @classmethod
+    def _update_statement(cls):
+        """
+        按主键批量修改：UPDATE ... WHERE id = :b_id，覆盖除主键外的全部字段，主键不存在时不写入
+        """
+        table = SalesPo.__table__
+        return update(table).where(table.c.id == bindparam("b_id"))
+
     @classmethod
     def update_sales(cls, sales: Sales) -> int:
         """
@@ -189,10 +419,13 @@ class SalesMapper:
         """
         try:
 
-            existing = db.session.get(SalesPo, sales.id)
+            # 加行锁读取修改前数据，汇总增量按锁定的数据计算
+            existing = db.session.get(SalesPo, sales.id, with_for_update=True, populate_existing=True)
             if not existing:
                 return 0
             now = datetime.now()
+            # 记录修改前参与汇总的字段
+            old_row = SalesRollupMapper.capture(existing)
             # 主键不参与更新
             existing.country = sales.country
             existing.brand_name = sales.brand_name
@@ -218,6 +451,9 @@ class SalesMapper:
             existing.create_by = sales.create_by
             existing.update_time = sales.update_time or now
             existing.remark = sales.remark
+            SalesRollupMapper.fill_derived_columns([existing])
+            # 同一事务中更新销量汇总
+            SalesRollupMapper.apply_changes([old_row], [SalesRollupMapper.capture(existing)])
             db.session.commit()
             return 1
 
@@ -238,8 +474,15 @@ class SalesMapper:
             int: 删除的记录数
         """
         try:
+            # 删除前记录参与汇总的字段
+            columns = [getattr(SalesPo, column) for column in SalesRollupMapper.SOURCE_COLUMNS]
+            removed = [SalesRollupMapper.capture(row)
+                       for row in db.session.execute(
+                           select(*columns).where(SalesPo.id.in_(ids)).with_for_update())]
             stmt = delete(SalesPo).where(SalesPo.id.in_(ids))
             result = db.session.execute(stmt)
+            # 同一事务中更新销量汇总
+            SalesRollupMapper.apply_changes(removed, [])
             db.session.commit()
             return result.rowcount
         except Exception as e:
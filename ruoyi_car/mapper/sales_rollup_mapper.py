@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+# @Author  : YY
+# @FileName: sales_rollup_mapper.py
+# @Time    : 2026-02-17 09:42:16
+
+import hashlib
+import json
+from bisect import bisect_left
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import select, delete, insert, update, func, bindparam
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ruoyi_admin.ext import db, redis_cache
+from ruoyi_car.domain.po import SalesPo, SalesRollupPo
+from ruoyi_car.domain.statistics.dto import CarStatisticsRequest
+from ruoyi_common.constant import StatisticsConstants
+from ruoyi_common.utils.base import LogUtil
+
+
+class SalesRollupMapper:
+    """
+    销量汇总Mapper
+
+    汇总维度：月份、省份、城市、国家、品牌、车型、能源类型、价格区间。
+    tb_sales 按 车系+城市+月份 唯一，汇总表不再区分车系，按车系筛选或分组的统计仍查询原始销量表。
+
+    价格区间按统计价格区间配置的边界 b0 < b1 < ... 编码，边界值本身单独一档，
+    这样 min_price >= bi、min_price <= bi 这类按边界筛选的条件在汇总表上也是精确的：
+        -1: 价格为 0     2k: b(k-1) < 价格 < bk     2k+1: 价格 = bk     NULL: 没有价格
+    tb_sales 的 province、price_bucket 字段按同样的规则和同一组边界在写入时填充，重建汇总表时一并重算。
+    """
+
+    # 参与汇总的原始销量字段，顺序即汇总维度顺序（min_price 汇总时换成价格区间）
+    SOURCE_COLUMNS = ("month", "city_full_name", "country", "brand_name", "model_type", "energy_type",
+                      "min_price", "sales")
+    # 重建时每批插入的行数
+    INSERT_BATCH_SIZE = 1000
+    # 重算 tb_sales 省份、价格区间时每批更新的取值数
+    UPDATE_BATCH_SIZE = 500
+
+    @classmethod
+    def load_state(cls) -> Tuple[Optional[List[int]], bool]:
+        """
+        读取汇总表状态
+
+        Returns:
+            Tuple[Optional[List[int]], bool]: 价格区间边界（从未构建过为 None）、是否可用于查询
+        """
+        state = redis_cache.hgetall(StatisticsConstants.SALES_ROLLUP_STATE_KEY)
+        if not state:
+            return None, False
+        boundaries = state.get(b"boundaries", b"").decode()
+        return ([int(x) for x in boundaries.split(',')] if boundaries else []), state.get(b"ready") == b"1"
+
+    @classmethod
+    def save_state(cls, boundaries: List[int], ready: bool) -> None:
+        """
+        保存汇总表状态
+        """
+        redis_cache.hset(StatisticsConstants.SALES_ROLLUP_STATE_KEY, mapping={
+            "boundaries": ",".join(str(x) for x in boundaries),
+            "ready": "1" if ready else "0",
+        })
+
+    @classmethod
+    def covering_boundaries(cls, request: CarStatisticsRequest) -> Optional[List[int]]:
+        """
+        判断查询条件能否由汇总表回答
+
+        Args:
+            request (CarStatisticsRequest): 统计查询条件
+        Returns:
+            Optional[List[int]]: 可以时返回汇总表的价格区间边界，否则返回 None
+        """
+        try:
+            boundaries, ready = cls.load_state()
+        except Exception as e:
+            LogUtil.logger.warning(f"[销量汇总] 读取状态失败，使用原始销量表: {e}")
+            return None
+        if not ready or request.series_id:
+            return None
+        # 价格条件必须落在区间边界上
+        for price in (request.min_price, request.max_price):
+            if price is not None and price not in boundaries:
+                return None
+        return boundaries
+
+    @classmethod
+    def sales_bucket_boundaries(cls, price_range: Sequence[int]) -> Optional[List[int]]:
+        """
+        tb_sales.price_bucket 是否按给定的价格区间计算
+
+        Returns:
+            Optional[List[int]]: 是时返回价格区间边界，否则（未构建、重建中、边界不同）返回 None
+        """
+        try:
+            boundaries, ready = cls.load_state()
+        except Exception as e:
+            LogUtil.logger.warning(f"[销量汇总] 读取状态失败，不使用价格区间字段: {e}")
+            return None
+        if not ready or boundaries != list(price_range or []):
+            return None
+        return boundaries
+
+    @classmethod
+    def fill_derived_columns(cls, items: Sequence[SalesPo]) -> None:
+        """
+        写入销量数据前填充省份、价格区间字段
+        """
+        if not items:
+            return
+        boundaries = cls._fill_boundaries()
+        for item in items:
+            item.province = cls.province_of(item.city_full_name)
+            item.price_bucket = cls.price_bucket(item.min_price, boundaries) if boundaries is not None else None
+
+    @classmethod
+    def fill_derived_values(cls, rows: Sequence[dict]) -> None:
+        """
+        批量写入的行字典填充省份、价格区间字段，同 fill_derived_columns
+        """
+        if not rows:
+            return
+        boundaries = cls._fill_boundaries()
+        for row in rows:
+            row["province"] = cls.province_of(row.get("city_full_name"))
+            row["price_bucket"] = cls.price_bucket(row.get("min_price"), boundaries) \
+                if boundaries is not None else None
+
+    @classmethod
+    def _fill_boundaries(cls) -> Optional[List[int]]:
+        try:
+            boundaries, _ = cls.load_state()
+        except Exception as e:
+            LogUtil.logger.error(f"[销量汇总] 读取状态失败，价格区间未填充，需重新构建: {e}")
+            boundaries = None
+        return boundaries
+
+    @staticmethod
+    def province_of(city_full_name: Optional[str]) -> Optional[str]:
+        """
+        省市 -> 省份，如 '江苏省 苏州市' -> '江苏省'，直辖市等没有空格的取原值
+        """
+        return city_full_name.split(' ')[0] if city_full_name and ' ' in city_full_name else city_full_name
+
+    @staticmethod
+    def price_bucket(price, boundaries: Sequence[int]) -> Optional[int]:
+        """
+        价格 -> 价格区间编码
+        """
+        if price is None:
+            return None
+        if price == 0:
+            return -1
+        index = bisect_left(boundaries, price)
+        if index < len(boundaries) and boundaries[index] == price:
+            return 2 * index + 1
+        return 2 * index
+
+    @staticmethod
+    def bucket_price(bucket: Optional[int], boundaries: Sequence[int]) -> float:
+        """
+        价格区间编码 -> 区间内的代表价格，按同一组边界划分价格区间时与原始价格落在同一区间
+        """
+        if bucket is None or bucket < 0 or not boundaries:
+            return 0.0
+        index, is_boundary = divmod(bucket, 2)
+        if is_boundary:
+            return float(boundaries[index])
+        if index == 0:
+            return boundaries[0] / 2
+        if index >= len(boundaries):
+            return float(boundaries[-1] * 2)
+        return (boundaries[index - 1] + boundaries[index]) / 2
+
+    @classmethod
+    def bucket_range_filter(cls, boundaries: Sequence[int], min_price=None, max_price=None) -> list:
+        """
+        原始销量表上的 min_price >= 最低价、min_price <= 最高价 条件换算到汇总表
+        """
+        conditions = []
+        if min_price is not None:
+            conditions.append(SalesRollupPo.price_bucket >= 2 * boundaries.index(min_price) + 1)
+        if max_price is not None:
+            conditions.append(SalesRollupPo.price_bucket <= 2 * boundaries.index(max_price) + 1)
+        return conditions
+
+    @classmethod
+    def capture(cls, item) -> tuple:
+        """
+        记录一条销量数据参与汇总的字段值，修改前先记录旧值
+
+        Args:
+            item: SalesPo、Sales、批量写入的行字典或查询 SOURCE_COLUMNS 得到的行
+        """
+        if isinstance(item, Mapping):
+            return tuple(item.get(column) for column in cls.SOURCE_COLUMNS)
+        return tuple(getattr(item, column, None) for column in cls.SOURCE_COLUMNS)
+
+    @classmethod
+    def apply_changes(cls, removed: List[tuple], added: List[tuple]) -> None:
+        """
+        按销量数据的变化增量更新汇总表，不提交事务，与销量数据在同一事务中提交
+
+        Args:
+            removed (List[tuple]): 删除（或修改前）的销量数据，capture 的结果
+            added (List[tuple]): 新增（或修改后）的销量数据，capture 的结果
+        """
+        if not removed and not added:
+            return
+        try:
+            boundaries, _ = cls.load_state()
+        except Exception as e:
+            LogUtil.logger.error(f"[销量汇总] 读取状态失败，本次变更未汇总，需重新构建: {e}")
+            return
+        # 从未构建过汇总表，无需维护
+        if boundaries is None:
+            return
+
+        deltas: Dict[tuple, List[int]] = {}
+        for rows, sign in ((removed, -1), (added, 1)):
+            for row in rows:
+                cls._accumulate(deltas, row, boundaries, sign, 1)
+        values = [cls._rollup_values(dims, sales, count)
+                  for dims, (sales, count) in deltas.items() if sales or count]
+        if not values:
+            return
+
+        db.session.execute(cls._upsert_statement(), values)
+        # 对应的销量数据都已删除的汇总行一并删除
+        db.session.execute(
+            delete(SalesRollupPo).where(
+                SalesRollupPo.rollup_key.in_([value["rollup_key"] for value in values]),
+                SalesRollupPo.row_count <= 0
+            )
+        )
+
+    @classmethod
+    def rebuild(cls, boundaries: List[int]) -> int:
+        """
+        按价格区间边界从原始销量表全量重建汇总表，汇总表由数据库迁移创建，重建期间销量写入等待
+
+        Args:
+            boundaries (List[int]): 价格区间边界，升序
+        Returns:
+            int: 汇总行数
+        """
+        # 重建期间不用于查询；之后开始的销量变更按新边界计算增量
+        cls.save_state(boundaries, ready=False)
+        try:
+            cls._lock_sales()
+            cls._fill_sales_columns(boundaries)
+            db.session.execute(delete(SalesRollupPo))
+            stmt = select(
+                SalesPo.month, SalesPo.city_full_name, SalesPo.country, SalesPo.brand_name,
+                SalesPo.model_type, SalesPo.energy_type, SalesPo.min_price,
+                func.sum(SalesPo.sales).label("sales"),
+                func.count().label("row_count")
+            ).group_by(
+                SalesPo.month, SalesPo.city_full_name, SalesPo.country, SalesPo.brand_name,
+                SalesPo.model_type, SalesPo.energy_type, SalesPo.min_price
+            )
+            deltas: Dict[tuple, List[int]] = {}
+            for row in db.session.execute(stmt):
+                cls._accumulate(deltas, cls.capture(row), boundaries, 1, row.row_count)
+            values = [cls._rollup_values(dims, sales, count) for dims, (sales, count) in deltas.items()]
+            for start in range(0, len(values), cls.INSERT_BATCH_SIZE):
+                db.session.execute(insert(SalesRollupPo), values[start:start + cls.INSERT_BATCH_SIZE])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"重建销量汇总出错: {e}")
+            raise
+        cls.save_state(boundaries, ready=True)
+        return len(values)
+
+    @classmethod
+    def _lock_sales(cls) -> None:
+        """
+        在重建事务中锁定原始销量表，直到重建提交，不提交事务
+
+        销量写入先写 tb_sales，再在同一事务中 apply_changes 更新汇总表。锁定后新的写入在写 tb_sales 时等待，
+        已写入未提交的写入先提交后才能取得锁，重建读取的汇总快照因此包含锁定前的全部变更，
+        锁定后的变更在重建提交后才在新的汇总表上累加，两者既不重复也不遗漏
+        """
+        # 结束之前的事务，汇总快照在取得锁之后才建立
+        db.session.commit()
+        db.session.execute(select(func.count(SalesPo.id)).with_for_update()).scalar()
+
+    @classmethod
+    def _fill_sales_columns(cls, boundaries: List[int]) -> None:
+        """
+        按省市、价格的不同取值批量重算 tb_sales 的省份、价格区间，不提交事务
+        """
+        # 按取值批量更新，使用 Core 表对象执行 executemany
+        table = SalesPo.__table__
+        cities = db.session.execute(select(table.c.city_full_name).distinct()).scalars().all()
+        values = [{"b_city": city, "b_province": cls.province_of(city)} for city in cities if city is not None]
+        stmt = update(table).where(table.c.city_full_name == bindparam("b_city")) \
+            .values(province=bindparam("b_province"))
+        for start in range(0, len(values), cls.UPDATE_BATCH_SIZE):
+            db.session.execute(stmt, values[start:start + cls.UPDATE_BATCH_SIZE])
+
+        prices = db.session.execute(select(table.c.min_price).distinct()).scalars().all()
+        values = [{"b_price": price, "b_bucket": cls.price_bucket(price, boundaries)}
+                  for price in prices if price is not None]
+        stmt = update(table).where(table.c.min_price == bindparam("b_price")) \
+            .values(price_bucket=bindparam("b_bucket"))
+        for start in range(0, len(values), cls.UPDATE_BATCH_SIZE):
+            db.session.execute(stmt, values[start:start + cls.UPDATE_BATCH_SIZE])
+
+    @classmethod
+    def _accumulate(cls, deltas: Dict[tuple, List[int]], row: tuple, boundaries: Sequence[int],
+                    sign: int, count: int) -> None:
+        month, city_full_name, country, brand_name, model_type, energy_type, min_price, sales = row
+        dims = (int(month) if month is not None else None, city_full_name, country, brand_name,
+                model_type, energy_type, cls.price_bucket(min_price, boundaries))
+        delta = deltas.setdefault(dims, [0, 0])
+        delta[0] += sign * int(sales or 0)
+        delta[1] += sign * count
+
+    @classmethod
+    def _rollup_values(cls, dims: tuple, sales: int, count: int) -> dict:
+        month, city_full_name, country, brand_name, model_type, energy_type, price_bucket = dims
+        province = cls.province_of(city_full_name)
+        return {
+            "rollup_key": hashlib.sha1(json.dumps(dims, ensure_ascii=False).encode()).hexdigest(),
+            "month": month,
+            "province": province,
+            "city_full_name": city_full_name,
+            "country": country,
+            "brand_name": brand_name,
+            "model_type": model_type,
+            "energy_type": energy_type,
+            "price_bucket": price_bucket,
+            "sales": sales,
+            "row_count": count,
+        }
+
+    @classmethod
+    def _upsert_statement(cls):
+        """
+        汇总行不存在时新增，存在时累加销量和记录数
+        """
+        if db.session.get_bind().dialect.name == "sqlite":
+            stmt = sqlite_insert(SalesRollupPo)
+            return stmt.on_conflict_do_update(
+                index_elements=[SalesRollupPo.rollup_key],
+                set_={
+                    "sales": SalesRollupPo.sales + stmt.excluded.sales,
+                    "row_count": SalesRollupPo.row_count + stmt.excluded.row_count,
+                }
+            )
+        stmt = mysql_insert(SalesRollupPo)
+        return stmt.on_duplicate_key_update(
+            sales=SalesRollupPo.sales + stmt.inserted.sales,
+            row_count=SalesRollupPo.row_count + stmt.inserted.row_count,
+        )
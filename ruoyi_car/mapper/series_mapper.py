@@ -4,7 +4,7 @@
 # @Time    : 2026-01-23 20:21:54
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 from flask import g
 from sqlalchemy import select, delete
@@ -12,11 +12,17 @@ from sqlalchemy import select, delete
 from ruoyi_admin.ext import db
 from ruoyi_car.domain.entity import Series
 from ruoyi_car.domain.po import SeriesPo
+from ruoyi_common.sqlalchemy.bulk import BulkUpsert
 
 
 class SeriesMapper:
     """车系信息Mapper"""
 
+    # 导入时按 series_id 批量新增、更新
+    BULK_UPSERT = BulkUpsert(db.session, SeriesPo, key_columns=("series_id",),
+                             fetch_columns=("create_time", "create_by"),
+                             insert_now=("create_time", "update_time"), update_now=("update_time",))
+
     @classmethod
     def select_series_list(cls, series: Series) -> List[Series]:
         """
@@ -29,50 +35,7 @@ class SeriesMapper:
             List[series]: 车系信息列表
         """
         try:
-            # 构建查询条件
-            stmt = select(SeriesPo)
-
-            if series.id is not None:
-                stmt = stmt.where(SeriesPo.id == series.id)
-
-            if series.country is not None:
-                stmt = stmt.where(SeriesPo.country == series.country)
-
-            if series.brand_name:
-                stmt = stmt.where(SeriesPo.brand_name.like("%" + str(series.brand_name) + "%"))
-
-            if series.series_name:
-                stmt = stmt.where(SeriesPo.series_name.like("%" + str(series.series_name) + "%"))
-
-            if series.series_id is not None:
-                stmt = stmt.where(SeriesPo.series_id == series.series_id)
-
-            if series.model_type is not None:
-                stmt = stmt.where(SeriesPo.model_type == series.model_type)
-
-            if series.energy_type is not None:
-                stmt = stmt.where(SeriesPo.energy_type == series.energy_type)
-
-            _params = getattr(series, "params", {}) or {}
-            print("params: ", _params)
-            begin_val = _params.get("beginMarketTime")
-            end_val = _params.get("endMarketTime")
-            if begin_val is not None:
-                stmt = stmt.where(SeriesPo.market_time >= begin_val)
-            if end_val is not None:
-                stmt = stmt.where(SeriesPo.market_time <= end_val)
-
-            begin_val = _params.get("beginCreateTime")
-            end_val = _params.get("endCreateTime")
-            if begin_val is not None:
-                print("begin_val: ", begin_val)
-                stmt = stmt.where(SeriesPo.create_time >= begin_val)
-            if end_val is not None:
-                stmt = stmt.where(SeriesPo.create_time <= end_val)
-
-            if series.create_by:
-                stmt = stmt.where(SeriesPo.create_by.like("%" + str(series.create_by) + "%"))
-            stmt = stmt.order_by(SeriesPo.city_total_sales.desc())
+            stmt = cls._select_series_list_stmt(series)
             if "criterian_meta" in g and g.criterian_meta.page:
                 g.criterian_meta.page.stmt = stmt
             result = db.session.execute(stmt).scalars().all()
@@ -81,6 +44,74 @@ class SeriesMapper:
             print(f"查询车系信息列表出错: {e}")
             return []
 
+    @classmethod
+    def iter_series_list(cls, series: Series, batch_size: int = 1000) -> Iterator[Series]:
+        """
+        通过服务端游标分批读取车系信息列表，用于流式导出
+
+        Args:
+            series (series): 车系信息对象
+            batch_size (int): 每批读取的行数
+
+        Returns:
+            Iterator[series]: 车系信息迭代器
+        """
+        stmt = cls._select_series_list_stmt(series).execution_options(yield_per=batch_size)
+        # 生成器在首次取数时才打开游标，导出写入前的字典标签查询不会落在未缓冲的游标连接上
+        for item in db.session.execute(stmt).scalars():
+            yield Series.model_validate(item)
+
+    @classmethod
+    def _select_series_list_stmt(cls, series: Series):
+        """
+        构建车系信息列表的查询语句
+        """
+        # 构建查询条件
+        stmt = select(SeriesPo)
+
+        if series.id is not None:
+            stmt = stmt.where(SeriesPo.id == series.id)
+
+        if series.country is not None:
+            stmt = stmt.where(SeriesPo.country == series.country)
+
+        if series.brand_name:
+            stmt = stmt.where(SeriesPo.brand_name.like("%" + str(series.brand_name) + "%"))
+
+        if series.series_name:
+            stmt = stmt.where(SeriesPo.series_name.like("%" + str(series.series_name) + "%"))
+
+        if series.series_id is not None:
+            stmt = stmt.where(SeriesPo.series_id == series.series_id)
+
+        if series.model_type is not None:
+            stmt = stmt.where(SeriesPo.model_type == series.model_type)
+
+        if series.energy_type is not None:
+            stmt = stmt.where(SeriesPo.energy_type == series.energy_type)
+
+        _params = getattr(series, "params", {}) or {}
+        print("params: ", _params)
+        begin_val = _params.get("beginMarketTime")
+        end_val = _params.get("endMarketTime")
+        if begin_val is not None:
+            stmt = stmt.where(SeriesPo.market_time >= begin_val)
+        if end_val is not None:
+            stmt = stmt.where(SeriesPo.market_time <= end_val)
+
+        begin_val = _params.get("beginCreateTime")
+        end_val = _params.get("endCreateTime")
+        if begin_val is not None:
+            print("begin_val: ", begin_val)
+            stmt = stmt.where(SeriesPo.create_time >= begin_val)
+        if end_val is not None:
+            stmt = stmt.where(SeriesPo.create_time <= end_val)
+
+        if series.create_by:
+            stmt = stmt.where(SeriesPo.create_by.like("%" + str(series.create_by) + "%"))
+        stmt = stmt.order_by(SeriesPo.city_total_sales.desc())
+        return stmt
+
     @classmethod
     def select_series_by_id(cls, id: int) -> Optional[Series]:
         """
@@ -3,20 +3,33 @@
 # @FileName: statistics_info_mapper.py
 # @Time    : 2026-01-23 20:21:54
 
-from typing import List, Optional
+from typing import Iterator, List, Optional
 from datetime import datetime
 
 from flask import g
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, or_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from ruoyi_admin.ext import db
 from ruoyi_car.domain.entity import StatisticsInfo
 from ruoyi_car.domain.po import StatisticsInfoPo
+from ruoyi_common.sqlalchemy.bulk import BulkUpsert
 
 
 class StatisticsInfoMapper:
     """统计信息Mapper"""
 
+    # 批量写入时每条语句的行数（缓存内容较大，控制单条语句大小）
+    UPSERT_BATCH_SIZE = 200
+    # 按 Key 前缀查询、按 Key 删除时每条语句的条件数
+    KEY_BATCH_SIZE = 500
+    # 导入时按主键批量新增、更新，新增时由数据库生成主键
+    BULK_UPSERT = BulkUpsert(db.session, StatisticsInfoPo, key_columns=("id",),
+                             insert_columns=[column.name for column in StatisticsInfoPo.__table__.columns
+                                             if column.name != "id"],
+                             insert_now=("create_time",), update_now=("create_time",))
+
     @classmethod
     def select_statistics_info_list(cls, statistics_info: StatisticsInfo) -> List[StatisticsInfo]:
         """
@@ -29,19 +42,7 @@ class StatisticsInfoMapper:
             List[statistics_info]: 统计信息列表
         """
         try:
-            # 构建查询条件
-            stmt = select(StatisticsInfoPo)
-
-            stmt = cls.init_query(statistics_info, stmt)
-
-            _params = getattr(statistics_info, "params", {}) or {}
-            begin_val = _params.get("beginCreateTime")
-            end_val = _params.get("endCreateTime")
-            if begin_val is not None:
-                stmt = stmt.where(StatisticsInfoPo.create_time >= begin_val)
-            if end_val is not None:
-                stmt = stmt.where(StatisticsInfoPo.create_time <= end_val)
-            stmt = stmt.order_by(StatisticsInfoPo.create_time.desc())
+            stmt = cls._select_statistics_info_list_stmt(statistics_info)
             if "criterian_meta" in g and g.criterian_meta.page:
                 g.criterian_meta.page.stmt = stmt
 
@@ -54,6 +55,43 @@ class StatisticsInfoMapper:
             traceback.print_exc()
             return []
 
+    @classmethod
+    def iter_statistics_info_list(cls, statistics_info: StatisticsInfo, batch_size: int = 1000) -> Iterator[StatisticsInfo]:
+        """
+        通过服务端游标分批读取统计信息列表，用于流式导出
+
+        Args:
+            statistics_info (statistics_info): 统计信息对象
+            batch_size (int): 每批读取的行数
+
+        Returns:
+            Iterator[statistics_info]: 统计信息迭代器
+        """
+        stmt = cls._select_statistics_info_list_stmt(statistics_info).execution_options(yield_per=batch_size)
+        # 生成器在首次取数时才打开游标，导出写入前的字典标签查询不会落在未缓冲的游标连接上
+        for item in db.session.execute(stmt).scalars():
+            yield StatisticsInfo.model_validate(item)
+
+    @classmethod
+    def _select_statistics_info_list_stmt(cls, statistics_info: StatisticsInfo):
+        """
+        构建统计信息列表的查询语句
+        """
+        # 构建查询条件
+        stmt = select(StatisticsInfoPo)
+
+        stmt = cls.init_query(statistics_info, stmt)
+
+        _params = getattr(statistics_info, "params", {}) or {}
+        begin_val = _params.get("beginCreateTime")
+        end_val = _params.get("endCreateTime")
+        if begin_val is not None:
+            stmt = stmt.where(StatisticsInfoPo.create_time >= begin_val)
+        if end_val is not None:
+            stmt = stmt.where(StatisticsInfoPo.create_time <= end_val)
+        stmt = stmt.order_by(StatisticsInfoPo.create_time.desc())
+        return stmt
+
     @classmethod
     def init_query(cls, statistics_info, stmt):
         if statistics_info.id is not None:
@@ -101,6 +139,55 @@ class StatisticsInfoMapper:
             traceback.print_exc()
             return []
 
+    @classmethod
+    def select_statistics_keys_by_prefixes(cls, prefixes: List[str]) -> List[str]:
+        """
+        查询以任一前缀开头的统计Key，只查询 Key 列，走 statistics_key 唯一索引的范围扫描
+
+        Args:
+            prefixes (List[str]): Key 前缀列表
+
+        Returns:
+            List[str]: 统计Key列表
+        """
+        keys = []
+        try:
+            for start in range(0, len(prefixes), cls.KEY_BATCH_SIZE):
+                conditions = [StatisticsInfoPo.statistics_key.startswith(prefix, autoescape=True)
+                              for prefix in prefixes[start:start + cls.KEY_BATCH_SIZE]]
+                keys.extend(db.session.execute(select(StatisticsInfoPo.statistics_key).where(or_(*conditions)))
+                            .scalars().all())
+            return list(dict.fromkeys(keys))
+        except Exception as e:
+            print(f"按前缀查询统计Key出错: {e}")
+            return []
+
+    @classmethod
+    def delete_statistics_info_by_keys(cls, statistics_keys: List[str]) -> int:
+        """
+        根据统计Key批量删除统计信息
+
+        Args:
+            statistics_keys (List[str]): 统计Key列表
+
+        Returns:
+            int: 删除的记录数
+        """
+        if not statistics_keys:
+            return 0
+        try:
+            count = 0
+            for start in range(0, len(statistics_keys), cls.KEY_BATCH_SIZE):
+                stmt = delete(StatisticsInfoPo).where(
+                    StatisticsInfoPo.statistics_key.in_(statistics_keys[start:start + cls.KEY_BATCH_SIZE]))
+                count += db.session.execute(stmt).rowcount
+            db.session.commit()
+            return count
+        except Exception as e:
+            db.session.rollback()
+            print(f"根据Key批量删除统计信息出错: {e}")
+            return 0
+
     @classmethod
     def select_statistics_info_by_id(cls, id: int) -> Optional[StatisticsInfo]:
         """
@@ -159,6 +246,7 @@ class StatisticsInfoMapper:
             new_po.common_key = statistics_info.common_key
             new_po.statistics_key = statistics_info.statistics_key
             new_po.content = statistics_info.content
+            new_po.payload = statistics_info.payload
             new_po.extend_content = statistics_info.extend_content
             new_po.remark = statistics_info.remark
             new_po.create_time = statistics_info.create_time or now
@@ -194,6 +282,7 @@ class StatisticsInfoMapper:
             existing.common_key = statistics_info.common_key
             existing.statistics_key = statistics_info.statistics_key
             existing.content = statistics_info.content
+            existing.payload = statistics_info.payload
             existing.extend_content = statistics_info.extend_content
             existing.remark = statistics_info.remark
             existing.create_time = statistics_info.create_time or now
@@ -205,6 +294,64 @@ class StatisticsInfoMapper:
             print(f"修改统计信息出错: {e}")
             return 0
 
+    @classmethod
+    def upsert_statistics_info_batch(cls, statistics_info_list: List[StatisticsInfo]) -> int:
+        """
+        按 statistics_key 批量新增或覆盖统计信息
+        每批一条 INSERT ... ON DUPLICATE KEY UPDATE，全部写完后一次提交
+
+        Args:
+            statistics_info_list (List[StatisticsInfo]): 统计信息列表
+
+        Returns:
+            int: 写入的记录数
+        """
+        if not statistics_info_list:
+            return 0
+        try:
+            now = datetime.now()
+            # 同一批中 Key 重复时以最后一条为准
+            rows = {
+                statistics_info.statistics_key: {
+                    "type": statistics_info.type,
+                    "statistics_name": statistics_info.statistics_name,
+                    "common_key": statistics_info.common_key,
+                    "statistics_key": statistics_info.statistics_key,
+                    "content": statistics_info.content,
+                    "payload": statistics_info.payload,
+                    "extend_content": statistics_info.extend_content,
+                    "remark": statistics_info.remark,
+                    "create_time": statistics_info.create_time or now,
+                }
+                for statistics_info in statistics_info_list
+            }
+            rows = list(rows.values())
+            stmt = cls._upsert_statement()
+            for start in range(0, len(rows), cls.UPSERT_BATCH_SIZE):
+                db.session.execute(stmt, rows[start:start + cls.UPSERT_BATCH_SIZE])
+            db.session.commit()
+            return len(rows)
+        except Exception as e:
+            db.session.rollback()
+            print(f"批量写入统计信息出错: {e}")
+            return 0
+
+    @classmethod
+    def _upsert_statement(cls):
+        """
+        statistics_key 不存在时新增，存在时覆盖（主键不变）
+        """
+        columns = ("type", "statistics_name", "common_key", "content", "payload", "extend_content", "remark",
+                   "create_time")
+        if db.session.get_bind().dialect.name == "sqlite":
+            stmt = sqlite_insert(StatisticsInfoPo)
+            return stmt.on_conflict_do_update(
+                index_elements=[StatisticsInfoPo.statistics_key],
+                set_={column: stmt.excluded[column] for column in columns}
+            )
+        stmt = mysql_insert(StatisticsInfoPo)
+        return stmt.on_duplicate_key_update({column: stmt.inserted[column] for column in columns})
+
     @classmethod
     def delete_statistics_info_by_ids(cls, ids: List[int]) -> int:
         """
@@ -4,11 +4,12 @@ from sqlalchemy import func
 from sqlalchemy.sql import select
 
 from ruoyi_admin.ext import db
-from ruoyi_car.domain.po import ModelPo
+from ruoyi_car.domain.po import ModelPo, SalesRollupPo
 from ruoyi_car.domain.po.sales_po import SalesPo
 from ruoyi_car.domain.statistics.dto import CarStatisticsRequest
 from ruoyi_car.domain.statistics.po.statistics_po import MapStatisticsPo, StatisticsPo, PriceStatisticsPo, \
     SalesPredictPo, SeriesStatisticsPo
+from ruoyi_car.mapper.sales_rollup_mapper import SalesRollupMapper
 
 
 class StatisticsMapper:
@@ -57,6 +58,15 @@ class StatisticsMapper:
         except Exception as e:
             print(f"[SQL日志] {method_name}: <打印失败: {e}>")
 
+    @classmethod
+    def _sales_source(cls, request: CarStatisticsRequest):
+        """
+        统计数据源：查询条件可以被销量汇总表覆盖时查询汇总表，否则查询原始销量表
+        返回: (数据源 Po 类, 汇总表价格区间边界，查询原始销量表时为 None)
+        """
+        boundaries = SalesRollupMapper.covering_boundaries(request)
+        return (SalesRollupPo if boundaries is not None else SalesPo), boundaries
+
     @classmethod
     def select_sales_map_statistics_raw(cls, request: CarStatisticsRequest) -> List[MapStatisticsPo]:
         """
@@ -65,17 +75,18 @@ class StatisticsMapper:
         支持完整的查询条件
         """
         try:
+            source, boundaries = cls._sales_source(request)
             # 按具体城市查询
             stmt = select(
-                func.sum(SalesPo.sales).label("value"),
-                SalesPo.city_full_name.label("name"),
-                SalesPo.month.label("month")
+                func.sum(source.sales).label("value"),
+                source.city_full_name.label("name"),
+                source.month.label("month")
             )
 
             # 应用完整的查询条件
-            stmt = cls.init_query(request, stmt)
+            stmt = cls.init_query(request, stmt, rollup_boundaries=boundaries)
             # 按城市和月份分组
-            stmt = stmt.group_by(SalesPo.city_full_name, SalesPo.month)
+            stmt = stmt.group_by(source.city_full_name, source.month)
 
             # 打印 SQL 日志
             cls._print_sql_log(stmt, "select_sales_map_statistics_raw")
@@ -109,21 +120,29 @@ class StatisticsMapper:
             return []
 
     @classmethod
-    def select_price_sales_statistics(cls, request) -> List[PriceStatisticsPo]:
+    def select_price_sales_statistics(cls, request, price_range: List[int] = None) -> List[PriceStatisticsPo]:
         """
         价格销售信息数据分析（按月，包含城市）
         select sum(sales) as value, min_price as price, city_full_name as city, month as month
         from tb_sales
         group by city, price, month;
+        传入的价格区间与汇总表一致时查询汇总表，price 为所在价格区间的代表价格；
+        不能使用汇总表时，tb_sales.price_bucket 按同一价格区间计算的，按价格区间分组，price 同样为代表价格
         """
         try:
+            source, boundaries = cls._sales_source(request)
+            rollup_boundaries = boundaries
+            if boundaries is not None and list(price_range or []) != boundaries:
+                source, boundaries, rollup_boundaries = SalesPo, None, None
+            if boundaries is None:
+                boundaries = SalesRollupMapper.sales_bucket_boundaries(price_range)
             stmt = select(
-                func.sum(SalesPo.sales).label("value"),
-                SalesPo.min_price.label("price"),
-                SalesPo.city_full_name.label("address"),
-                SalesPo.month.label("month")
+                func.sum(source.sales).label("value"),
+                (source.price_bucket if boundaries is not None else source.min_price).label("price"),
+                source.city_full_name.label("address"),
+                source.month.label("month")
             )
-            stmt = cls.init_query(request, stmt)
+            stmt = cls.init_query(request, stmt, rollup_boundaries=rollup_boundaries)
             stmt = stmt.group_by("address", "price", "month")
 
             # 打印 SQL 日志
@@ -137,7 +156,8 @@ class StatisticsMapper:
             return [
                 PriceStatisticsPo(
                     address=str(item['address']) if item['address'] else '',
-                    price=float(item['price']) if item['price'] else 0.0,
+                    price=SalesRollupMapper.bucket_price(item['price'], boundaries) if boundaries is not None
+                    else float(item['price']) if item['price'] else 0.0,
                     value=int(item['value']) if item['value'] else 0,
                     month=int(item['month']) if item['month'] else 0
                 )
@@ -157,13 +177,14 @@ class StatisticsMapper:
         group by name, city,month;
         """
         try:
+            source, boundaries = cls._sales_source(request)
             stmt = select(
-                func.sum(SalesPo.sales).label("value"),
-                SalesPo.energy_type.label("name"),
-                SalesPo.month.label("month"),
-                SalesPo.city_full_name.label("address")
+                func.sum(source.sales).label("value"),
+                source.energy_type.label("name"),
+                source.month.label("month"),
+                source.city_full_name.label("address")
             )
-            stmt = cls.init_query(request, stmt)
+            stmt = cls.init_query(request, stmt, rollup_boundaries=boundaries)
             stmt = stmt.group_by("name", "address", "month")
 
             # 打印 SQL 日志
@@ -195,13 +216,14 @@ class StatisticsMapper:
         group by name, city,month;
         """
         try:
+            source, boundaries = cls._sales_source(request)
             stmt = select(
-                func.sum(SalesPo.sales).label("value"),
-                SalesPo.brand_name.label("name"),
-                SalesPo.month.label("month"),
-                SalesPo.city_full_name.label("address")
+                func.sum(source.sales).label("value"),
+                source.brand_name.label("name"),
+                source.month.label("month"),
+                source.city_full_name.label("address")
             )
-            stmt = cls.init_query(request, stmt)
+            stmt = cls.init_query(request, stmt, rollup_boundaries=boundaries)
             stmt = stmt.group_by("name", "address", "month")
 
             # 打印 SQL 日志
@@ -233,13 +255,14 @@ class StatisticsMapper:
         group by name, city,month;
         """
         try:
+            source, boundaries = cls._sales_source(request)
             stmt = select(
-                func.sum(SalesPo.sales).label("value"),
-                SalesPo.country.label("name"),
-                SalesPo.month.label("month"),
-                SalesPo.city_full_name.label("address")
+                func.sum(source.sales).label("value"),
+                source.country.label("name"),
+                source.month.label("month"),
+                source.city_full_name.label("address")
             )
-            stmt = cls.init_query(request, stmt)
+            stmt = cls.init_query(request, stmt, rollup_boundaries=boundaries)
             stmt = stmt.group_by("name", "address", "month")
 
             # 打印 SQL 日志
@@ -271,13 +294,14 @@ class StatisticsMapper:
         group by name, city,month;
         """
         try:
+            source, boundaries = cls._sales_source(request)
             stmt = select(
-                func.sum(SalesPo.sales).label("value"),
-                SalesPo.model_type.label("name"),
-                SalesPo.month.label("month"),
-                SalesPo.city_full_name.label("address")
+                func.sum(source.sales).label("value"),
+                source.model_type.label("name"),
+                source.month.label("month"),
+                source.city_full_name.label("address")
             )
-            stmt = cls.init_query(request, stmt)
+            stmt = cls.init_query(request, stmt, rollup_boundaries=boundaries)
             stmt = stmt.group_by("name", "address", "month")
 
             # 打印 SQL 日志
@@ -340,23 +364,22 @@ class StatisticsMapper:
     @classmethod
     def sales_predict_statistics(cls, request: CarStatisticsRequest) -> List[SalesPredictPo]:
         """
-        查询到每个月的销量，每个城市，这个查询不会因为查询时间范围
-        SELECT avg(tb_sales.sales)     AS avg_sales,
-               max(tb_sales.sales)     AS max_sales,
-               min(tb_sales.sales)     AS min_sales,
-               tb_sales.city_full_name AS address,
+        查询到每个月的销量，每个省份，这个查询不会因为查询时间范围
+        SELECT sum(tb_sales.sales)     AS value,
+               tb_sales.province       AS address,
                tb_sales.month          AS month
         FROM tb_sales
         WHERE tb_sales.brand_name = '比亚迪'
         GROUP BY address, month
         """
         try:
+            source, boundaries = cls._sales_source(request)
             stmt = select(
-                func.sum(SalesPo.sales).label("value"),
-                SalesPo.city_full_name.label("address"),
-                SalesPo.month.label("month")
+                func.sum(source.sales).label("value"),
+                source.province.label("address"),
+                source.month.label("month")
             )
-            stmt = cls.init_query(request, stmt, query_month=False)
+            stmt = cls.init_query(request, stmt, query_month=False, rollup_boundaries=boundaries)
             stmt = stmt.group_by("address", "month")
             result = db.session.execute(stmt).mappings().all()
             if not result:
@@ -431,40 +454,56 @@ class StatisticsMapper:
             print(f"百公里加速信息查询出错: {e}")
 
     @classmethod
-    def init_query(cls, request: CarStatisticsRequest, stmt, query_month=True):
+    def init_query(cls, request: CarStatisticsRequest, stmt, query_month=True, rollup_boundaries=None):
         """
         初始化查询条件
         支持所有查询参数：时间、国家、品牌、系列、车型、能源类型、价格、城市
+        rollup_boundaries 不为 None 时条件作用在销量汇总表上（不含车系条件，见 SalesRollupMapper）
         """
+        source = SalesRollupPo if rollup_boundaries is not None else SalesPo
         # 开始时间
         if query_month and request.start_time:
-            stmt = stmt.where(SalesPo.month >= request.start_time)
+            stmt = stmt.where(source.month >= request.start_time)
         # 结束时间
         if query_month and request.end_time:
-            stmt = stmt.where(SalesPo.month <= request.end_time)
+            stmt = stmt.where(source.month <= request.end_time)
         # 国家
         if request.country:
-            stmt = stmt.where(SalesPo.country == request.country)
+            stmt = stmt.where(source.country == request.country)
         # 品牌名
         if request.brand_name:
-            stmt = stmt.where(SalesPo.brand_name == request.brand_name)
+            stmt = stmt.where(source.brand_name == request.brand_name)
         # 系列名称
         if request.series_id:
             stmt = stmt.where(SalesPo.series_id == request.series_id)
         # 车型
         if request.model_type:
-            stmt = stmt.where(SalesPo.model_type == request.model_type)
+            stmt = stmt.where(source.model_type == request.model_type)
         # 能源类型
         if request.energy_type:
-            stmt = stmt.where(SalesPo.energy_type == request.energy_type)
-        # 最高价格（车辆最低价 <= 请求最高价）
-        if request.max_price is not None:
-            stmt = stmt.where(SalesPo.min_price <= request.max_price)
-        # 最低价格（车辆最高价 >= 请求最低价）
-        if request.min_price is not None:
-            stmt = stmt.where(SalesPo.min_price >= request.min_price)
-        # 城市
+            stmt = stmt.where(source.energy_type == request.energy_type)
+        if rollup_boundaries is not None:
+            # 价格条件换算为价格区间条件
+            stmt = stmt.where(*SalesRollupMapper.bucket_range_filter(
+                rollup_boundaries, request.min_price, request.max_price))
+        else:
+            # 最高价格（车辆最低价 <= 请求最高价）
+            if request.max_price is not None:
+                stmt = stmt.where(SalesPo.min_price <= request.max_price)
+            # 最低价格（车辆最高价 >= 请求最低价）
+            if request.min_price is not None:
+                stmt = stmt.where(SalesPo.min_price >= request.min_price)
+        # 省份或城市，按索引字段精确匹配
         if request.address:
-            stmt = stmt.where(SalesPo.city_full_name.contains(request.address))
+            stmt = stmt.where(cls.address_filter(source, request.address))
 
         return stmt
+
+    @classmethod
+    def address_filter(cls, source, address: str):
+        """
+        地址条件：'江苏省' 按省份匹配，'江苏省 苏州市' 按省市匹配
+        """
+        if ' ' in address:
+            return source.city_full_name == address
+        return source.province == address
@@ -3,20 +3,26 @@
 # @FileName: view_mapper.py
 # @Time    : 2026-01-23 20:21:53
 
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 from datetime import datetime, date
 
 from flask import g
-from sqlalchemy import select, update, delete, and_
+from sqlalchemy import select, update, delete, and_, func
 
 from ruoyi_admin.ext import db
 from ruoyi_car.domain.entity import View
 from ruoyi_car.domain.po import ViewPo
+from ruoyi_common.sqlalchemy.bulk import BulkUpsert
 
 
 class ViewMapper:
     """用户浏览Mapper"""
 
+    # 导入时按主键批量新增、更新
+    # 导入时读取已存在记录的用户，修改了用户的记录导入后两个用户的画像都需要重建
+    BULK_UPSERT = BulkUpsert(db.session, ViewPo, key_columns=("id",), fetch_columns=("user_id",),
+                             insert_now=("create_time",))
+
     @classmethod
     def select_view_list(cls, view: View) -> List[View]:
         """
@@ -29,44 +35,7 @@ class ViewMapper:
             List[view]: 用户浏览列表
         """
         try:
-            # 构建查询条件
-            stmt = select(ViewPo)
-
-            if view.id is not None:
-                stmt = stmt.where(ViewPo.id == view.id)
-
-            if view.user_id is not None:
-                stmt = stmt.where(ViewPo.user_id == view.user_id)
-
-            if view.user_name:
-                stmt = stmt.where(ViewPo.user_name.like("%" + str(view.user_name) + "%"))
-
-            if view.country is not None:
-                stmt = stmt.where(ViewPo.country == view.country)
-
-            if view.brand_name:
-                stmt = stmt.where(ViewPo.brand_name.like("%" + str(view.brand_name) + "%"))
-
-            if view.model_type is not None:
-                stmt = stmt.where(ViewPo.model_type == view.model_type)
-
-            if view.energy_type is not None:
-                stmt = stmt.where(ViewPo.energy_type == view.energy_type)
-
-            _params = getattr(view, "params", {}) or {}
-            begin_val = _params.get("beginCreateTime")
-            end_val = _params.get("endCreateTime")
-            if begin_val is not None:
-                stmt = stmt.where(ViewPo.create_time >= begin_val)
-            if end_val is not None:
-                stmt = stmt.where(ViewPo.create_time <= end_val)
-            # 应用数据范围过滤（如果 DataScope 设置了有效的过滤条件）
-            if ("criterian_meta" in g and
-                    g.criterian_meta.scope is not None and
-                    g.criterian_meta.scope != [] and
-                    g.criterian_meta.scope != ()):
-                stmt = stmt.where(g.criterian_meta.scope)
-            stmt=stmt.order_by(ViewPo.create_time.desc())
+            stmt = cls._select_view_list_stmt(view)
             if "criterian_meta" in g and g.criterian_meta.page:
                 g.criterian_meta.page.stmt = stmt
             result = db.session.execute(stmt).scalars().all()
@@ -75,6 +44,68 @@ class ViewMapper:
             print(f"查询用户浏览列表出错: {e}")
             return []
 
+    @classmethod
+    def iter_view_list(cls, view: View, batch_size: int = 1000) -> Iterator[View]:
+        """
+        通过服务端游标分批读取用户浏览列表，用于流式导出
+
+        Args:
+            view (view): 用户浏览对象
+            batch_size (int): 每批读取的行数
+
+        Returns:
+            Iterator[view]: 用户浏览迭代器
+        """
+        stmt = cls._select_view_list_stmt(view).execution_options(yield_per=batch_size)
+        # 生成器在首次取数时才打开游标，导出写入前的字典标签查询不会落在未缓冲的游标连接上
+        for item in db.session.execute(stmt).scalars():
+            yield View.model_validate(item)
+
+    @classmethod
+    def _select_view_list_stmt(cls, view: View):
+        """
+        构建用户浏览列表的查询语句
+        """
+        # 构建查询条件
+        stmt = select(ViewPo)
+
+        if view.id is not None:
+            stmt = stmt.where(ViewPo.id == view.id)
+
+        if view.user_id is not None:
+            stmt = stmt.where(ViewPo.user_id == view.user_id)
+
+        if view.user_name:
+            stmt = stmt.where(ViewPo.user_name.like("%" + str(view.user_name) + "%"))
+
+        if view.country is not None:
+            stmt = stmt.where(ViewPo.country == view.country)
+
+        if view.brand_name:
+            stmt = stmt.where(ViewPo.brand_name.like("%" + str(view.brand_name) + "%"))
+
+        if view.model_type is not None:
+            stmt = stmt.where(ViewPo.model_type == view.model_type)
+
+        if view.energy_type is not None:
+            stmt = stmt.where(ViewPo.energy_type == view.energy_type)
+
+        _params = getattr(view, "params", {}) or {}
+        begin_val = _params.get("beginCreateTime")
+        end_val = _params.get("endCreateTime")
+        if begin_val is not None:
+            stmt = stmt.where(ViewPo.create_time >= begin_val)
+        if end_val is not None:
+            stmt = stmt.where(ViewPo.create_time <= end_val)
+        # 应用数据范围过滤（如果 DataScope 设置了有效的过滤条件）
+        if ("criterian_meta" in g and
+                g.criterian_meta.scope is not None and
+                g.criterian_meta.scope != [] and
+                g.criterian_meta.scope != ()):
+            stmt = stmt.where(g.criterian_meta.scope)
+        stmt=stmt.order_by(ViewPo.create_time.desc())
+        return stmt
+
     @classmethod
     def select_view_by_id(cls, id: int) -> Optional[View]:
         """
@@ -283,3 +314,109 @@ class ViewMapper:
         except Exception as e:
             print(f"获取用户最新浏览记录出错: {e}")
             return []
+
+    @classmethod
+    def select_user_view_by_offset_new(cls, user_id, offset) -> Optional[View]:
+        """
+        根据用户ID按时间倒序获取第 offset 条（从0开始）浏览记录，排序与 select_user_views_by_user_num_new 一致
+
+        Args:
+            user_id (int): 用户ID
+            offset (int): 偏移量
+
+        Returns:
+            Optional[View]: 用户浏览记录，不存在时返回 None
+        """
+        try:
+            stmt = select(ViewPo).where(
+                ViewPo.user_id == user_id
+            ).order_by(ViewPo.create_time.desc()).offset(offset).limit(1)
+            result = db.session.execute(stmt).scalars().first()
+            return View.model_validate(result) if result else None
+        except Exception as e:
+            print(f"获取用户指定位置浏览记录出错: {e}")
+            raise
+
+    @classmethod
+    def select_user_ids_by_ids(cls, ids: List[int]) -> List[int]:
+        """
+        查询指定浏览记录涉及的用户
+
+        Args:
+            ids (List[int]): ID列表
+
+        Returns:
+            List[int]: 用户ID列表
+        """
+        if not ids:
+            return []
+        try:
+            stmt = select(ViewPo.user_id).where(ViewPo.id.in_(ids)).distinct()
+            return [row[0] for row in db.session.execute(stmt).all() if row[0] is not None]
+        except Exception as e:
+            print(f"查询浏览记录用户出错: {e}")
+            return []
+
+    @classmethod
+    def select_max_view_id(cls) -> int:
+        """
+        查询当前最大的浏览记录ID
+
+        Returns:
+            int: 最大ID，没有记录时返回0
+        """
+        try:
+            return db.session.execute(select(func.max(ViewPo.id))).scalar() or 0
+        except Exception as e:
+            print(f"查询最大浏览记录ID出错: {e}")
+            raise
+
+    @classmethod
+    def select_user_ids_by_id_range(cls, min_id: int, max_id: int) -> List[int]:
+        """
+        查询ID在 (min_id, max_id] 区间内的浏览记录涉及的用户
+
+        Args:
+            min_id (int): 起始ID（不包含）
+            max_id (int): 结束ID（包含）
+
+        Returns:
+            List[int]: 用户ID列表
+        """
+        try:
+            stmt = select(ViewPo.user_id).where(
+                and_(
+                    ViewPo.id > min_id,
+                    ViewPo.id <= max_id
+                )
+            ).distinct()
+            return [row[0] for row in db.session.execute(stmt).all()]
+        except Exception as e:
+            print(f"查询区间内浏览用户出错: {e}")
+            raise
+
+    @classmethod
+    def select_interactions_by_user_ids(cls, user_ids: List[int], max_id: int) -> List[Tuple]:
+        """
+        查询指定用户ID不超过 max_id 的浏览记录，只返回计算共现需要的字段
+
+        Args:
+            user_ids (List[int]): 用户ID列表
+            max_id (int): 最大ID（包含）
+
+        Returns:
+            List[Tuple]: (ID, 用户ID, 车系ID, 分数, 创建时间) 列表
+        """
+        if not user_ids:
+            return []
+        try:
+            stmt = select(ViewPo.id, ViewPo.user_id, ViewPo.series_id, ViewPo.score, ViewPo.create_time).where(
+                and_(
+                    ViewPo.user_id.in_(user_ids),
+                    ViewPo.id <= max_id
+                )
+            ).order_by(ViewPo.id)
+            return [tuple(row) for row in db.session.execute(stmt).all()]
+        except Exception as e:
+            print(f"批量查询用户浏览记录出错: {e}")
+            raise
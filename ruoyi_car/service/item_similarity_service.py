@@ -0,0 +1,423 @@
+# -*- coding: utf-8 -*-
+# @Author  : YY
+# @FileName: item_similarity_service.py
+# @Time    : 2026-02-14 09:52:36
+
+import io
+import json
+import math
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ruoyi_admin.ext import redis_cache
+from ruoyi_car.mapper.like_mapper import LikeMapper
+from ruoyi_car.mapper.view_mapper import ViewMapper
+from ruoyi_car.service.recommend_config import RecommendConfig
+from ruoyi_common.constant import RecommendConstants
+from ruoyi_common.utils.base import LogUtil
+from ruoyi_framework.descriptor import RedisBuildLock
+
+
+class CooccurrenceMatrix:
+    """
+    车系共现稀疏矩阵
+
+    只保存上三角（车系下标 i < j），键为 i * PAIR_BASE + j，同时记录共现权重与共现用户数；
+    对角线（各车系权重的平方和）单独保存，用于计算余弦相似度。
+    写入先进入缓冲区，缓冲区过大或计算近邻前再统一合并。
+    """
+
+    PAIR_BASE = 1 << 31
+    # 缓冲区车系对数量超过该值时合并
+    COMPACT_SIZE = 5_000_000
+
+    def __init__(self, series_ids: List[int] = None, keys: np.ndarray = None, values: np.ndarray = None,
+                 counts: np.ndarray = None, norms: np.ndarray = None):
+        # 下标 -> 车系ID，新车系追加到末尾，已有下标不变
+        self.series_ids: List[int] = list(series_ids) if series_ids is not None else []
+        self.index: Dict[int, int] = {series_id: i for i, series_id in enumerate(self.series_ids)}
+        self.keys = keys if keys is not None else np.zeros(0, dtype=np.int64)
+        self.values = values if values is not None else np.zeros(0, dtype=np.float64)
+        self.counts = counts if counts is not None else np.zeros(0, dtype=np.int64)
+        self.norms = norms if norms is not None else np.zeros(0, dtype=np.float64)
+        self._pending: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._pending_size = 0
+
+    def _series_index(self, series_id: int) -> int:
+        index = self.index.get(series_id)
+        if index is None:
+            index = len(self.series_ids)
+            self.series_ids.append(series_id)
+            self.index[series_id] = index
+        return index
+
+    def add_vector(self, vector: Dict[int, float], sign: int) -> None:
+        """
+        累加（sign=1）或扣除（sign=-1）一个用户车系向量的外积
+
+        Args:
+            vector (Dict[int, float]): 车系ID -> 权重
+            sign (int): 1 累加，-1 扣除
+        """
+        if not vector:
+            return
+        indexes = np.array([self._series_index(series_id) for series_id in vector], dtype=np.int64)
+        weights = np.array(list(vector.values()), dtype=np.float64)
+        order = np.argsort(indexes)
+        indexes, weights = indexes[order], weights[order]
+        if len(self.norms) < len(self.series_ids):
+            self.norms = np.concatenate([self.norms, np.zeros(len(self.series_ids) - len(self.norms))])
+        self.norms[indexes] += sign * weights * weights
+        if len(indexes) < 2:
+            return
+        left, right = np.triu_indices(len(indexes), 1)
+        self._pending.append((
+            indexes[left] * self.PAIR_BASE + indexes[right],
+            sign * weights[left] * weights[right],
+            np.full(len(left), sign, dtype=np.int64),
+        ))
+        self._pending_size += len(left)
+        if self._pending_size >= self.COMPACT_SIZE:
+            self.compact()
+
+    def compact(self) -> None:
+        """
+        把缓冲区合并到矩阵，共现用户数减到 0 的车系对直接移除
+        """
+        if not self._pending:
+            return
+        keys = np.concatenate([self.keys] + [item[0] for item in self._pending])
+        values = np.concatenate([self.values] + [item[1] for item in self._pending])
+        counts = np.concatenate([self.counts] + [item[2] for item in self._pending])
+        self._pending = []
+        self._pending_size = 0
+        keys, inverse = np.unique(keys, return_inverse=True)
+        values = np.bincount(inverse, weights=values, minlength=len(keys))
+        counts = np.rint(np.bincount(inverse, weights=counts, minlength=len(keys))).astype(np.int64)
+        keep = counts > 0
+        self.keys, self.values, self.counts = keys[keep], values[keep], counts[keep]
+
+    def top_neighbors(self, neighbor_num: int, min_co_users: int) -> Dict[int, List[Tuple[int, float]]]:
+        """
+        计算每个车系余弦相似度最高的前 neighbor_num 个车系
+
+        Args:
+            neighbor_num (int): 近邻数
+            min_co_users (int): 最少共现用户数
+        Returns:
+            Dict[int, List[Tuple[int, float]]]: 车系ID -> [(近邻车系ID, 相似度)]，按相似度降序
+        """
+        self.compact()
+        keep = self.counts >= min_co_users
+        keys, values = self.keys[keep], self.values[keep]
+        left, right = keys // self.PAIR_BASE, keys % self.PAIR_BASE
+        norms = np.maximum(self.norms, 0.0)
+        denominator = np.sqrt(norms[left] * norms[right])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            similarity = np.where(denominator > 0, values / denominator, 0.0)
+        valid = similarity > 0
+        left, right, similarity = left[valid], right[valid], np.minimum(similarity[valid], 1.0)
+
+        # 每个车系对在两端各出现一次，按 (车系, 相似度降序, 近邻下标) 排序后取每组前 N 个
+        rows = np.concatenate([left, right])
+        columns = np.concatenate([right, left])
+        similarity = np.concatenate([similarity, similarity])
+        order = np.lexsort((columns, -similarity, rows))
+        rows, columns, similarity = rows[order], columns[order], similarity[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows, side='left')
+        keep = rank < neighbor_num
+
+        series_ids = np.array(self.series_ids, dtype=np.int64)
+        neighbors: Dict[int, List[Tuple[int, float]]] = defaultdict(list)
+        for series_id, neighbor_id, score in zip(series_ids[rows[keep]].tolist(),
+                                                 series_ids[columns[keep]].tolist(),
+                                                 similarity[keep].tolist()):
+            neighbors[series_id].append((neighbor_id, round(score, 6)))
+        return dict(neighbors)
+
+    def to_bytes(self) -> bytes:
+        self.compact()
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, series_ids=np.array(self.series_ids, dtype=np.int64), keys=self.keys,
+                            values=self.values, counts=self.counts, norms=self.norms)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CooccurrenceMatrix":
+        with np.load(io.BytesIO(data)) as arrays:
+            return cls(arrays["series_ids"].tolist(), arrays["keys"], arrays["values"],
+                       arrays["counts"], arrays["norms"])
+
+
+class ItemSimilarityService:
+    """
+    车系共现（物品协同过滤）服务
+
+    同一用户浏览、点赞过的车系两两共现，共现权重为两个车系在该用户下权重的乘积，车系相似度为余弦相似度。
+    用户对车系的权重 = 操作分数 * decay^(锚点日 - 操作日)，与偏好画像一样按锚点日期保存：
+    所有用户向量按相同比例衰减，余弦相似度不随日期变化，因此可以增量维护——每次只处理上次计算后
+    有新浏览、点赞的用户，扣除其旧向量的外积并累加新向量的外积。历史记录按用户分批读取。
+
+    每个车系只保存前 M 个近邻；推荐时按用户画像中近期车系的近邻加权得到协同过滤分数，
+    乘以融合权重后与属性相似度相加。删除的浏览、点赞记录不会被增量发现，在下次全量重建时生效。
+    """
+
+    # 每批读取的用户数
+    USER_BATCH_SIZE = 1000
+    # 每个车系保存的近邻数
+    NEIGHBOR_NUM = 50
+    # 每个用户参与共现的车系数上限，按权重取前 N 个，避免重度用户产生过多车系对
+    MAX_USER_SERIES = 200
+    # 至少被这么多用户共同浏览、点赞过的车系对才计算相似度
+    MIN_CO_USERS = 2
+    # 推荐时使用用户画像中权重最高的车系数
+    PROFILE_SERIES_NUM = 50
+    # 锚点放大倍数（外积后为平方）的自然对数上限，超过后全量重建
+    MAX_ANCHOR_EXPONENT = 50.0
+    # 任务锁过期时间
+    LOCK_EXPIRE_SECONDS = 2 * 60 * 60
+
+    STATE_ANCHOR = "anchor"
+    STATE_SIGNATURE = "signature"
+    STATE_VIEW_ID = "view_id"
+    STATE_LIKE_ID = "like_id"
+    STATE_MATRIX = "matrix"
+    STATE_UPDATED = "updated"
+
+    @classmethod
+    def refresh(cls, full_rebuild: bool = False) -> Dict:
+        """
+        增量更新车系共现矩阵与近邻
+
+        Args:
+            full_rebuild (bool): 是否丢弃已有状态全量重建
+        Returns:
+            Dict: 执行结果统计
+        """
+        # 锁的值为本次随机 token，执行超过锁过期时间后不会删除其他任务重新获取的锁
+        lock = RedisBuildLock(redis_cache, RecommendConstants.CF_LOCK_KEY, cls.LOCK_EXPIRE_SECONDS)
+        if not lock.acquire():
+            LogUtil.logger.warning("[车系共现] 已有任务在执行，本次跳过")
+            return {"skipped": True}
+        try:
+            return cls._refresh(full_rebuild)
+        finally:
+            lock.release()
+
+    @classmethod
+    def _refresh(cls, full_rebuild: bool) -> Dict:
+        start_time = time.time()
+        config = RecommendConfig.get()
+        # 衰减因子不合法时不做时间衰减
+        decay = config.time_decay_factor if config.time_decay_factor > 0 else 1.0
+        today = datetime.now().toordinal()
+        signature = cls._signature(config)
+
+        state = None if full_rebuild else cls._load_state()
+        if state is not None and state[cls.STATE_SIGNATURE] != signature:
+            LogUtil.logger.info("[车系共现] 衰减因子或操作分数已变更，全量重建")
+            state = None
+        if state is not None and 2 * (today - state[cls.STATE_ANCHOR]) * -math.log(decay) > cls.MAX_ANCHOR_EXPONENT:
+            LogUtil.logger.info("[车系共现] 锚点日期过早，全量重建")
+            state = None
+        if state is None:
+            full_rebuild = True
+            matrix = CooccurrenceMatrix()
+            anchor, view_watermark, like_watermark = today, 0, 0
+        else:
+            matrix = state[cls.STATE_MATRIX]
+            anchor = state[cls.STATE_ANCHOR]
+            view_watermark, like_watermark = state[cls.STATE_VIEW_ID], state[cls.STATE_LIKE_ID]
+
+        # 先确定本次处理的ID上限，计算期间新写入的记录留给下次
+        max_view_id = max(ViewMapper.select_max_view_id(), view_watermark)
+        max_like_id = max(LikeMapper.select_max_like_id(), like_watermark)
+        user_ids = sorted(set(ViewMapper.select_user_ids_by_id_range(view_watermark, max_view_id))
+                          | set(LikeMapper.select_user_ids_by_id_range(like_watermark, max_like_id)))
+        LogUtil.logger.info(f"[车系共现] {'全量' if full_rebuild else '增量'}计算，用户数={len(user_ids)}")
+
+        record_count = 0
+        for offset in range(0, len(user_ids), cls.USER_BATCH_SIZE):
+            batch_user_ids = user_ids[offset:offset + cls.USER_BATCH_SIZE]
+            old_records: Dict[int, List[Tuple[int, float]]] = defaultdict(list)
+            new_records: Dict[int, List[Tuple[int, float]]] = defaultdict(list)
+            for records, watermark, default_score in (
+                    (ViewMapper.select_interactions_by_user_ids(batch_user_ids, max_view_id),
+                     view_watermark, config.view_score),
+                    (LikeMapper.select_interactions_by_user_ids(batch_user_ids, max_like_id),
+                     like_watermark, config.like_score)):
+                record_count += len(records)
+                for record_id, user_id, series_id, score, create_time in records:
+                    if series_id is None:
+                        continue
+                    event_day = create_time.toordinal() if create_time else today
+                    weight = float(score or default_score) * math.pow(decay, anchor - event_day)
+                    new_records[user_id].append((series_id, weight))
+                    if record_id <= watermark:
+                        old_records[user_id].append((series_id, weight))
+            for user_id in batch_user_ids:
+                old_vector = cls._user_vector(old_records.get(user_id))
+                new_vector = cls._user_vector(new_records.get(user_id))
+                if old_vector != new_vector:
+                    matrix.add_vector(old_vector, -1)
+                    matrix.add_vector(new_vector, 1)
+
+        neighbors = matrix.top_neighbors(cls.NEIGHBOR_NUM, cls.MIN_CO_USERS)
+        cls._save_neighbors(neighbors)
+        cls._save_state(matrix, anchor, signature, max_view_id, max_like_id)
+
+        elapsed = round(time.time() - start_time, 2)
+        LogUtil.logger.info(f"[车系共现] 完成，用户数={len(user_ids)}，记录数={record_count}，"
+                            f"车系对={len(matrix.keys)}，有近邻的车系={len(neighbors)}，耗时={elapsed}s")
+        return {"full": full_rebuild, "users": len(user_ids), "records": record_count,
+                "pairs": len(matrix.keys), "series": len(neighbors), "elapsed": elapsed}
+
+    @classmethod
+    def _user_vector(cls, records: Optional[List[Tuple[int, float]]]) -> Dict[int, float]:
+        """
+        汇总用户对各车系的权重，只保留权重最高的 MAX_USER_SERIES 个车系
+        """
+        if not records:
+            return {}
+        vector: Dict[int, float] = defaultdict(float)
+        for series_id, weight in records:
+            vector[series_id] += weight
+        items = sorted(((series_id, weight) for series_id, weight in vector.items() if weight > 0),
+                       key=lambda item: (-item[1], item[0]))
+        return dict(items[:cls.MAX_USER_SERIES])
+
+    @classmethod
+    def get_neighbors(cls, series_ids: List[int]) -> Dict[int, List[Tuple[int, float]]]:
+        """
+        批量读取车系近邻
+
+        Args:
+            series_ids (List[int]): 车系ID列表
+        Returns:
+            Dict[int, List[Tuple[int, float]]]: 车系ID -> [(近邻车系ID, 相似度)]
+        """
+        if not series_ids:
+            return {}
+        values = redis_cache.hmget(RecommendConstants.CF_NEIGHBOR_KEY, [str(series_id) for series_id in series_ids])
+        return {
+            series_id: [(int(neighbor_id), float(score)) for neighbor_id, score in json.loads(value)]
+            for series_id, value in zip(series_ids, values) if value is not None
+        }
+
+    @classmethod
+    def user_series_weights(cls, user_preference: Dict[str, Dict[str, float]]) -> Dict[int, float]:
+        """
+        取用户画像中权重最高的车系
+
+        Args:
+            user_preference (Dict[str, Dict[str, float]]): 用户偏好
+        Returns:
+            Dict[int, float]: 车系ID -> 权重
+        """
+        series_preference = user_preference.get("series") or {}
+        items = sorted(((int(series_id), weight) for series_id, weight in series_preference.items() if weight > 0),
+                       key=lambda item: (-item[1], item[0]))
+        return dict(items[:cls.PROFILE_SERIES_NUM])
+
+    @classmethod
+    def blend_scores(cls, series_weights: Dict[int, float], neighbors: Dict[int, List[Tuple[int, float]]],
+                     cf_weight: float) -> Dict[int, float]:
+        """
+        按用户车系权重对近邻相似度加权平均，再乘以融合权重
+
+        Args:
+            series_weights (Dict[int, float]): 用户车系权重
+            neighbors (Dict[int, List[Tuple[int, float]]]): 车系近邻
+            cf_weight (float): 融合权重
+        Returns:
+            Dict[int, float]: 车系ID -> 协同过滤分数
+        """
+        total_weight = sum(series_weights.values())
+        if total_weight <= 0 or cf_weight <= 0:
+            return {}
+        scores: Dict[int, float] = defaultdict(float)
+        for series_id, weight in series_weights.items():
+            for neighbor_id, similarity in neighbors.get(series_id, ()):
+                scores[neighbor_id] += weight * similarity
+        return {series_id: cf_weight * score / total_weight for series_id, score in scores.items()}
+
+    @classmethod
+    def user_cf_scores(cls, user_preference: Dict[str, Dict[str, float]], cf_weight: float) -> Dict[int, float]:
+        """
+        计算单个用户的协同过滤分数，读取失败时返回空字典，只使用属性相似度
+
+        Args:
+            user_preference (Dict[str, Dict[str, float]]): 用户偏好
+            cf_weight (float): 融合权重
+        Returns:
+            Dict[int, float]: 车系ID -> 协同过滤分数
+        """
+        if cf_weight <= 0:
+            return {}
+        series_weights = cls.user_series_weights(user_preference)
+        try:
+            neighbors = cls.get_neighbors(list(series_weights))
+        except Exception as e:
+            LogUtil.logger.warning(f"[车系共现] 读取车系近邻失败: {e}")
+            return {}
+        return cls.blend_scores(series_weights, neighbors, cf_weight)
+
+    @classmethod
+    def _signature(cls, config: RecommendConfig) -> str:
+        """
+        影响共现权重的配置签名，变更后全量重建
+        """
+        return json.dumps([config.time_decay_factor, config.view_score, config.like_score, cls.MAX_USER_SERIES],
+                          separators=(',', ':'))
+
+    @classmethod
+    def _load_state(cls) -> Optional[Dict]:
+        try:
+            data = redis_cache.hgetall(RecommendConstants.CF_STATE_KEY)
+            if not data:
+                return None
+            data = {key.decode("utf-8"): value for key, value in data.items()}
+            return {
+                cls.STATE_ANCHOR: int(data[cls.STATE_ANCHOR]),
+                cls.STATE_SIGNATURE: data[cls.STATE_SIGNATURE].decode("utf-8"),
+                cls.STATE_VIEW_ID: int(data[cls.STATE_VIEW_ID]),
+                cls.STATE_LIKE_ID: int(data[cls.STATE_LIKE_ID]),
+                cls.STATE_MATRIX: CooccurrenceMatrix.from_bytes(data[cls.STATE_MATRIX]),
+            }
+        except Exception as e:
+            LogUtil.logger.warning(f"[车系共现] 读取计算状态失败，全量重建: {e}")
+            return None
+
+    @classmethod
+    def _save_state(cls, matrix: CooccurrenceMatrix, anchor: int, signature: str,
+                    view_id: int, like_id: int) -> None:
+        redis_cache.hset(RecommendConstants.CF_STATE_KEY, mapping={
+            cls.STATE_ANCHOR: str(anchor),
+            cls.STATE_SIGNATURE: signature,
+            cls.STATE_VIEW_ID: str(view_id),
+            cls.STATE_LIKE_ID: str(like_id),
+            cls.STATE_MATRIX: matrix.to_bytes(),
+            cls.STATE_UPDATED: datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        })
+
+    @classmethod
+    def _save_neighbors(cls, neighbors: Dict[int, List[Tuple[int, float]]]) -> None:
+        """
+        先写入临时 Hash 再整体替换，读取方不会看到写了一半的近邻
+        """
+        building_key = f"{RecommendConstants.CF_NEIGHBOR_KEY}:building"
+        pipe = redis_cache.pipeline()
+        pipe.delete(building_key)
+        if neighbors:
+            pipe.hset(building_key, mapping={
+                str(series_id): json.dumps(items, separators=(',', ':'))
+                for series_id, items in neighbors.items()
+            })
+            pipe.rename(building_key, RecommendConstants.CF_NEIGHBOR_KEY)
+        else:
+            pipe.delete(RecommendConstants.CF_NEIGHBOR_KEY)
+        pipe.execute()
@@ -3,14 +3,15 @@
 # @FileName: like_service.py
 # @Time    : 2026-01-23 20:21:54
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
 
 from ruoyi_car.domain.entity import Like
 from ruoyi_car.mapper import SeriesMapper
 from ruoyi_car.mapper.like_mapper import LikeMapper
+from ruoyi_car.service.preference_profile_service import PreferenceProfileService
 from ruoyi_common.constant import ConfigConstants
 from ruoyi_common.exception import ServiceException
-from ruoyi_common.utils.base import LogUtil
+from ruoyi_common.utils.base import ExcelRowException, LogUtil
 from ruoyi_framework.descriptor.datascope import DataScope
 from ruoyi_system.service import SysConfigService
 
@@ -32,6 +33,20 @@ class LikeService:
         """
         return LikeMapper.select_like_list(like)
 
+    @classmethod
+    @DataScope(dept=True, user=True)
+    def iter_like_list(cls, like: Like) -> Iterator[Like]:
+        """
+        流式查询用户点赞列表，用于导出
+
+        Args:
+            like (like): 用户点赞对象
+
+        Returns:
+            Iterator[like]: 用户点赞迭代器
+        """
+        return LikeMapper.iter_like_list(like)
+
     @classmethod
     def select_like_by_id(cls, id: int) -> Optional[Like]:
         """
@@ -85,7 +100,10 @@ class LikeService:
         like.configuration_score = series_info.configuration_score or 3
         like.price = series_info.min_price or 0
         like.score = like_score
-        return LikeMapper.insert_like(like)
+        result = LikeMapper.insert_like(like)
+        if result > 0:
+            PreferenceProfileService.record_like(like)
+        return result
 
     @classmethod
     def update_like(cls, like: Like) -> int:
@@ -98,7 +116,12 @@ class LikeService:
         Returns:
             int: 更新的记录数
         """
-        return LikeMapper.update_like(like)
+        # 记录的用户、时间、车系都可能变化，修改前后两个用户的画像都删除，由下次读取重建
+        user_ids = LikeMapper.select_user_ids_by_ids([like.id]) if like.id is not None else []
+        result = LikeMapper.update_like(like)
+        if result > 0:
+            PreferenceProfileService.delete_profiles(user_ids + [like.user_id])
+        return result
 
     @classmethod
     def delete_like_by_ids(cls, ids: List[int]) -> int:
@@ -111,63 +134,84 @@ class LikeService:
         Returns:
             int: 删除的记录数
         """
-        return LikeMapper.delete_like_by_ids(ids)
+        user_ids = LikeMapper.select_user_ids_by_ids(ids)
+        result = LikeMapper.delete_like_by_ids(ids)
+        if result > 0:
+            PreferenceProfileService.delete_profiles(user_ids)
+        return result
 
     @classmethod
     def delete_like_by_series_and_user(cls, series_id, user_id) -> int:
         """
         根据用户和series删除点赞
         """
-        return LikeMapper.delete_like_by_series_and_user(series_id, user_id)
+        like_info = LikeMapper.select_series_like_by_series_and_user(series_id, user_id)
+        result = LikeMapper.delete_like_by_series_and_user(series_id, user_id)
+        if result > 0 and like_info:
+            PreferenceProfileService.remove_like(like_info)
+        return result
 
     @classmethod
-    def import_like(cls, like_list: List[Like], is_update: bool = False) -> str:
+    def import_like(cls, like_chunks: Iterable[List[Like]], is_update: bool = False) -> str:
         """
         导入用户点赞数据
 
         Args:
-            like_list (List[like]): 用户点赞列表
+            like_chunks (Iterable[List[Like]]): 用户点赞数据块，逐块写入
             is_update (bool): 是否更新已存在的数据
 
         Returns:
             str: 导入结果消息
         """
-        if not like_list:
-            raise ServiceException("导入用户点赞数据不能为空")
-
         success_count = 0
         fail_count = 0
         success_msg = ""
         fail_msg = ""
-
-        for like in like_list:
-            try:
-                display_value = like
-
-                display_value = getattr(like, "id", display_value)
-                existing = None
-                if like.id is not None:
-                    existing = LikeMapper.select_like_by_id(like.id)
-                if existing:
-                    if is_update:
-                        result = LikeMapper.update_like(like)
+        # 导入涉及的用户，导入结束后删除这些用户的画像，由下次读取重建
+        user_ids = set()
+
+        def resolve(like: Like, existing) -> Optional[str]:
+            if existing is not None and not is_update:
+                return "已存在"
+            user_ids.add(like.user_id)
+            if existing is not None:
+                user_ids.add(existing.user_id)
+            return None
+
+        def fallback(like: Like, existing) -> Optional[str]:
+            if existing is not None:
+                result = LikeMapper.update_like(like)
+            else:
+                result = LikeMapper.insert_like(like)
+            return None if result > 0 else "操作失败"
+
+        try:
+            for like_list in like_chunks:
+                # 导入结果中显示的数据标识，写入前取值
+                display_values = [getattr(like, "id", like) for like in like_list]
+                # 按主键分批查询已存在的数据，每批一个事务批量新增、更新
+                results = LikeMapper.BULK_UPSERT.run(like_list, resolve, fallback=fallback)
+                for display_value, result in zip(display_values, results):
+                    if result is None:
+                        success_count += 1
+                        success_msg += f"<br/> 第{success_count}条数据，操作成功：{display_value}"
+                    elif isinstance(result, Exception):
+                        fail_count += 1
+                        fail_msg += f"<br/> 第{fail_count}条数据，导入失败，原因：{result.__class__.__name__}"
+                        LogUtil.logger.error(f"导入用户点赞失败，原因：{result}")
                     else:
                         fail_count += 1
-                        fail_msg += f"<br/> 第{fail_count}条数据，已存在：{display_value}"
-                        continue
-                else:
-                    result = LikeMapper.insert_like(like)
-
-                if result > 0:
-                    success_count += 1
-                    success_msg += f"<br/> 第{success_count}条数据，操作成功：{display_value}"
-                else:
-                    fail_count += 1
-                    fail_msg += f"<br/> 第{fail_count}条数据，操作失败：{display_value}"
-            except Exception as e:
-                fail_count += 1
-                fail_msg += f"<br/> 第{fail_count}条数据，导入失败，原因：{e.__class__.__name__}"
-                LogUtil.logger.error(f"导入用户点赞失败，原因：{e}")
+                        fail_msg += f"<br/> 第{fail_count}条数据，{result}：{display_value}"
+        except ExcelRowException as e:
+            # 数据行格式错误时停止读取，之前的数据块已经写入
+            fail_count += 1
+            fail_msg += f"<br/> 第{fail_count}条数据，导入中止：{e}"
+            LogUtil.logger.error(f"导入用户点赞中止，原因：{e}")
+        finally:
+            PreferenceProfileService.delete_profiles(user_ids)
+
+        if success_count + fail_count == 0:
+            raise ServiceException("导入用户点赞数据不能为空")
 
         if fail_count > 0:
             if success_msg:
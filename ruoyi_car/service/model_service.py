@@ -2,18 +2,16 @@
 # @Author  : YY
 # @FileName: model_service.py
 # @Time    : 2026-01-23 20:21:54
-import time
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 from datetime import datetime
 import re
 
 from ruoyi_common.exception import ServiceException
-from ruoyi_common.utils.base import LogUtil
+from ruoyi_common.utils.base import ExcelRowException, LogUtil
 from ruoyi_common.utils.security_util import get_username
-from ruoyi_car.domain.entity import Model
+from ruoyi_car.domain.entity import Model, Series
 from ruoyi_car.mapper.model_mapper import ModelMapper
 from ruoyi_car.mapper.series_mapper import SeriesMapper
-from ruoyi_car.domain.po import SeriesPo
 
 
 class ModelService:
@@ -32,6 +30,19 @@ class ModelService:
         """
         return ModelMapper.select_model_list(model)
 
+    @classmethod
+    def iter_model_list(cls, model: Model) -> Iterator[Model]:
+        """
+        流式查询车型信息列表，用于导出
+
+        Args:
+            model (model): 车型信息对象
+
+        Returns:
+            Iterator[model]: 车型信息迭代器
+        """
+        return ModelMapper.iter_model_list(model)
+
     @classmethod
     def select_model_by_id(cls, id: int) -> Optional[Model]:
         """
@@ -165,120 +176,71 @@ class ModelService:
         return None
 
     @classmethod
-    def import_model(cls, model_list: List[Model]) -> str:
+    def import_model(cls, model_chunks: Iterable[List[Model]]) -> str:
         """
         导入车型信息数据
 
         Args:
-            model_list (List[Model]): 车型信息列表
+            model_chunks (Iterable[List[Model]]): 车型信息数据块，逐块写入
 
         Returns:
             str: 导入结果消息
         """
-        if not model_list:
-            raise ServiceException("导入车型信息数据不能为空")
-        start_time = time.time()
         success_count = 0
         fail_count = 0
         success_msg = ""
         fail_msg = ""
         username = get_username()
 
-        # 缓存 series 查询结果，避免重复查询数据库
-        # key: series_id, value: SeriesPo 对象或 None（表示不存在）
-        series_cache: dict[int, Optional[SeriesPo]] = {}
+        # 导入数据引用的车系，每块只查询尚未查询过的车系ID，同一车系ID有多条时取第一条
+        series_map: Dict[int, Optional[Series]] = {}
 
-        for model in model_list:
-            try:
-                # 生成显示值
-                display_value = getattr(model, "car_name", None) or getattr(model, "car_id", None) or str(model)
-
-                # 1. 验证 series_id 是否存在
-                if model.series_id is None:
-                    fail_count += 1
-                    fail_msg += f"<br/> 第{fail_count}条数据，导入失败：车系ID不能为空：{display_value}"
-                    continue
-
-                # 从缓存中获取或查询 series
-                series_info = None
-                if model.series_id in series_cache:
-                    series_info = series_cache[model.series_id]
-                else:
-                    series_info = SeriesMapper.select_series_by_series_id(model.series_id)
-                    series_cache[model.series_id] = series_info
-
-                # 如果 series 不存在，记录为脏数据
-                if series_info is None:
-                    fail_count += 1
-                    fail_msg += f"<br/> 第{fail_count}条数据，导入失败：车系不存在（车系ID：{model.series_id}）：{display_value}"
-                    continue
-
-                # 2. 从 series 中获取数据并赋值给 model
-                model.country = series_info.country
-                model.brand_name = series_info.brand_name
-                model.series_name = series_info.series_name
-                model.model_type = series_info.model_type
-                # 如果 energy_type 为空，从 series 中获取
-                if not model.energy_type:
-                    model.energy_type = series_info.energy_type
-
-                # 3. 处理价格字符串，提取数字并转换
-                if model.owner_price_str:
-                    model.owner_price = cls._extract_price_from_string(model.owner_price_str)
-
-                if model.dealer_price_str:
-                    model.dealer_price = cls._extract_price_from_string(model.dealer_price_str)
-
-                # 4. 处理 acceleration_str 和 max_speed_str，提取数字赋值
-                if model.acceleration_str:
-                    model.acceleration = cls._extract_number_from_string(model.acceleration_str)
-
-                if model.max_speed_str:
-                    model.max_speed = cls._extract_number_from_string(model.max_speed_str)
-
-                # 5. 验证必填字段：car_id 和 car_name
-                if model.car_id is None:
-                    fail_count += 1
-                    fail_msg += f"<br/> 第{fail_count}条数据，导入失败：车型ID不能为空：{display_value}"
-                    continue
-
-                if not model.car_name:
-                    fail_count += 1
-                    fail_msg += f"<br/> 第{fail_count}条数据，导入失败：车型名称不能为空：{display_value}"
-                    continue
-
-                # 6. 根据 car_id 查询判断是更新还是新增
-                existing = None
-                existing = ModelMapper.select_model_by_car_id(model.car_id)
-
-                if existing:
-                    # 更新已存在的记录
-                    model.id = existing.id
-                    # 保留原有的创建时间和创建人
-                    model.create_time = existing.create_time
-                    model.create_by = existing.create_by
-                    result = ModelMapper.update_model(model)
-                else:
-                    # 新增记录，赋值创建时间和创建人
-                    model.create_time = datetime.now()
-                    model.create_by = username
-                    result = ModelMapper.insert_model(model)
-
-                if result > 0:
-                    success_count += 1
-                    success_msg += f"<br/> 第{success_count}条数据，操作成功：{display_value}"
-                else:
-                    fail_count += 1
-                    fail_msg += f"<br/> 第{fail_count}条数据，操作失败：{display_value}"
-                elapsed_time = time.time() - start_time
-                minutes, seconds = divmod(int(elapsed_time), 60)
-                print("   [运行时间: {:02d}:{:02d}]".format(minutes, seconds))
-                print(f"当前进度：{success_count}/{len(model_list)}，成功：{success_count}条，失败：{fail_count}条")
-
-            except Exception as e:
-                fail_count += 1
-                fail_msg += f"<br/> 第{fail_count}条数据，导入失败，原因：{e.__class__.__name__}"
-                LogUtil.logger.error(f"导入车型信息失败，原因：{e}")
+        def prepare(model: Model) -> Optional[str]:
+            return cls._prepare_import_model(model, series_map)
+
+        def resolve(model: Model, existing) -> Optional[str]:
+            if existing is not None:
+                # 更新已存在的记录，保留原有的创建时间和创建人
+                model.id = existing.id
+                model.create_time = existing.create_time
+                model.create_by = existing.create_by
+            else:
+                # 新增记录，赋值创建时间和创建人
+                model.create_time = datetime.now()
+                model.create_by = username
+            return None
+
+        def fallback(model: Model, existing) -> Optional[str]:
+            if existing is not None:
+                result = ModelMapper.update_model(model)
+            else:
+                result = ModelMapper.insert_model(model)
+            return None if result > 0 else f"操作失败：{cls._display_value(model)}"
+
+        try:
+            for model_list in model_chunks:
+                cls._load_series_map(series_map, model_list)
+                # 根据 car_id 分批查询已存在的数据，每批一个事务批量新增、更新
+                results = ModelMapper.BULK_UPSERT.run(model_list, resolve, prepare=prepare, fallback=fallback)
+                for model, result in zip(model_list, results):
+                    if result is None:
+                        success_count += 1
+                        success_msg += f"<br/> 第{success_count}条数据，操作成功：{cls._display_value(model)}"
+                    elif isinstance(result, Exception):
+                        fail_count += 1
+                        fail_msg += f"<br/> 第{fail_count}条数据，导入失败，原因：{result.__class__.__name__}"
+                        LogUtil.logger.error(f"导入车型信息失败，原因：{result}")
+                    else:
+                        fail_count += 1
+                        fail_msg += f"<br/> 第{fail_count}条数据，{result}"
+        except ExcelRowException as e:
+            # 数据行格式错误时停止读取，之前的数据块已经写入
+            fail_count += 1
+            fail_msg += f"<br/> 第{fail_count}条数据，导入中止：{e}"
+            LogUtil.logger.error(f"导入车型信息中止，原因：{e}")
+
+        if success_count + fail_count == 0:
+            raise ServiceException("导入车型信息数据不能为空")
 
         if fail_count > 0:
             if success_msg:
@@ -288,3 +250,69 @@ class ModelService:
             raise ServiceException(fail_msg)
         success_msg = f"恭喜您，数据已全部导入成功！共 {success_count} 条，数据如下：" + success_msg
         return success_msg
+
+    @classmethod
+    def _load_series_map(cls, series_map: Dict[int, Optional[Series]], model_list: List[Model]) -> None:
+        """
+        一次查询一块导入数据引用的、尚未查询过的车系，同一车系ID有多条时取第一条，不存在的车系记为 None
+        """
+        series_ids = list({model.series_id for model in model_list
+                           if model.series_id is not None and model.series_id not in series_map})
+        if not series_ids:
+            return
+        for series_id in series_ids:
+            series_map[series_id] = None
+        for series_info in SeriesMapper.select_series_by_series_ids(series_ids):
+            if series_map.get(series_info.series_id) is None:
+                series_map[series_info.series_id] = series_info
+
+    @classmethod
+    def _prepare_import_model(cls, model: Model, series_map: Dict[int, Series]) -> Optional[str]:
+        """
+        校验导入的车型信息，从车系补全车系字段并解析价格、加速、最高车速，返回失败信息，校验通过返回 None
+        """
+        display_value = cls._display_value(model)
+        # 1. 验证 series_id 是否存在
+        if model.series_id is None:
+            return f"导入失败：车系ID不能为空：{display_value}"
+        series_info = series_map.get(model.series_id)
+        # 如果 series 不存在，记录为脏数据
+        if series_info is None:
+            return f"导入失败：车系不存在（车系ID：{model.series_id}）：{display_value}"
+
+        # 2. 从 series 中获取数据并赋值给 model
+        model.country = series_info.country
+        model.brand_name = series_info.brand_name
+        model.series_name = series_info.series_name
+        model.model_type = series_info.model_type
+        # 如果 energy_type 为空，从 series 中获取
+        if not model.energy_type:
+            model.energy_type = series_info.energy_type
+
+        # 3. 处理价格字符串，提取数字并转换
+        if model.owner_price_str:
+            model.owner_price = cls._extract_price_from_string(model.owner_price_str)
+
+        if model.dealer_price_str:
+            model.dealer_price = cls._extract_price_from_string(model.dealer_price_str)
+
+        # 4. 处理 acceleration_str 和 max_speed_str，提取数字赋值
+        if model.acceleration_str:
+            model.acceleration = cls._extract_number_from_string(model.acceleration_str)
+
+        if model.max_speed_str:
+            model.max_speed = cls._extract_number_from_string(model.max_speed_str)
+
+        # 5. 验证必填字段：car_id 和 car_name
+        if model.car_id is None:
+            return f"导入失败：车型ID不能为空：{display_value}"
+        if not model.car_name:
+            return f"导入失败：车型名称不能为空：{display_value}"
+        return None
+
+    @staticmethod
+    def _display_value(model: Model) -> str:
+        """
+        导入结果中显示的数据标识
+        """
+        return getattr(model, "car_name", None) or getattr(model, "car_id", None) or str(model)
@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+# @Author  : YY
+# @FileName: preference_profile_service.py
+# @Time    : 2026-02-11 09:48:17
+
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from redis.exceptions import WatchError
+
+from ruoyi_admin.ext import redis_cache
+from ruoyi_car.domain.entity import View, Like
+from ruoyi_car.mapper.like_mapper import LikeMapper
+from ruoyi_car.mapper.view_mapper import ViewMapper
+from ruoyi_car.service.recommend_config import RecommendConfig
+from ruoyi_car.service.series_catalog import SeriesCatalog
+from ruoyi_common.constant import RecommendConstants
+from ruoyi_common.utils.base import LogUtil
+
+
+class PreferenceProfileService:
+    """
+    用户偏好画像服务
+
+    画像保存在 Redis Hash 中，字段为 "维度:取值"，浏览/点赞写入时 O(1) 累加。
+    需要时间衰减的维度按锚点日期保存：写入权重 = 操作权重 * decay^(锚点日 - 操作日)，
+    读取时再统一乘 decay^(今天 - 锚点日)，即得到与逐条衰减相同的结果（按自然日计算）。
+    画像不存在或衰减因子、价格区间等配置变更时，读取时从最近的浏览、点赞记录重建。
+    画像只包含最近 view_record_num 条浏览、like_record_num 条点赞，增量累加与重建使用相同的记录窗口。
+    浏览、点赞记录被修改、删除或导入时删除画像，由下次读取重建。
+    series 维度记录用户对各车系的衰减权重，用于车系共现（协同过滤）推荐。
+    """
+
+    # 需要时间衰减的维度，score 维度只累加权重因子不做衰减
+    DECAY_DIMENSIONS = ("country", "brand", "model_type", "energy_type", "price", "series")
+    SERIES_DIMENSION = "series"
+    SCORE_DIMENSION = "score"
+    FIELD_SEPARATOR = ":"
+
+    META_ANCHOR = "_anchor"
+    META_SIGNATURE = "_signature"
+    META_UPDATED = "_updated"
+    META_VIEWS = "_views"
+    META_LIKES = "_likes"
+
+    # 锚点放大倍数的自然对数上限，超过后把画像平移到新的锚点，避免浮点溢出
+    MAX_ANCHOR_EXPONENT = 50.0
+    # 画像过期时间，长期不活跃的用户下次访问时重建
+    PROFILE_EXPIRE_SECONDS = 30 * 24 * 60 * 60
+    # 画像字段格式版本，字段变化时递增，旧画像按签名不一致重建
+    PROFILE_VERSION = 2
+    # 增量累加时画像被并发修改的重试次数，仍冲突时删除画像由下次读取重建
+    RECORD_RETRY_TIMES = 5
+
+    @classmethod
+    def record_view(cls, view: View) -> None:
+        """
+        浏览记录写入后累加画像
+
+        Args:
+            view (View): 已写入的浏览记录
+        """
+        cls._record(view, cls.META_VIEWS, 1)
+
+    @classmethod
+    def record_like(cls, like: Like) -> None:
+        """
+        点赞记录写入后累加画像
+
+        Args:
+            like (Like): 已写入的点赞记录
+        """
+        cls._record(like, cls.META_LIKES, 1)
+
+    @classmethod
+    def remove_like(cls, like: Like) -> None:
+        """
+        取消点赞后从画像中扣除该记录的权重
+
+        Args:
+            like (Like): 被删除的点赞记录
+        """
+        cls._record(like, cls.META_LIKES, -1)
+
+    @classmethod
+    def get_profile(cls, user_id: int, now: datetime = None,
+                    config: RecommendConfig = None) -> Tuple[Dict[str, Dict[str, float]], int, int]:
+        """
+        读取用户偏好画像，并按当前日期计算衰减后的权重
+
+        Args:
+            user_id (int): 用户ID
+            now (datetime): 当前时间
+            config (RecommendConfig): 推荐配置，为空时读取当前配置
+        Returns:
+            Tuple[Dict[str, Dict[str, float]], int, int]: 用户偏好、浏览记录数、点赞记录数
+        """
+        now = now or datetime.now()
+        config = config or RecommendConfig.get()
+        key = cls._profile_key(user_id)
+        today = now.toordinal()
+        data = {}
+        try:
+            data = {k.decode("utf-8"): v.decode("utf-8") for k, v in redis_cache.hgetall(key).items()}
+        except Exception as e:
+            LogUtil.logger.warning(f"[偏好画像] 读取用户 {user_id} 画像失败: {e}")
+        if not data or data.get(cls.META_SIGNATURE) != cls._signature(config) or cls.META_ANCHOR not in data:
+            data = cls._rebuild_profile(user_id, today, config)
+        anchor = int(data[cls.META_ANCHOR])
+        # 锚点晚于今天（平移到了未来的操作日、服务器时间回拨）时不放大权重
+        elapsed_days = max(today - anchor, 0)
+        decay = math.pow(config.time_decay_factor, elapsed_days)
+
+        preference = {dimension: defaultdict(float) for dimension in cls.DECAY_DIMENSIONS + (cls.SCORE_DIMENSION,)}
+        for field_name, value in data.items():
+            if field_name.startswith("_"):
+                continue
+            dimension, _, item = field_name.partition(cls.FIELD_SEPARATOR)
+            if dimension not in preference:
+                continue
+            value = float(value)
+            preference[dimension][item] = value * decay if dimension in cls.DECAY_DIMENSIONS else value
+        return preference, int(float(data.get(cls.META_VIEWS, 0))), int(float(data.get(cls.META_LIKES, 0)))
+
+    @classmethod
+    def delete_profile(cls, user_id: int) -> None:
+        """
+        删除用户画像，下次读取时重建
+        """
+        try:
+            redis_cache.delete(cls._profile_key(user_id))
+        except Exception as e:
+            LogUtil.logger.error(f"[偏好画像] 删除用户 {user_id} 画像失败: {e}")
+
+    @classmethod
+    def delete_profiles(cls, user_ids: Iterable[int]) -> None:
+        """
+        批量删除用户画像，下次读取时重建
+        """
+        keys = [cls._profile_key(user_id) for user_id in set(user_ids) if user_id is not None]
+        if not keys:
+            return
+        try:
+            redis_cache.delete(*keys)
+        except Exception as e:
+            LogUtil.logger.error(f"[偏好画像] 批量删除 {len(keys)} 个用户画像失败: {e}")
+
+    @classmethod
+    def _record(cls, record: View | Like, counter_field: str, sign: int) -> None:
+        """
+        按单条记录累加画像，画像不存在时跳过，由下次读取时重建
+        记录窗口已满时：新增记录同时扣除移出窗口的最旧记录；删除记录会有更早的记录移入窗口，直接删除画像
+        读取锚点、计数到写入增量在 WATCH/MULTI 中完成，期间画像被其他写入、重建或平移修改时重新计算
+        """
+        if record is None or record.user_id is None:
+            return
+        key = cls._profile_key(record.user_id)
+        try:
+            config = RecommendConfig.get()
+            if config.time_decay_factor <= 0:
+                return
+            with redis_cache.pipeline() as pipe:
+                for _ in range(cls.RECORD_RETRY_TIMES):
+                    try:
+                        pipe.watch(key)
+                        anchor_raw, signature, count_raw = pipe.hmget(key, cls.META_ANCHOR, cls.META_SIGNATURE,
+                                                                      counter_field)
+                        if anchor_raw is None:
+                            pipe.unwatch()
+                            return
+                        if signature is None or signature.decode("utf-8") != cls._signature(config):
+                            # 配置已变更，旧画像作废
+                            pipe.unwatch()
+                            redis_cache.delete(key)
+                            return
+                        window = cls._record_window(config, counter_field)
+                        count = int(float(count_raw)) if count_raw is not None else 0
+                        if sign < 0 and count >= window:
+                            pipe.unwatch()
+                            redis_cache.delete(key)
+                            return
+                        anchor = int(anchor_raw)
+                        event_day = (record.create_time or datetime.now()).toordinal()
+                        if (event_day - anchor) * -math.log(config.time_decay_factor) > cls.MAX_ANCHOR_EXPONENT:
+                            pipe.unwatch()
+                            if cls._rebase_profile(key, event_day, config.time_decay_factor) is None:
+                                return
+                            # 按平移后的锚点重新读取
+                            continue
+                        increments, count_delta = cls._record_changes(record, counter_field, sign, anchor,
+                                                                      count, window, config)
+
+                        pipe.multi()
+                        for field_name, value in increments.items():
+                            pipe.hincrbyfloat(key, field_name, value)
+                        pipe.hincrby(key, counter_field, count_delta)
+                        pipe.hset(key, cls.META_UPDATED, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+                        pipe.expire(key, cls.PROFILE_EXPIRE_SECONDS)
+                        pipe.execute()
+                        return
+                    except WatchError:
+                        continue
+            LogUtil.logger.warning(f"[偏好画像] 用户 {record.user_id} 画像并发更新重试失败，删除后重建")
+            cls.delete_profile(record.user_id)
+        except Exception as e:
+            LogUtil.logger.error(f"[偏好画像] 更新用户 {record.user_id} 画像失败: {e}")
+            # 画像可能只更新了一部分，删除后由下次读取重建
+            cls.delete_profile(record.user_id)
+
+    @classmethod
+    def _record_changes(cls, record: View | Like, counter_field: str, sign: int, anchor: int, count: int,
+                        window: int, config: RecommendConfig) -> Tuple[Dict[str, float], int]:
+        """
+        计算单条记录写入（sign=1）或删除（sign=-1）对画像各字段的增量与记录数的变化，
+        写入时记录窗口已满则同时扣除移出窗口的记录
+        """
+        series_avg_score = SeriesCatalog.get_snapshot().avg_scores(config.series_score)
+        increments: Dict[str, float] = defaultdict(float)
+        weight = cls._record_weight(record, counter_field, anchor, config)
+        for field_name, value in cls._record_increments(record, weight, config, series_avg_score).items():
+            increments[field_name] += value * sign
+        count_delta = sign
+        if sign > 0 and count >= window:
+            # 写入后按时间倒序排在第 window 条的记录移出窗口（新记录本身早于窗口时即为它自己，增减抵消）
+            if counter_field == cls.META_VIEWS:
+                evicted = ViewMapper.select_user_view_by_offset_new(record.user_id, window)
+            else:
+                evicted = LikeMapper.select_user_like_by_offset_new(record.user_id, window)
+            if evicted is not None:
+                evicted_weight = cls._record_weight(evicted, counter_field, anchor, config)
+                for field_name, value in cls._record_increments(evicted, evicted_weight, config,
+                                                                series_avg_score).items():
+                    increments[field_name] -= value
+                count_delta = 0
+        return increments, count_delta
+
+    @classmethod
+    def _record_weight(cls, record: View | Like, counter_field: str, anchor: int, config: RecommendConfig) -> float:
+        """
+        单条记录按锚点日期折算后的权重
+        """
+        default_score = config.view_score if counter_field == cls.META_VIEWS else config.like_score
+        event_day = (record.create_time or datetime.now()).toordinal()
+        return (record.score or default_score) * math.pow(config.time_decay_factor, anchor - event_day)
+
+    @classmethod
+    def _record_window(cls, config: RecommendConfig, counter_field: str) -> int:
+        """
+        画像包含的最近记录数，与推荐时读取的浏览、点赞记录数一致
+        """
+        if counter_field == cls.META_VIEWS:
+            return config.view_record_num if config.view_record_num is not None else 100
+        return config.like_record_num if config.like_record_num is not None else 30
+
+    @classmethod
+    def _record_increments(cls, record: View | Like, weight: float, config: RecommendConfig,
+                           series_avg_score: Dict[str, float]) -> Dict[str, float]:
+        """
+        计算单条记录对画像各字段的增量，累加规则与推荐时逐条累加完全一致
+        """
+        # 推荐服务依赖浏览、点赞服务，这里延迟导入避免循环导入
+        from ruoyi_car.service.recommend_service import RecommendService
+        preference = defaultdict(lambda: defaultdict(float))
+        RecommendService._accumulate_preference(preference, record, weight, config.price_range, series_avg_score,
+                                                config.overall_score_weight)
+        if record.series_id is not None:
+            preference[cls.SERIES_DIMENSION][str(record.series_id)] += weight
+        return {
+            f"{dimension}{cls.FIELD_SEPARATOR}{item}": value
+            for dimension, prefs in preference.items()
+            for item, value in prefs.items()
+        }
+
+    @classmethod
+    def _rebuild_profile(cls, user_id: int, today: int, config: RecommendConfig) -> Dict[str, str]:
+        """
+        从最近的浏览、点赞记录重建画像，锚点为今天
+        读取记录前 WATCH 画像，期间有增量累加写入时不保存本次结果，避免覆盖这次写入，由下次读取重建
+        """
+        key = cls._profile_key(user_id)
+        pipe = None
+        if config.time_decay_factor > 0:
+            try:
+                pipe = redis_cache.pipeline()
+                pipe.watch(key)
+            except Exception as e:
+                LogUtil.logger.error(f"[偏好画像] 保存用户 {user_id} 画像失败: {e}")
+                pipe = None
+        try:
+            views = ViewMapper.select_user_views_by_user_num_new(user_id, cls._record_window(config, cls.META_VIEWS))
+            likes = LikeMapper.select_user_likes_by_user_num_new(user_id, cls._record_window(config, cls.META_LIKES))
+            series_avg_score = SeriesCatalog.get_snapshot().avg_scores(config.series_score)
+            fields: Dict[str, float] = defaultdict(float)
+            for records, default_score in ((views, config.view_score), (likes, config.like_score)):
+                for record in records:
+                    days_diff = today - record.create_time.toordinal() if record.create_time else 0
+                    time_weight = math.pow(config.time_decay_factor, days_diff) if days_diff > 0 else 1.0
+                    weight = (record.score or default_score) * time_weight
+                    for field_name, value in cls._record_increments(record, weight, config,
+                                                                    series_avg_score).items():
+                        fields[field_name] += value
+
+            data = {field_name: repr(value) for field_name, value in fields.items()}
+            data[cls.META_ANCHOR] = str(today)
+            data[cls.META_SIGNATURE] = cls._signature(config)
+            data[cls.META_UPDATED] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            data[cls.META_VIEWS] = str(len(views))
+            data[cls.META_LIKES] = str(len(likes))
+            if pipe is not None:
+                try:
+                    pipe.multi()
+                    pipe.delete(key)
+                    pipe.hset(key, mapping=data)
+                    pipe.expire(key, cls.PROFILE_EXPIRE_SECONDS)
+                    pipe.execute()
+                except WatchError:
+                    LogUtil.logger.info(f"[偏好画像] 用户 {user_id} 画像重建期间有新的写入，本次不保存")
+                except Exception as e:
+                    LogUtil.logger.error(f"[偏好画像] 保存用户 {user_id} 画像失败: {e}")
+            return data
+        finally:
+            if pipe is not None:
+                pipe.reset()
+
+    @classmethod
+    def _rebase_profile(cls, key: str, new_anchor: int, time_decay_factor: float) -> Optional[int]:
+        """
+        把画像平移到新的锚点日期，返回新锚点；并发冲突重试失败时删除画像并返回 None
+        """
+        with redis_cache.pipeline() as pipe:
+            for _ in range(3):
+                try:
+                    pipe.watch(key)
+                    data = {k.decode("utf-8"): v.decode("utf-8") for k, v in pipe.hgetall(key).items()}
+                    if cls.META_ANCHOR not in data:
+                        pipe.unwatch()
+                        return None
+                    old_anchor = int(data[cls.META_ANCHOR])
+                    if old_anchor >= new_anchor:
+                        pipe.unwatch()
+                        return old_anchor
+                    factor = math.pow(time_decay_factor, new_anchor - old_anchor)
+                    mapping = {cls.META_ANCHOR: str(new_anchor)}
+                    for field_name, value in data.items():
+                        dimension = field_name.partition(cls.FIELD_SEPARATOR)[0]
+                        if dimension in cls.DECAY_DIMENSIONS:
+                            mapping[field_name] = repr(float(value) * factor)
+                    pipe.multi()
+                    pipe.hset(key, mapping=mapping)
+                    pipe.execute()
+                    return new_anchor
+                except WatchError:
+                    continue
+        redis_cache.delete(key)
+        return None
+
+    @classmethod
+    def _signature(cls, config: RecommendConfig) -> str:
+        return f"{cls.PROFILE_VERSION}:{config.signature}"
+
+    @classmethod
+    def _profile_key(cls, user_id: int) -> str:
+        return f"{RecommendConstants.PREFERENCE_PROFILE_KEY}{user_id}"
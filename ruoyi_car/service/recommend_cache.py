@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+# @Author  : YY
+# @FileName: recommend_cache.py
+# @Time    : 2026-02-13 10:27:40
+
+import json
+from typing import Dict, List, Optional, Tuple
+
+from ruoyi_admin.ext import redis_cache
+from ruoyi_car.domain.entity import Recommend, Series
+from ruoyi_car.mapper.series_mapper import SeriesMapper
+from ruoyi_common.constant import RecommendConstants
+from ruoyi_common.utils.base import LogUtil
+
+
+class RecommendResultCache:
+    """
+    推荐结果缓存
+
+    每个用户的推荐结果保存为 Redis 有序集合（车系ID -> 排序分），排序分按推荐顺序递减，
+    分页直接 ZREVRANGE，顺序与推荐结果完全一致；推荐总数、生成时间和偏好模型单独保存在 Hash 中。
+    车系卡片统一缓存在一个 Hash 中，分页时按车系ID批量读取。数据库中的推荐记录作为持久备份，
+    缓存不存在时从最新的推荐记录恢复。
+    """
+
+    # 推荐结果过期时间，过期后从数据库推荐记录恢复
+    RESULT_EXPIRE_SECONDS = 7 * 24 * 60 * 60
+    # 车系卡片过期时间，车系数据变更时直接删除
+    CARD_EXPIRE_SECONDS = 24 * 60 * 60
+
+    @classmethod
+    def save(cls, recommend: Recommend) -> bool:
+        """
+        保存单个用户的推荐结果
+
+        Args:
+            recommend (Recommend): 推荐记录
+        Returns:
+            bool: 是否保存成功
+        """
+        return cls.save_batch([recommend]) > 0
+
+    @classmethod
+    def save_batch(cls, recommend_list: List[Recommend]) -> int:
+        """
+        批量保存推荐结果，所有用户在一个 pipeline 中写入
+
+        Args:
+            recommend_list (List[Recommend]): 推荐记录列表
+        Returns:
+            int: 保存的用户数
+        """
+        try:
+            pipe = redis_cache.pipeline(transaction=False)
+            count = 0
+            for recommend in recommend_list:
+                if recommend is None or recommend.user_id is None or not recommend.content:
+                    continue
+                content = json.loads(recommend.content)
+                series_ids = content.get('series_ids', [])
+                if not isinstance(series_ids, list):
+                    continue
+                result_key = cls._result_key(recommend.user_id)
+                meta_key = cls._meta_key(recommend.user_id)
+                pipe.delete(result_key, meta_key)
+                if series_ids:
+                    # 排序分按推荐顺序递减，分数相同的车系也能保持原有顺序
+                    size = len(series_ids)
+                    pipe.zadd(result_key, {str(series_id): size - index for index, series_id in enumerate(series_ids)})
+                    pipe.expire(result_key, cls.RESULT_EXPIRE_SECONDS)
+                pipe.hset(meta_key, mapping={
+                    "total": content.get('total', len(series_ids)),
+                    "create_time": content.get('create_time', ""),
+                    "model": recommend.model_info or "",
+                })
+                pipe.expire(meta_key, cls.RESULT_EXPIRE_SECONDS)
+                count += 1
+            pipe.execute()
+            return count
+        except Exception as e:
+            LogUtil.logger.error(f"[推荐缓存] 保存推荐结果失败: {e}")
+            return 0
+
+    @classmethod
+    def get_page(cls, user_id: int, page_num: int, page_size: int) -> Optional[Tuple[List[int], int]]:
+        """
+        分页读取推荐结果
+
+        Args:
+            user_id (int): 用户ID
+            page_num (int): 页码
+            page_size (int): 每页数量
+        Returns:
+            Optional[Tuple[List[int], int]]: 当前页车系ID和推荐总数，缓存不存在或读取失败时返回 None
+        """
+        start = (page_num - 1) * page_size
+        end = start + page_size - 1
+        try:
+            pipe = redis_cache.pipeline(transaction=False)
+            pipe.hget(cls._meta_key(user_id), "total")
+            pipe.zrevrange(cls._result_key(user_id), start, end)
+            total, members = pipe.execute()
+        except Exception as e:
+            LogUtil.logger.warning(f"[推荐缓存] 读取推荐结果失败: {e}")
+            return None
+        if total is None:
+            return None
+        return [int(member) for member in members], int(total)
+
+    @classmethod
+    def get_series_cards(cls, series_ids: List[int]) -> List[Dict]:
+        """
+        按顺序获取车系卡片，缓存中没有的车系从数据库加载并写入缓存
+
+        Args:
+            series_ids (List[int]): 车系ID列表
+        Returns:
+            List[Dict]: 车系卡片列表，顺序与传入的车系ID一致
+        """
+        if not series_ids:
+            return []
+        cards: Dict[int, Dict] = {}
+        try:
+            values = redis_cache.hmget(RecommendConstants.SERIES_CARD_KEY, [str(series_id) for series_id in series_ids])
+            for series_id, value in zip(series_ids, values):
+                if value is not None:
+                    cards[series_id] = json.loads(value)
+        except Exception as e:
+            LogUtil.logger.warning(f"[推荐缓存] 读取车系卡片失败: {e}")
+
+        missing_ids = [series_id for series_id in series_ids if series_id not in cards]
+        if missing_ids:
+            loaded = {series.series_id: cls._build_series_card(series)
+                      for series in SeriesMapper.select_series_by_series_ids(missing_ids)}
+            cards.update(loaded)
+            if loaded:
+                try:
+                    pipe = redis_cache.pipeline(transaction=False)
+                    pipe.hset(RecommendConstants.SERIES_CARD_KEY, mapping={
+                        str(series_id): json.dumps(card, ensure_ascii=False, separators=(',', ':'))
+                        for series_id, card in loaded.items()
+                    })
+                    pipe.expire(RecommendConstants.SERIES_CARD_KEY, cls.CARD_EXPIRE_SECONDS)
+                    pipe.execute()
+                except Exception as e:
+                    LogUtil.logger.warning(f"[推荐缓存] 写入车系卡片失败: {e}")
+        # 已下架（删除）的车系不再返回
+        return [cards[series_id] for series_id in series_ids if series_id in cards]
+
+    @classmethod
+    def clear_series_cards(cls) -> None:
+        """
+        车系数据变更后清空车系卡片缓存
+        """
+        try:
+            redis_cache.delete(RecommendConstants.SERIES_CARD_KEY)
+        except Exception as e:
+            LogUtil.logger.error(f"[推荐缓存] 清空车系卡片失败: {e}")
+
+    @classmethod
+    def _build_series_card(cls, series: Series) -> Dict:
+        return {
+            'id': series.id,
+            'country': series.country,
+            'brandName': series.brand_name,
+            'image': series.image,
+            'seriesName': series.series_name,
+            'seriesId': series.series_id,
+            'dealerPriceStr': series.dealer_price_str,
+            'official_price_str': series.official_price_str,
+            'cityTotalSales': series.city_total_sales,
+            'monthTotalSales': series.month_total_sales,
+            'modelType': series.model_type,
+            'energyType': series.energy_type,
+            'marketTime': series.market_time.strftime('%Y-%m-%d') if series.market_time else None,
+            'overallScore': series.overall_score,
+        }
+
+    @classmethod
+    def _result_key(cls, user_id: int) -> str:
+        return f"{RecommendConstants.RESULT_KEY}{user_id}"
+
+    @classmethod
+    def _meta_key(cls, user_id: int) -> str:
+        return f"{RecommendConstants.RESULT_META_KEY}{user_id}"
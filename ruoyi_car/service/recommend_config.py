@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# @Author  : YY
+# @FileName: recommend_config.py
+# @Time    : 2026-02-12 14:05:52
+
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import ClassVar, Dict, List, Optional, Tuple
+
+from ruoyi_admin.ext import redis_cache
+from ruoyi_common.constant import ConfigConstants, Constants
+from ruoyi_common.utils import StringUtil
+from ruoyi_common.utils.base import LogUtil
+from ruoyi_system.service import SysConfigService
+
+
+@dataclass
+class RecommendConfig:
+    """
+    推荐相关配置
+
+    所有配置通过一次 MGET 读取、解析后缓存在进程内；参数管理中新增、修改、删除配置或刷新缓存时
+    会递增配置版本号，各进程在下次访问时发现版本变化并重新加载。
+    """
+
+    # 六维度权重
+    weights: Dict[str, float] = field(default_factory=lambda: {
+        "country": 5,  # 国家
+        "brand": 30,  # 品牌名
+        "model_type": 15,  # 车型
+        "energy_type": 6,  # 能源类型
+        "price": 21.0,  # 价格
+        "score": 1.0  # 综合分数
+    })
+    # 时间衰减因子，每天乘以该值
+    time_decay_factor: float = 0.95
+    # 维度分数与综合分数比较的权重
+    overall_score_weight: Dict[str, float] = field(default_factory=lambda: {"greater_than": 1.2, "less_than": 0.8})
+    # 推荐数
+    recommend_num: int = 3000
+    # 点赞分数
+    like_score: float = 15
+    # 浏览分数
+    view_score: float = 1
+    # 价格区间
+    price_range: List[int] = field(default_factory=lambda: [100000, 200000, 300000, 500000, 1000000, 2000000])
+    # 车系默认维度分数
+    series_score: float = 2.5
+    # 浏览、点赞记录条数，未配置时由使用方决定默认值
+    view_record_num: Optional[int] = None
+    like_record_num: Optional[int] = None
+    # 是否开启离线预计算推荐
+    offline: bool = False
+    # 车系共现（协同过滤）分数融合权重，为 0 时不启用
+    cf_weight: float = 0.0
+
+    # 配置字段 -> 参数键
+    CONFIG_KEYS: ClassVar[Dict[str, str]] = {
+        "weights": ConfigConstants.CAE_MODEL_WEIGHT,
+        "time_decay_factor": ConfigConstants.CAR_TIME_DECAY_FACTOR,
+        "overall_score_weight": ConfigConstants.CAR_OVERALL_SCORE_WEIGHT,
+        "recommend_num": ConfigConstants.CAR_RECOMMEND_NUM,
+        "like_score": ConfigConstants.CAR_SCORE_LIKE,
+        "view_score": ConfigConstants.CAR_SCORE_VIEW,
+        "price_range": ConfigConstants.STATISTICS_PRICE_RANGE,
+        "series_score": ConfigConstants.CAR_SCORE_SERIES_DEFAULT,
+        "view_record_num": ConfigConstants.CAR_VIEW_RECORD_NUM,
+        "like_record_num": ConfigConstants.CAR_LIKE_RECORD_NUM,
+        "offline": ConfigConstants.CAR_RECOMMEND_OFFLINE,
+        "cf_weight": ConfigConstants.CAR_RECOMMEND_CF_WEIGHT,
+    }
+
+    # (配置版本号, 配置)
+    _cache: ClassVar[Optional[Tuple[int, "RecommendConfig"]]] = None
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+
+    @property
+    def signature(self) -> str:
+        """
+        影响用户偏好画像的配置签名，变更后画像需要重建
+        """
+        return json.dumps([self.time_decay_factor, self.price_range, self.overall_score_weight],
+                          ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+    @classmethod
+    def get(cls) -> "RecommendConfig":
+        """
+        获取推荐配置，配置版本未变化时直接返回进程内缓存
+
+        Returns:
+            RecommendConfig: 推荐配置
+        """
+        version = cls._current_version()
+        cached = cls._cache
+        if cached is not None and (version is None or cached[0] == version):
+            return cached[1]
+        with cls._lock:
+            cached = cls._cache
+            if cached is not None and (version is None or cached[0] == version):
+                return cached[1]
+            config = cls.load()
+            cls._cache = (version or 0, config)
+            return config
+
+    @classmethod
+    def load(cls) -> "RecommendConfig":
+        """
+        通过一次 MGET 读取全部推荐配置，Redis 中没有的配置回源数据库
+
+        Returns:
+            RecommendConfig: 推荐配置
+        """
+        names = list(cls.CONFIG_KEYS.keys())
+        keys = [cls.CONFIG_KEYS[name] for name in names]
+        values = redis_cache.mget([SysConfigService.get_cache_key(key) for key in keys])
+        config = cls()
+        for name, key, value in zip(names, keys, values):
+            raw = value.decode("utf-8") if value is not None else SysConfigService.select_config_by_key(key)
+            if not raw:
+                continue
+            try:
+                setattr(config, name, cls._parse(name, raw))
+            except (ValueError, TypeError) as e:
+                LogUtil.logger.warning(f"[推荐配置] 参数 {key} 格式错误，使用默认值: {e}")
+        return config
+
+    @classmethod
+    def _parse(cls, name: str, raw: str):
+        if name in ("weights", "overall_score_weight"):
+            value = json.loads(raw)
+            if not isinstance(value, dict):
+                raise ValueError(f"需要JSON对象: {raw}")
+            return value
+        if name == "price_range":
+            # 配置格式为 "8000,12000,20000,30000,40000"
+            return [int(x.strip()) for x in raw.split(',')]
+        if name == "offline":
+            return StringUtil.to_bool(raw)
+        if name in ("recommend_num", "view_record_num", "like_record_num"):
+            return int(raw)
+        return float(raw)
+
+    @classmethod
+    def _current_version(cls) -> Optional[int]:
+        """
+        读取参数配置版本号，Redis 不可用时返回 None
+        """
+        try:
+            value = redis_cache.get(Constants.SYS_CONFIG_VERSION_KEY)
+        except Exception as e:
+            LogUtil.logger.warning(f"[推荐配置] 读取配置版本号失败: {e}")
+            return None
+        return int(value) if value else 0
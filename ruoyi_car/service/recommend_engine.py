@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+# @Author  : YY
+# @FileName: recommend_engine.py
+# @Time    : 2026-02-10 10:12:31
+
+import heapq
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ruoyi_car.domain.entity import Series
+
+
+class SeriesScoringEngine:
+    """
+    车系目录向量化打分引擎
+
+    车系目录只编码一次：国家、品牌、车型、能源类型、价格区间编码为 multi-hot 矩阵
+    （按 "/" 拆分多值，按行保存命中列号），8 个评分字段编码为浮点矩阵。为用户打分时
+    把偏好转成向量，与 multi-hot 矩阵相乘得到每个车系在各维度的命中权重与命中个数，
+    再按与 RecommendService._calculate_dimension_similarity_fast 相同的规则计算相似度。
+
+    推荐排名时先通过倒排索引（维度取值 -> 车系行号）召回至少命中一个偏好取值的车系，
+    只对候选车系打分，再用有界堆取前 K 个；候选不足时用热门车系补足。
+    传入额外分数（如车系共现分数）时，有额外分数的车系同样进入候选，分数与属性相似度相加。
+    同一份编码也用于分块计算车系之间的两两相似度，得到每个车系的相似车系列表。
+    """
+
+    # (用户偏好维度, 车系字段)，价格维度由价格区间标签计算
+    DIMENSIONS: Tuple[Tuple[str, Optional[str]], ...] = (
+        ("country", "country"),
+        ("brand", "brand_name"),
+        ("model_type", "model_type"),
+        ("energy_type", "energy_type"),
+        ("price", None),
+    )
+
+    # 推荐结果少于该数量时用热门车系补足
+    MIN_CANDIDATE_NUM = 20
+    # 计算相似车系时每块相似度矩阵的元素数上限
+    NEIGHBOR_BLOCK_ELEMENTS = 4_000_000
+
+    SCORE_FIELDS = ['overall_score', 'exterior_score', 'interior_score', 'space_score',
+                    'handling_score', 'comfort_score', 'power_score', 'configuration_score']
+
+    def __init__(self, series_list: List[Series], price_range: List[int],
+                 price_label_func: Callable[[float, List[int]], str]):
+        """
+        编码车系目录
+
+        Args:
+            series_list (List[Series]): 车系列表
+            price_range (List[int]): 价格区间
+            price_label_func: 价格区间标签函数，与偏好中价格标签的生成方式保持一致
+        """
+        self.series_list: List[Series] = list(series_list or [])
+        self.price_range: List[int] = list(price_range)
+        self.size = len(self.series_list)
+        # 车系ID -> 行号，车系ID重复时取第一行
+        self.row_by_series_id: Dict[int, int] = {}
+        for row, series in enumerate(self.series_list):
+            self.row_by_series_id.setdefault(series.series_id, row)
+
+        # 每个维度的取值 -> 列号，列号 0 保留给空位（偏好值恒为 0）
+        self.vocabularies: Dict[str, Dict[str, int]] = {}
+        # 每个维度的 multi-hot 编码，按行保存命中的列号，不足的位置补 0
+        self.item_indexes: Dict[str, np.ndarray] = {}
+        # 每个维度的取值个数
+        self.item_counts: Dict[str, np.ndarray] = {}
+        # 每个维度的倒排索引，下标为列号，值为包含该取值的车系行号
+        self.postings: Dict[str, List[np.ndarray]] = {}
+        for dimension, field in self.DIMENSIONS:
+            vocabulary: Dict[str, int] = {}
+            rows: List[List[int]] = []
+            for series in self.series_list:
+                if field is None:
+                    value = price_label_func(series.min_price, self.price_range) if series.min_price else None
+                else:
+                    value = getattr(series, field, None)
+                columns = []
+                for item in self._split_items(value):
+                    if item not in vocabulary:
+                        vocabulary[item] = len(vocabulary) + 1
+                    columns.append(vocabulary[item])
+                rows.append(columns)
+            max_items = max((len(columns) for columns in rows), default=0) or 1
+            indexes = np.zeros((self.size, max_items), dtype=np.int32)
+            for row, columns in enumerate(rows):
+                indexes[row, :len(columns)] = columns
+            self.vocabularies[dimension] = vocabulary
+            self.item_indexes[dimension] = indexes
+            self.item_counts[dimension] = np.array([len(columns) for columns in rows], dtype=np.float64)
+            postings: List[List[int]] = [[] for _ in range(len(vocabulary) + 1)]
+            for row, columns in enumerate(rows):
+                for column in columns:
+                    postings[column].append(row)
+            self.postings[dimension] = [np.array(items, dtype=np.int64) for items in postings]
+
+        # 热门车系顺序，按城市总销量降序，销量相同保持目录顺序
+        sales = np.array([series.city_total_sales or 0 for series in self.series_list], dtype=np.float64)
+        self.popular_order = np.argsort(-sales, kind='stable')
+
+        # 评分矩阵，缺失值为 NaN
+        self.score_matrix = np.array(
+            [[self._to_float(getattr(series, field, None)) for field in self.SCORE_FIELDS]
+             for series in self.series_list],
+            dtype=np.float64,
+        ).reshape(self.size, len(self.SCORE_FIELDS))
+
+    @staticmethod
+    def _split_items(value) -> List[str]:
+        """
+        拆分多值字段，与逐条打分时的 set(item.strip() ...) 保持一致
+        """
+        if not value:
+            return []
+        return list(set(item.strip() for item in str(value).split('/') if item.strip()))
+
+    @staticmethod
+    def _to_float(value) -> float:
+        return float(value) if value is not None else np.nan
+
+    def average_scores(self, series_score: float) -> Dict[str, float]:
+        """
+        计算各评分字段的平均分，没有数据的字段使用默认分数
+
+        Args:
+            series_score (float): 默认分数
+        Returns:
+            Dict[str, float]: 各维度平均分数字典
+        """
+        counts = np.count_nonzero(~np.isnan(self.score_matrix), axis=0)
+        sums = np.nansum(self.score_matrix, axis=0)
+        avg_scores = {}
+        for index, field_name in enumerate(self.SCORE_FIELDS):
+            if counts[index] > 0:
+                avg_scores[field_name] = float(sums[index] / counts[index])
+            else:
+                avg_scores[field_name] = series_score
+        return avg_scores
+
+    def score(self, user_preference: Dict[str, Dict[str, float]], weights: Dict[str, float],
+              rows: np.ndarray = None) -> np.ndarray:
+        """
+        计算车系的相似度分数
+
+        Args:
+            user_preference (Dict[str, Dict[str, float]]): 用户偏好
+            weights (Dict[str, float]): 维度权重
+            rows (np.ndarray): 只计算这些行号的车系，为空时计算整个目录
+        Returns:
+            np.ndarray: 与 rows（或车系目录）顺序一致的分数数组
+        """
+        size = self.size if rows is None else len(rows)
+        total_score = np.zeros(size, dtype=np.float64)
+        for dimension, _ in self.DIMENSIONS:
+            prefs = user_preference.get(dimension)
+            if not prefs or size == 0:
+                continue
+            total_weight = sum(prefs.values())
+            if total_weight <= 0:
+                continue
+            similarity = self._dimension_similarity(dimension, prefs, total_weight, rows)
+            total_score = total_score + similarity * weights[dimension]
+        return total_score
+
+    def candidates(self, user_preference: Dict[str, Dict[str, float]]) -> np.ndarray:
+        """
+        倒排索引召回：返回至少命中一个偏好取值的车系行号（升序）
+
+        Args:
+            user_preference (Dict[str, Dict[str, float]]): 用户偏好
+        Returns:
+            np.ndarray: 候选车系行号
+        """
+        posting_lists = []
+        for dimension, _ in self.DIMENSIONS:
+            prefs = user_preference.get(dimension)
+            if not prefs or sum(prefs.values()) <= 0:
+                continue
+            vocabulary = self.vocabularies[dimension]
+            postings = self.postings[dimension]
+            for item in prefs:
+                column = vocabulary.get(item)
+                if column is not None:
+                    posting_lists.append(postings[column])
+        if not posting_lists:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(posting_lists))
+
+    def _dimension_similarity(self, dimension: str, prefs: Dict[str, float], total_weight: float,
+                              rows: np.ndarray = None) -> np.ndarray:
+        """
+        计算单个维度车系的相似度，规则同 _calculate_dimension_similarity_fast
+        """
+        vocabulary = self.vocabularies[dimension]
+        # 偏好向量与命中标记向量，下标 0 为空位
+        preference_vector = np.zeros(len(vocabulary) + 1, dtype=np.float64)
+        match_vector = np.zeros(len(vocabulary) + 1, dtype=np.float64)
+        for item, value in prefs.items():
+            column = vocabulary.get(item)
+            if column is not None:
+                preference_vector[column] = value
+                match_vector[column] = 1.0
+
+        # multi-hot 矩阵与偏好向量相乘，按取值顺序逐列累加以保持与逐条计算相同的浮点结果
+        indexes = self.item_indexes[dimension]
+        item_counts = self.item_counts[dimension]
+        if rows is not None:
+            indexes = indexes[rows]
+            item_counts = item_counts[rows]
+        matched_score = np.zeros(len(indexes), dtype=np.float64)
+        match_count = np.zeros(len(indexes), dtype=np.float64)
+        for position in range(indexes.shape[1]):
+            matched_score = matched_score + preference_vector[indexes[:, position]]
+            match_count = match_count + match_vector[indexes[:, position]]
+
+        similarity = matched_score / total_weight
+        # 多个匹配项奖励
+        similarity = np.where(match_count > 1,
+                              np.minimum(similarity * (1 + 0.1 * (match_count - 1)), 1.0),
+                              similarity)
+        # 完全匹配奖励
+        similarity = np.where((match_count == item_counts) & (item_counts > 1),
+                              np.minimum(similarity * 1.2, 1.0),
+                              similarity)
+        return np.where(match_count > 0, np.minimum(similarity, 1.0), 0.0)
+
+    def nearest_neighbors(self, weights: Dict[str, float], neighbor_num: int,
+                          series_score: float = 2.5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        分块两两比较整个目录，计算每个车系最相似的前 N 个车系
+
+        属性维度按 Jaccard 相似度（共同取值数 / 取值并集数）乘维度权重累加；评分维度按 8 项评分的
+        均方根差计算 1 / (1 + rms)，缺失评分用目录平均分补齐。总分除以权重之和，范围 0~1。
+
+        Args:
+            weights (Dict[str, float]): 维度权重，与推荐打分使用同一份配置
+            neighbor_num (int): 近邻数
+            series_score (float): 评分字段全部缺失时的默认分数
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 近邻行号与相似度（n × k），按相似度降序
+        """
+        neighbor_num = min(neighbor_num, self.size - 1)
+        dimensions = [(dimension, float(weights.get(dimension, 0))) for dimension, _ in self.DIMENSIONS
+                      if float(weights.get(dimension, 0)) > 0]
+        score_weight = float(weights.get('score', 0))
+        total_weight = sum(weight for _, weight in dimensions) + max(score_weight, 0.0)
+        if neighbor_num <= 0 or total_weight <= 0:
+            return np.zeros((self.size, 0), dtype=np.int64), np.zeros((self.size, 0), dtype=np.float64)
+
+        avg_scores = self.average_scores(series_score)
+        scores = np.where(np.isnan(self.score_matrix),
+                          np.array([avg_scores[field] for field in self.SCORE_FIELDS]), self.score_matrix)
+        squared = (scores * scores).sum(axis=1)
+
+        neighbor_rows = np.zeros((self.size, neighbor_num), dtype=np.int64)
+        neighbor_scores = np.zeros((self.size, neighbor_num), dtype=np.float64)
+        # 每块的相似度矩阵控制在 NEIGHBOR_BLOCK_ELEMENTS 个元素以内
+        block_size = max(1, self.NEIGHBOR_BLOCK_ELEMENTS // self.size)
+        for start in range(0, self.size, block_size):
+            end = min(start + block_size, self.size)
+            similarity = np.zeros((end - start, self.size), dtype=np.float64)
+            for dimension, weight in dimensions:
+                indexes = self.item_indexes[dimension]
+                item_counts = self.item_counts[dimension]
+                match_count = np.zeros((end - start, self.size), dtype=np.float64)
+                for left_position in range(indexes.shape[1]):
+                    left = indexes[start:end, left_position][:, None]
+                    for right_position in range(indexes.shape[1]):
+                        match_count += (left == indexes[None, :, right_position]) & (left > 0)
+                union_count = item_counts[start:end, None] + item_counts[None, :] - match_count
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    similarity += weight * np.where(union_count > 0, match_count / union_count, 0.0)
+            if score_weight > 0:
+                distance = squared[start:end, None] + squared[None, :] - 2 * scores[start:end] @ scores.T
+                rms = np.sqrt(np.maximum(distance, 0.0) / len(self.SCORE_FIELDS))
+                similarity += score_weight / (1 + rms)
+            similarity /= total_weight
+            # 排除自身
+            similarity[np.arange(end - start), np.arange(start, end)] = -np.inf
+
+            top = np.argpartition(-similarity, neighbor_num - 1, axis=1)[:, :neighbor_num]
+            top_scores = np.take_along_axis(similarity, top, axis=1)
+            # 相似度降序，相同时按行号升序
+            order = np.lexsort((top, -top_scores))
+            neighbor_rows[start:end] = np.take_along_axis(top, order, axis=1)
+            neighbor_scores[start:end] = np.take_along_axis(top_scores, order, axis=1)
+        return neighbor_rows, neighbor_scores
+
+    def rank(self, user_preference: Dict[str, Dict[str, float]], weights: Dict[str, float],
+             recommend_num: int, min_score: float = 1,
+             min_candidate_num: int = None,
+             extra_scores: Dict[int, float] = None) -> List[Tuple[Series, float]]:
+        """
+        计算推荐排名
+
+        Args:
+            user_preference (Dict[str, Dict[str, float]]): 用户偏好
+            weights (Dict[str, float]): 维度权重
+            recommend_num (int): 推荐数
+            min_score (float): 相似度最低阈值
+            min_candidate_num (int): 结果少于该数量时用热门车系补足，补足的车系分数为 0
+            extra_scores (Dict[int, float]): 车系ID -> 额外分数，与属性相似度相加
+        Returns:
+            List[Tuple[Series, float]]: 按分数降序的车系及分数，分数相同保持目录顺序
+        """
+        if recommend_num <= 0:
+            return []
+        rows = self.candidates(user_preference)
+        extra_rows = [self.row_by_series_id[series_id] for series_id in (extra_scores or {})
+                      if series_id in self.row_by_series_id]
+        if extra_rows:
+            rows = np.union1d(rows, np.array(extra_rows, dtype=np.int64))
+        scores = self.score(user_preference, weights, rows)
+        if extra_rows:
+            scores = scores + np.array([extra_scores.get(self.series_list[row].series_id, 0.0)
+                                        for row in rows.tolist()], dtype=np.float64)
+        keep = (scores > 0) & (scores >= min_score)
+        rows, scores = rows[keep].tolist(), scores[keep].tolist()
+        # 有界堆取前 K 个，分数相同按行号升序，与对整个目录稳定排序的结果一致
+        top = heapq.nlargest(recommend_num, range(len(rows)), key=lambda i: (scores[i], -rows[i]))
+        result = [(self.series_list[rows[i]], scores[i]) for i in top]
+
+        min_candidate_num = self.MIN_CANDIDATE_NUM if min_candidate_num is None else min_candidate_num
+        target = min(recommend_num, min_candidate_num)
+        if len(result) < target:
+            chosen = set(rows[i] for i in top)
+            for row in self.popular_order.tolist():
+                if len(result) >= target:
+                    break
+                if row not in chosen:
+                    result.append((self.series_list[row], 0.0))
+        return result
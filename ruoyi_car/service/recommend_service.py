@@ -5,27 +5,37 @@
 
 import json
 import math
-from collections import defaultdict
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Optional, Dict, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
+from ruoyi_admin.app import init_worker_process
 from ruoyi_car.domain.entity import Recommend, Series
 from ruoyi_car.domain.entity import View, Like
-from ruoyi_car.mapper import SeriesMapper
 from ruoyi_car.mapper.recommend_mapper import RecommendMapper
+from ruoyi_car.service.recommend_engine import SeriesScoringEngine
+from ruoyi_car.service.series_catalog import SeriesCatalog, SeriesCatalogSnapshot
+from ruoyi_car.service.item_similarity_service import ItemSimilarityService
 from ruoyi_car.service.like_service import LikeService
-from ruoyi_car.service.series_service import SeriesService
+from ruoyi_car.service.preference_profile_service import PreferenceProfileService
+from ruoyi_car.service.recommend_cache import RecommendResultCache
+from ruoyi_car.service.recommend_config import RecommendConfig
 from ruoyi_car.service.view_service import ViewService
-from ruoyi_common.constant import ConfigConstants
 from ruoyi_common.exception import ServiceException
-from ruoyi_common.utils.base import LogUtil
+from ruoyi_common.utils.base import ExcelRowException, LogUtil
 from ruoyi_framework.descriptor.datascope import DataScope
-from ruoyi_system.service import SysConfigService
 
 
 class RecommendService:
     """用户推荐服务类"""
 
+    # 离线预计算每批处理的用户数
+    PRECOMPUTE_BATCH_SIZE = 500
+
     # --- 基础查询方法 ---
 
     @classmethod
@@ -36,6 +46,20 @@ class RecommendService:
         """
         return RecommendMapper.select_recommend_list(recommend)
 
+    @classmethod
+    @DataScope(dept=True, user=True)
+    def iter_recommend_list(cls, recommend: Recommend) -> Iterator[Recommend]:
+        """
+        流式查询用户推荐列表，用于导出
+
+        Args:
+            recommend (recommend): 用户推荐对象
+
+        Returns:
+            Iterator[recommend]: 用户推荐迭代器
+        """
+        return RecommendMapper.iter_recommend_list(recommend)
+
     @classmethod
     def select_recommend_by_id(cls, id: int) -> Optional[Recommend]:
         """
@@ -65,46 +89,52 @@ class RecommendService:
         return RecommendMapper.delete_recommend_by_ids(ids)
 
     @classmethod
-    def import_recommend(cls, recommend_list: List[Recommend], is_update: bool = False) -> str:
+    def import_recommend(cls, recommend_chunks: Iterable[List[Recommend]], is_update: bool = False) -> str:
         """
         导入用户推荐数据
         """
-        if not recommend_list:
-            raise ServiceException("导入用户推荐数据不能为空")
-
         success_count = 0
         fail_count = 0
         success_msg = ""
         fail_msg = ""
 
-        for recommend in recommend_list:
-            try:
-                display_value = recommend
-
-                display_value = getattr(recommend, "id", display_value)
-                existing = None
-                if recommend.id is not None:
-                    existing = RecommendMapper.select_recommend_by_id(recommend.id)
-                if existing:
-                    if is_update:
-                        result = RecommendMapper.update_recommend(recommend)
+        def resolve(recommend: Recommend, existing) -> Optional[str]:
+            if existing is not None and not is_update:
+                return "已存在"
+            return None
+
+        def fallback(recommend: Recommend, existing) -> Optional[str]:
+            if existing is not None:
+                result = RecommendMapper.update_recommend(recommend)
+            else:
+                result = RecommendMapper.insert_recommend(recommend)
+            return None if result > 0 else "操作失败"
+
+        try:
+            for recommend_list in recommend_chunks:
+                # 导入结果中显示的数据标识，写入前取值
+                display_values = [getattr(recommend, "id", recommend) for recommend in recommend_list]
+                # 按主键分批查询已存在的数据，每批一个事务批量新增、更新
+                results = RecommendMapper.BULK_UPSERT.run(recommend_list, resolve, fallback=fallback)
+                for display_value, result in zip(display_values, results):
+                    if result is None:
+                        success_count += 1
+                        success_msg += f"<br/> 第{success_count}条数据，操作成功：{display_value}"
+                    elif isinstance(result, Exception):
+                        fail_count += 1
+                        fail_msg += f"<br/> 第{fail_count}条数据，导入失败，原因：{result.__class__.__name__}"
+                        LogUtil.logger.error(f"导入用户推荐失败，原因：{result}")
                     else:
                         fail_count += 1
-                        fail_msg += f"<br/> 第{fail_count}条数据，已存在：{display_value}"
-                        continue
-                else:
-                    result = RecommendMapper.insert_recommend(recommend)
-
-                if result > 0:
-                    success_count += 1
-                    success_msg += f"<br/> 第{success_count}条数据，操作成功：{display_value}"
-                else:
-                    fail_count += 1
-                    fail_msg += f"<br/> 第{fail_count}条数据，操作失败：{display_value}"
-            except Exception as e:
-                fail_count += 1
-                fail_msg += f"<br/> 第{fail_count}条数据，导入失败，原因：{e.__class__.__name__}"
-                LogUtil.logger.error(f"导入用户推荐失败，原因：{e}")
+                        fail_msg += f"<br/> 第{fail_count}条数据，{result}：{display_value}"
+        except ExcelRowException as e:
+            # 数据行格式错误时停止读取，之前的数据块已经写入
+            fail_count += 1
+            fail_msg += f"<br/> 第{fail_count}条数据，导入中止：{e}"
+            LogUtil.logger.error(f"导入用户推荐中止，原因：{e}")
+
+        if success_count + fail_count == 0:
+            raise ServiceException("导入用户推荐数据不能为空")
 
         if fail_count > 0:
             if success_msg:
@@ -120,77 +150,65 @@ class RecommendService:
     def get_user_recommendations(cls, user_id: int, user_name: str = None,
                                  page_num: int = 1, page_size: int = 10) -> Dict:
         """
-        为指定用户自动生成/更新推荐模型
+        为指定用户自动生成/更新推荐模型，并分页返回推荐车系
 
         算法逻辑：
-        1. 获取用户最近N条的浏览和点赞记录
-        2. 对每条记录应用时间衰减权重和操作权重
-        3. 按六个维度聚合加权总分
-        4. 存储结果到Recommend表
+        1. 读取用户偏好画像（浏览和点赞记录按时间衰减、操作权重累加）
+        2. 按六个维度计算车系相似度，融合车系共现（协同过滤）分数后排序
+        3. 存储结果到Recommend表，同时写入推荐缓存
+        4. 分页从推荐缓存读取车系，按推荐顺序返回
 
         Returns:
-            Recommend: 生成或更新的推荐记录
+            Dict: 当前页车系列表和推荐总数
         """
         try:
-            # 第一页时检查是否需要生成/更新推荐模型
-            recommend_obj = Recommend()
+            # 第一页时检查是否需要生成/更新推荐模型，新生成的结果会同时写入推荐缓存
             LogUtil.logger.info(f"[推荐] 用户={user_id}, pageNum={page_num}, pageSize={page_size}")
             if page_num == 1:
                 should_generate = cls._should_generate_new_recommendations(user_id)
                 LogUtil.logger.info(f"[推荐] 用户={user_id}, 需要生成新推荐={should_generate}")
                 if should_generate:
                     # 需要生成模型
-                    recommend_obj = cls._generate_new_recommendations(user_id, user_name)
+                    cls._generate_new_recommendations(user_id, user_name)
                     LogUtil.logger.info(f"[推荐] 用户={user_id}, 新推荐生成完成")
-            if recommend_obj is None or recommend_obj.id is None:
-                recommend_obj = RecommendMapper.select_user_recommend_history(user_id)
-                LogUtil.logger.info(f"[推荐] 用户={user_id}, 从历史记录获取recommend_obj={recommend_obj}")
-            if not recommend_obj or not recommend_obj.content:
-                LogUtil.logger.info(f"用户 {user_id} 没有推荐记录")
-                return {'rows': [], 'total': 0}
-            content_data = json.loads(recommend_obj.content)
-            LogUtil.logger.debug(f"[推荐] 用户={user_id}, content_data={content_data}")
-            series_ids = content_data.get('series_ids', [])
-            total_count = content_data.get('total', len(series_ids))
-            # 确保数据格式正确
-            if not isinstance(series_ids, list):
-                LogUtil.logger.error(f"用户 {user_id} 的推荐内容格式错误")
-                return {'rows': [], 'total': 0}
 
-            # 分页处理
-            start_idx = (page_num - 1) * page_size
-            end_idx = start_idx + page_size
-            page_series_ids = series_ids[start_idx:end_idx]
+            page = RecommendResultCache.get_page(user_id, page_num, page_size)
+            if page is None:
+                # 缓存中没有推荐结果，从数据库最新的推荐记录恢复
+                recommend_obj = RecommendMapper.select_user_recommend_history(user_id)
+                LogUtil.logger.info(f"[推荐] 用户={user_id}, 从历史记录恢复推荐缓存")
+                if not recommend_obj or not recommend_obj.content:
+                    LogUtil.logger.info(f"用户 {user_id} 没有推荐记录")
+                    return {'rows': [], 'total': 0}
+                if RecommendResultCache.save(recommend_obj):
+                    page = RecommendResultCache.get_page(user_id, page_num, page_size)
+                if page is None:
+                    page = cls._page_from_content(user_id, recommend_obj.content, page_num, page_size)
+            page_series_ids, total_count = page
 
             if not page_series_ids:
                 LogUtil.logger.info(f"用户 {user_id} 没有推荐内容")
                 return {'rows': [], 'total': 0}
-            series_list = SeriesService.select_series_by_series_ids(page_series_ids)
-            result_list = []
-            for series in series_list:
-                series_data = {
-                    'id': series.id,
-                    'country': series.country,
-                    'brandName': series.brand_name,
-                    'image': series.image,
-                    'seriesName': series.series_name,
-                    'seriesId': series.series_id,
-                    'dealerPriceStr': series.dealer_price_str,
-                    'official_price_str': series.official_price_str,
-                    'cityTotalSales': series.city_total_sales,
-                    'monthTotalSales': series.month_total_sales,
-                    'modelType': series.model_type,
-                    'energyType': series.energy_type,
-                    'marketTime': series.market_time.strftime('%Y-%m-%d') if series.market_time else None,
-                    'overallScore': series.overall_score,
-                }
-                result_list.append(series_data)
-
+            result_list = RecommendResultCache.get_series_cards(page_series_ids)
             return {'rows': result_list, 'total': total_count}
         except Exception as e:
             LogUtil.logger.error(f"获取用户 {user_id} 推荐时出错: {e}")
             return {'rows': [], 'total': 0}
 
+    @classmethod
+    def _page_from_content(cls, user_id: int, content: str, page_num: int, page_size: int) -> Tuple[List[int], int]:
+        """
+        直接从推荐记录内容分页，推荐缓存不可用时使用
+        """
+        content_data = json.loads(content)
+        series_ids = content_data.get('series_ids', [])
+        # 确保数据格式正确
+        if not isinstance(series_ids, list):
+            LogUtil.logger.error(f"用户 {user_id} 的推荐内容格式错误")
+            return [], 0
+        start_idx = (page_num - 1) * page_size
+        return series_ids[start_idx:start_idx + page_size], content_data.get('total', len(series_ids))
+
     @classmethod
     def _should_generate_new_recommendations(cls, user_id: int) -> bool:
         """
@@ -207,6 +225,10 @@ class RecommendService:
             recommend = RecommendMapper.select_user_recommend_history(user_id)
             if recommend is None:
                 return True  # 没有推荐记录，需要生成
+            # 开启离线预计算后，已有推荐记录的用户由定时任务更新，请求时只读取结果
+            config = RecommendConfig.get()
+            if config.offline:
+                return False
 
             # 根据推荐记录创建时间，判断有多少条新纪录
             # 获取上次推荐的创建时间
@@ -216,10 +238,8 @@ class RecommendService:
             new_views = ViewService.select_user_views_after_time(user_id, last_recommend_time)
             # 查询在这个时间点之后的新点赞记录
             new_likes = LikeService.select_user_likes_after_time(user_id, last_recommend_time)
-            view_num_str = SysConfigService.select_config_by_key(ConfigConstants.CAR_VIEW_RECORD_NUM)
-            like_num_str = SysConfigService.select_config_by_key(ConfigConstants.CAR_LIKE_RECORD_NUM)
-            view_num = int(view_num_str) if view_num_str else 5
-            like_num = int(like_num_str) if like_num_str else 1
+            view_num = config.view_record_num if config.view_record_num is not None else 5
+            like_num = config.like_record_num if config.like_record_num is not None else 1
             if len(new_views) >= view_num or len(new_likes) >= like_num:
                 return True  # 新的浏览或点赞记录数量达到要求，需要生成新推荐
             else:
@@ -233,101 +253,160 @@ class RecommendService:
     def _generate_new_recommendations(cls, user_id, user_name: str) -> Optional[Recommend]:
         # ==================== 1. 配置参数 ====================
         now = datetime.now()
+        config = RecommendConfig.get()
 
-        # --- 六维度权重配置 ---
-        # 每个维度的重要程度
-        weights = {
-            "country": 5,  # 国家
-            "brand": 30,  # 品牌名
-            "model_type": 15,  # 车型
-            "energy_type": 6,  # 能源类型
-            "price": 21.0,  # 价格
-            "score": 1.0  # 综合分数
-        }
-
-        # --- 时间衰减配置 ---
-        # decay_factor: 衰减因子，每天乘以 0.95
-        time_decay_factor = 0.95
-        time_decay_factor_str = SysConfigService.select_config_by_key(ConfigConstants.CAR_TIME_DECAY_FACTOR)
-        time_decay_factor = float(time_decay_factor_str) if time_decay_factor_str else 0.95
-        weights_str = SysConfigService.select_config_by_key(ConfigConstants.CAE_MODEL_WEIGHT)
-        weights = json.loads(weights_str) if weights_str else weights
-        user_preference = {
-            "country": defaultdict(float),
-            "brand": defaultdict(float),
-            "model_type": defaultdict(float),
-            "energy_type": defaultdict(float),
-            "price": defaultdict(float),
-            "score": defaultdict(float)
-        }
-        overall_score_weight = {
-            "greater_than": 2,
-            "less_than": 0.5
-        },
-        overall_score_weight_str = SysConfigService.select_config_by_key(ConfigConstants.CAR_OVERALL_SCORE_WEIGHT)
-        overall_score_weight = json.loads(
-            overall_score_weight_str) if overall_score_weight_str else overall_score_weight
-        now = datetime.now()
-        # 推荐数
-        recommend_num_str = SysConfigService.select_config_by_key(ConfigConstants.CAR_RECOMMEND_NUM)
-        recommend_num = int(recommend_num_str) if recommend_num_str else 3000
-        like_score_str = SysConfigService.select_config_by_key(ConfigConstants.CAR_SCORE_LIKE)
-        ##转换成数值
-        like_score = float(like_score_str) if like_score_str else 15
-        view_score_str = SysConfigService.select_config_by_key(ConfigConstants.CAR_SCORE_VIEW)
-        ##转换成数值
-        view_score = float(view_score_str) if view_score_str else 1
-        # 价格范围
-        price_range = [100000, 200000, 300000, 500000, 1000000, 2000000]
-        price_range_str = SysConfigService.select_config_by_key(ConfigConstants.STATISTICS_PRICE_RANGE)
-        series_score = 2.5
-        series_score_str = SysConfigService.select_config_by_key(ConfigConstants.CAR_SCORE_SERIES_DEFAULT)
-        series_score = float(series_score_str) if series_score_str else series_score
-        if price_range_str:
-            try:
-                # 配置格式为 "8000,12000,20000,30000,40000"
-                price_range = [int(x.strip()) for x in price_range_str.split(',')]
-            except ValueError:
-                # 如果配置格式错误，使用默认值
-                price_range = [100000, 200000, 300000, 500000, 1000000, 2000000]
-            # ==================== 2. 获取历史数据 ====================
-            # 获取浏览记录
-            likes = []
-            views = []
-            series = []
+        # ==================== 2. 获取用户画像 ====================
         try:
-            view_num_str = SysConfigService.select_config_by_key(ConfigConstants.CAR_VIEW_RECORD_NUM)
-            like_num_str = SysConfigService.select_config_by_key(ConfigConstants.CAR_LIKE_RECORD_NUM)
-            view_num = int(view_num_str) if view_num_str else 100
-            like_num = int(like_num_str) if like_num_str else 30
-            # 查询最新的浏览点赞记录
-            views = ViewService.select_user_views_by_user_num_new(user_id, view_num)
-            likes = LikeService.select_user_likes_by_user_num_new(user_id, like_num)
-            # 查询所有的系列
-            series = SeriesMapper.select_all_series()
+            # 读取增量维护的用户偏好画像，衰减在读取时按当前日期计算，不再扫描浏览点赞记录
+            user_preference, view_count, like_count = PreferenceProfileService.get_profile(user_id, now)
+            # 车系目录使用进程内快照，车系数据变更后自动重新加载
+            catalog = SeriesCatalog.get_snapshot()
         except Exception as e:
             LogUtil.logger.warning(f"获取数据失败 {user_id}: {e}")
             return
+        # 用户近期车系的共现近邻分数，融合权重为 0 时不读取
+        cf_scores = ItemSimilarityService.user_cf_scores(user_preference, config.cf_weight)
 
         # ==================== 3. 生成模型 ====================
-        recommend = cls.generate_user_recommendation(
-            weights,
-            user_preference,
-            time_decay_factor,
-            recommend_num,
-            series,
-            views,
-            likes,
-            series_score,
-            like_score,
-            view_score,
-            price_range,
-            now
-        )
+        recommend = cls._build_user_recommendation(config, catalog, user_preference, view_count, like_count, now,
+                                                   cf_scores)
         recommend.user_id = user_id
         recommend.user_name = user_name
         recommend.create_time = now
         cls.insert_recommend(recommend)
+        RecommendResultCache.save(recommend)
+        return recommend
+
+    @classmethod
+    def _build_user_recommendation(cls, config: RecommendConfig, catalog: SeriesCatalogSnapshot,
+                                   user_preference: Dict[str, Dict[str, float]],
+                                   view_count: int, like_count: int, now: datetime,
+                                   cf_scores: Dict[int, float] = None) -> Recommend:
+        """
+        根据用户画像生成推荐模型，不访问数据库，可在子进程中执行
+        """
+        return cls.generate_user_recommendation(
+            config.weights,
+            user_preference,
+            config.time_decay_factor,
+            config.recommend_num,
+            list(catalog.series_list),
+            [],
+            [],
+            config.series_score,
+            config.like_score,
+            config.view_score,
+            config.price_range,
+            now,
+            catalog=catalog,
+            view_count=view_count,
+            like_count=like_count,
+            cf_scores=cf_scores
+        )
+
+    @classmethod
+    def precompute_recommendations(cls, max_workers: int = None) -> Dict:
+        """
+        离线批量预计算推荐
+
+        查询上次推荐之后有新浏览或新点赞的用户，按批读取用户画像，在进程池中并行打分，
+        每批结果一次性写回推荐表。请求时只需读取最新的推荐记录。
+
+        Args:
+            max_workers (int): 进程数，默认使用CPU核数
+        Returns:
+            Dict: 执行结果统计
+        """
+        start_time = time.time()
+        now = datetime.now()
+        users = RecommendMapper.select_users_with_new_activity()
+        LogUtil.logger.info(f"[推荐预计算] 需要更新推荐的用户数={len(users)}")
+        if not users:
+            return {"users": 0, "saved": 0, "elapsed": round(time.time() - start_time, 2)}
+
+        config = RecommendConfig.get()
+        catalog = SeriesCatalog.get_snapshot()
+        # 在主进程中完成目录编码，编码结果随目录快照传给子进程
+        catalog.engine(config.price_range, cls._get_price_range_label)
+
+        max_workers = min(max_workers or os.cpu_count() or 1, len(users))
+        executor = None
+        if max_workers > 1:
+            # 定时任务进程是多线程的，fork 会把其他线程持有的锁、数据库和 Redis 连接复制到子进程，
+            # 因此用 spawn 启动子进程，子进程创建自己的应用上下文与连接
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker_process,
+                initargs=(pickle.dumps((_init_precompute_worker, (catalog, config))),)
+            )
+        else:
+            _init_precompute_worker(catalog, config)
+
+        saved_count = 0
+        failed_count = 0
+        try:
+            for offset in range(0, len(users), cls.PRECOMPUTE_BATCH_SIZE):
+                batch_users = users[offset:offset + cls.PRECOMPUTE_BATCH_SIZE]
+                tasks = []
+                for user_id, user_name in batch_users:
+                    try:
+                        user_preference, view_count, like_count = PreferenceProfileService.get_profile(user_id, now)
+                    except Exception as e:
+                        failed_count += 1
+                        LogUtil.logger.error(f"[推荐预计算] 读取用户 {user_id} 画像失败: {e}")
+                        continue
+                    tasks.append((user_id, user_name, user_preference, view_count, like_count, now))
+                cf_scores_list = cls._batch_cf_scores([task[2] for task in tasks], config.cf_weight)
+                tasks = [task + (cf_scores,) for task, cf_scores in zip(tasks, cf_scores_list)]
+
+                if executor is not None:
+                    chunksize = max(1, len(tasks) // (max_workers * 4))
+                    results = list(executor.map(_precompute_user_recommendation, tasks, chunksize=chunksize))
+                else:
+                    results = [_precompute_user_recommendation(task) for task in tasks]
+
+                recommend_list = []
+                for user_id, user_name, content, model_info in results:
+                    if content is None:
+                        # 计算失败时 model_info 为失败原因
+                        failed_count += 1
+                        LogUtil.logger.error(f"[推荐预计算] 计算用户 {user_id} 推荐失败: {model_info}")
+                        continue
+                    recommend_list.append(Recommend(user_id=user_id, user_name=user_name, content=content,
+                                                    model_info=model_info, create_time=now))
+                batch_saved = RecommendMapper.insert_recommend_batch(recommend_list)
+                if batch_saved:
+                    RecommendResultCache.save_batch(recommend_list)
+                saved_count += batch_saved
+                failed_count += len(recommend_list) - batch_saved
+                LogUtil.logger.info(
+                    f"[推荐预计算] 进度 {offset + len(batch_users)}/{len(users)}，本批写入 {batch_saved} 条")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        elapsed = round(time.time() - start_time, 2)
+        LogUtil.logger.info(f"[推荐预计算] 完成，用户数={len(users)}，写入={saved_count}，失败={failed_count}，"
+                            f"进程数={max_workers if executor is not None else 1}，耗时={elapsed}s")
+        return {"users": len(users), "saved": saved_count, "failed": failed_count, "elapsed": elapsed}
+
+    @classmethod
+    def _batch_cf_scores(cls, preference_list: List[Dict[str, Dict[str, float]]],
+                         cf_weight: float) -> List[Dict[int, float]]:
+        """
+        批量计算车系共现分数，整批用户的车系近邻一次读取
+        """
+        if cf_weight <= 0:
+            return [{} for _ in preference_list]
+        weights_list = [ItemSimilarityService.user_series_weights(preference) for preference in preference_list]
+        try:
+            neighbors = ItemSimilarityService.get_neighbors(
+                sorted(set(series_id for series_weights in weights_list for series_id in series_weights)))
+        except Exception as e:
+            LogUtil.logger.warning(f"[推荐预计算] 读取车系近邻失败: {e}")
+            neighbors = {}
+        return [ItemSimilarityService.blend_scores(series_weights, neighbors, cf_weight)
+                for series_weights in weights_list]
 
     @classmethod
     def generate_user_recommendation(cls,
@@ -343,7 +422,11 @@ class RecommendService:
                                      view_score: float = 5,
                                      price_range: List[int] = None,
                                      now: datetime = None,
-                                     overall_score_weight: Dict[str, float] = None
+                                     overall_score_weight: Dict[str, float] = None,
+                                     catalog: SeriesCatalogSnapshot = None,
+                                     view_count: int = None,
+                                     like_count: int = None,
+                                     cf_scores: Dict[int, float] = None
                                      ) -> Optional[Recommend]:
 
         """
@@ -361,13 +444,22 @@ class RecommendService:
             like_score 点赞分数
             series_score 车系默认维度分数
             overall_score_weight 维度分数与综合分数比较的权重配置
+            catalog 车系目录快照，传入时直接使用快照上的平均分和打分引擎
+            view_count 浏览记录数，使用偏好画像时传入，默认取浏览记录列表长度
+            like_count 点赞记录数，使用偏好画像时传入，默认取点赞记录列表长度
+            cf_scores 车系ID -> 车系共现分数（已乘融合权重），与属性相似度相加
 
 
         Returns:
             Optional[Recommend]: 生成的推荐模型
         """
         # 1、计算各个维度的平均分数
-        series_avg_score = cls._calculate_avg_score(series_list, series_score)
+        if catalog is not None:
+            series_avg_score = catalog.avg_scores(series_score)
+            engine = catalog.engine(price_range, cls._get_price_range_label)
+        else:
+            series_avg_score = cls._calculate_avg_score(series_list, series_score)
+            engine = None
         # 2、计算模型分数
         user_preference = cls._calculate_user_preference(user_views, user_likes, user_preference, time_decay_factor,
                                                          series_avg_score, like_score, view_score, price_range, now,
@@ -377,7 +469,9 @@ class RecommendService:
                                                            series_score,
                                                            series_avg_score,
                                                            price_range,
-                                                           recommend_num)
+                                                           recommend_num,
+                                                           engine,
+                                                           cf_scores)
 
         # 4、构建结果集，推荐模型
         # 从所有的推荐结果拿到所有的车系series_id
@@ -395,7 +489,8 @@ class RecommendService:
         # 预先计算各维度的权重总和
         pref_totals = {dim: sum(prefs.values()) for dim, prefs in user_preference.items() if not dim.startswith('_')}
         for dimension, prefs in user_preference.items():
-            if dimension.startswith('_'):
+            # series 维度只用于车系共现推荐，不展示在偏好模型中
+            if dimension.startswith('_') or dimension == 'series':
                 continue
             total_weight = pref_totals.get(dimension, 0)
             if total_weight > 0:
@@ -415,8 +510,8 @@ class RecommendService:
                 "score": float(weights.get('score', 5.0)),  # 综合分数
             },
             'timeDecayFactor': float(time_decay_factor),
-            'viewRecordsCount': len(user_views),
-            'likeRecordsCount': len(user_likes),
+            'viewRecordsCount': view_count if view_count is not None else len(user_views),
+            'likeRecordsCount': like_count if like_count is not None else len(user_likes),
             'total': len(series_ids),
             'createTime': now.strftime("%Y-%m-%d %H:%M:%S"),
             'model': processed_preference
@@ -585,7 +680,9 @@ class RecommendService:
                                 weights: Dict[str, float] = None,
                                 series_score: float = 0.0,
                                 series_avg_score: dict[str, float] = None,
-                                price_range: List[int] = None, recommend_num: int = 3000) -> \
+                                price_range: List[int] = None, recommend_num: int = 3000,
+                                engine: SeriesScoringEngine = None,
+                                cf_scores: Dict[int, float] = None) -> \
             List[
                 Tuple[Series, float]]:
         """
@@ -595,23 +692,17 @@ class RecommendService:
             user_preference (Dict[str, Dict[str, float]]): 用户偏好
             weights 权重
             series_score 车系维度默认分数
+            engine 已编码的打分引擎，为空时按传入的车型列表现场编码
+            cf_scores 车系共现分数，与属性相似度相加
         Returns:
             List[Tuple[Series, float]]: 车型得分列表
         """
-        candidates = []
-        # 预计算各维度权重总和，用于 _calculate_dimension_similarity
-        pref_totals = {k: sum(v.values()) for k, v in user_preference.items() if not k.startswith('_')}
-        for series in series:
-            # 计算相似度分数
-            similarity_score = cls._calculate_similarity_score(series, user_preference, weights,
-                                                               series_score, series_avg_score,
-                                                               price_range)
-            if similarity_score > 0:
-                candidates.append((series, similarity_score))
-        # 按相似度排序
-        candidates.sort(key=lambda x: x[1], reverse=True)
+        # 车系目录编码为矩阵后统一打分，结果与逐条调用 _calculate_similarity_score 的排名一致
+        if engine is None:
+            engine = SeriesScoringEngine(series, price_range, cls._get_price_range_label)
         min_score_threshold = 1  # 相似度最低阈值
-        filtered_series_scores = [item for item in candidates if item[1] >= min_score_threshold][:recommend_num]
+        filtered_series_scores = engine.rank(user_preference, weights, recommend_num, min_score_threshold,
+                                             extra_scores=cf_scores)
         if not filtered_series_scores:
             print("没有找到电影")
             return []
@@ -856,3 +947,31 @@ class RecommendService:
                 avg_scores[field_name] = series_score
 
         return avg_scores
+
+
+# 离线预计算子进程中的车系目录快照与推荐配置，由进程池初始化函数设置
+_precompute_context: Dict = {}
+
+
+def _init_precompute_worker(catalog: SeriesCatalogSnapshot, config: RecommendConfig) -> None:
+    """
+    离线预计算进程初始化，每个子进程只接收一次目录快照与配置
+    """
+    _precompute_context["catalog"] = catalog
+    _precompute_context["config"] = config
+
+
+def _precompute_user_recommendation(task: Tuple) -> Tuple[int, str, Optional[str], str]:
+    """
+    在子进程中为单个用户生成推荐，只做计算，不访问数据库和 Redis
+    单个用户计算失败时返回的推荐内容为 None、模型信息为失败原因，不影响同批其他用户
+    """
+    user_id, user_name, user_preference, view_count, like_count, now, cf_scores = task
+    try:
+        recommend = RecommendService._build_user_recommendation(
+            _precompute_context["config"], _precompute_context["catalog"],
+            user_preference, view_count, like_count, now, cf_scores
+        )
+    except Exception as e:
+        return user_id, user_name, None, f"{e.__class__.__name__}: {e}"
+    return user_id, user_name, recommend.content, recommend.model_info
@@ -0,0 +1,492 @@
+# -*- coding: utf-8 -*-
+# @Author  : YY
+# @FileName: sales_analytics_engine.py
+# @Time    : 2026-02-18 10:26:37
+
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ruoyi_admin.ext import redis_cache
+from ruoyi_car.domain.statistics.dto import CarStatisticsRequest
+from ruoyi_car.domain.statistics.po.statistics_po import MapStatisticsPo, PriceStatisticsPo, StatisticsPo, \
+    SalesPredictPo
+from ruoyi_car.mapper.sales_mapper import SalesMapper
+from ruoyi_car.mapper.sales_rollup_mapper import SalesRollupMapper
+from ruoyi_car.mapper.statistics_mapper import StatisticsMapper
+from ruoyi_common.constant import ConfigConstants, StatisticsConstants
+from ruoyi_common.utils import StringUtil
+from ruoyi_common.utils.base import LogUtil
+from ruoyi_system.service import SysConfigService
+
+
+class _Dictionary:
+    """
+    字典编码：取值 <-> 编码，NULL 和空字符串各占一个编码，与 SQL 分组结果一致
+    """
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self, values: Sequence = ()):
+        self.values = list(values)
+        self.codes = {value: code for code, value in enumerate(self.values)}
+
+    def encode(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+    def lookup(self, predicate) -> np.ndarray:
+        """
+        按取值计算条件，返回以编码为下标的布尔表
+        """
+        return np.fromiter((bool(predicate(value)) for value in self.values), dtype=bool, count=len(self.values))
+
+    def copy(self) -> "_Dictionary":
+        return _Dictionary(self.values)
+
+
+class SalesColumnStore:
+    """
+    销量数据列式只读快照
+
+    每个维度按字典编码保存为 int32 编码数组，另保存 int32 月份、float64 价格（NULL 为 NaN）、int64 销量，
+    省份由省市编码换算得到，不单独保存。
+    查询条件换算为布尔掩码，分组键按各维度编码混合进制拼接后用 bincount 汇总。
+    快照创建后不再修改，所有请求线程共享；增量刷新时生成新快照整体替换。
+    """
+
+    # 字典编码的维度
+    DIMENSIONS = ("month", "city_full_name", "country", "brand_name", "model_type", "energy_type",
+                  "series_id", "min_price")
+    # 月份为 NULL 时的取值，按月份范围过滤时排除
+    NULL_MONTH = np.iinfo(np.int32).min
+    # 分组键取值空间不超过该值时直接 bincount，否则先 unique 压缩
+    DENSE_GROUP_LIMIT = 1 << 22
+
+    _COLUMN_INDEX = {column: index for index, column in enumerate(SalesMapper.ANALYTICS_COLUMNS)}
+
+    def __init__(self, generation: int, offset: int, dictionaries: Dict[str, _Dictionary],
+                 ids: np.ndarray, codes: Dict[str, np.ndarray], sales: np.ndarray):
+        # 数据代数、已应用的变更日志长度
+        self.generation = generation
+        self.offset = offset
+        self.dictionaries = dictionaries
+        self.ids = ids
+        self.codes = codes
+        self.sales = sales
+        # 省份字典随快照重新生成：省市 -> 省份编码
+        provinces = _Dictionary()
+        province_table = np.array([provinces.encode(SalesRollupMapper.province_of(value))
+                                   for value in dictionaries["city_full_name"].values], dtype=np.int32)
+        dictionaries["province"] = provinces
+        codes["province"] = province_table[codes["city_full_name"]]
+        month_table = np.array([int(value) if value is not None else self.NULL_MONTH
+                                for value in dictionaries["month"].values], dtype=np.int32)
+        price_table = np.array([float(value) if value is not None else np.nan
+                                for value in dictionaries["min_price"].values], dtype=np.float64)
+        self.month = month_table[codes["month"]]
+        self.price = price_table[codes["min_price"]]
+
+    @property
+    def size(self) -> int:
+        return int(self.ids.size)
+
+    @classmethod
+    def load(cls, generation: int, offset: int, batches) -> "SalesColumnStore":
+        """
+        从分批读取的销量数据构建快照
+
+        Args:
+            generation (int): 数据代数
+            offset (int): 已应用的变更日志长度
+            batches: SalesMapper.iter_sales_analytics_rows 的结果
+        """
+        dictionaries = {dimension: _Dictionary() for dimension in cls.DIMENSIONS}
+        parts = [cls._encode(rows, dictionaries) for rows in batches if rows]
+        return cls._assemble(generation, offset, dictionaries, parts)
+
+    def merge(self, generation: int, offset: int, changed_ids: Sequence[int], rows: List[tuple]) -> "SalesColumnStore":
+        """
+        应用一批变更生成新快照：变更ID对应的旧行全部移除，再追加当前仍存在的行
+
+        Args:
+            generation (int): 数据代数
+            offset (int): 应用后的变更日志长度
+            changed_ids (Sequence[int]): 变更（新增、修改、删除）的销量ID
+            rows (List[tuple]): 变更ID中仍存在的销量数据
+        """
+        # 字典只追加不修改，旧快照的编码在新快照中仍然有效
+        dictionaries = {dimension: self.dictionaries[dimension].copy() for dimension in self.DIMENSIONS}
+        keep = ~np.isin(self.ids, np.asarray(changed_ids, dtype=np.int64))
+        current = {
+            "ids": self.ids[keep],
+            "sales": self.sales[keep],
+            **{dimension: self.codes[dimension][keep] for dimension in self.DIMENSIONS},
+        }
+        parts = [current]
+        if rows:
+            parts.append(self._encode(rows, dictionaries))
+        return self._assemble(generation, offset, dictionaries, parts)
+
+    @classmethod
+    def _encode(cls, rows: List[tuple], dictionaries: Dict[str, _Dictionary]) -> Dict[str, np.ndarray]:
+        part = {
+            "ids": np.fromiter((row[cls._COLUMN_INDEX["id"]] for row in rows), dtype=np.int64, count=len(rows)),
+            "sales": np.fromiter((int(row[cls._COLUMN_INDEX["sales"]] or 0) for row in rows),
+                                 dtype=np.int64, count=len(rows)),
+        }
+        for dimension in cls.DIMENSIONS:
+            index = cls._COLUMN_INDEX[dimension]
+            encode = dictionaries[dimension].encode
+            part[dimension] = np.fromiter((encode(row[index]) for row in rows), dtype=np.int32, count=len(rows))
+        return part
+
+    @classmethod
+    def _assemble(cls, generation: int, offset: int, dictionaries: Dict[str, _Dictionary],
+                  parts: List[Dict[str, np.ndarray]]) -> "SalesColumnStore":
+        def concat(name, dtype):
+            arrays = [part[name] for part in parts]
+            return np.concatenate(arrays) if arrays else np.empty(0, dtype=dtype)
+
+        ids = concat("ids", np.int64)
+        sales = concat("sales", np.int64)
+        codes = {dimension: concat(dimension, np.int32) for dimension in cls.DIMENSIONS}
+        # 保持按ID有序，增量追加的通常是新ID，无需重新排序
+        if ids.size > 1 and np.any(ids[1:] < ids[:-1]):
+            order = np.argsort(ids, kind="stable")
+            ids, sales = ids[order], sales[order]
+            codes = {dimension: array[order] for dimension, array in codes.items()}
+        return cls(generation, offset, dictionaries, ids, codes, sales)
+
+    def _equals(self, dimension: str, value) -> np.ndarray:
+        code = self.dictionaries[dimension].codes.get(value)
+        if code is None:
+            return np.zeros(self.size, dtype=bool)
+        return self.codes[dimension] == code
+
+    def mask(self, request: CarStatisticsRequest, query_month: bool = True) -> np.ndarray:
+        """
+        查询条件 -> 布尔掩码，条件含义与 StatisticsMapper.init_query 一致
+        """
+        mask = np.ones(self.size, dtype=bool)
+        # 开始时间、结束时间
+        if query_month and (request.start_time or request.end_time):
+            mask &= self.month != self.NULL_MONTH
+            if request.start_time:
+                mask &= self.month >= request.start_time
+            if request.end_time:
+                mask &= self.month <= request.end_time
+        # 国家、品牌名、车型、能源类型
+        for dimension in ("country", "brand_name", "model_type", "energy_type"):
+            value = getattr(request, dimension)
+            if value:
+                mask &= self._equals(dimension, value)
+        # 系列名称
+        if request.series_id:
+            try:
+                mask &= self._equals("series_id", int(request.series_id))
+            except (TypeError, ValueError):
+                mask[:] = False
+        # 价格，NaN 参与比较结果为 False，与 SQL 中 NULL 不满足条件一致
+        if request.max_price is not None:
+            mask &= self.price <= request.max_price
+        if request.min_price is not None:
+            mask &= self.price >= request.min_price
+        # 省份或城市（精确匹配）
+        if request.address:
+            mask &= self._equals("city_full_name" if ' ' in request.address else "province", request.address)
+        return mask
+
+    def aggregate(self, request: CarStatisticsRequest, group_by: Sequence[str],
+                  query_month: bool = True) -> List[tuple]:
+        """
+        按查询条件过滤后分组求销量合计
+
+        Args:
+            request (CarStatisticsRequest): 统计查询条件
+            group_by (Sequence[str]): 分组维度，DIMENSIONS 中的字段或 province
+            query_month (bool): 是否按月份范围过滤
+        Returns:
+            List[tuple]: (销量合计, 各分组维度取值...)，没有匹配数据时为空列表
+        """
+        rows = np.flatnonzero(self.mask(request, query_month))
+        if rows.size == 0:
+            return []
+        cardinalities = [len(self.dictionaries[dimension].values) for dimension in group_by]
+        keys = np.zeros(rows.size, dtype=np.int64)
+        for dimension, cardinality in zip(group_by, cardinalities):
+            keys = keys * cardinality + self.codes[dimension][rows]
+        key_space = int(np.prod(cardinalities, dtype=np.int64))
+        weights = self.sales[rows]
+        if key_space <= min(self.DENSE_GROUP_LIMIT, 8 * rows.size):
+            groups = np.flatnonzero(np.bincount(keys, minlength=key_space))
+            sums = np.bincount(keys, weights=weights, minlength=key_space)[groups]
+        else:
+            groups, inverse = np.unique(keys, return_inverse=True)
+            sums = np.bincount(inverse.ravel(), weights=weights, minlength=groups.size)
+
+        # 分组键按混合进制还原为各维度取值
+        columns = []
+        remaining = groups
+        for dimension, cardinality in zip(reversed(group_by), reversed(cardinalities)):
+            remaining, codes = np.divmod(remaining, cardinality)
+            values = self.dictionaries[dimension].values
+            columns.append([values[code] for code in codes.tolist()])
+        columns.reverse()
+        return list(zip(np.rint(sums).astype(np.int64).tolist(), *columns))
+
+
+class SalesAnalyticsEngine:
+    """
+    内存列式统计引擎
+
+    进程内加载一次 tb_sales 为 SalesColumnStore，统计查询在内存中计算，方法与返回值同 StatisticsMapper。
+    销量新增、修改、删除、导入后把变更的销量ID追加到 Redis 变更日志，各进程每次访问读取一次
+    （代数, 日志长度），只按日志中新增的ID回查数据库增量刷新；日志过长时清空并递增代数，各进程全量重新加载。
+    引擎出错时改为查询数据库。
+    """
+
+    # 变更日志超过该长度时清空并递增代数
+    CHANGE_LOG_LIMIT = 200000
+    # 每次写入变更日志的ID数
+    CHANGE_LOG_PUSH_BATCH = 1000
+    # 增量刷新每次回查数据库的ID数
+    REFRESH_QUERY_BATCH = 1000
+    # 变更ID数超过快照行数的该比例时直接全量重新加载
+    FULL_RELOAD_RATIO = 0.2
+
+    _store: Optional[SalesColumnStore] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def enabled(cls) -> bool:
+        """
+        是否开启内存列式统计引擎
+        """
+        try:
+            return StringUtil.to_bool(SysConfigService.select_config_by_key(ConfigConstants.STATISTICS_MEMORY_ENGINE))
+        except Exception as e:
+            LogUtil.logger.warning(f"[内存统计] 读取开关失败，使用数据库统计: {e}")
+            return False
+
+    @classmethod
+    def get_store(cls) -> SalesColumnStore:
+        """
+        获取当前销量快照，数据有变更时先刷新
+
+        Returns:
+            SalesColumnStore: 销量快照
+        """
+        state = cls._current_state()
+        store = cls._store
+        if store is not None and (state is None or cls._is_current(store, state)):
+            return store
+        with cls._lock:
+            # 等待锁期间可能已被其他线程刷新，重新读取一次状态
+            state = cls._current_state()
+            store = cls._store
+            if store is not None and (state is None or cls._is_current(store, state)):
+                return store
+            generation, length = state or (0, 0)
+            if store is None or store.generation != generation:
+                store = cls._reload(generation, length)
+            else:
+                store = cls._refresh(store, generation, length)
+            cls._store = store
+            return store
+
+    @classmethod
+    def _reload(cls, generation: int, length: int) -> SalesColumnStore:
+        # 先读状态再加载数据，加载期间的变更在下次访问时重放，按ID回查结果与重放顺序无关
+        store = SalesColumnStore.load(generation, length, SalesMapper.iter_sales_analytics_rows())
+        LogUtil.logger.info(f"[内存统计] 加载销量快照，代数={generation}，销量数={store.size}")
+        return store
+
+    @classmethod
+    def _refresh(cls, store: SalesColumnStore, generation: int, length: int) -> SalesColumnStore:
+        changed_ids = sorted({int(value) for value in redis_cache.lrange(
+            StatisticsConstants.SALES_ANALYTICS_CHANGE_LOG_KEY, store.offset, length - 1)})
+        if len(changed_ids) > store.size * cls.FULL_RELOAD_RATIO:
+            return cls._reload(generation, length)
+        rows = []
+        for start in range(0, len(changed_ids), cls.REFRESH_QUERY_BATCH):
+            rows.extend(SalesMapper.select_sales_analytics_rows_by_ids(
+                changed_ids[start:start + cls.REFRESH_QUERY_BATCH]))
+        LogUtil.logger.info(f"[内存统计] 增量刷新销量快照，变更={len(changed_ids)}，仍存在={len(rows)}")
+        return store.merge(generation, length, changed_ids, rows)
+
+    @classmethod
+    def _is_current(cls, store: SalesColumnStore, state: Tuple[int, int]) -> bool:
+        generation, length = state
+        return store.generation == generation and store.offset >= length
+
+    @classmethod
+    def _current_state(cls) -> Optional[Tuple[int, int]]:
+        """
+        一次往返读取（代数, 变更日志长度），Redis 不可用时返回 None，继续使用本进程已有快照
+        """
+        try:
+            pipe = redis_cache.pipeline()
+            pipe.get(StatisticsConstants.SALES_ANALYTICS_GENERATION_KEY)
+            pipe.llen(StatisticsConstants.SALES_ANALYTICS_CHANGE_LOG_KEY)
+            generation, length = pipe.execute()
+        except Exception as e:
+            LogUtil.logger.warning(f"[内存统计] 读取变更状态失败: {e}")
+            return None
+        return int(generation) if generation else 0, int(length or 0)
+
+    @classmethod
+    def notify_changed(cls, ids: Sequence[int]) -> None:
+        """
+        销量数据变更后记录变更的销量ID，各进程在下次访问时增量刷新
+
+        Args:
+            ids (Sequence[int]): 新增、修改、删除的销量ID
+        """
+        ids = [int(value) for value in ids if value is not None]
+        if not ids:
+            return
+        try:
+            pipe = redis_cache.pipeline()
+            for start in range(0, len(ids), cls.CHANGE_LOG_PUSH_BATCH):
+                pipe.rpush(StatisticsConstants.SALES_ANALYTICS_CHANGE_LOG_KEY,
+                           *ids[start:start + cls.CHANGE_LOG_PUSH_BATCH])
+            length = pipe.execute()[-1]
+            if length > cls.CHANGE_LOG_LIMIT:
+                pipe = redis_cache.pipeline()
+                pipe.delete(StatisticsConstants.SALES_ANALYTICS_CHANGE_LOG_KEY)
+                pipe.incr(StatisticsConstants.SALES_ANALYTICS_GENERATION_KEY)
+                pipe.execute()
+        except Exception as e:
+            LogUtil.logger.error(f"[内存统计] 记录销量变更失败: {e}")
+            # 本进程直接丢弃快照，即使 Redis 不可用也不会继续使用旧数据
+            cls._store = None
+
+    @classmethod
+    def select_sales_map_statistics_raw(cls, request: CarStatisticsRequest) -> List[MapStatisticsPo]:
+        """
+        销售地图销量分析，同 StatisticsMapper.select_sales_map_statistics_raw
+        """
+        try:
+            rows = cls.get_store().aggregate(request, ("city_full_name", "month"))
+            return [
+                MapStatisticsPo(
+                    value=value,
+                    name=name if name is not None else '',
+                    month=int(month) if month else 0
+                )
+                for value, name, month in rows
+            ]
+        except Exception as e:
+            LogUtil.logger.error(f"[内存统计] 销售地图统计出错，改为查询数据库: {e}")
+            return StatisticsMapper.select_sales_map_statistics_raw(request)
+
+    @classmethod
+    def select_price_sales_statistics(cls, request: CarStatisticsRequest,
+                                      price_range: List[int] = None) -> List[PriceStatisticsPo]:
+        """
+        价格销售信息数据分析，同 StatisticsMapper.select_price_sales_statistics，price 始终为原始价格
+        """
+        try:
+            rows = cls.get_store().aggregate(request, ("city_full_name", "min_price", "month"))
+            return [
+                PriceStatisticsPo(
+                    address=str(address) if address else '',
+                    price=float(price) if price else 0.0,
+                    value=int(value) if value else 0,
+                    month=int(month) if month else 0
+                )
+                for value, address, price, month in rows
+            ]
+        except Exception as e:
+            LogUtil.logger.error(f"[内存统计] 价格销售统计出错，改为查询数据库: {e}")
+            return StatisticsMapper.select_price_sales_statistics(request, price_range)
+
+    @classmethod
+    def energy_type_sales_statistics(cls, request: CarStatisticsRequest) -> List[StatisticsPo]:
+        """
+        能源类型销售统计，同 StatisticsMapper.energy_type_sales_statistics
+        """
+        return cls._dimension_statistics(request, "energy_type", StatisticsMapper.energy_type_sales_statistics)
+
+    @classmethod
+    def brand_sales_statistics(cls, request: CarStatisticsRequest) -> List[StatisticsPo]:
+        """
+        品牌销售统计，同 StatisticsMapper.brand_sales_statistics
+        """
+        return cls._dimension_statistics(request, "brand_name", StatisticsMapper.brand_sales_statistics)
+
+    @classmethod
+    def country_sales_statistics(cls, request: CarStatisticsRequest) -> List[StatisticsPo]:
+        """
+        国家销售统计，同 StatisticsMapper.country_sales_statistics
+        """
+        return cls._dimension_statistics(request, "country", StatisticsMapper.country_sales_statistics)
+
+    @classmethod
+    def model_type_sales_statistics(cls, request: CarStatisticsRequest) -> List[StatisticsPo]:
+        """
+        车型销售统计，同 StatisticsMapper.model_type_sales_statistics
+        """
+        return cls._dimension_statistics(request, "model_type", StatisticsMapper.model_type_sales_statistics)
+
+    @classmethod
+    def series_sales_statistics(cls, request: CarStatisticsRequest) -> List[StatisticsPo]:
+        """
+        车系销售统计，同 StatisticsMapper.series_sales_statistics
+        """
+        try:
+            rows = cls.get_store().aggregate(request, ("series_id", "city_full_name", "month"))
+            return [
+                StatisticsPo(
+                    value=int(value) if value else 0,
+                    name=str(series_id) if series_id else 0,
+                    month=int(month) if month else 0,
+                    address=str(address) if address else ''
+                )
+                for value, series_id, address, month in rows
+            ]
+        except Exception as e:
+            LogUtil.logger.error(f"[内存统计] 车系销售统计出错，改为查询数据库: {e}")
+            return StatisticsMapper.series_sales_statistics(request)
+
+    @classmethod
+    def sales_predict_statistics(cls, request: CarStatisticsRequest) -> List[SalesPredictPo]:
+        """
+        每个省份每个月的销量，不按月份范围过滤，同 StatisticsMapper.sales_predict_statistics
+        """
+        try:
+            rows = cls.get_store().aggregate(request, ("province", "month"), query_month=False)
+            return [
+                SalesPredictPo(
+                    value=float(value) if value else 0,
+                    address=str(address) if address else '',
+                    month=int(month) if month else 0
+                )
+                for value, address, month in rows
+            ]
+        except Exception as e:
+            LogUtil.logger.error(f"[内存统计] 销售预测统计出错，改为查询数据库: {e}")
+            return StatisticsMapper.sales_predict_statistics(request)
+
+    @classmethod
+    def _dimension_statistics(cls, request: CarStatisticsRequest, dimension: str, fallback) -> List[StatisticsPo]:
+        try:
+            rows = cls.get_store().aggregate(request, (dimension, "city_full_name", "month"))
+            return [
+                StatisticsPo(
+                    value=int(value) if value else 0,
+                    name=str(name) if name else '',
+                    month=int(month) if month else 0,
+                    address=str(address) if address else ''
+                )
+                for value, name, address, month in rows
+            ]
+        except Exception as e:
+            LogUtil.logger.error(f"[内存统计] {dimension} 销售统计出错，改为查询数据库: {e}")
+            return fallback(request)
@@ -3,21 +3,26 @@
 # @FileName: sales_service.py
 # @Time    : 2026-01-23 20:21:54
 import time
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 from datetime import datetime
 
 from ruoyi_common.exception import ServiceException
-from ruoyi_common.utils.base import LogUtil
+from ruoyi_common.utils.base import ExcelRowException, LogUtil
 from ruoyi_common.utils.security_util import get_username
-from ruoyi_car.domain.entity import Sales
+from ruoyi_car.domain.entity import Sales, Series
 from ruoyi_car.mapper.sales_mapper import SalesMapper
+from ruoyi_car.mapper.sales_rollup_mapper import SalesRollupMapper
 from ruoyi_car.mapper.series_mapper import SeriesMapper
-from ruoyi_car.domain.po import SeriesPo
+from ruoyi_car.service.sales_analytics_engine import SalesAnalyticsEngine
+from ruoyi_car.service.statistics_service import StatisticsService
 
 
 class SalesService:
     """销量信息服务类"""
 
+    # 导入时每批处理的行数：每批一次查询已存在的数据、一个事务写入
+    IMPORT_BATCH_SIZE = 1000
+
     @classmethod
     def select_sales_list(cls, sales: Sales) -> List[Sales]:
         """
@@ -31,6 +36,19 @@ class SalesService:
         """
         return SalesMapper.select_sales_list(sales)
 
+    @classmethod
+    def iter_sales_list(cls, sales: Sales) -> Iterator[Sales]:
+        """
+        流式查询销量信息列表，用于导出
+
+        Args:
+            sales (sales): 销量信息对象
+
+        Returns:
+            Iterator[sales]: 销量信息迭代器
+        """
+        return SalesMapper.iter_sales_list(sales)
+
     @classmethod
     def select_sales_by_id(cls, id: int) -> Optional[Sales]:
         """
@@ -59,7 +77,11 @@ class SalesService:
         existing = SalesMapper.select_sales_by_series_city_month(sales.series_id, sales.city_full_name, sales.month)
         if existing:
             raise ServiceException("已存在相同车系、城市和月份的销量信息")
-        return SalesMapper.insert_sales(sales)
+        result = SalesMapper.insert_sales(sales)
+        if result > 0:
+            SalesAnalyticsEngine.notify_changed([sales.id])
+            StatisticsService.invalidate_sales_statistics([cls._month_province(sales)])
+        return result
 
     @classmethod
     def update_sales(cls, sales: Sales) -> int:
@@ -75,7 +97,14 @@ class SalesService:
         existing = SalesMapper.select_sales_by_series_city_month(sales.series_id, sales.city_full_name, sales.month)
         if existing and existing.id != sales.id:
             raise ServiceException("已存在相同车系、城市和月份的销量信息")
-        return SalesMapper.update_sales(sales)
+        # 修改前后的月份、城市都可能变化，两者的统计缓存都需要清理
+        touched = SalesMapper.select_sales_month_provinces([sales.id])
+        result = SalesMapper.update_sales(sales)
+        if result > 0:
+            SalesAnalyticsEngine.notify_changed([sales.id])
+            touched.add(cls._month_province(sales))
+            StatisticsService.invalidate_sales_statistics(touched)
+        return result
 
     @classmethod
     def delete_sales_by_ids(cls, ids: List[int]) -> int:
@@ -88,115 +117,73 @@ class SalesService:
         Returns:
             int: 删除的记录数
         """
-        return SalesMapper.delete_sales_by_ids(ids)
+        touched = SalesMapper.select_sales_month_provinces(ids)
+        result = SalesMapper.delete_sales_by_ids(ids)
+        if result > 0:
+            SalesAnalyticsEngine.notify_changed(ids)
+            StatisticsService.invalidate_sales_statistics(touched)
+        return result
 
     @classmethod
-    def import_sales(cls, sales_list: List[Sales]) -> str:
+    def import_sales(cls, sales_chunks: Iterable[List[Sales]]) -> str:
         """
         导入销量信息数据
+        逐块读取，按批处理：每批先校验，再一次查询已存在的数据，最后在一个事务中批量新增、修改；
+        批量写入失败时该批逐条写入，保证每条数据单独记录成功或失败
 
         Args:
-            sales_list (List[Sales]): 销量信息列表
+            sales_chunks (Iterable[List[Sales]]): 销量信息数据块
 
         Returns:
             str: 导入结果消息
         """
-        if not sales_list:
-            raise ServiceException("导入销量信息数据不能为空")
         start_time = time.time()
         success_count = 0
         fail_count = 0
-        success_msg = ""
-        fail_msg = ""
+        success_msgs: List[str] = []
+        fail_msgs: List[str] = []
         username = get_username()
 
-        # 缓存 series 查询结果，避免重复查询数据库
-        # key: series_id, value: SeriesPo 对象或 None（表示不存在）
-        series_cache: dict[int, Optional[SeriesPo]] = {}
-
-        for sales in sales_list:
-            try:
-                # 生成显示值
-                display_value = getattr(sales, "city_name", None) or getattr(sales, "series_id", None) or str(sales)
-
-                # 1. 验证 series_id 是否存在
-                if sales.series_id is None:
-                    fail_count += 1
-                    fail_msg += f"<br/> 第{fail_count}条数据，导入失败：车系ID不能为空：{display_value}"
-                    continue
-
-                # 从缓存中获取或查询 series
-                series_info = None
-                if sales.series_id in series_cache:
-                    series_info = series_cache[sales.series_id]
-                else:
-                    series_info = SeriesMapper.select_series_by_series_id(sales.series_id)
-                    series_cache[sales.series_id] = series_info
-
-                # 如果 series 不存在，记录为脏数据
-                if series_info is None:
-                    fail_count += 1
-                    fail_msg += f"<br/> 第{fail_count}条数据，导入失败：车系不存在（车系ID：{sales.series_id}）：{display_value}"
-                    continue
-
-                # 2. 从 series 中获取数据并赋值给 sales
-                sales.country = series_info.country
-                sales.brand_name = series_info.brand_name
-                sales.series_name = series_info.series_name
-                sales.model_type = series_info.model_type
-                sales.energy_type = series_info.energy_type
-                sales.max_price = series_info.max_price
-                sales.min_price = series_info.min_price
-                sales.image = series_info.image
-
-                # 3. 验证必填字段：city_name 和 month
-                if not sales.city_name:
-                    fail_count += 1
-                    fail_msg += f"<br/> 第{fail_count}条数据，导入失败：城市名称不能为空：{display_value}"
-                    continue
-
-                if sales.month is None:
-                    fail_count += 1
-                    fail_msg += f"<br/> 第{fail_count}条数据，导入失败：月份不能为空：{display_value}"
-                    continue
-
-                # 4. 根据 series_id、city_name、month 查询判断是更新还是新增
-                existing = None
-                existing = SalesMapper.select_sales_by_series_city_month(
-                    sales.series_id,
-                    sales.city_full_name,
-                    sales.month
-                )
-
-                if existing:
-                    # 更新已存在的记录
-                    sales.id = existing.id
-                    # 保留原有的创建时间和创建人
-                    sales.create_time = existing.create_time
-                    sales.create_by = existing.create_by
-                    result = SalesMapper.update_sales(sales)
-                else:
-                    # 新增记录，赋值创建时间和创建人
-                    sales.create_time = datetime.now()
-                    sales.create_by = username
-                    result = SalesMapper.insert_sales(sales)
-
-                if result > 0:
-                    success_count += 1
-                    success_msg += f"<br/> 第{success_count}条数据，操作成功：{display_value}"
-                else:
-                    fail_count += 1
-                    fail_msg += f"<br/> 第{fail_count}条数据，操作失败：{display_value}"
-                elapsed_time = time.time() - start_time
-                minutes, seconds = divmod(int(elapsed_time), 60)
-                print("   [运行时间: {:02d}:{:02d}]".format(minutes, seconds))
-                print(f"当前进度：{success_count}/{len(sales_list)}，成功：{success_count}条，失败：{fail_count}条")
-
-            except Exception as e:
-                fail_count += 1
-                fail_msg += f"<br/> 第{fail_count}条数据，导入失败，原因：{e.__class__.__name__}"
-                LogUtil.logger.error(f"导入销量信息失败，原因：{e}")
+        # 导入数据引用的车系，每块只查询尚未查询过的车系ID
+        series_map: Dict[int, Optional[Series]] = {}
+        # 新增、更新成功的销量ID，导入结束后统一通知内存统计引擎
+        changed_ids: List[int] = []
+        # 新增、更新成功的 (月份, 省份)，导入结束后统一清理对应的统计缓存
+        touched = set()
+
+        try:
+            for sales_list in sales_chunks:
+                cls._load_series_map(series_map, sales_list)
+                for start in range(0, len(sales_list), cls.IMPORT_BATCH_SIZE):
+                    batch = sales_list[start:start + cls.IMPORT_BATCH_SIZE]
+                    # 每条数据的导入结果：None 表示成功，否则为失败信息
+                    results = cls._import_sales_batch(batch, series_map, username)
+                    for sales, error in zip(batch, results):
+                        if error is None:
+                            changed_ids.append(sales.id)
+                            touched.add(cls._month_province(sales))
+                            success_count += 1
+                            success_msgs.append(f"<br/> 第{success_count}条数据，操作成功：{cls._display_value(sales)}")
+                        else:
+                            fail_count += 1
+                            fail_msgs.append(f"<br/> 第{fail_count}条数据，{error}")
+                LogUtil.logger.info(f"[销量导入] 进度：{success_count + fail_count}条，成功：{success_count}条，"
+                                    f"失败：{fail_count}条，耗时={round(time.time() - start_time, 2)}s")
+        except ExcelRowException as e:
+            # 数据行格式错误时停止读取，之前的数据块已经写入
+            fail_count += 1
+            fail_msgs.append(f"<br/> 第{fail_count}条数据，导入中止：{e}")
+            LogUtil.logger.error(f"导入销量信息中止，原因：{e}")
+        finally:
+            # 导入中途出错时，已写入的数据同样需要通知统计引擎、清理统计缓存
+            SalesAnalyticsEngine.notify_changed(changed_ids)
+            StatisticsService.invalidate_sales_statistics(touched)
+
+        if success_count + fail_count == 0:
+            raise ServiceException("导入销量信息数据不能为空")
 
+        success_msg = "".join(success_msgs)
+        fail_msg = "".join(fail_msgs)
         if fail_count > 0:
             if success_msg:
                 fail_msg = f"导入成功{success_count}条，失败{fail_count}条。{success_msg}<br/>" + fail_msg
@@ -205,3 +192,143 @@ class SalesService:
             raise ServiceException(fail_msg)
         success_msg = f"恭喜您，数据已全部导入成功！共 {success_count} 条，数据如下：" + success_msg
         return success_msg
+
+    @classmethod
+    def _load_series_map(cls, series_map: Dict[int, Optional[Series]], sales_list: List[Sales]) -> None:
+        """
+        一次查询一块导入数据引用的、尚未查询过的车系，同一车系ID有多条时取第一条，不存在的车系记为 None
+        """
+        series_ids = list({sales.series_id for sales in sales_list
+                           if sales.series_id is not None and sales.series_id not in series_map})
+        if not series_ids:
+            return
+        for series_id in series_ids:
+            series_map[series_id] = None
+        for series_info in SeriesMapper.select_series_by_series_ids(series_ids):
+            if series_map.get(series_info.series_id) is None:
+                series_map[series_info.series_id] = series_info
+
+    @classmethod
+    def _import_sales_batch(cls, batch: List[Sales], series_map: Dict[int, Series],
+                            username: str) -> List[Optional[str]]:
+        """
+        导入一批销量信息，返回每条数据的导入结果：None 表示成功，否则为失败信息
+        """
+        results: List[Optional[str]] = [None] * len(batch)
+        # 校验通过的数据：(下标, 唯一键)
+        valid = []
+        for index, sales in enumerate(batch):
+            try:
+                error = cls._validate_import_sales(sales, series_map)
+                if error is None:
+                    valid.append((index, SalesMapper.sales_key(sales.series_id, sales.city_full_name, sales.month)))
+                results[index] = error
+            except Exception as e:
+                results[index] = f"导入失败，原因：{e.__class__.__name__}"
+                LogUtil.logger.error(f"导入销量信息失败，原因：{e}")
+        if not valid:
+            return results
+
+        try:
+            existing_map = SalesMapper.select_sales_by_keys([key for _, key in valid])
+        except Exception as e:
+            LogUtil.logger.error(f"导入销量信息失败，原因：{e}")
+            for index, _ in valid:
+                results[index] = f"导入失败，原因：{e.__class__.__name__}"
+            return results
+
+        # 根据 series_id、city_full_name、month 判断是更新还是新增，同一批中重复的数据以最后一条为准
+        inserts: Dict[tuple, Sales] = {}
+        updates: Dict[tuple, Sales] = {}
+        for index, key in valid:
+            sales = batch[index]
+            existing = existing_map.get(key)
+            if existing:
+                # 更新已存在的记录，保留原有的创建时间和创建人
+                sales.id = existing.id
+                sales.create_time = existing.create_time
+                sales.create_by = existing.create_by
+                updates[key] = sales
+            else:
+                # 新增记录，赋值创建时间和创建人
+                sales.create_time = datetime.now()
+                sales.create_by = username
+                inserts[key] = sales
+
+        if SalesMapper.save_sales_batch(list(inserts.values()), list(updates.values())) > 0:
+            # 被同一批中后一条覆盖的数据与其写入同一条记录
+            written = {**inserts, **updates}
+            for index, key in valid:
+                batch[index].id = written[key].id
+            return results
+
+        # 批量写入失败时逐条写入，只有出错的数据记为失败
+        LogUtil.logger.warning(f"[销量导入] 批量写入失败，逐条写入 {len(valid)} 条")
+        for index, _ in valid:
+            try:
+                if cls._save_import_sales(batch[index], username) <= 0:
+                    results[index] = f"操作失败：{cls._display_value(batch[index])}"
+            except Exception as e:
+                results[index] = f"导入失败，原因：{e.__class__.__name__}"
+                LogUtil.logger.error(f"导入销量信息失败，原因：{e}")
+        return results
+
+    @classmethod
+    def _validate_import_sales(cls, sales: Sales, series_map: Dict[int, Series]) -> Optional[str]:
+        """
+        校验导入的销量信息并从车系补全车系字段，返回失败信息，校验通过返回 None
+        """
+        display_value = cls._display_value(sales)
+        # 1. 验证 series_id 是否存在
+        if sales.series_id is None:
+            return f"导入失败：车系ID不能为空：{display_value}"
+        series_info = series_map.get(sales.series_id)
+        if series_info is None:
+            return f"导入失败：车系不存在（车系ID：{sales.series_id}）：{display_value}"
+
+        # 2. 从 series 中获取数据并赋值给 sales
+        sales.country = series_info.country
+        sales.brand_name = series_info.brand_name
+        sales.series_name = series_info.series_name
+        sales.model_type = series_info.model_type
+        sales.energy_type = series_info.energy_type
+        sales.max_price = series_info.max_price
+        sales.min_price = series_info.min_price
+        sales.image = series_info.image
+
+        # 3. 验证必填字段：city_name 和 month
+        if not sales.city_name:
+            return f"导入失败：城市名称不能为空：{display_value}"
+        if sales.month is None:
+            return f"导入失败：月份不能为空：{display_value}"
+        return None
+
+    @classmethod
+    def _save_import_sales(cls, sales: Sales, username: str) -> int:
+        """
+        逐条写入一条导入的销量信息，已存在时更新
+        """
+        key = SalesMapper.sales_key(sales.series_id, sales.city_full_name, sales.month)
+        existing = SalesMapper.select_sales_by_keys([key]).get(key)
+        if existing:
+            sales.id = existing.id
+            sales.create_time = existing.create_time
+            sales.create_by = existing.create_by
+            return SalesMapper.update_sales(sales)
+        sales.create_time = datetime.now()
+        sales.create_by = username
+        return SalesMapper.insert_sales(sales)
+
+    @staticmethod
+    def _display_value(sales: Sales) -> str:
+        """
+        导入结果中显示的数据标识
+        """
+        return getattr(sales, "city_name", None) or getattr(sales, "series_id", None) or str(sales)
+
+    @staticmethod
+    def _month_province(sales: Sales) -> tuple:
+        """
+        销量数据所在的 (月份, 省份)
+        """
+        return sales.month, SalesRollupMapper.province_of(sales.city_full_name)
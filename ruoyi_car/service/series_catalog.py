@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# @Author  : YY
+# @FileName: series_catalog.py
+# @Time    : 2026-02-10 15:36:08
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from ruoyi_admin.ext import redis_cache
+from ruoyi_car.domain.entity import Series
+from ruoyi_car.mapper.series_mapper import SeriesMapper
+from ruoyi_car.service.recommend_cache import RecommendResultCache
+from ruoyi_car.service.recommend_engine import SeriesScoringEngine
+from ruoyi_common.constant import RecommendConstants
+from ruoyi_common.utils.base import LogUtil
+
+
+class SeriesCatalogSnapshot:
+    """
+    车系目录只读快照
+
+    快照创建后不再修改，所有请求线程共享；车系数据变更时整体替换为新快照。
+    """
+
+    SCORE_FIELDS = SeriesScoringEngine.SCORE_FIELDS
+
+    def __init__(self, version: int, series_list: List[Series]):
+        self.version = version
+        self.series_list: Tuple[Series, ...] = tuple(series_list)
+        # 预计算各评分字段的平均分，没有数据的字段为 None
+        self._avg_scores: Dict[str, Optional[float]] = self._calculate_avg_score(self.series_list)
+        # 价格区间 -> 打分引擎，价格区间配置变更时按新区间重新编码
+        self._engines: Dict[Tuple[int, ...], SeriesScoringEngine] = {}
+        self._engine_lock = threading.Lock()
+
+    @classmethod
+    def _calculate_avg_score(cls, series_list: Tuple[Series, ...]) -> Dict[str, Optional[float]]:
+        score_sums = {field: 0.0 for field in cls.SCORE_FIELDS}
+        score_counts = {field: 0 for field in cls.SCORE_FIELDS}
+        for series in series_list:
+            for field_name in cls.SCORE_FIELDS:
+                value = getattr(series, field_name, None)
+                if value is not None:
+                    score_sums[field_name] += value
+                    score_counts[field_name] += 1
+        return {
+            field_name: score_sums[field_name] / score_counts[field_name] if score_counts[field_name] > 0 else None
+            for field_name in cls.SCORE_FIELDS
+        }
+
+    def avg_scores(self, series_score: float) -> Dict[str, float]:
+        """
+        获取各评分字段的平均分
+
+        Args:
+            series_score (float): 没有数据时的默认分数
+        Returns:
+            Dict[str, float]: 各维度平均分数字典
+        """
+        return {
+            field_name: value if value is not None else series_score
+            for field_name, value in self._avg_scores.items()
+        }
+
+    def engine(self, price_range: List[int], price_label_func) -> SeriesScoringEngine:
+        """
+        获取按指定价格区间编码的打分引擎
+
+        Args:
+            price_range (List[int]): 价格区间
+            price_label_func: 价格区间标签函数
+        Returns:
+            SeriesScoringEngine: 打分引擎
+        """
+        key = tuple(price_range)
+        engine = self._engines.get(key)
+        if engine is None:
+            with self._engine_lock:
+                engine = self._engines.get(key)
+                if engine is None:
+                    engine = SeriesScoringEngine(list(self.series_list), price_range, price_label_func)
+                    self._engines[key] = engine
+        return engine
+
+    def __getstate__(self):
+        # 传给 spawn 启动的预计算子进程时连同已编码的打分引擎一起序列化，锁不能序列化，在子进程中重新创建
+        state = self.__dict__.copy()
+        del state["_engine_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._engine_lock = threading.Lock()
+
+
+class SeriesCatalog:
+    """
+    进程内车系目录
+
+    Redis 中保存目录版本号，车系新增、修改、删除、导入后递增；
+    每次访问只读取一次版本号，与本进程快照版本不一致时重新加载并整体替换。
+    """
+
+    _snapshot: Optional[SeriesCatalogSnapshot] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_snapshot(cls) -> SeriesCatalogSnapshot:
+        """
+        获取当前车系目录快照
+
+        Returns:
+            SeriesCatalogSnapshot: 车系目录快照
+        """
+        version = cls._current_version()
+        snapshot = cls._snapshot
+        if snapshot is not None and (version is None or snapshot.version == version):
+            return snapshot
+        with cls._lock:
+            snapshot = cls._snapshot
+            if snapshot is not None and (version is None or snapshot.version == version):
+                return snapshot
+            # 先读版本号再加载数据，加载期间发生的变更会在下次访问时被发现
+            series_list = SeriesMapper.select_all_series()
+            snapshot = SeriesCatalogSnapshot(version or 0, series_list)
+            cls._snapshot = snapshot
+            LogUtil.logger.info(f"[车系目录] 加载快照，版本={snapshot.version}，车系数={len(series_list)}")
+            return snapshot
+
+    @classmethod
+    def bump_version(cls) -> None:
+        """
+        车系数据变更后递增目录版本号，各进程在下次访问时重新加载，同时清空车系卡片缓存
+        """
+        try:
+            redis_cache.incr(RecommendConstants.SERIES_CATALOG_VERSION_KEY)
+        except Exception as e:
+            LogUtil.logger.error(f"[车系目录] 更新版本号失败: {e}")
+        # 本进程直接丢弃快照，即使 Redis 不可用也不会继续使用旧数据
+        cls._snapshot = None
+        # 推荐列表展示的车系卡片同步失效
+        RecommendResultCache.clear_series_cards()
+
+    @classmethod
+    def _current_version(cls) -> Optional[int]:
+        """
+        读取目录版本号，Redis 不可用时返回 None，继续使用本进程已有快照
+        """
+        try:
+            value = redis_cache.get(RecommendConstants.SERIES_CATALOG_VERSION_KEY)
+        except Exception as e:
+            LogUtil.logger.warning(f"[车系目录] 读取版本号失败: {e}")
+            return None
+        return int(value) if value else 0
@@ -2,15 +2,16 @@
 # @Author  : YY
 # @FileName: series_service.py
 # @Time    : 2026-01-23 20:21:54
-import time
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 
 from ruoyi_car.domain.entity import Series
 from ruoyi_car.mapper import LikeMapper, ModelMapper
 from ruoyi_car.mapper.series_mapper import SeriesMapper
+from ruoyi_car.service.series_catalog import SeriesCatalog
+from ruoyi_car.service.series_similarity_service import SeriesSimilarityService
 from ruoyi_car.service.view_service import ViewService
 from ruoyi_common.exception import ServiceException
-from ruoyi_common.utils.base import LogUtil
+from ruoyi_common.utils.base import ExcelRowException, LogUtil
 from ruoyi_common.utils.security_util import get_username, get_user_id
 
 
@@ -30,6 +31,19 @@ class SeriesService:
         """
         return SeriesMapper.select_series_list(series)
 
+    @classmethod
+    def iter_series_list(cls, series: Series) -> Iterator[Series]:
+        """
+        流式查询车系信息列表，用于导出
+
+        Args:
+            series (series): 车系信息对象
+
+        Returns:
+            Iterator[series]: 车系信息迭代器
+        """
+        return SeriesMapper.iter_series_list(series)
+
     @classmethod
     def select_series_by_id(cls, id: int) -> Optional[Series]:
         """
@@ -77,6 +91,20 @@ class SeriesService:
         ViewService.add_view(series_info)
         return series_info
 
+    @classmethod
+    def select_similar_series(cls, series_id: int, num: int = 10) -> List[Dict]:
+        """
+        查询相似车系
+
+        Args:
+            series_id (int): 车系ID
+            num (int): 返回数量
+
+        Returns:
+            List[Dict]: 相似车系卡片列表，按相似度降序
+        """
+        return SeriesSimilarityService.get_similar_series(series_id, num)
+
     @classmethod
     def select_series_by_series_ids(cls, series_id)->List[Series]:
         """
@@ -107,7 +135,10 @@ class SeriesService:
         series_db = SeriesMapper.select_series_by_series_id(series.series_id)
         if series_db:
             raise ServiceException(f"车系ID为{series.series_id}的记录已存在")
-        return SeriesMapper.insert_series(series)
+        result = SeriesMapper.insert_series(series)
+        if result > 0:
+            SeriesCatalog.bump_version()
+        return result
 
     @classmethod
     def update_series(cls, series: Series) -> int:
@@ -124,7 +155,10 @@ class SeriesService:
         series_db = SeriesMapper.select_series_by_series_id(series.series_id)
         if series_db and series_db.id != series.id:
             raise ServiceException(f"车系ID为{series.series_id}的记录已存在")
-        return SeriesMapper.update_series(series)
+        result = SeriesMapper.update_series(series)
+        if result > 0:
+            SeriesCatalog.bump_version()
+        return result
 
     @classmethod
     def delete_series_by_ids(cls, ids: List[int]) -> int:
@@ -137,73 +171,94 @@ class SeriesService:
         Returns:
             int: 删除的记录数
         """
-        return SeriesMapper.delete_series_by_ids(ids)
+        result = SeriesMapper.delete_series_by_ids(ids)
+        if result > 0:
+            SeriesCatalog.bump_version()
+        return result
 
     @classmethod
-    def import_series(cls, series_list: List[Series]) -> str:
+    def import_series(cls, series_chunks: Iterable[List[Series]]) -> str:
         """
         导入车系信息数据
 
         Args:
-            series_list (List[series]): 车系信息列表
+            series_chunks (Iterable[List[Series]]): 车系信息数据块，逐块写入
 
         Returns:
             str: 导入结果消息
         """
-        if not series_list:
-            raise ServiceException("导入车系信息数据不能为空")
-        start_time = time.time()
         success_count = 0
         fail_count = 0
         success_msg = ""
         fail_msg = ""
         username = get_username()
-        for series in series_list:
-            try:
-                # 验证必填字段
-                missing_fields = cls._validate_required_fields(series)
-                if missing_fields:
-                    fail_count += 1
-                    fail_msg += f"<br/> 第{fail_count}条数据，导入失败：缺少必要字段（{', '.join(missing_fields)}）"
-                    continue
-
-                # 清理脏数据
-                cls._clean_dirty_data(series)
-
-                # 从官方指导价解析最高最低价格（单位转换：万元 -> 元）
-                cls._parse_price_from_string(series)
-
-                # 检查是否存在，存在则更新，不存在则新增
-                existing = SeriesMapper.select_series_by_series_id(series.series_id)
-                if existing:
-                    # 更新时保留原有的创建时间和创建人
-                    series.create_time = existing.create_time
-                    series.create_by = existing.create_by
-                    result = SeriesMapper.update_series_by_series_id(series)
-                    operation = "更新"
-                else:
-                    # 新增时设置创建人和创建时间
-                    series.create_by = username
-                    result = SeriesMapper.insert_series(series)
-                    operation = "新增"
-
-                if result > 0:
-                    success_count += 1
-                    success_msg += f"<br/> 第{success_count}条数据，操作成功：{series.series_name or series.series_id}"
-                else:
-                    fail_count += 1
-                    error_msg = f"第{fail_count}条数据，{operation}失败：{series.series_name or series.series_id}"
-                    fail_msg += f"<br/> {error_msg}"
-                    LogUtil.logger.error(
-                        f"导入车系信息{operation}失败，series_id={series.series_id}, series_name={series.series_name}, 返回结果={result}")
-                elapsed_time = time.time() - start_time
-                minutes, seconds = divmod(int(elapsed_time), 60)
-                print("   [运行时间: {:02d}:{:02d}]".format(minutes, seconds))
-                print(f"当前进度：{success_count}/{len(series_list)}，成功：{success_count}条，失败：{fail_count}条")
-            except Exception as e:
-                fail_count += 1
-                fail_msg += f"<br/> 第{fail_count}条数据，导入失败，原因：{e.__class__.__name__}"
-                LogUtil.logger.error(f"导入车系信息失败，原因：{e}")
+
+        def prepare(series: Series) -> Optional[str]:
+            # 验证必填字段
+            missing_fields = cls._validate_required_fields(series)
+            if missing_fields:
+                return f"导入失败：缺少必要字段（{', '.join(missing_fields)}）"
+            # 清理脏数据
+            cls._clean_dirty_data(series)
+            # 从官方指导价解析最高最低价格（单位转换：万元 -> 元）
+            cls._parse_price_from_string(series)
+            return None
+
+        def resolve(series: Series, existing) -> Optional[str]:
+            if existing is not None:
+                # 更新时保留原有的创建时间和创建人
+                series.create_time = existing.create_time
+                series.create_by = existing.create_by
+            else:
+                # 新增时设置创建人和创建时间
+                series.create_by = username
+            return None
+
+        def fallback(series: Series, existing) -> Optional[str]:
+            if existing is not None:
+                result = SeriesMapper.update_series_by_series_id(series)
+                operation = "更新"
+            else:
+                result = SeriesMapper.insert_series(series)
+                operation = "新增"
+            if result > 0:
+                return None
+            LogUtil.logger.error(
+                f"导入车系信息{operation}失败，series_id={series.series_id}, series_name={series.series_name}, 返回结果={result}")
+            return f"{operation}失败：{series.series_name or series.series_id}"
+
+        try:
+            for series_list in series_chunks:
+                # 根据 series_id 分批查询已存在的数据，每批一个事务批量新增、更新
+                results = SeriesMapper.BULK_UPSERT.run(series_list, resolve, prepare=prepare, fallback=fallback)
+                for series, result in zip(series_list, results):
+                    if result is None:
+                        success_count += 1
+                        success_msg += f"<br/> 第{success_count}条数据，操作成功：{series.series_name or series.series_id}"
+                    elif isinstance(result, Exception):
+                        fail_count += 1
+                        fail_msg += f"<br/> 第{fail_count}条数据，导入失败，原因：{result.__class__.__name__}"
+                        LogUtil.logger.error(f"导入车系信息失败，原因：{result}")
+                    else:
+                        fail_count += 1
+                        fail_msg += f"<br/> 第{fail_count}条数据，{result}"
+        except ExcelRowException as e:
+            # 数据行格式错误时停止读取，之前的数据块已经写入
+            fail_count += 1
+            fail_msg += f"<br/> 第{fail_count}条数据，导入中止：{e}"
+            LogUtil.logger.error(f"导入车系信息中止，原因：{e}")
+        finally:
+            # 导入中途出错时，已写入的车系同样需要刷新缓存版本和相似车系
+            if success_count > 0:
+                SeriesCatalog.bump_version()
+                # 导入后在后台重新计算相似车系，不阻塞导入请求
+                try:
+                    SeriesSimilarityService.refresh_async()
+                except Exception as e:
+                    LogUtil.logger.error(f"导入车系后提交相似车系计算失败，原因：{e}")
+
+        if success_count + fail_count == 0:
+            raise ServiceException("导入车系信息数据不能为空")
         if fail_count > 0:
             if success_msg:
                 fail_msg = f"导入成功{success_count}条，失败{fail_count}条。{success_msg}<br/>" + fail_msg
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# @Author  : YY
+# @FileName: series_similarity_service.py
+# @Time    : 2026-02-16 10:08:25
+
+import json
+import time
+from typing import Dict, List
+
+from ruoyi_admin.ext import redis_cache
+from ruoyi_car.service.recommend_cache import RecommendResultCache
+from ruoyi_car.service.recommend_config import RecommendConfig
+from ruoyi_car.service.recommend_service import RecommendService
+from ruoyi_car.service.series_catalog import SeriesCatalog
+from ruoyi_common.constant import RecommendConstants
+from ruoyi_common.utils.base import LogUtil
+from ruoyi_framework.asyncsched.manager import TaskManager
+from ruoyi_framework.descriptor import RedisBuildLock
+
+
+class SeriesSimilarityService:
+    """
+    相似车系服务
+
+    按推荐打分使用的属性维度（国家、品牌、车型、能源类型、价格区间）和 8 项评分，对整个车系目录
+    分块两两计算相似度，每个车系保存前 N 个相似车系到 Redis Hash，详情页直接按车系ID读取。
+    车系导入后在后台重新计算；新增、修改、删除的单个车系由定时任务刷新。
+    """
+
+    # 每个车系保存的相似车系数
+    NEIGHBOR_NUM = 20
+    # 计算任务锁过期时间，需大于整个目录计算一次的耗时，锁只由持有者释放
+    LOCK_EXPIRE_SECONDS = 60 * 60
+
+    @classmethod
+    def refresh(cls) -> int:
+        """
+        重新计算全部车系的相似车系
+
+        Returns:
+            int: 计算的车系数，已有任务在执行时返回 0
+        """
+        lock = RedisBuildLock(redis_cache, RecommendConstants.SERIES_SIMILAR_LOCK_KEY, cls.LOCK_EXPIRE_SECONDS)
+        if not lock.acquire():
+            LogUtil.logger.info("[相似车系] 已有任务在执行，本次跳过")
+            return 0
+        try:
+            start_time = time.time()
+            config = RecommendConfig.get()
+            catalog = SeriesCatalog.get_snapshot()
+            engine = catalog.engine(config.price_range, RecommendService._get_price_range_label)
+            neighbor_rows, neighbor_scores = engine.nearest_neighbors(config.weights, cls.NEIGHBOR_NUM,
+                                                                      config.series_score)
+            mapping = {}
+            for row, series in enumerate(engine.series_list):
+                mapping[str(series.series_id)] = json.dumps(
+                    [[engine.series_list[neighbor].series_id, round(score, 4)]
+                     for neighbor, score in zip(neighbor_rows[row].tolist(), neighbor_scores[row].tolist())],
+                    separators=(',', ':'))
+
+            # 先写入临时 Hash 再整体替换，读取方不会看到写了一半的结果
+            building_key = f"{RecommendConstants.SERIES_SIMILAR_KEY}:building"
+            pipe = redis_cache.pipeline()
+            pipe.delete(building_key)
+            if mapping:
+                pipe.hset(building_key, mapping=mapping)
+                pipe.rename(building_key, RecommendConstants.SERIES_SIMILAR_KEY)
+            else:
+                pipe.delete(RecommendConstants.SERIES_SIMILAR_KEY)
+            pipe.execute()
+            LogUtil.logger.info(f"[相似车系] 完成，车系数={len(mapping)}，耗时={round(time.time() - start_time, 2)}s")
+            return len(mapping)
+        finally:
+            lock.release()
+
+    @classmethod
+    def refresh_async(cls, only_missing: bool = False) -> None:
+        """
+        在后台线程中重新计算全部车系的相似车系
+
+        Args:
+            only_missing (bool): 为 True 时仅在相似车系尚未计算过时计算，避免排队的多个任务重复计算
+        """
+        TaskManager.execute(cls._refresh_task, only_missing)
+
+    @classmethod
+    def _refresh_task(cls, app, only_missing: bool) -> int:
+        with app.app_context():
+            try:
+                if only_missing and redis_cache.exists(RecommendConstants.SERIES_SIMILAR_KEY):
+                    return 0
+                return cls.refresh()
+            except Exception as e:
+                LogUtil.logger.error(f"[相似车系] 后台计算失败，原因：{e}")
+                return 0
+
+    @classmethod
+    def get_similar_series(cls, series_id: int, num: int = 10) -> List[Dict]:
+        """
+        获取相似车系，尚未计算过时提交后台计算并返回空列表；重新计算期间返回上一次的结果
+
+        Args:
+            series_id (int): 车系ID
+            num (int): 返回数量，最多 NEIGHBOR_NUM 个
+        Returns:
+            List[Dict]: 车系卡片列表，附带相似度 similarity，按相似度降序
+        """
+        value = redis_cache.hget(RecommendConstants.SERIES_SIMILAR_KEY, str(series_id))
+        if value is None:
+            if not redis_cache.exists(RecommendConstants.SERIES_SIMILAR_KEY) \
+                    and not redis_cache.exists(RecommendConstants.SERIES_SIMILAR_LOCK_KEY):
+                cls.refresh_async(only_missing=True)
+            return []
+        neighbors = json.loads(value)[:max(0, min(num, cls.NEIGHBOR_NUM))]
+        similarity = {neighbor_id: score for neighbor_id, score in neighbors}
+        cards = RecommendResultCache.get_series_cards([neighbor_id for neighbor_id, _ in neighbors])
+        return [dict(card, similarity=similarity.get(card['seriesId'])) for card in cards]
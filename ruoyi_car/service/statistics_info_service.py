@@ -3,12 +3,15 @@
 # @FileName: statistics_info_service.py
 # @Time    : 2026-01-23 20:21:54
 
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
 
+from ruoyi_common.constant import StatisticsConstants
 from ruoyi_common.exception import ServiceException
-from ruoyi_common.utils.base import LogUtil
+from ruoyi_common.utils.base import ExcelRowException, LogUtil
 from ruoyi_car.domain.entity import StatisticsInfo
 from ruoyi_car.mapper.statistics_info_mapper import StatisticsInfoMapper
+from ruoyi_car.service.statistics_payload import StatisticsPayload
+from ruoyi_framework.descriptor import custom_cache_evict
 
 class StatisticsInfoService:
     """统计信息服务类"""
@@ -23,7 +26,24 @@ class StatisticsInfoService:
         Returns:
             List[statistics_info]: 统计信息列表
         """
-        return StatisticsInfoMapper.select_statistics_info_list(statistics_info)
+        statistics_infos = StatisticsInfoMapper.select_statistics_info_list(statistics_info)
+        for item in statistics_infos:
+            cls._fill_content(item)
+        return statistics_infos
+
+    @classmethod
+    def iter_statistics_info_list(cls, statistics_info: StatisticsInfo) -> Iterator[StatisticsInfo]:
+        """
+        流式查询统计信息列表，用于导出
+
+        Args:
+            statistics_info (statistics_info): 统计信息对象
+
+        Returns:
+            Iterator[statistics_info]: 统计信息迭代器
+        """
+        rows = StatisticsInfoMapper.iter_statistics_info_list(statistics_info)
+        return (cls._fill_content(item) for item in rows)
 
     @classmethod
     def select_statistics_info_by_key(cls, statistics_key: str) -> Optional[StatisticsInfo]:
@@ -52,6 +72,32 @@ class StatisticsInfoService:
         return StatisticsInfoMapper.select_statistics_info_list_by_keys(statistics_keys)
 
 
+    @classmethod
+    def select_statistics_keys_by_prefixes(cls, prefixes: List[str]) -> List[str]:
+        """
+        查询以任一前缀开头的统计Key
+
+        Args:
+            prefixes (List[str]): Key 前缀列表
+
+        Returns:
+            List[str]: 统计Key列表
+        """
+        return StatisticsInfoMapper.select_statistics_keys_by_prefixes(prefixes)
+
+    @classmethod
+    def delete_statistics_info_by_keys(cls, statistics_keys: List[str]) -> int:
+        """
+        根据统计Key批量删除统计信息
+
+        Args:
+            statistics_keys (List[str]): 统计Key列表
+
+        Returns:
+            int: 删除的记录数
+        """
+        return StatisticsInfoMapper.delete_statistics_info_by_keys(statistics_keys)
+
     @classmethod
     def select_statistics_info_by_id(cls, id: int) -> Optional[StatisticsInfo]:
         """
@@ -63,7 +109,19 @@ class StatisticsInfoService:
         Returns:
             statistics_info: 统计信息对象
         """
-        return StatisticsInfoMapper.select_statistics_info_by_id(id)
+        return cls._fill_content(StatisticsInfoMapper.select_statistics_info_by_id(id))
+
+    @classmethod
+    def _fill_content(cls, statistics_info: Optional[StatisticsInfo]) -> Optional[StatisticsInfo]:
+        """
+        后台查看、导出时把压缩编码的统计内容还原为 JSON 文本，编辑保存后按 JSON 文本保存
+        """
+        if statistics_info is not None and statistics_info.payload and not statistics_info.content:
+            try:
+                statistics_info.content = StatisticsPayload.to_json(statistics_info.payload)
+            except Exception as e:
+                LogUtil.logger.warning(f"统计内容解码失败: key={statistics_info.statistics_key}, 错误={e}")
+        return statistics_info
 
     @classmethod
     def insert_statistics_info(cls, statistics_info: StatisticsInfo) -> int:
@@ -92,6 +150,18 @@ class StatisticsInfoService:
         """
         return StatisticsInfoMapper.update_statistics_info(statistics_info)
 
+    @classmethod
+    def save_statistics_info_batch(cls, statistics_info_list: List[StatisticsInfo]) -> int:
+        """
+        按统计 Key 批量新增或覆盖统计信息
+
+        Args:
+            statistics_info_list (List[StatisticsInfo]): 统计信息列表
+
+        Returns:
+            int: 写入的记录数
+        """
+        return StatisticsInfoMapper.upsert_statistics_info_batch(statistics_info_list)
 
 
     @classmethod
@@ -108,53 +178,59 @@ class StatisticsInfoService:
         return StatisticsInfoMapper.delete_statistics_info_by_ids(ids)
 
     @classmethod
-    def import_statistics_info(cls, statistics_info_list: List[StatisticsInfo], is_update: bool = False) -> str:
+    def import_statistics_info(cls, statistics_info_chunks: Iterable[List[StatisticsInfo]], is_update: bool = False) -> str:
         """
         导入统计信息数据
 
         Args:
-            statistics_info_list (List[statistics_info]): 统计信息列表
+            statistics_info_chunks (Iterable[List[StatisticsInfo]]): 统计信息数据块，逐块写入
             is_update (bool): 是否更新已存在的数据
 
         Returns:
             str: 导入结果消息
         """
-        if not statistics_info_list:
-            raise ServiceException("导入统计信息数据不能为空")
-
         success_count = 0
         fail_count = 0
         success_msg = ""
         fail_msg = ""
 
-        for statistics_info in statistics_info_list:
-            try:
-                display_value = statistics_info
-
-                display_value = getattr(statistics_info, "id", display_value)
-                existing = None
-                if statistics_info.id is not None:
-                    existing = StatisticsInfoMapper.select_statistics_info_by_id(statistics_info.id)
-                if existing:
-                    if is_update:
-                        result = StatisticsInfoMapper.update_statistics_info(statistics_info)
+        def resolve(statistics_info: StatisticsInfo, existing) -> Optional[str]:
+            if existing is not None and not is_update:
+                return "已存在"
+            return None
+
+        def fallback(statistics_info: StatisticsInfo, existing) -> Optional[str]:
+            if existing is not None:
+                result = StatisticsInfoMapper.update_statistics_info(statistics_info)
+            else:
+                result = StatisticsInfoMapper.insert_statistics_info(statistics_info)
+            return None if result > 0 else "操作失败"
+
+        try:
+            for statistics_info_list in statistics_info_chunks:
+                # 导入结果中显示的数据标识，写入前取值
+                display_values = [getattr(statistics_info, "id", statistics_info) for statistics_info in statistics_info_list]
+                # 按主键分批查询已存在的数据，每批一个事务批量新增、更新
+                results = StatisticsInfoMapper.BULK_UPSERT.run(statistics_info_list, resolve, fallback=fallback)
+                for display_value, result in zip(display_values, results):
+                    if result is None:
+                        success_count += 1
+                        success_msg += f"<br/> 第{success_count}条数据，操作成功：{display_value}"
+                    elif isinstance(result, Exception):
+                        fail_count += 1
+                        fail_msg += f"<br/> 第{fail_count}条数据，导入失败，原因：{result.__class__.__name__}"
+                        LogUtil.logger.error(f"导入统计信息失败，原因：{result}")
                     else:
                         fail_count += 1
-                        fail_msg += f"<br/> 第{fail_count}条数据，已存在：{display_value}"
-                        continue
-                else:
-                    result = StatisticsInfoMapper.insert_statistics_info(statistics_info)
-
-                if result > 0:
-                    success_count += 1
-                    success_msg += f"<br/> 第{success_count}条数据，操作成功：{display_value}"
-                else:
-                    fail_count += 1
-                    fail_msg += f"<br/> 第{fail_count}条数据，操作失败：{display_value}"
-            except Exception as e:
-                fail_count += 1
-                fail_msg += f"<br/> 第{fail_count}条数据，导入失败，原因：{e.__class__.__name__}"
-                LogUtil.logger.error(f"导入统计信息失败，原因：{e}")
+                        fail_msg += f"<br/> 第{fail_count}条数据，{result}：{display_value}"
+        except ExcelRowException as e:
+            # 数据行格式错误时停止读取，之前的数据块已经写入
+            fail_count += 1
+            fail_msg += f"<br/> 第{fail_count}条数据，导入中止：{e}"
+            LogUtil.logger.error(f"导入统计信息中止，原因：{e}")
+
+        if success_count + fail_count == 0:
+            raise ServiceException("导入统计信息数据不能为空")
 
         if fail_count > 0:
             if success_msg:
@@ -166,5 +242,6 @@ class StatisticsInfoService:
         return success_msg
 
     @classmethod
+    @custom_cache_evict(key_prefixes=StatisticsConstants.CACHEABLE_KEY_PREFIXES)
     def clear_statistics_info(cls,statistics_info: StatisticsInfo)->int:
         return StatisticsInfoMapper.clear_statistics_info(statistics_info)
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+# @Author  : YY
+# @FileName: statistics_payload.py
+# @Time    : 2026-02-19 09:51:40
+
+import json
+import struct
+import sys
+import zlib
+from array import array
+from collections import namedtuple
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖，未安装时使用 zlib
+    zstandard = None
+
+
+class StatisticsRows(Sequence):
+    """
+    解码后的统计数据
+
+    数据按列保存，首次访问时才解压、解码，每一行按需组装为 namedtuple 行元组，字段名即写入时的字段名。
+    """
+
+    def __init__(self, payload: bytes):
+        self._payload = payload
+        self._names: Optional[List[str]] = None
+        self._columns: Optional[List[list]] = None
+        self._row_type = None
+
+    def _load(self) -> None:
+        if self._columns is None:
+            names, columns = StatisticsPayload.decode_columns(self._payload)
+            self._row_type = namedtuple("StatisticsRow", names, rename=True)
+            self._names, self._columns = names, columns
+            self._payload = None
+
+    @property
+    def names(self) -> List[str]:
+        self._load()
+        return self._names
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._columns[0]) if self._columns else 0
+
+    def __getitem__(self, index):
+        self._load()
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._row_type._make(column[index] for column in self._columns)
+
+    def __iter__(self) -> Iterator[tuple]:
+        self._load()
+        make = self._row_type._make
+        for values in zip(*self._columns):
+            yield make(values)
+
+    def as_dicts(self) -> List[Dict[str, Any]]:
+        """
+        还原为写入时的字典列表
+        """
+        self._load()
+        return [dict(zip(self._names, values)) for values in zip(*self._columns)]
+
+
+class StatisticsPayload:
+    """
+    统计内容的压缩二进制编码
+
+    格式：魔数 b"SP" + 版本号(1字节) + 压缩方式(1字节) + 正文（按压缩方式压缩）
+    正文：头部长度(uint32) + 头部 JSON + 各列数据；头部记录行数和每列的字段名、类型，
+    整数、浮点数列按小端 int64/float64 打包，布尔列 1 字节，字符串列按列内字典编码为 uint32，
+    含 NULL 的数值列另带 1 字节的 NULL 标记，其他取值整列存入头部 JSON。
+    读取时兼容旧的 JSON 文本内容。
+    """
+
+    MAGIC = b"SP"
+    VERSION = 1
+    # 压缩方式
+    COMPRESS_NONE = 0
+    COMPRESS_ZLIB = 1
+    COMPRESS_ZSTD = 2
+    # 正文小于该字节数时不压缩
+    COMPRESS_MIN_SIZE = 256
+    ZLIB_LEVEL = 6
+    ZSTD_LEVEL = 6
+    # 字符串列中 NULL 的编码
+    NULL_CODE = 0xFFFFFFFF
+
+    _HEADER = struct.Struct("<2sBB")
+    # 4 字节无符号整数的 array 类型码
+    _UINT32 = next(code for code in "IL" if array(code).itemsize == 4)
+    _LENGTH = struct.Struct("<I")
+    _LITTLE_ENDIAN = sys.byteorder == "little"
+
+    @classmethod
+    def is_payload(cls, data) -> bool:
+        """
+        是否为本格式的二进制内容
+        """
+        return isinstance(data, (bytes, bytearray, memoryview)) and bytes(data[:2]) == cls.MAGIC
+
+    @classmethod
+    def encode(cls, rows: List[Dict[str, Any]]) -> bytes:
+        """
+        字典列表 -> 压缩二进制内容，各行字段不一致时缺失的字段为 NULL
+
+        Args:
+            rows (List[Dict[str, Any]]): 统计数据
+        Returns:
+            bytes: 二进制内容
+        """
+        names: Dict[str, None] = {}
+        for row in rows:
+            names.update(dict.fromkeys(row))
+        specs, sections = [], []
+        for name in names:
+            spec, data = cls._encode_column([row.get(name) for row in rows])
+            spec["name"] = name
+            specs.append(spec)
+            sections.extend(data)
+        header = json.dumps({"rows": len(rows), "columns": specs}, ensure_ascii=False,
+                            separators=(',', ':')).encode("utf-8")
+        body = b"".join([cls._LENGTH.pack(len(header)), header, *sections])
+
+        compress = cls.COMPRESS_NONE
+        if len(body) >= cls.COMPRESS_MIN_SIZE:
+            if zstandard is not None:
+                body, compress = zstandard.ZstdCompressor(level=cls.ZSTD_LEVEL).compress(body), cls.COMPRESS_ZSTD
+            else:
+                body, compress = zlib.compress(body, cls.ZLIB_LEVEL), cls.COMPRESS_ZLIB
+        return cls._HEADER.pack(cls.MAGIC, cls.VERSION, compress) + body
+
+    @classmethod
+    def decode(cls, payload: bytes) -> StatisticsRows:
+        """
+        二进制内容 -> 行元组序列，首次访问时才解码
+        """
+        return StatisticsRows(bytes(payload))
+
+    @classmethod
+    def decode_columns(cls, payload: bytes):
+        """
+        二进制内容 -> (字段名列表, 各列取值列表)
+
+        Raises:
+            ValueError: 不是本格式、版本不支持或压缩方式不可用
+        """
+        if not cls.is_payload(payload) or len(payload) < cls._HEADER.size:
+            raise ValueError("不是统计内容二进制格式")
+        _, version, compress = cls._HEADER.unpack_from(payload)
+        if version != cls.VERSION:
+            raise ValueError(f"不支持的统计内容版本: {version}")
+        body = memoryview(payload)[cls._HEADER.size:]
+        if compress == cls.COMPRESS_ZLIB:
+            body = memoryview(zlib.decompress(body))
+        elif compress == cls.COMPRESS_ZSTD:
+            if zstandard is None:
+                raise ValueError("统计内容使用 zstd 压缩，当前环境未安装 zstandard")
+            body = memoryview(zstandard.ZstdDecompressor().decompress(body))
+        elif compress != cls.COMPRESS_NONE:
+            raise ValueError(f"不支持的压缩方式: {compress}")
+
+        (header_size,) = cls._LENGTH.unpack_from(body)
+        offset = cls._LENGTH.size + header_size
+        header = json.loads(bytes(body[cls._LENGTH.size:offset]).decode("utf-8"))
+        size = header["rows"]
+        names, columns = [], []
+        for spec in header["columns"]:
+            values, offset = cls._decode_column(spec, body, offset, size)
+            names.append(spec["name"])
+            columns.append(values)
+        return names, columns
+
+    @classmethod
+    def load_rows(cls, payload: Optional[bytes], content: Optional[str]) -> Sequence:
+        """
+        读取统计内容：有二进制内容时解码为行元组，否则按旧格式解析 JSON 文本为字典列表
+        """
+        if payload:
+            return cls.decode(payload)
+        return json.loads(content) if content else []
+
+    @classmethod
+    def to_json(cls, payload: bytes) -> str:
+        """
+        二进制内容 -> JSON 文本，供后台查看
+        """
+        return json.dumps(cls.decode(payload).as_dicts(), ensure_ascii=False)
+
+    @classmethod
+    def _encode_column(cls, values: List[Any]):
+        present = [value for value in values if value is not None]
+        if not present:
+            return {"type": "n"}, []
+        mask = bytes(value is None for value in values) if len(present) < len(values) else None
+        kinds = {type(value) for value in present}
+        if kinds == {bool}:
+            return {"type": "b"}, [bytes(2 if value is None else int(value) for value in values)]
+        if kinds == {int} and all(-(1 << 63) <= value < (1 << 63) for value in present):
+            return cls._pack_numbers("q", values, mask)
+        if kinds == {float}:
+            return cls._pack_numbers("d", values, mask)
+        if kinds == {str}:
+            strings: Dict[str, int] = {}
+            codes = array(cls._UINT32, (cls.NULL_CODE if value is None
+                                        else strings.setdefault(value, len(strings)) for value in values))
+            return {"type": "s", "strings": list(strings)}, [cls._to_bytes(codes)]
+        # 混合类型（如整数与浮点数混用）整列按 JSON 保存，保证还原后类型不变
+        return {"type": "j", "values": values}, []
+
+    @classmethod
+    def _pack_numbers(cls, typecode: str, values: List[Any], mask: Optional[bytes]):
+        numbers = array(typecode, (0 if value is None else value for value in values))
+        sections = [mask] if mask is not None else []
+        sections.append(cls._to_bytes(numbers))
+        return {"type": typecode, "nullable": mask is not None}, sections
+
+    @classmethod
+    def _decode_column(cls, spec: Dict[str, Any], body: memoryview, offset: int, size: int):
+        column_type = spec["type"]
+        if column_type == "n":
+            return [None] * size, offset
+        if column_type == "j":
+            return spec["values"], offset
+        if column_type == "b":
+            flags = bytes(body[offset:offset + size])
+            return [None if flag == 2 else bool(flag) for flag in flags], offset + size
+        if column_type == "s":
+            codes, offset = cls._read_array(cls._UINT32, body, offset, size)
+            strings = spec["strings"]
+            return [None if code == cls.NULL_CODE else strings[code] for code in codes], offset
+        mask = None
+        if spec.get("nullable"):
+            mask = bytes(body[offset:offset + size])
+            offset += size
+        numbers, offset = cls._read_array(column_type, body, offset, size)
+        if mask is None:
+            return numbers, offset
+        return [None if is_null else value for value, is_null in zip(numbers, mask)], offset
+
+    @classmethod
+    def _read_array(cls, typecode: str, body: memoryview, offset: int, size: int):
+        values = array(typecode)
+        end = offset + values.itemsize * size
+        values.frombytes(body[offset:end])
+        if not cls._LITTLE_ENDIAN:
+            values.byteswap()
+        return values.tolist(), end
+
+    @classmethod
+    def _to_bytes(cls, values: array) -> bytes:
+        if not cls._LITTLE_ENDIAN:
+            values = array(values.typecode, values)
+            values.byteswap()
+        return values.tobytes()
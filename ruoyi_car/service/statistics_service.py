@@ -1,30 +1,56 @@
 # stdlib imports
-import json
-from typing import List, Optional, Dict
+import hashlib
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# third-party imports
+from flask import current_app
+from pydantic import TypeAdapter, ValidationError
 
 # project imports
+from ruoyi_admin.ext import redis_cache
 from ruoyi_car.domain.entity import StatisticsInfo
 from ruoyi_car.domain.statistics.dto import CarStatisticsRequest
 from ruoyi_car.domain.statistics.po.statistics_po import MapStatisticsPo, PriceStatisticsPo, StatisticsPo, \
     SalesPredictPo
 from ruoyi_car.domain.statistics.vo.statistics_vo import MapStatisticsVo, StatisticsVo, SalesPredictVo, \
     SeriesStatisticsVo
+from ruoyi_car.mapper.sales_rollup_mapper import SalesRollupMapper
 from ruoyi_car.mapper.statistics_mapper import StatisticsMapper
+from ruoyi_car.service.sales_analytics_engine import SalesAnalyticsEngine
 from ruoyi_car.service.series_service import SeriesService
 from ruoyi_car.service.statistics_info_service import StatisticsInfoService
+from ruoyi_car.service.statistics_payload import StatisticsPayload
 from ruoyi_common.constant import StatisticsConstants, ConfigConstants
-from ruoyi_common.utils import DateUtil
-from ruoyi_framework.descriptor import custom_cacheable
+from ruoyi_common.utils import DateUtil, StringUtil
+from ruoyi_common.utils.base import LogUtil
+from ruoyi_framework.asyncsched.manager import TaskManager
+from ruoyi_framework.descriptor import custom_cacheable, evict_cache, RedisBuildLock, SingleFlight
+from ruoyi_framework.descriptor.custom_cacheable import ARGS_HASH_PREFIX
 from ruoyi_system.service import SysConfigService
 
 
 class StatisticsService:
+    # Vo 类 -> 整批校验缓存数据的 TypeAdapter
+    _VO_LIST_ADAPTERS: Dict[type, TypeAdapter] = {}
+    # 统计缓存构建：进程内同一批 Key 只构建一次
+    _BUILD_FLIGHT = SingleFlight()
+    # 跨进程构建锁的过期时间（秒），构建进程异常退出时锁自动释放
+    BUILD_LOCK_TIMEOUT = 120
+    # 等待其他进程构建完成的最长时间（秒），超时后自行构建
+    BUILD_WAIT_TIMEOUT = 60
 
     @classmethod
     @custom_cacheable(
         key_prefix=StatisticsConstants.MAP_SALES_STATISTICS_COMMON_KEY,
+        key_field="request.address",
         expire_time=10*60,
-        use_query_params_as_key=True
+        use_query_params_as_key=True,
+        local_max_size=256,
+        single_flight=True,
+        stale_expire_time=30*60
     )
     def sales_map_statistics(cls, request: CarStatisticsRequest) -> List[MapStatisticsVo]:
         """销售地图销量分析"""
@@ -43,6 +69,7 @@ class StatisticsService:
         # 步骤3：收集缓存命中的数据和未缓存的月份
         cached_results = []
         uncached_months = []
+        uncached_keys = []
 
         for month, stats_key in zip(months, stats_keys):
             cached_list, cached_data = cached_map.get(stats_key, ([], []))
@@ -53,18 +80,23 @@ class StatisticsService:
             else:
                 # 缓存不存在，加入待查询列表
                 uncached_months.append(month)
+                uncached_keys.append(stats_key)
 
         # 无未缓存月份，直接返回缓存数据
         if not uncached_months:
             return cached_results
 
-        # 全国查询：为每个省份的每个月构建缓存
-        if not request.address:
-            cls._build_nationwide_cache(request, months, uncached_months, cached_results)
-        # 省份查询：只查询该省份的未缓存月份
-        else:
-            cls._build_province_cache(request, uncached_months, cached_results)
+        def build() -> List[MapStatisticsVo]:
+            results = []
+            # 全国查询：为每个省份的每个月构建缓存
+            if not request.address:
+                cls._build_nationwide_cache(request, months, uncached_months, results)
+            # 省份查询：只查询该省份的未缓存月份
+            else:
+                cls._build_province_cache(request, uncached_months, results)
+            return results
 
+        cached_results.extend(cls._build_uncached(uncached_keys, MapStatisticsVo, build))
         return cached_results
 
     @classmethod
@@ -76,30 +108,14 @@ class StatisticsService:
         收集所有省份，为每个省份的每个月保存缓存
         有数据的保存数据，没数据的保存空缓存
         """
-        # 收集所有出现过的省份（遍历所有未缓存月份）
-        all_provinces = set()
-        for month in uncached_months:
-            # 构建查询请求
-            temp_request = CarStatisticsRequest(start_time=month, end_time=month)
-            # 复制原始请求的其他筛选条件（品牌、系列等）
-            temp_request = cls._copy_request_params(request, temp_request)
-
-            # 查询数据库，获取原始数据
-            raw_data: List[MapStatisticsPo] = StatisticsMapper.select_sales_map_statistics_raw(temp_request)
-            for item in raw_data:
-                # 解析省份名称（格式："江苏省 苏州市"）
-                province = item.name.split(' ')[0] if ' ' in item.name else item.name
-                all_provinces.add(province)
+        cache_infos = []
+        # 一次查询所有未缓存月份，按月份拆分并收集所有出现过的省份
+        month_rows, _, all_provinces = cls._select_nationwide_rows(
+            request, uncached_months, cls._statistics_source().select_sales_map_statistics_raw, lambda item: item.name)
 
         # 为每个未缓存的月份构建缓存
         for month in uncached_months:
-            # 构建查询请求
-            temp_request = CarStatisticsRequest(start_time=month, end_time=month)
-            # 复制原始请求的其他筛选条件（品牌、系列等）
-            temp_request = cls._copy_request_params(request, temp_request)
-
-            # 查询数据库，获取原始数据
-            raw_data: List[MapStatisticsPo] = StatisticsMapper.select_sales_map_statistics_raw(temp_request)
+            raw_data: List[MapStatisticsPo] = month_rows[month]
 
             # 转换为 Vo 对象并按省份分组
             provinces_with_data = cls._group_cities_by_province(raw_data)
@@ -110,20 +126,24 @@ class StatisticsService:
                 province_request = cls._build_request_with_province(request, province, month)
                 stats_key = cls._build_stats_key(province_request, month,
                                                  StatisticsConstants.MAP_SALES_STATISTICS_COMMON_KEY)
-                cls._save_to_cache(stats_key, cities, province,
-                                   statistics_name=StatisticsConstants.MAP_SALES_STATISTICS_COMMON_NAME)
+                cache_infos.append(cls._build_cache_info(stats_key, cities,
+                                                         statistics_name=StatisticsConstants.MAP_SALES_STATISTICS_COMMON_NAME))
 
             # 保存月份汇总缓存（省份聚合数据）
             province_results = cls._aggregate_by_province(raw_data)
             month_key = cls._build_stats_key(request, month, StatisticsConstants.MAP_SALES_STATISTICS_COMMON_KEY)
-            cls._save_to_cache(month_key, province_results, None,
-                               statistics_name=StatisticsConstants.MAP_SALES_STATISTICS_COMMON_NAME)
+            cache_infos.append(cls._build_cache_info(month_key, province_results,
+                                                     statistics_name=StatisticsConstants.MAP_SALES_STATISTICS_COMMON_NAME))
             cached_results.extend(province_results)
 
+        # 一次批量写入本次构建的所有缓存
+        cls._save_many_to_cache(cache_infos)
+
     @classmethod
     def _build_province_cache(cls, request: CarStatisticsRequest, uncached_months: List[int],
                               cached_results: List[MapStatisticsVo]) -> None:
         """构建省份查询的缓存"""
+        cache_infos = []
         for month in uncached_months:
             temp_request = CarStatisticsRequest(
                 start_time=month, end_time=month, address=request.address
@@ -134,10 +154,13 @@ class StatisticsService:
             db_results = cls._fetch_province_all_cities_data(temp_request)
 
             stats_key = cls._build_stats_key(temp_request, month, StatisticsConstants.MAP_SALES_STATISTICS_COMMON_KEY)
-            cls._save_to_cache(stats_key, db_results, request.address,
-                               statistics_name=StatisticsConstants.MAP_SALES_STATISTICS_COMMON_NAME)
+            cache_infos.append(cls._build_cache_info(stats_key, db_results,
+                                                     statistics_name=StatisticsConstants.MAP_SALES_STATISTICS_COMMON_NAME))
             cached_results.extend(db_results)
 
+        # 一次批量写入本次构建的所有缓存
+        cls._save_many_to_cache(cache_infos)
+
     @classmethod
     def _build_request_with_province(cls, source_request: CarStatisticsRequest, province: str,
                                      month: int) -> CarStatisticsRequest:
@@ -167,6 +190,34 @@ class StatisticsService:
         target.min_price = source.min_price
         return target
 
+    @classmethod
+    def _select_nationwide_rows(cls, request: CarStatisticsRequest, uncached_months: List[int],
+                                mapper_method, address_getter) -> tuple:
+        """
+        全国缓存构建：一次查询覆盖所有未缓存月份，再在内存中一次遍历按月份、省份拆分
+        说明：按最小、最大未缓存月份查询一个时间段，区间内已缓存月份的数据直接丢弃
+        返回: ({月份: [原始数据]}, {月份: {省份: [原始数据]}}, 出现过的所有省份)
+        """
+        temp_request = CarStatisticsRequest(start_time=min(uncached_months), end_time=max(uncached_months))
+        # 复制原始请求的其他筛选条件（品牌、系列等）
+        temp_request = cls._copy_request_params(request, temp_request)
+        raw_data = mapper_method(temp_request)
+
+        month_rows = {month: [] for month in uncached_months}
+        month_province_rows = {month: {} for month in uncached_months}
+        all_provinces = set()
+        for item in raw_data:
+            rows = month_rows.get(item.month)
+            if rows is None:
+                continue
+            rows.append(item)
+            # 解析省份名称（格式："江苏省 苏州市"）
+            address = address_getter(item)
+            province = address.split(' ')[0] if ' ' in address else address
+            all_provinces.add(province)
+            month_province_rows[item.month].setdefault(province, []).append(item)
+        return month_rows, month_province_rows, all_provinces
+
     @classmethod
     def _build_stats_key(cls, request: CarStatisticsRequest, month: int, common_key: str) -> str:
         """
@@ -258,28 +309,75 @@ class StatisticsService:
             # 返回空结果
             return {key: ([], []) for key in stats_keys}
 
+    @classmethod
+    def _build_uncached(cls, uncached_keys: List[str], vo_class, build: Callable[[], List]) -> List:
+        """
+        构建未缓存的统计数据，返回构建结果
+        同一批缓存 Key 同一时间只构建一次：本进程的并发请求等待并复用构建结果，
+        其他进程的请求等待持锁方写入缓存后直接读取缓存，等待超时再自行构建
+        """
+        lock_key = StatisticsConstants.STATISTICS_BUILD_LOCK_KEY + hashlib.sha1(
+            "\n".join(uncached_keys).encode("utf-8")).hexdigest()
+
+        def build_once() -> List:
+            lock = RedisBuildLock(redis_cache, lock_key, cls.BUILD_LOCK_TIMEOUT)
+            load = lambda: cls._select_cached_results(uncached_keys, vo_class)
+            if not lock.acquire():
+                cached = lock.wait(load, cls.BUILD_WAIT_TIMEOUT)
+                if cached is not None:
+                    return cached
+                LogUtil.logger.warning(f"[统计缓存] 等待其他进程构建超时，自行构建: {uncached_keys[0]}")
+                return build()
+            try:
+                # 加锁前其他进程可能刚构建完成
+                cached = load()
+                return cached if cached is not None else build()
+            finally:
+                lock.release()
+
+        results, _ = cls._BUILD_FLIGHT.do(lock_key, build_once, timeout=cls.BUILD_LOCK_TIMEOUT)
+        return results
+
+    @classmethod
+    def _select_cached_results(cls, stats_keys: List[str], vo_class=None):
+        """
+        按 Key 顺序读取缓存数据，任一 Key 未缓存时返回 None
+        """
+        cached_map = cls._get_cached_data_batch(stats_keys, vo_class=vo_class)
+        results = []
+        for key in stats_keys:
+            cached_list, cached_data = cached_map.get(key, ([], []))
+            if not cached_list:
+                return None
+            results.extend(cached_data)
+        return results
+
     @classmethod
     def _parse_cached_data(cls, cached_item, vo_class=None) -> tuple:
         """
         解析缓存数据
+        压缩编码的内容解码为行元组后整批校验为 Vo，旧数据仍按 JSON 文本解析
         返回: (缓存记录列表, 解析后的数据列表)
         """
-        # 调试日志
-        content_len = len(cached_item.content) if cached_item.content else 0
-        print(f"[缓存读取] key={cached_item.statistics_key}, content长度={content_len}")
-
-        # 尝试解析 JSON
         try:
-            content_data = json.loads(cached_item.content) if cached_item.content else []
-        except json.JSONDecodeError as e:
-            print(f"[缓存错误] JSON解析失败: key={cached_item.statistics_key}, 错误={e}")
+            content_data = StatisticsPayload.load_rows(cached_item.payload, cached_item.content)
+            rows = list(content_data)
+        except Exception as e:
+            print(f"[缓存错误] 内容解析失败: key={cached_item.statistics_key}, 错误={e}")
             return ([], [])
 
-        results = []
         # 如果指定了vo_class，使用vo_class，否则使用通用的 StatisticsVo
         VoClass = vo_class if vo_class else StatisticsVo
+        try:
+            return ([cached_item], cls._vo_list_adapter(VoClass).validate_python(rows, from_attributes=True))
+        except ValidationError:
+            # 存在字段不匹配的行，逐行解析
+            pass
 
-        for item in content_data:
+        results = []
+        for item in rows:
+            if not isinstance(item, dict):
+                item = item._asdict()
             try:
                 vo = VoClass(**item)
             except Exception as e:
@@ -297,51 +395,53 @@ class StatisticsService:
         return ([cached_item], results)
 
     @classmethod
-    def _save_to_cache(cls, stats_key: str, data: List, address: Optional[str],
-                       stat_type: str = None, common_key: str = None,
-                       statistics_name: str = None) -> None:
-        """
-        保存数据到缓存
-        如果缓存已存在则更新，不存在则新增
-        """
-        try:
-            # 序列化数据 (支持 Vo 和 Po 对象)
-            data_dicts = []
-            for item in data:
-                if hasattr(item, 'dict'):
-                    data_dicts.append(item.dict())
-                elif hasattr(item, '__dict__'):
-                    data_dicts.append(item.__dict__)
-                else:
-                    data_dicts.append(item)
-            content_str = json.dumps(data_dicts, ensure_ascii=False)
-
-            existing_info = StatisticsInfo(statistics_key=stats_key)
-            existing_list = StatisticsInfoService.select_statistics_info_list(existing_info)
-
-            # 默认使用地图统计的type和key，如果指定了则使用指定的
-            use_type = stat_type or StatisticsConstants.MAP_SALES_STATISTICS_COMMON_TYPE
-            use_key = common_key or StatisticsConstants.MAP_SALES_STATISTICS_COMMON_KEY
-
-            stat_info = StatisticsInfo(
-                type=use_type,
-                common_key=use_key,
-                statistics_key=stats_key,
-                content=content_str
-            )
-
-            # 如果传入了statistics_name，直接使用；否则报错（调用方必须传入）
-            if statistics_name:
-                stat_info.statistics_name = statistics_name
-            else:
-                raise ValueError("statistics_name is required")
+    def _vo_list_adapter(cls, vo_class) -> TypeAdapter:
+        adapter = cls._VO_LIST_ADAPTERS.get(vo_class)
+        if adapter is None:
+            adapter = cls._VO_LIST_ADAPTERS[vo_class] = TypeAdapter(List[vo_class])
+        return adapter
 
-            if existing_list:
-                stat_info.id = existing_list[0].id
-                StatisticsInfoService.update_statistics_info(stat_info)
+    @classmethod
+    def _build_cache_info(cls, stats_key: str, data: List, stat_type: str = None, common_key: str = None,
+                          statistics_name: str = None) -> StatisticsInfo:
+        """
+        构建一条缓存记录，由 _save_many_to_cache 批量写入
+        """
+        # 序列化数据 (支持 Vo 和 Po 对象)
+        data_dicts = []
+        for item in data:
+            if hasattr(item, 'dict'):
+                data_dicts.append(item.dict())
+            elif hasattr(item, '__dict__'):
+                data_dicts.append(item.__dict__)
             else:
-                StatisticsInfoService.insert_statistics_info(stat_info)
+                data_dicts.append(item)
+        payload = StatisticsPayload.encode(data_dicts)
+
+        # 默认使用地图统计的type和key，如果指定了则使用指定的
+        use_type = stat_type or StatisticsConstants.MAP_SALES_STATISTICS_COMMON_TYPE
+        use_key = common_key or StatisticsConstants.MAP_SALES_STATISTICS_COMMON_KEY
+
+        # 调用方必须传入 statistics_name
+        if not statistics_name:
+            raise ValueError("statistics_name is required")
+
+        return StatisticsInfo(
+            type=use_type,
+            common_key=use_key,
+            statistics_key=stats_key,
+            statistics_name=statistics_name,
+            payload=payload
+        )
 
+    @classmethod
+    def _save_many_to_cache(cls, cache_infos: List[StatisticsInfo]) -> None:
+        """
+        批量保存缓存
+        按 statistics_key 覆盖已有缓存，不存在则新增，每批一条语句、一次提交
+        """
+        try:
+            StatisticsInfoService.save_statistics_info_batch(cache_infos)
         except Exception as e:
             print(f"保存缓存数据出错: {e}")
 
@@ -409,7 +509,7 @@ class StatisticsService:
         """
         province_name = cls._extract_province_from_address(request.address)
         # 查询所有城市数据（不带地址限制，由 Mapper 的 init_query 处理）
-        raw_data: List[MapStatisticsPo] = StatisticsMapper.select_sales_map_statistics_raw(request)
+        raw_data: List[MapStatisticsPo] = cls._statistics_source().select_sales_map_statistics_raw(request)
 
         # 过滤出属于指定省份的城市数据
         province_cities = []
@@ -447,8 +547,12 @@ class StatisticsService:
     @classmethod
     @custom_cacheable(
         key_prefix=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_KEY,
+        key_field="request.address",
         expire_time=10*60,
-        use_query_params_as_key=True
+        use_query_params_as_key=True,
+        local_max_size=256,
+        single_flight=True,
+        stale_expire_time=30*60
     )
     def price_sales_statistics(cls, request) -> List[StatisticsVo]:
         """
@@ -457,13 +561,7 @@ class StatisticsService:
         全国查询时，缓存所有省份数据
         """
         # 获取价格范围配置
-        price_range = [100000, 200000, 300000, 500000, 1000000, 2000000]
-        price_range_str = SysConfigService.select_config_by_key(ConfigConstants.STATISTICS_PRICE_RANGE)
-        if price_range_str:
-            try:
-                price_range = [int(x.strip()) for x in price_range_str.split(',')]
-            except ValueError:
-                pass  # 使用默认值
+        price_range = cls._get_price_range()
 
         # 生成月份列表
         months = DateUtil.generate_months_list(request.start_time, request.end_time)
@@ -487,6 +585,7 @@ class StatisticsService:
         # 步骤3：收集缓存命中的数据和未缓存的月份
         cached_results = []
         uncached_months = []
+        uncached_keys = []
 
         for month, stats_key in zip(months, stats_keys):
             cached_list, cached_data = cached_map.get(stats_key, ([], []))
@@ -495,18 +594,23 @@ class StatisticsService:
                 cached_results.extend(cached_data)
             else:
                 uncached_months.append(month)
+                uncached_keys.append(stats_key)
 
         # 无未缓存月份，直接返回
         if not uncached_months:
             return cached_results
 
-        # 全国查询：为每个省份的每个月构建缓存
-        if not request.address:
-            cls._build_nationwide_price_cache(request, months, uncached_months, price_range, cached_results)
-        # 省份查询：只查询该省份的未缓存月份
-        else:
-            cls._build_province_price_cache(request, uncached_months, price_range, cached_results)
+        def build() -> List[StatisticsVo]:
+            results = []
+            # 全国查询：为每个省份的每个月构建缓存
+            if not request.address:
+                cls._build_nationwide_price_cache(request, months, uncached_months, price_range, results)
+            # 省份查询：只查询该省份的未缓存月份
+            else:
+                cls._build_province_price_cache(request, uncached_months, price_range, results)
+            return results
 
+        cached_results.extend(cls._build_uncached(uncached_keys, StatisticsVo, build))
         return cached_results
 
     @classmethod
@@ -517,29 +621,17 @@ class StatisticsService:
         构建全国价格统计缓存
         收集所有省份，为每个省份的每个月保存缓存
         """
-        # 收集所有出现过的省份
-        all_provinces = set()
-        for month in uncached_months:
-            temp_request = CarStatisticsRequest(start_time=month, end_time=month)
-            temp_request = cls._copy_request_params(request, temp_request)
-            raw_data = StatisticsMapper.select_price_sales_statistics(temp_request)
-            for item in raw_data:
-                province = item.address.split(' ')[0] if ' ' in item.address else item.address
-                all_provinces.add(province)
+        cache_infos = []
+        # 一次查询所有未缓存月份，按月份、省份分组并收集所有出现过的省份
+        month_rows, month_province_rows, all_provinces = cls._select_nationwide_rows(
+            request, uncached_months,
+            lambda req: cls._statistics_source().select_price_sales_statistics(req, price_range),
+            lambda item: item.address)
 
         # 为每个未缓存的月份构建缓存
         for month in uncached_months:
-            temp_request = CarStatisticsRequest(start_time=month, end_time=month)
-            temp_request = cls._copy_request_params(request, temp_request)
-            raw_data = StatisticsMapper.select_price_sales_statistics(temp_request)
-
-            # 按省份分组数据
-            provinces_data = {}
-            for item in raw_data:
-                province = item.address.split(' ')[0] if ' ' in item.address else item.address
-                if province not in provinces_data:
-                    provinces_data[province] = []
-                provinces_data[province].append(item)
+            raw_data = month_rows[month]
+            provinces_data = month_province_rows[month]
 
             # 保存每个省份的缓存
             for province in all_provinces:
@@ -550,24 +642,28 @@ class StatisticsService:
                 stats_key = cls._build_stats_key(province_request, month,
                                                  StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_KEY)
                 month_results = cls._aggregate_by_price_range(province_data, price_range, province)
-                cls._save_to_cache(stats_key, month_results, province,
-                                   stat_type=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_TYPE,
-                                   common_key=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_KEY,
-                                   statistics_name=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_NAME)
+                cache_infos.append(cls._build_cache_info(stats_key, month_results,
+                                                         stat_type=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_TYPE,
+                                                         common_key=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_KEY,
+                                                         statistics_name=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_NAME))
 
             # 保存月份汇总缓存（全国数据）
-            month_key = cls._build_stats_key(temp_request, month, StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_KEY)
+            month_key = cls._build_stats_key(request, month, StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_KEY)
             month_results = cls._aggregate_by_price_range(raw_data, price_range, None)
-            cls._save_to_cache(month_key, month_results, None,
-                               stat_type=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_TYPE,
-                               common_key=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_KEY,
-                               statistics_name=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_NAME)
+            cache_infos.append(cls._build_cache_info(month_key, month_results,
+                                                     stat_type=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_TYPE,
+                                                     common_key=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_KEY,
+                                                     statistics_name=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_NAME))
             cached_results.extend(month_results)
 
+        # 一次批量写入本次构建的所有缓存
+        cls._save_many_to_cache(cache_infos)
+
     @classmethod
     def _build_province_price_cache(cls, request: CarStatisticsRequest, uncached_months: List[int],
                                     price_range: List[int], cached_results: List[StatisticsVo]) -> None:
         """构建省份价格统计缓存"""
+        cache_infos = []
         for month in uncached_months:
             temp_request = CarStatisticsRequest(
                 start_time=month, end_time=month, address=request.address
@@ -575,19 +671,179 @@ class StatisticsService:
             temp_request = cls._copy_request_params(request, temp_request)
 
             # 查询数据库
-            raw_data = StatisticsMapper.select_price_sales_statistics(temp_request)
+            raw_data = cls._statistics_source().select_price_sales_statistics(temp_request, price_range)
 
             # 按价格范围聚合数据
             month_results = cls._aggregate_by_price_range(raw_data, price_range, request.address)
 
             # 保存缓存
             stats_key = cls._build_stats_key(temp_request, month, StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_KEY)
-            cls._save_to_cache(stats_key, month_results, request.address,
-                               stat_type=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_TYPE,
-                               common_key=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_KEY,
-                               statistics_name=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_NAME)
+            cache_infos.append(cls._build_cache_info(stats_key, month_results,
+                                                     stat_type=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_TYPE,
+                                                     common_key=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_KEY,
+                                                     statistics_name=StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_NAME))
             cached_results.extend(month_results)
 
+        # 一次批量写入本次构建的所有缓存
+        cls._save_many_to_cache(cache_infos)
+
+    @classmethod
+    def _statistics_source(cls):
+        """
+        统计查询数据源：开启内存列式统计引擎时在进程内计算，否则查询数据库，两者方法与返回值相同
+        """
+        return SalesAnalyticsEngine if SalesAnalyticsEngine.enabled() else StatisticsMapper
+
+    @classmethod
+    def _get_price_range(cls) -> List[int]:
+        """
+        读取统计价格区间配置，未配置或格式错误时使用默认区间
+        """
+        price_range = [100000, 200000, 300000, 500000, 1000000, 2000000]
+        price_range_str = SysConfigService.select_config_by_key(ConfigConstants.STATISTICS_PRICE_RANGE)
+        if price_range_str:
+            try:
+                price_range = [int(x.strip()) for x in price_range_str.split(',')]
+            except ValueError:
+                pass  # 使用默认值
+        return price_range
+
+    @classmethod
+    def rebuild_sales_rollup(cls) -> int:
+        """
+        按当前统计价格区间重建销量汇总表
+        价格区间配置变更后汇总表不再用于价格统计，需重新构建
+        """
+        start_time = time.time()
+        price_range = cls._get_price_range()
+        if price_range != sorted(set(price_range)):
+            LogUtil.logger.error(f"[销量汇总] 价格区间配置不是升序，无法构建: {price_range}")
+            return 0
+        row_count = SalesRollupMapper.rebuild(price_range)
+        LogUtil.logger.info(f"[销量汇总] 重建完成，汇总行数={row_count}，耗时={round(time.time() - start_time, 2)}s")
+        return row_count
+
+    @classmethod
+    def invalidate_sales_statistics(cls, touched: Iterable[Tuple[Any, Optional[str]]],
+                                    rebuild: Optional[bool] = None) -> int:
+        """
+        销量数据变更后按变更的 (月份, 省份) 清理统计缓存，代替清空全部统计信息
+        - 统计信息：该省份、全国在该月份的按月统计，以及该省份、全国的销量预测
+        - 接口结果缓存：Key 中不含月份，清理该省份（含省内城市）、全国查询的结果
+        rebuild 为 True 时在后台按被清理的统计 Key 重新构建，为 None 时读取配置
+
+        Args:
+            touched: 变更的 (月份, 省份)，省份为空的数据只影响全国统计
+            rebuild (bool): 是否在后台重新构建
+
+        Returns:
+            int: 清理的统计信息条数
+        """
+        pairs = {(int(month), province or '') for month, province in touched if month not in (None, '')}
+        if not pairs:
+            return 0
+        predict_key = StatisticsConstants.SALES_PREDICT_COMMON_KEY
+        provinces = {province for _, province in pairs}
+
+        # 统计 Key 格式见 _build_stats_key，全国统计的省份为空
+        prefixes = {f"{predict_key}::"}
+        prefixes.update(f"{predict_key}:{province}:" for province in provinces)
+        for month, province in pairs:
+            for common_key in StatisticsConstants.SALES_MONTHLY_COMMON_KEYS:
+                prefixes.add(f"{common_key}::{month}:")
+                prefixes.add(f"{common_key}:{province}:{month}:")
+
+        # 接口结果缓存 Key：{前缀}:{地址}:args:{参数摘要}，全国查询没有地址段
+        patterns = []
+        for common_key in StatisticsConstants.SALES_MONTHLY_COMMON_KEYS + (predict_key,):
+            patterns.append(f"{common_key}:{ARGS_HASH_PREFIX}:*")
+            patterns.extend(f"{common_key}:{province}*" for province in sorted(provinces) if province)
+
+        try:
+            statistics_keys = StatisticsInfoService.select_statistics_keys_by_prefixes(sorted(prefixes))
+            count = StatisticsInfoService.delete_statistics_info_by_keys(statistics_keys)
+            evict_cache(patterns)
+        except Exception as e:
+            LogUtil.logger.error(f"[统计缓存] 按销量变更清理统计缓存失败: {e}")
+            return 0
+        LogUtil.logger.info(f"[统计缓存] 销量变更 {len(pairs)} 个(月份, 省份)，清理统计信息 {count} 条")
+
+        if rebuild is None:
+            rebuild = StringUtil.to_bool(SysConfigService.select_config_by_key(ConfigConstants.STATISTICS_REBUILD_ON_CHANGE))
+        if rebuild and statistics_keys:
+            TaskManager.execute(cls._rebuild_statistics_keys, statistics_keys)
+        return count
+
+    @classmethod
+    def _rebuild_statistics_keys(cls, app, statistics_keys: List[str]) -> int:
+        """
+        后台重新构建被清理的统计信息：先构建全国查询（同时写入各省份的缓存），省份查询只构建仍未缓存的部分
+        返回: 执行的统计次数
+        """
+        methods = {
+            StatisticsConstants.MAP_SALES_STATISTICS_COMMON_KEY: cls.sales_map_statistics,
+            StatisticsConstants.PRICE_SALES_STATISTICS_COMMON_KEY: cls.price_sales_statistics,
+            StatisticsConstants.ENERGY_TYPE_SALES_STATISTICS_COMMON_KEY: cls.energy_type_sales_statistics,
+            StatisticsConstants.BRAND_SALES_STATISTICS_COMMON_KEY: cls.brand_sales_statistics,
+            StatisticsConstants.COUNTRY_SALES_STATISTICS_COMMON_KEY: cls.country_sales_statistics,
+            StatisticsConstants.MODEL_TYPE_SALES_STATISTICS_COMMON_KEY: cls.model_type_sales_statistics,
+            StatisticsConstants.SERIES_SALES_STATISTICS_COMMON_KEY: cls.series_sales_statistics,
+            StatisticsConstants.SALES_PREDICT_COMMON_KEY: cls.sales_predict_statistics,
+        }
+        with app.app_context():
+            start_time = time.time()
+            units = {}
+            for statistics_key in statistics_keys:
+                parsed = cls._parse_stats_key(statistics_key)
+                if parsed is not None:
+                    units.setdefault((parsed[0], parsed[1].model_dump_json()), parsed)
+
+            failed = 0
+            for common_key, request in sorted(units.values(), key=lambda unit: unit[1].address is not None):
+                try:
+                    methods[common_key](request)
+                except Exception:
+                    failed += 1
+                    LogUtil.logger.error(f"[统计缓存] 重新构建失败 {common_key}: {traceback.format_exc()}")
+            LogUtil.logger.info(f"[统计缓存] 后台重新构建完成，统计 {len(units)} 次，失败 {failed} 次，"
+                                f"耗时={round(time.time() - start_time, 2)}s")
+            return len(units)
+
+    @classmethod
+    def _parse_stats_key(cls, statistics_key: str) -> Optional[Tuple[str, CarStatisticsRequest]]:
+        """
+        统计Key -> (统计公共key, 查询条件)，_build_stats_key 的逆过程，无法解析时返回 None
+        销量预测按配置的预测时间范围只构建全国查询，全国预测会同时写入各省份的缓存
+        """
+        predict_key = StatisticsConstants.SALES_PREDICT_COMMON_KEY
+        for common_key in StatisticsConstants.SALES_MONTHLY_COMMON_KEYS + (predict_key,):
+            if statistics_key.startswith(f"{common_key}:"):
+                break
+        else:
+            return None
+        parts = statistics_key[len(common_key) + 1:].split(':')
+        if len(parts) != 9:
+            return None
+        province, month, country, brand, series, model, energy, min_price, max_price = \
+            [None if value in ('', 'all') else value for value in parts]
+        try:
+            if common_key == predict_key:
+                start_month = int(SysConfigService.select_config_by_key(
+                    ConfigConstants.CURRENT_PREDICT_START_MONTH) or 202212)
+                end_month = int(SysConfigService.select_config_by_key(
+                    ConfigConstants.CURRENT_PREDICT_END_MONTH) or 202512)
+                province = None
+            else:
+                start_month = end_month = int(month)
+            return common_key, CarStatisticsRequest(
+                start_time=start_month, end_time=end_month, address=province, country=country,
+                brand_name=brand, series_id=series, model_type=model, energy_type=energy,
+                min_price=float(min_price) if min_price is not None else None,
+                max_price=float(max_price) if max_price is not None else None
+            )
+        except ValueError:
+            return None
+
     @classmethod
     def _aggregate_by_price_range(cls, pos: List[PriceStatisticsPo], price_range: List[int],
                                   address: str = None) -> List[StatisticsVo]:
@@ -666,8 +922,12 @@ class StatisticsService:
     @classmethod
     @custom_cacheable(
         key_prefix=StatisticsConstants.ENERGY_TYPE_SALES_STATISTICS_COMMON_KEY,
+        key_field="request.address",
         expire_time=10*60,
-        use_query_params_as_key=True
+        use_query_params_as_key=True,
+        local_max_size=256,
+        single_flight=True,
+        stale_expire_time=30*60
     )
     def energy_type_sales_statistics(cls, request: CarStatisticsRequest) -> List[StatisticsVo]:
         """
@@ -675,7 +935,7 @@ class StatisticsService:
         """
         return cls._dimension_statistics(
             request,
-            lambda req: StatisticsMapper.energy_type_sales_statistics(req),
+            lambda req: cls._statistics_source().energy_type_sales_statistics(req),
             StatisticsConstants.ENERGY_TYPE_SALES_STATISTICS_COMMON_KEY,
             StatisticsConstants.ENERGY_TYPE_SALES_STATISTICS_COMMON_TYPE,
             StatisticsConstants.ENERGY_TYPE_SALES_STATISTICS_COMMON_NAME
@@ -684,8 +944,12 @@ class StatisticsService:
     @classmethod
     @custom_cacheable(
         key_prefix=StatisticsConstants.SERIES_SALES_STATISTICS_COMMON_KEY,
+        key_field="request.address",
         expire_time=10*60,
-        use_query_params_as_key=True
+        use_query_params_as_key=True,
+        local_max_size=256,
+        single_flight=True,
+        stale_expire_time=30*60
     )
     def series_sales_statistics(cls, request) -> List[SeriesStatisticsVo]:
         """
@@ -713,6 +977,7 @@ class StatisticsService:
         # 步骤3：收集缓存命中的数据和未缓存的月份
         cached_results = []
         uncached_months = []
+        uncached_keys = []
 
         for month, stats_key in zip(months, stats_keys):
             cached_list, cached_data = cached_map.get(stats_key, ([], []))
@@ -721,24 +986,29 @@ class StatisticsService:
                 cached_results.extend(cached_data)
             else:
                 uncached_months.append(month)
+                uncached_keys.append(stats_key)
 
         if not uncached_months:
             return cached_results
 
         # 步骤4：未缓存数据需要从数据库查询并处理
-        # 全国查询
-        if not request.address:
-            cls._build_nationwide_series_cache(request, uncached_months, cached_results,
-                                               StatisticsConstants.SERIES_SALES_STATISTICS_COMMON_KEY,
-                                               StatisticsConstants.SERIES_SALES_STATISTICS_COMMON_TYPE,
-                                               StatisticsConstants.SERIES_SALES_STATISTICS_COMMON_NAME)
-        # 省份查询
-        else:
-            cls._build_province_series_cache(request, uncached_months, cached_results,
-                                             StatisticsConstants.SERIES_SALES_STATISTICS_COMMON_KEY,
-                                             StatisticsConstants.SERIES_SALES_STATISTICS_COMMON_TYPE,
-                                             StatisticsConstants.SERIES_SALES_STATISTICS_COMMON_NAME)
+        def build() -> List[SeriesStatisticsVo]:
+            results = []
+            # 全国查询
+            if not request.address:
+                cls._build_nationwide_series_cache(request, uncached_months, results,
+                                                   StatisticsConstants.SERIES_SALES_STATISTICS_COMMON_KEY,
+                                                   StatisticsConstants.SERIES_SALES_STATISTICS_COMMON_TYPE,
+                                                   StatisticsConstants.SERIES_SALES_STATISTICS_COMMON_NAME)
+            # 省份查询
+            else:
+                cls._build_province_series_cache(request, uncached_months, results,
+                                                 StatisticsConstants.SERIES_SALES_STATISTICS_COMMON_KEY,
+                                                 StatisticsConstants.SERIES_SALES_STATISTICS_COMMON_TYPE,
+                                                 StatisticsConstants.SERIES_SALES_STATISTICS_COMMON_NAME)
+            return results
 
+        cached_results.extend(cls._build_uncached(uncached_keys, SeriesStatisticsVo, build))
         return cached_results
 
     @classmethod
@@ -746,6 +1016,7 @@ class StatisticsService:
                                         uncached_months: List[str], cached_results: List[SeriesStatisticsVo],
                                         common_key: str, stat_type: str, statistics_name: str):
         """构建全国车系销售统计缓存"""
+        cache_infos = []
         # 全国查询：按省份+车系列表聚合
         all_pos = []
         for month in uncached_months:
@@ -756,7 +1027,7 @@ class StatisticsService:
                 model_type=request.model_type, energy_type=request.energy_type,
                 min_price=request.min_price, max_price=request.max_price
             )
-            pos = StatisticsMapper.series_sales_statistics(temp_request)
+            pos = cls._statistics_source().series_sales_statistics(temp_request)
             all_pos.extend(pos)
 
         if not all_pos:
@@ -771,13 +1042,13 @@ class StatisticsService:
             value = po.value
             month = po.month
 
-            if province not in province_series_map:
-                province_series_map[province] = {}
-            if series_id not in province_series_map[province]:
-                province_series_map[province][series_id] = {
+            # 按月份分开聚合，每个月份的缓存只包含当月数据
+            series_map = province_series_map.setdefault((province, month), {})
+            if series_id not in series_map:
+                series_map[series_id] = {
                     'value': 0, 'month': month, 'series_id': series_id
                 }
-            province_series_map[province][series_id]['value'] += value
+            series_map[series_id]['value'] += value
 
         # 批量查询车系信息获取名称
         cls._fill_series_names(province_series_map)
@@ -787,7 +1058,7 @@ class StatisticsService:
         for month in uncached_months:
             cache_data_map[month] = []
 
-        for province, series_map in province_series_map.items():
+        for (province, _), series_map in province_series_map.items():
             for series_id, data in series_map.items():
                 series_name = data['series_name']
                 vo = SeriesStatisticsVo(
@@ -805,15 +1076,19 @@ class StatisticsService:
         # 批量写入缓存
         for month in uncached_months:
             stats_key = cls._build_stats_key(request, month, common_key)
-            cls._save_to_cache(stats_key, cache_data_map.get(month, []), request.address,
-                               stat_type=stat_type, common_key=common_key,
-                               statistics_name=statistics_name)
+            cache_infos.append(cls._build_cache_info(stats_key, cache_data_map.get(month, []),
+                                                     stat_type=stat_type, common_key=common_key,
+                                                     statistics_name=statistics_name))
+
+        # 一次批量写入本次构建的所有缓存
+        cls._save_many_to_cache(cache_infos)
 
     @classmethod
     def _build_province_series_cache(cls, request: CarStatisticsRequest,
                                       uncached_months: List[str], cached_results: List[SeriesStatisticsVo],
                                       common_key: str, stat_type: str, statistics_name: str):
         """构建省份车系销售统计缓存"""
+        cache_infos = []
         filter_province = request.address.split(' ')[0] if ' ' in request.address else request.address
 
         # 省份查询：按城市+车系列表聚合
@@ -826,7 +1101,7 @@ class StatisticsService:
                 model_type=request.model_type, energy_type=request.energy_type,
                 min_price=request.min_price, max_price=request.max_price
             )
-            pos = StatisticsMapper.series_sales_statistics(temp_request)
+            pos = cls._statistics_source().series_sales_statistics(temp_request)
             all_pos.extend(pos)
 
         if not all_pos:
@@ -843,13 +1118,13 @@ class StatisticsService:
             value = po.value
             month = po.month
 
-            if city not in city_series_map:
-                city_series_map[city] = {}
-            if series_id not in city_series_map[city]:
-                city_series_map[city][series_id] = {
+            # 按月份分开聚合，每个月份的缓存只包含当月数据
+            series_map = city_series_map.setdefault((city, month), {})
+            if series_id not in series_map:
+                series_map[series_id] = {
                     'value': 0, 'month': month, 'series_id': series_id
                 }
-            city_series_map[city][series_id]['value'] += value
+            series_map[series_id]['value'] += value
 
         # 批量查询车系信息获取名称
         cls._fill_series_names(city_series_map)
@@ -859,7 +1134,7 @@ class StatisticsService:
         for month in uncached_months:
             cache_data_map[month] = []
 
-        for city, series_map in city_series_map.items():
+        for (city, _), series_map in city_series_map.items():
             for series_id, data in series_map.items():
                 series_name = data['series_name']
                 vo = SeriesStatisticsVo(
@@ -877,9 +1152,12 @@ class StatisticsService:
         # 批量写入缓存
         for month in uncached_months:
             stats_key = cls._build_stats_key(request, month, common_key)
-            cls._save_to_cache(stats_key, cache_data_map.get(month, []), request.address,
-                               stat_type=stat_type, common_key=common_key,
-                               statistics_name=statistics_name)
+            cache_infos.append(cls._build_cache_info(stats_key, cache_data_map.get(month, []),
+                                                     stat_type=stat_type, common_key=common_key,
+                                                     statistics_name=statistics_name))
+
+        # 一次批量写入本次构建的所有缓存
+        cls._save_many_to_cache(cache_infos)
 
     @classmethod
     def _fill_series_names(cls, dimension_series_map: Dict):
@@ -888,7 +1166,7 @@ class StatisticsService:
         统一处理方法，避免循环导入
 
         Args:
-            dimension_series_map: 维度-车系列表字典，如 {省份: {series_id: {'value':, 'month':, 'series_id':}}}
+            dimension_series_map: 维度-车系列表字典，如 {(省份, 月份): {series_id: {'value':, 'month':, 'series_id':}}}
         """
         # 收集所有 series_id
         all_series_ids = set()
@@ -914,8 +1192,12 @@ class StatisticsService:
     @classmethod
     @custom_cacheable(
         key_prefix=StatisticsConstants.BRAND_SALES_STATISTICS_COMMON_KEY,
+        key_field="request.address",
         expire_time=10 * 60,
-        use_query_params_as_key=True
+        use_query_params_as_key=True,
+        local_max_size=256,
+        single_flight=True,
+        stale_expire_time=30*60
     )
     def brand_sales_statistics(cls, request: CarStatisticsRequest) -> List[StatisticsVo]:
         """
@@ -923,7 +1205,7 @@ class StatisticsService:
         """
         return cls._dimension_statistics(
             request,
-            StatisticsMapper.brand_sales_statistics,
+            cls._statistics_source().brand_sales_statistics,
             StatisticsConstants.BRAND_SALES_STATISTICS_COMMON_KEY,
             StatisticsConstants.BRAND_SALES_STATISTICS_COMMON_TYPE,
             StatisticsConstants.BRAND_SALES_STATISTICS_COMMON_NAME
@@ -932,8 +1214,12 @@ class StatisticsService:
     @classmethod
     @custom_cacheable(
         key_prefix=StatisticsConstants.COUNTRY_SALES_STATISTICS_COMMON_KEY,
+        key_field="request.address",
         expire_time=10*60,
-        use_query_params_as_key=True
+        use_query_params_as_key=True,
+        local_max_size=256,
+        single_flight=True,
+        stale_expire_time=30*60
     )
     def country_sales_statistics(cls, request: CarStatisticsRequest) -> List[StatisticsVo]:
         """
@@ -941,7 +1227,7 @@ class StatisticsService:
         """
         return cls._dimension_statistics(
             request,
-            StatisticsMapper.country_sales_statistics,
+            cls._statistics_source().country_sales_statistics,
             StatisticsConstants.COUNTRY_SALES_STATISTICS_COMMON_KEY,
             StatisticsConstants.COUNTRY_SALES_STATISTICS_COMMON_TYPE,
             StatisticsConstants.COUNTRY_SALES_STATISTICS_COMMON_NAME
@@ -950,8 +1236,12 @@ class StatisticsService:
     @classmethod
     @custom_cacheable(
         key_prefix=StatisticsConstants.MODEL_TYPE_SALES_STATISTICS_COMMON_KEY,
+        key_field="request.address",
         expire_time=10*60,
-        use_query_params_as_key=True
+        use_query_params_as_key=True,
+        local_max_size=256,
+        single_flight=True,
+        stale_expire_time=30*60
     )
     def model_type_sales_statistics(cls, request: CarStatisticsRequest) -> List[StatisticsVo]:
         """
@@ -959,7 +1249,7 @@ class StatisticsService:
         """
         return cls._dimension_statistics(
             request,
-            StatisticsMapper.model_type_sales_statistics,
+            cls._statistics_source().model_type_sales_statistics,
             StatisticsConstants.MODEL_TYPE_SALES_STATISTICS_COMMON_KEY,
             StatisticsConstants.MODEL_TYPE_SALES_STATISTICS_COMMON_TYPE,
             StatisticsConstants.MODEL_TYPE_SALES_STATISTICS_COMMON_NAME
@@ -994,6 +1284,7 @@ class StatisticsService:
         # 步骤3：收集缓存命中的数据和未缓存的月份
         cached_results = []
         uncached_months = []
+        uncached_keys = []
 
         for month, stats_key in zip(months, stats_keys):
             cached_list, cached_data = cached_map.get(stats_key, ([], []))
@@ -1002,21 +1293,26 @@ class StatisticsService:
                 cached_results.extend(cached_data)
             else:
                 uncached_months.append(month)
+                uncached_keys.append(stats_key)
 
         if not uncached_months:
             return cached_results
 
-        # 全国查询
-        if not request.address:
-            cls._build_nationwide_dimension_cache(request, months, uncached_months, cached_results,
-                                                  mapper_method, stat_type, common_key,
-                                                  statistics_name)
-        # 省份查询
-        else:
-            cls._build_province_dimension_cache(request, uncached_months, cached_results,
-                                                mapper_method, stat_type, common_key,
-                                                statistics_name)
+        def build() -> List[StatisticsVo]:
+            results = []
+            # 全国查询
+            if not request.address:
+                cls._build_nationwide_dimension_cache(request, months, uncached_months, results,
+                                                      mapper_method, stat_type, common_key,
+                                                      statistics_name)
+            # 省份查询
+            else:
+                cls._build_province_dimension_cache(request, uncached_months, results,
+                                                    mapper_method, stat_type, common_key,
+                                                    statistics_name)
+            return results
 
+        cached_results.extend(cls._build_uncached(uncached_keys, StatisticsVo, build))
         return cached_results
 
     @classmethod
@@ -1073,34 +1369,20 @@ class StatisticsService:
         """
         构建全国维度统计缓存（通用方法）
         说明：
-        1. 遍历所有未缓存的月份，收集每个月份出现的省份
-        2. 再次遍历月份，查询原始数据
+        1. 一次查询所有未缓存月份的原始数据，按月份、省份分组并收集出现过的省份
+        2. 遍历月份构建缓存
         3. 为每个省份保存该月份的缓存（按省份聚合）
         4. 保存月份汇总缓存（按省份聚合全国）
         """
-        # 步骤1：收集所有未缓存月份中出现的省份
-        all_provinces = set()
-        for month in uncached_months:
-            temp_request = CarStatisticsRequest(start_time=month, end_time=month)
-            temp_request = cls._copy_request_params(request, temp_request)
-            raw_data = mapper_method(temp_request)
-            for item in raw_data:
-                province = item.address.split(' ')[0] if ' ' in item.address else item.address
-                all_provinces.add(province)
+        cache_infos = []
+        # 步骤1：一次查询所有未缓存月份，按月份、省份分组
+        month_rows, month_province_rows, all_provinces = cls._select_nationwide_rows(
+            request, uncached_months, mapper_method, lambda item: item.address)
 
-        # 步骤2：遍历月份，查询数据并构建缓存
+        # 步骤2：遍历月份构建缓存
         for month in uncached_months:
-            temp_request = CarStatisticsRequest(start_time=month, end_time=month)
-            temp_request = cls._copy_request_params(request, temp_request)
-            raw_data = mapper_method(temp_request)
-
-            # 按省份分组原始数据
-            provinces_data = {}
-            for item in raw_data:
-                province = item.address.split(' ')[0] if ' ' in item.address else item.address
-                if province not in provinces_data:
-                    provinces_data[province] = []
-                provinces_data[province].append(item)
+            raw_data = month_rows[month]
+            provinces_data = month_province_rows[month]
 
             # 步骤3：为每个省份保存缓存（按省份聚合）
             for province in all_provinces:
@@ -1110,18 +1392,21 @@ class StatisticsService:
 
                 stats_key = cls._build_stats_key(province_request, month, common_key)
                 month_results = cls._aggregate_by_dimension(province_data, province)
-                cls._save_to_cache(stats_key, month_results, province,
-                                   stat_type=stat_type, common_key=common_key,
-                                   statistics_name=statistics_name)
+                cache_infos.append(cls._build_cache_info(stats_key, month_results,
+                                                         stat_type=stat_type, common_key=common_key,
+                                                         statistics_name=statistics_name))
 
             # 步骤4：保存月份汇总缓存（全国数据）
-            month_key = cls._build_stats_key(temp_request, month, common_key)
+            month_key = cls._build_stats_key(request, month, common_key)
             month_results = cls._aggregate_by_dimension(raw_data, None)
-            cls._save_to_cache(month_key, month_results, None,
-                               stat_type=stat_type, common_key=common_key,
-                               statistics_name=statistics_name)
+            cache_infos.append(cls._build_cache_info(month_key, month_results,
+                                                     stat_type=stat_type, common_key=common_key,
+                                                     statistics_name=statistics_name))
             cached_results.extend(month_results)
 
+        # 一次批量写入本次构建的所有缓存
+        cls._save_many_to_cache(cache_infos)
+
     @classmethod
     def _build_province_dimension_cache(cls, request: CarStatisticsRequest, uncached_months: List[int],
                                         cached_results: List[StatisticsVo],
@@ -1134,6 +1419,7 @@ class StatisticsService:
         2. 查询该省份的原始数据
         3. 按城市聚合数据并保存缓存
         """
+        cache_infos = []
         for month in uncached_months:
             temp_request = CarStatisticsRequest(
                 start_time=month, end_time=month, address=request.address
@@ -1148,16 +1434,23 @@ class StatisticsService:
 
             # 保存缓存
             stats_key = cls._build_stats_key(temp_request, month, common_key)
-            cls._save_to_cache(stats_key, month_results, request.address,
-                               stat_type=stat_type, common_key=common_key,
-                               statistics_name=statistics_name)
+            cache_infos.append(cls._build_cache_info(stats_key, month_results,
+                                                     stat_type=stat_type, common_key=common_key,
+                                                     statistics_name=statistics_name))
             cached_results.extend(month_results)
 
+        # 一次批量写入本次构建的所有缓存
+        cls._save_many_to_cache(cache_infos)
+
     @classmethod
     @custom_cacheable(
         key_prefix=StatisticsConstants.SALES_PREDICT_COMMON_KEY,
+        key_field="request.address",
         expire_time=10*60,
-        use_query_params_as_key=True
+        use_query_params_as_key=True,
+        local_max_size=256,
+        single_flight=True,
+        stale_expire_time=30*60
     )
     def sales_predict_statistics(cls, request) -> List[SalesPredictVo]:
         """
@@ -1183,8 +1476,17 @@ class StatisticsService:
             if cached_data:
                 return cached_data
 
+        return cls._build_uncached([stats_key], SalesPredictVo,
+                                   lambda: cls._build_sales_predict(request, stats_key, prodict_num))
+
+    @classmethod
+    def _build_sales_predict(cls, request: CarStatisticsRequest, stats_key: str,
+                             prodict_num: int) -> List[SalesPredictVo]:
+        """
+        查询数据库计算全国、各省份的销量预测并写入缓存，返回请求范围的预测结果
+        """
         # 4. 走数据库
-        raw_data: List[SalesPredictPo] = StatisticsMapper.sales_predict_statistics(request)
+        raw_data: List[SalesPredictPo] = cls._statistics_source().sales_predict_statistics(request)
         if not raw_data:
             return []
 
@@ -1222,6 +1524,7 @@ class StatisticsService:
         # 9. 省份预测
         all_results_provinces = defaultdict(list)
         stats_name = StatisticsConstants.SALES_PREDICT_COMMON_NAME
+        cache_infos = []
 
         for province, monthly_data in province_data.items():
             if not monthly_data:
@@ -1251,16 +1554,17 @@ class StatisticsService:
 
             # 保存省份缓存
             print(f"SAVE CACHE [Province]: {province} -> {province_stats_key}")
-            cls._save_to_cache(province_stats_key, province_results, province,
-                               stat_type=StatisticsConstants.SALES_PREDICT_COMMON_TYPE,
-                               common_key=StatisticsConstants.SALES_PREDICT_COMMON_KEY,
-                               statistics_name=stats_name)
+            cache_infos.append(cls._build_cache_info(province_stats_key, province_results,
+                                                     stat_type=StatisticsConstants.SALES_PREDICT_COMMON_TYPE,
+                                                     common_key=StatisticsConstants.SALES_PREDICT_COMMON_KEY,
+                                                     statistics_name=stats_name))
 
         # 10. 保存全国缓存
-        cls._save_to_cache(stats_key, all_results_nationwide, request.address,
-                           stat_type=StatisticsConstants.SALES_PREDICT_COMMON_TYPE,
-                           common_key=StatisticsConstants.SALES_PREDICT_COMMON_KEY,
-                           statistics_name=stats_name)
+        cache_infos.append(cls._build_cache_info(stats_key, all_results_nationwide,
+                                                 stat_type=StatisticsConstants.SALES_PREDICT_COMMON_TYPE,
+                                                 common_key=StatisticsConstants.SALES_PREDICT_COMMON_KEY,
+                                                 statistics_name=stats_name))
+        cls._save_many_to_cache(cache_infos)
 
         # 11. 返回结果
         if not request.address:
@@ -1403,29 +1707,15 @@ class StatisticsService:
         """
         构建全国预测的原始数据缓存
         """
-        # 收集所有出现过的省份
-        all_provinces = set()
-        for month in uncached_months:
-            temp_request = CarStatisticsRequest(start_time=month, end_time=month)
-            temp_request = cls._copy_request_params(request, temp_request)
-            raw_data = StatisticsMapper.sales_predict_statistics(temp_request)
-            for item in raw_data:
-                province = item.address.split(' ')[0] if ' ' in item.address else item.address
-                all_provinces.add(province)
+        cache_infos = []
+        # 一次查询所有未缓存月份（预测查询本身不按月份过滤），按月份、省份分组
+        month_rows, month_province_rows, all_provinces = cls._select_nationwide_rows(
+            request, uncached_months, cls._statistics_source().sales_predict_statistics, lambda item: item.address)
 
         # 为每个未缓存的月份构建缓存
         for month in uncached_months:
-            temp_request = CarStatisticsRequest(start_time=month, end_time=month)
-            temp_request = cls._copy_request_params(request, temp_request)
-            raw_data = StatisticsMapper.sales_predict_statistics(temp_request)
-
-            # 转换为 Po 对象并按省份分组
-            provinces_data = {}
-            for item in raw_data:
-                province = item.address.split(' ')[0] if ' ' in item.address else item.address
-                if province not in provinces_data:
-                    provinces_data[province] = []
-                provinces_data[province].append(item)
+            raw_data = month_rows[month]
+            provinces_data = month_province_rows[month]
 
             # 为每个已知省份保存缓存
             for province in all_provinces:
@@ -1433,58 +1723,61 @@ class StatisticsService:
                 province_request = cls._build_request_with_province(request, province, month)
                 stats_key = cls._build_stats_key(province_request, month,
                                                  StatisticsConstants.SALES_PREDICT_COMMON_KEY)
-                cls._save_to_cache(stats_key, province_data, province,
-                                   stat_type=StatisticsConstants.SALES_PREDICT_COMMON_TYPE,
-                                   common_key=StatisticsConstants.SALES_PREDICT_COMMON_KEY,
-                                   statistics_name=StatisticsConstants.SALES_PREDICT_COMMON_NAME)
+                cache_infos.append(cls._build_cache_info(stats_key, province_data,
+                                                         stat_type=StatisticsConstants.SALES_PREDICT_COMMON_TYPE,
+                                                         common_key=StatisticsConstants.SALES_PREDICT_COMMON_KEY,
+                                                         statistics_name=StatisticsConstants.SALES_PREDICT_COMMON_NAME))
 
             # 保存月份汇总缓存（全国数据）
             month_key = cls._build_stats_key(request, month, StatisticsConstants.SALES_PREDICT_COMMON_KEY)
-            # 计算全国该月的汇总数据
-            total_sales = sum(item.avg_sales for item in raw_data)
-            count = len(raw_data)
-            avg_sales = total_sales / count if count > 0 else 0
-
-            # 构建全国汇总的 Po
+            # 构建全国汇总的 Po（该月全国总销量）
             nationwide_po = SalesPredictPo(
                 address="全国",
-                avg_sales=avg_sales,
-                max_sales=max((item.max_sales for item in raw_data), default=0),
-                min_sales=min((item.min_sales for item in raw_data), default=0),
+                value=sum(item.value for item in raw_data),
                 month=month
             )
-            cls._save_to_cache(month_key, [nationwide_po], None,
-                               stat_type=StatisticsConstants.SALES_PREDICT_COMMON_TYPE,
-                               common_key=StatisticsConstants.SALES_PREDICT_COMMON_KEY,
-                               statistics_name=StatisticsConstants.SALES_PREDICT_COMMON_NAME)
+            cache_infos.append(cls._build_cache_info(month_key, [nationwide_po],
+                                                     stat_type=StatisticsConstants.SALES_PREDICT_COMMON_TYPE,
+                                                     common_key=StatisticsConstants.SALES_PREDICT_COMMON_KEY,
+                                                     statistics_name=StatisticsConstants.SALES_PREDICT_COMMON_NAME))
 
             # 同时更新内存中的缓存结果列表，方便后续计算
             cached_results.extend(raw_data)
 
+        # 一次批量写入本次构建的所有缓存
+        cls._save_many_to_cache(cache_infos)
+
     @classmethod
     def _build_province_predict_cache(cls, request: CarStatisticsRequest, uncached_months: List[int],
                                       cached_results: List[SalesPredictPo]) -> None:
         """构建省份预测的原始数据缓存"""
+        cache_infos = []
         for month in uncached_months:
             temp_request = CarStatisticsRequest(
                 start_time=month, end_time=month, address=request.address
             )
             temp_request = cls._copy_request_params(request, temp_request)
 
-            db_results = StatisticsMapper.sales_predict_statistics(temp_request)
+            db_results = cls._statistics_source().sales_predict_statistics(temp_request)
 
             stats_key = cls._build_stats_key(temp_request, month, StatisticsConstants.SALES_PREDICT_COMMON_KEY)
-            cls._save_to_cache(stats_key, db_results, request.address,
-                               stat_type=StatisticsConstants.SALES_PREDICT_COMMON_TYPE,
-                               common_key=StatisticsConstants.SALES_PREDICT_COMMON_KEY,
-                               statistics_name=StatisticsConstants.SALES_PREDICT_COMMON_NAME)
+            cache_infos.append(cls._build_cache_info(stats_key, db_results,
+                                                     stat_type=StatisticsConstants.SALES_PREDICT_COMMON_TYPE,
+                                                     common_key=StatisticsConstants.SALES_PREDICT_COMMON_KEY,
+                                                     statistics_name=StatisticsConstants.SALES_PREDICT_COMMON_NAME))
             cached_results.extend(db_results)
 
+        # 一次批量写入本次构建的所有缓存
+        cls._save_many_to_cache(cache_infos)
+
     @classmethod
     @custom_cacheable(
         key_prefix=StatisticsConstants.ACCELERATION_COMMON_KEY,
         expire_time=10*60,
-        use_query_params_as_key=True
+        use_query_params_as_key=True,
+        local_max_size=256,
+        single_flight=True,
+        stale_expire_time=30*60
     )
     def acceleration_statistics(cls, request) -> List[SeriesStatisticsVo]:
         """
@@ -1527,29 +1820,34 @@ class StatisticsService:
 
         return results
 
+    # 自动统计默认并发数（同时占用的数据库连接数）
+    AUTO_STATISTICS_WORKERS = 4
+
     @classmethod
-    def auto_statistics(cls):
+    def auto_statistics(cls, max_workers: int = None):
         """
         自动统计所有维度数据
-        按顺序统计：地图+价格预测 -> 价格(带价格范围查询) -> 能源类型 -> 品牌 -> 国家 -> 车型 -> 车系
-        每次查询都打性能日志
-        """
-        import time
-        import logging
+        预热单元之间的依赖：
+            地图、价格预测                              无依赖
+            价格、能源类型、品牌、国家、车型、车系统计    无依赖
+            每个价格区间/能源类型/品牌/国家/车型/车系的地图、价格预测统计
+                                                        依赖对应维度的统计结果（取值列表）
+        没有依赖的单元在有界线程池中并发执行，每个单元使用独立的应用上下文和数据库会话，
+        返回每个单元的记录数和耗时
 
-        # 配置日志
-        logger = logging.getLogger(__name__)
-        logger.setLevel(logging.INFO)
+        Args:
+            max_workers (int): 并发数，默认 AUTO_STATISTICS_WORKERS
+        """
 
         def log_info(msg):
             """打印日志到控制台"""
             print(f"[自动统计] {msg}")
-            logger.info(msg)
+            LogUtil.logger.info(msg)
 
         def log_error(msg):
             """打印错误日志"""
             print(f"[自动统计 ERROR] {msg}")
-            logger.error(msg)
+            LogUtil.logger.error(msg)
 
         # 记录总开始时间
         total_start_time = time.time()
@@ -1565,305 +1863,138 @@ class StatisticsService:
 
         start_month = int(start_month_str)
         end_month = int(end_month_str)
+        max_workers = max(1, max_workers or cls.AUTO_STATISTICS_WORKERS)
 
         log_info(f"========== 开始自动统计 ==========")
-        log_info(f"时间范围: {start_month} - {end_month}")
+        log_info(f"时间范围: {start_month} - {end_month}，并发数: {max_workers}")
+
+        def build_request(**filters) -> CarStatisticsRequest:
+            return CarStatisticsRequest(start_time=start_month, end_time=end_month, **filters)
+
+        # 维度统计单元：(单元名称, 统计方法, 从统计结果中取出维度取值 -> [(取值名称, 查询条件)])
+        dimension_units = [
+            ("价格统计", cls.price_sales_statistics, cls._price_dimension_values),
+            ("能源类型统计", cls.energy_type_sales_statistics,
+             lambda result: cls._dimension_values(result, 'energy_type')),
+            ("品牌统计", cls.brand_sales_statistics,
+             lambda result: cls._dimension_values(result, 'brand_name')),
+            ("国家统计", cls.country_sales_statistics,
+             lambda result: cls._dimension_values(result, 'country')),
+            ("车型统计", cls.model_type_sales_statistics,
+             lambda result: cls._dimension_values(result, 'model_type')),
+            ("车系统计", cls.series_sales_statistics, cls._series_dimension_values),
+        ]
 
-        try:
-            # ========== 1. 初始统计：地图 + 价格预测 ==========
-            log_info(f"【1】初始统计：地图 + 价格预测")
-
-            # 1.1 地图统计
-            map_request = CarStatisticsRequest(start_time=start_month, end_time=end_month)
-            step_start_time = time.time()
-            map_result = cls.sales_map_statistics(map_request)
-            elapsed = time.time() - step_start_time
-            log_info(f"    地图统计完成: {len(map_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-            # 1.2 价格预测统计
-            predict_request = CarStatisticsRequest(start_time=start_month, end_time=end_month)
-            step_start_time = time.time()
-            predict_result = cls.sales_predict_statistics(predict_request)
-            elapsed = time.time() - step_start_time
-            log_info(f"    价格预测统计完成: {len(predict_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-            # ========== 2. 价格统计 ==========
-            log_info(f"【2】价格统计")
-            price_request = CarStatisticsRequest(start_time=start_month, end_time=end_month)
-            step_start_time = time.time()
-            price_result = cls.price_sales_statistics(price_request)
-            elapsed = time.time() - step_start_time
-            log_info(f"    价格统计完成: {len(price_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-            # 2.1 对价格结果去重并解析价格范围
-            unique_prices = {}
-            for item in price_result:
-                if item.name and item.name not in unique_prices:
-                    unique_prices[item.name] = {
-                        'min': None,
-                        'max': None,
-                        'original': item.name
-                    }
-
-            # 解析价格范围
-            valid_prices = {}
-            invalid_prices = []
-            for name, price_info in unique_prices.items():
-                price_range = cls._parse_price_range(name)
-                price_info['min'] = price_range['min']
-                price_info['max'] = price_range['max']
-                # 过滤掉无法解析的价格（min和max都为None）
-                if price_range['min'] is None and price_range['max'] is None:
-                    invalid_prices.append(name)
-                else:
-                    valid_prices[name] = price_info
+        app = current_app._get_current_object()
+        steps = []
+        dimension_counts = {}
+        pending = {}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="auto-statistics") as executor:
+
+            def submit(name, method, request, expand=None):
+                future = executor.submit(cls._run_statistics_unit, app, name, method, request)
+                pending[future] = expand
+
+            # 1. 无依赖的单元：全量地图、价格预测以及各维度统计
+            submit("地图统计", cls.sales_map_statistics, build_request())
+            submit("价格预测统计", cls.sales_predict_statistics, build_request())
+            for name, method, expand in dimension_units:
+                submit(name, method, build_request(), expand)
+
+            # 2. 单元完成后提交依赖它的单元
+            while pending:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    expand = pending.pop(future)
+                    step = future.result()
+                    result = step.pop("result")
+                    steps.append(step)
+                    if step["status"] == "success":
+                        log_info(f"    {step['name']}完成: {step['records']} 条记录, 耗时: {step['time']:.2f}秒")
+                    else:
+                        log_error(f"    {step['name']}失败: {step['message']}, 耗时: {step['time']:.2f}秒")
+                    if expand is None or result is None:
+                        continue
+
+                    values = expand(result)
+                    dimension_counts[step["name"]] = len(values)
+                    log_info(f"    {step['name']}: {len(values)} 个取值: {[value_name for value_name, _ in values]}")
+                    for value_name, filters in values:
+                        submit(f"{step['name']}[{value_name}]地图统计", cls.sales_map_statistics,
+                               build_request(**filters))
+                        submit(f"{step['name']}[{value_name}]价格预测统计", cls.sales_predict_statistics,
+                               build_request(**filters))
+
+        # 计算总耗时
+        total_elapsed = time.time() - total_start_time
+        failed_steps = [step for step in steps if step["status"] != "success"]
+        step_records = {step["name"]: step["records"] for step in steps}
+        log_info(f"========== 自动统计完成，单元数: {len(steps)}，失败: {len(failed_steps)}，"
+                 f"总耗时: {total_elapsed:.2f}秒 ==========")
 
-            if invalid_prices:
-                log_info(f"    跳过无法解析的价格区间: {invalid_prices}")
+        return {
+            "status": "error" if failed_steps else "success",
+            "message": f"自动统计完成，{len(failed_steps)} 个单元失败" if failed_steps else "自动统计完成",
+            "time_range": {"start": start_month, "end": end_month},
+            "total_time": f"{total_elapsed:.2f}秒",
+            "summary": {
+                "initial": {"map": step_records.get("地图统计", 0), "predict": step_records.get("价格预测统计", 0)},
+                "prices": dimension_counts.get("价格统计", 0),
+                "energies": dimension_counts.get("能源类型统计", 0),
+                "brands": dimension_counts.get("品牌统计", 0),
+                "countries": dimension_counts.get("国家统计", 0),
+                "models": dimension_counts.get("车型统计", 0),
+                "series": dimension_counts.get("车系统计", 0)
+            },
+            # 每个单元的耗时，按耗时降序
+            "steps": sorted(steps, key=lambda step: step["time"], reverse=True)
+        }
 
-            log_info(f"    有效价格区间: {len(valid_prices)} 个: {list(valid_prices.keys())}")
+    @classmethod
+    def _run_statistics_unit(cls, app, name: str, method, request: CarStatisticsRequest) -> dict:
+        """
+        在独立的应用上下文（独立数据库会话）中执行一个自动统计单元
+        返回: {name, status, records, time, message, result}
+        """
+        with app.app_context():
+            start_time = time.time()
+            try:
+                result = method(request)
+                return {"name": name, "status": "success", "records": len(result),
+                        "time": round(time.time() - start_time, 2), "result": result}
+            except Exception as e:
+                LogUtil.logger.error(f"[自动统计] {name}失败: {traceback.format_exc()}")
+                return {"name": name, "status": "error", "records": 0,
+                        "time": round(time.time() - start_time, 2), "message": str(e), "result": None}
 
-            # 2.2 对每个有效价格范围统计地图和价格预测
-            for price_name, price_info in valid_prices.items():
-                log_info(f"    价格区间: {price_name} (min={price_info['min']}, max={price_info['max']})")
+    @classmethod
+    def _price_dimension_values(cls, price_result: List[StatisticsVo]) -> List[tuple]:
+        """
+        价格统计结果 -> [(价格区间名称, 查询条件)]，跳过无法解析的价格区间
+        """
+        values = []
+        for name in dict.fromkeys(item.name for item in price_result if item.name):
+            price_range = cls._parse_price_range(name)
+            # 过滤掉无法解析的价格（min和max都为None）
+            if price_range['min'] is None and price_range['max'] is None:
+                continue
+            values.append((name, {'min_price': price_range['min'], 'max_price': price_range['max']}))
+        return values
 
-                # 地图统计
-                map_request = CarStatisticsRequest(
-                    start_time=start_month,
-                    end_time=end_month,
-                    min_price=price_info['min'],
-                    max_price=price_info['max']
-                )
-                step_start_time = time.time()
-                map_result = cls.sales_map_statistics(map_request)
-                elapsed = time.time() - step_start_time
-                log_info(f"        地图统计完成: {len(map_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-                # 价格预测统计
-                predict_request = CarStatisticsRequest(
-                    start_time=start_month,
-                    end_time=end_month,
-                    min_price=price_info['min'],
-                    max_price=price_info['max']
-                )
-                step_start_time = time.time()
-                predict_result = cls.sales_predict_statistics(predict_request)
-                elapsed = time.time() - step_start_time
-                log_info(f"        价格预测统计完成: {len(predict_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-            # 2.3 重置价格范围
-            log_info(f"    重置价格范围")
-
-            # ========== 3. 能源类型统计 ==========
-            log_info(f"【3】能源类型统计")
-            energy_request = CarStatisticsRequest(start_time=start_month, end_time=end_month)
-            step_start_time = time.time()
-            energy_result = cls.energy_type_sales_statistics(energy_request)
-            elapsed = time.time() - step_start_time
-            log_info(f"    能源类型统计完成: {len(energy_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-            # 3.1 对每个能源类型统计地图和价格预测
-            unique_energies = [item.name for item in energy_result if item.name]
-
-            for energy_name in unique_energies:
-                log_info(f"    能源类型: {energy_name}")
-
-                # 地图统计
-                map_request = CarStatisticsRequest(
-                    start_time=start_month,
-                    end_time=end_month,
-                    energy_type=energy_name
-                )
-                step_start_time = time.time()
-                map_result = cls.sales_map_statistics(map_request)
-                elapsed = time.time() - step_start_time
-                log_info(f"        地图统计完成: {len(map_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-                # 价格预测统计
-                predict_request = CarStatisticsRequest(
-                    start_time=start_month,
-                    end_time=end_month,
-                    energy_type=energy_name
-                )
-                step_start_time = time.time()
-                predict_result = cls.sales_predict_statistics(predict_request)
-                elapsed = time.time() - step_start_time
-                log_info(f"        价格预测统计完成: {len(predict_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-            # 3.2 重置能源类型
-            log_info(f"    重置能源类型")
-
-            # ========== 4. 品牌统计 ==========
-            log_info(f"【4】品牌统计")
-            brand_request = CarStatisticsRequest(start_time=start_month, end_time=end_month)
-            step_start_time = time.time()
-            brand_result = cls.brand_sales_statistics(brand_request)
-            elapsed = time.time() - step_start_time
-            log_info(f"    品牌统计完成: {len(brand_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-            unique_brands = [item.name for item in brand_result if item.name]
-            for brand_name in unique_brands:
-                log_info(f"    品牌: {brand_name}")
-
-                # 地图统计
-                map_request = CarStatisticsRequest(
-                    start_time=start_month,
-                    end_time=end_month,
-                    brand_name=brand_name
-                )
-                step_start_time = time.time()
-                map_result = cls.sales_map_statistics(map_request)
-                elapsed = time.time() - step_start_time
-                log_info(f"        地图统计完成: {len(map_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-                # 价格预测统计
-                predict_request = CarStatisticsRequest(
-                    start_time=start_month,
-                    end_time=end_month,
-                    brand_name=brand_name
-                )
-                step_start_time = time.time()
-                predict_result = cls.sales_predict_statistics(predict_request)
-                elapsed = time.time() - step_start_time
-                log_info(f"        价格预测统计完成: {len(predict_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-            log_info(f"    重置品牌")
-
-            # ========== 5. 国家统计 ==========
-            log_info(f"【5】国家统计")
-            country_request = CarStatisticsRequest(start_time=start_month, end_time=end_month)
-            step_start_time = time.time()
-            country_result = cls.country_sales_statistics(country_request)
-            elapsed = time.time() - step_start_time
-            log_info(f"    国家统计完成: {len(country_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-            unique_countries = [item.name for item in country_result if item.name]
-            for country_name in unique_countries:
-                log_info(f"    国家: {country_name}")
-
-                # 地图统计
-                map_request = CarStatisticsRequest(
-                    start_time=start_month,
-                    end_time=end_month,
-                    country=country_name
-                )
-                step_start_time = time.time()
-                map_result = cls.sales_map_statistics(map_request)
-                elapsed = time.time() - step_start_time
-                log_info(f"        地图统计完成: {len(map_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-                # 价格预测统计
-                predict_request = CarStatisticsRequest(
-                    start_time=start_month,
-                    end_time=end_month,
-                    country=country_name
-                )
-                step_start_time = time.time()
-                predict_result = cls.sales_predict_statistics(predict_request)
-                elapsed = time.time() - step_start_time
-                log_info(f"        价格预测统计完成: {len(predict_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-            log_info(f"    重置国家")
-
-            # ========== 6. 车型统计 ==========
-            log_info(f"【6】车型统计")
-            model_request = CarStatisticsRequest(start_time=start_month, end_time=end_month)
-            step_start_time = time.time()
-            model_result = cls.model_type_sales_statistics(model_request)
-            elapsed = time.time() - step_start_time
-            log_info(f"    车型统计完成: {len(model_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-            unique_models = [item.name for item in model_result if item.name]
-            for model_name in unique_models:
-                log_info(f"    车型: {model_name}")
-
-                # 地图统计
-                map_request = CarStatisticsRequest(
-                    start_time=start_month,
-                    end_time=end_month,
-                    model_type=model_name
-                )
-                step_start_time = time.time()
-                map_result = cls.sales_map_statistics(map_request)
-                elapsed = time.time() - step_start_time
-                log_info(f"        地图统计完成: {len(map_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-                # 价格预测统计
-                predict_request = CarStatisticsRequest(
-                    start_time=start_month,
-                    end_time=end_month,
-                    model_type=model_name
-                )
-                step_start_time = time.time()
-                predict_result = cls.sales_predict_statistics(predict_request)
-                elapsed = time.time() - step_start_time
-                log_info(f"        价格预测统计完成: {len(predict_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-            log_info(f"    重置车型")
-
-            # ========== 7. 车系统计 ==========
-            log_info(f"【7】车系统计")
-            series_request = CarStatisticsRequest(start_time=start_month, end_time=end_month)
-            step_start_time = time.time()
-            series_result = cls.series_sales_statistics(series_request)
-            elapsed = time.time() - step_start_time
-            log_info(f"    车系统计完成: {len(series_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-            unique_series = [(item.name, item.seriesId) for item in series_result if item.name]
-            for series_name, series_id in unique_series:
-                log_info(f"    车系: {series_name} (id={series_id})")
-
-                # 地图统计
-                map_request = CarStatisticsRequest(
-                    start_time=start_month,
-                    end_time=end_month,
-                    series_id=series_id
-                )
-                step_start_time = time.time()
-                map_result = cls.sales_map_statistics(map_request)
-                elapsed = time.time() - step_start_time
-                log_info(f"        地图统计完成: {len(map_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-                # 价格预测统计
-                predict_request = CarStatisticsRequest(
-                    start_time=start_month,
-                    end_time=end_month,
-                    series_id=series_id
-                )
-                step_start_time = time.time()
-                predict_result = cls.sales_predict_statistics(predict_request)
-                elapsed = time.time() - step_start_time
-                log_info(f"        价格预测统计完成: {len(predict_result)} 条记录, 耗时: {elapsed:.2f}秒")
-
-            log_info(f"    重置车系")
-
-            # 计算总耗时
-            total_elapsed = time.time() - total_start_time
-            log_info(f"========== 自动统计完成，总耗时: {total_elapsed:.2f}秒 ==========")
-
-            return {
-                "status": "success",
-                "message": "自动统计完成",
-                "time_range": {"start": start_month, "end": end_month},
-                "total_time": f"{total_elapsed:.2f}秒",
-                "summary": {
-                    "initial": {"map": len(map_result), "predict": len(predict_result)},
-                    "prices": len(valid_prices),
-                    "energies": len(unique_energies),
-                    "brands": len(unique_brands),
-                    "countries": len(unique_countries),
-                    "models": len(unique_models),
-                    "series": len(unique_series)
-                }
-            }
+    @classmethod
+    def _dimension_values(cls, result: List[StatisticsVo], field_name: str) -> List[tuple]:
+        """
+        维度统计结果 -> [(维度取值, 查询条件)]，同一取值只预热一次
+        """
+        return [(name, {field_name: name}) for name in dict.fromkeys(item.name for item in result if item.name)]
 
-        except Exception as e:
-            total_elapsed = time.time() - total_start_time
-            error_msg = f"自动统计失败: {str(e)}"
-            log_error(error_msg)
-            import traceback
-            log_error(traceback.format_exc())
-            return {"status": "error", "message": error_msg, "total_time": f"{total_elapsed:.2f}秒"}
+    @classmethod
+    def _series_dimension_values(cls, result: List[SeriesStatisticsVo]) -> List[tuple]:
+        """
+        车系统计结果 -> [(车系名称, 查询条件)]，同一车系只预热一次
+        """
+        series = dict.fromkeys((item.name, item.seriesId) for item in result if item.name)
+        return [(f"{name}({series_id})", {'series_id': str(series_id)}) for name, series_id in series]
 
     @classmethod
     def _parse_price_range(cls, price_str: str) -> dict:
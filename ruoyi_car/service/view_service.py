@@ -3,13 +3,14 @@
 # @FileName: view_service.py
 # @Time    : 2026-01-23 20:21:53
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
 
 from ruoyi_car.domain.entity import View, Series
 from ruoyi_car.mapper.view_mapper import ViewMapper
+from ruoyi_car.service.preference_profile_service import PreferenceProfileService
 from ruoyi_common.constant import ConfigConstants
 from ruoyi_common.exception import ServiceException
-from ruoyi_common.utils.base import LogUtil
+from ruoyi_common.utils.base import ExcelRowException, LogUtil
 from ruoyi_common.utils.security_util import get_user_id, get_username
 from ruoyi_framework.descriptor.datascope import DataScope
 from ruoyi_system.service import SysConfigService
@@ -32,6 +33,20 @@ class ViewService:
         """
         return ViewMapper.select_view_list(view)
 
+    @classmethod
+    @DataScope(dept=True, user=True)
+    def iter_view_list(cls, view: View) -> Iterator[View]:
+        """
+        流式查询用户浏览列表，用于导出
+
+        Args:
+            view (view): 用户浏览对象
+
+        Returns:
+            Iterator[view]: 用户浏览迭代器
+        """
+        return ViewMapper.iter_view_list(view)
+
     @classmethod
     def select_view_by_id(cls, id: int) -> Optional[View]:
         """
@@ -56,7 +71,10 @@ class ViewService:
         Returns:
             int: 插入的记录数
         """
-        return ViewMapper.insert_view(view)
+        result = ViewMapper.insert_view(view)
+        if result > 0:
+            PreferenceProfileService.record_view(view)
+        return result
 
     @classmethod
     def add_view(cls, series: Series) -> int:
@@ -94,7 +112,10 @@ class ViewService:
         view_info.configuration_score = series.configuration_score or 3
         view_info.price = series.min_price or 0
         view_info.score = view_score
-        return ViewMapper.insert_view(view_info)
+        result = ViewMapper.insert_view(view_info)
+        if result > 0:
+            PreferenceProfileService.record_view(view_info)
+        return result
 
     @classmethod
     def update_view(cls, view: View) -> int:
@@ -107,7 +128,12 @@ class ViewService:
         Returns:
             int: 更新的记录数
         """
-        return ViewMapper.update_view(view)
+        # 记录的用户、时间、车系都可能变化，修改前后两个用户的画像都删除，由下次读取重建
+        user_ids = ViewMapper.select_user_ids_by_ids([view.id]) if view.id is not None else []
+        result = ViewMapper.update_view(view)
+        if result > 0:
+            PreferenceProfileService.delete_profiles(user_ids + [view.user_id])
+        return result
 
     @classmethod
     def delete_view_by_ids(cls, ids: List[int]) -> int:
@@ -120,56 +146,73 @@ class ViewService:
         Returns:
             int: 删除的记录数
         """
-        return ViewMapper.delete_view_by_ids(ids)
+        user_ids = ViewMapper.select_user_ids_by_ids(ids)
+        result = ViewMapper.delete_view_by_ids(ids)
+        if result > 0:
+            PreferenceProfileService.delete_profiles(user_ids)
+        return result
 
     @classmethod
-    def import_view(cls, view_list: List[View], is_update: bool = False) -> str:
+    def import_view(cls, view_chunks: Iterable[List[View]], is_update: bool = False) -> str:
         """
         导入用户浏览数据
 
         Args:
-            view_list (List[view]): 用户浏览列表
+            view_chunks (Iterable[List[View]]): 用户浏览数据块，逐块写入
             is_update (bool): 是否更新已存在的数据
 
         Returns:
             str: 导入结果消息
         """
-        if not view_list:
-            raise ServiceException("导入用户浏览数据不能为空")
-
         success_count = 0
         fail_count = 0
         success_msg = ""
         fail_msg = ""
-
-        for view in view_list:
-            try:
-                display_value = view
-
-                display_value = getattr(view, "id", display_value)
-                existing = None
-                if view.id is not None:
-                    existing = ViewMapper.select_view_by_id(view.id)
-                if existing:
-                    if is_update:
-                        result = ViewMapper.update_view(view)
+        # 导入涉及的用户，导入结束后删除这些用户的画像，由下次读取重建
+        user_ids = set()
+
+        def resolve(view: View, existing) -> Optional[str]:
+            if existing is not None and not is_update:
+                return "已存在"
+            user_ids.add(view.user_id)
+            if existing is not None:
+                user_ids.add(existing.user_id)
+            return None
+
+        def fallback(view: View, existing) -> Optional[str]:
+            if existing is not None:
+                result = ViewMapper.update_view(view)
+            else:
+                result = ViewMapper.insert_view(view)
+            return None if result > 0 else "操作失败"
+
+        try:
+            for view_list in view_chunks:
+                # 导入结果中显示的数据标识，写入前取值
+                display_values = [getattr(view, "id", view) for view in view_list]
+                # 按主键分批查询已存在的数据，每批一个事务批量新增、更新
+                results = ViewMapper.BULK_UPSERT.run(view_list, resolve, fallback=fallback)
+                for display_value, result in zip(display_values, results):
+                    if result is None:
+                        success_count += 1
+                        success_msg += f"<br/> 第{success_count}条数据，操作成功：{display_value}"
+                    elif isinstance(result, Exception):
+                        fail_count += 1
+                        fail_msg += f"<br/> 第{fail_count}条数据，导入失败，原因：{result.__class__.__name__}"
+                        LogUtil.logger.error(f"导入用户浏览失败，原因：{result}")
                     else:
                         fail_count += 1
-                        fail_msg += f"<br/> 第{fail_count}条数据，已存在：{display_value}"
-                        continue
-                else:
-                    result = ViewMapper.insert_view(view)
-
-                if result > 0:
-                    success_count += 1
-                    success_msg += f"<br/> 第{success_count}条数据，操作成功：{display_value}"
-                else:
-                    fail_count += 1
-                    fail_msg += f"<br/> 第{fail_count}条数据，操作失败：{display_value}"
-            except Exception as e:
-                fail_count += 1
-                fail_msg += f"<br/> 第{fail_count}条数据，导入失败，原因：{e.__class__.__name__}"
-                LogUtil.logger.error(f"导入用户浏览失败，原因：{e}")
+                        fail_msg += f"<br/> 第{fail_count}条数据，{result}：{display_value}"
+        except ExcelRowException as e:
+            # 数据行格式错误时停止读取，之前的数据块已经写入
+            fail_count += 1
+            fail_msg += f"<br/> 第{fail_count}条数据，导入中止：{e}"
+            LogUtil.logger.error(f"导入用户浏览中止，原因：{e}")
+        finally:
+            PreferenceProfileService.delete_profiles(user_ids)
+
+        if success_count + fail_count == 0:
+            raise ServiceException("导入用户浏览数据不能为空")
 
         if fail_count > 0:
             if success_msg:
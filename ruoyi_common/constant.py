@@ -94,6 +94,8 @@ class Constants:
 
     SYS_CONFIG_KEY = "sys_config:"
 
+    SYS_CONFIG_VERSION_KEY = "sys_config_version"
+
     SYS_DICT_KEY = "sys_dict:"
 
     RESOURCE_PREFIX = "/profile"
@@ -188,11 +190,19 @@ class ConfigConstants:
     CAR_LIKE_RECORD_NUM = "car:like:number"
     # 推荐数
     CAR_RECOMMEND_NUM = "car:recommend:number"
+    # 是否开启离线预计算推荐，开启后请求时只读取定时任务生成的结果
+    CAR_RECOMMEND_OFFLINE = "car:recommend:offline"
+    # 车系共现（协同过滤）分数融合权重，为 0 时不启用
+    CAR_RECOMMEND_CF_WEIGHT = "car:recommend:cf:weight"
     # time_decay_factor 时间衰减因子
     CAR_TIME_DECAY_FACTOR = "car:time:decay:factor"
     # 推荐模型权重
     CAE_MODEL_WEIGHT = "car:model:weight"
     STATISTICS_PRICE_RANGE = "statistics:price:range"
+    # 是否开启内存列式统计引擎，开启后统计查询在进程内计算，不再查询数据库
+    STATISTICS_MEMORY_ENGINE = "statistics:memory:engine"
+    # 销量变更后是否在后台重新构建被清理的统计缓存
+    STATISTICS_REBUILD_ON_CHANGE = "statistics:rebuild:on:change"
     # 综合评分
     CAR_OVERALL_SCORE_WEIGHT = "car:overall:score:weight"
     # 预测月份数
@@ -254,3 +264,46 @@ class StatisticsConstants:
     SALES_PREDICT_COMMON_NAME = "销量预测"
     # 百公里加速
     ACCELERATION_COMMON_KEY="car:statistics:acceleration"
+    # 统计接口结果缓存的 Key 前缀，清空统计信息时一并清理
+    CACHEABLE_KEY_PREFIXES = (
+        MAP_SALES_STATISTICS_COMMON_KEY, PRICE_SALES_STATISTICS_COMMON_KEY, ENERGY_TYPE_SALES_STATISTICS_COMMON_KEY,
+        BRAND_SALES_STATISTICS_COMMON_KEY, COUNTRY_SALES_STATISTICS_COMMON_KEY, MODEL_TYPE_SALES_STATISTICS_COMMON_KEY,
+        SERIES_SALES_STATISTICS_COMMON_KEY, SALES_PREDICT_COMMON_KEY, ACCELERATION_COMMON_KEY,
+    )
+    # 按月份缓存的销量统计公共key，销量变更时按 (月份, 省份) 清理
+    SALES_MONTHLY_COMMON_KEYS = (
+        MAP_SALES_STATISTICS_COMMON_KEY, PRICE_SALES_STATISTICS_COMMON_KEY, ENERGY_TYPE_SALES_STATISTICS_COMMON_KEY,
+        BRAND_SALES_STATISTICS_COMMON_KEY, COUNTRY_SALES_STATISTICS_COMMON_KEY, MODEL_TYPE_SALES_STATISTICS_COMMON_KEY,
+        SERIES_SALES_STATISTICS_COMMON_KEY,
+    )
+    # 统计缓存构建锁前缀，后接本次构建的缓存 Key 摘要
+    STATISTICS_BUILD_LOCK_KEY = "car:statistics:build:lock:"
+    # 销量汇总表状态（价格区间边界、是否可用于查询）
+    SALES_ROLLUP_STATE_KEY = "car:statistics:sales:rollup:state"
+    # 内存列式统计引擎：销量变更日志（变更的销量ID列表）
+    SALES_ANALYTICS_CHANGE_LOG_KEY = "car:statistics:sales:analytics:changes"
+    # 内存列式统计引擎：数据代数，变化时各进程全量重新加载
+    SALES_ANALYTICS_GENERATION_KEY = "car:statistics:sales:analytics:generation"
+
+
+class RecommendConstants:
+    # 车系目录快照版本号，车系数据变更时递增
+    SERIES_CATALOG_VERSION_KEY = "car:recommend:series:catalog:version"
+    # 用户偏好画像前缀，后接用户ID
+    PREFERENCE_PROFILE_KEY = "car:recommend:profile:"
+    # 用户推荐结果有序集合前缀，后接用户ID
+    RESULT_KEY = "car:recommend:result:"
+    # 用户推荐结果信息（总数、生成时间、偏好模型）前缀，后接用户ID
+    RESULT_META_KEY = "car:recommend:result:meta:"
+    # 推荐车系卡片
+    SERIES_CARD_KEY = "car:recommend:series:card"
+    # 车系共现矩阵增量计算状态
+    CF_STATE_KEY = "car:recommend:cf:state"
+    # 相似车系（按属性与评分计算，每个车系的前 N 个相似车系）
+    SERIES_SIMILAR_KEY = "car:recommend:series:similar"
+    # 相似车系计算任务锁
+    SERIES_SIMILAR_LOCK_KEY = "car:recommend:series:similar:lock"
+    # 车系共现近邻（每个车系的前 M 个相似车系）
+    CF_NEIGHBOR_KEY = "car:recommend:cf:neighbors"
+    # 车系共现计算任务锁
+    CF_LOCK_KEY = "car:recommend:cf:lock"
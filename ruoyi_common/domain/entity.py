@@ -189,26 +189,35 @@ class SysRole(AuditEntity):
     role_id: Annotated[
         int,
         BeforeValidator(str_to_int),
-        Field(gt=0, default=None, vo=VoAccess(query=True))
+        Field(gt=0, default=None, vo=VoAccess(query=True)),
+        ExcelField(name="角色序号", cell_type="numeric")
     ]
 
     role_name: Annotated[
         Optional[str],
-        Field(default=None, vo=VoAccess(query=True))
+        Field(default=None, vo=VoAccess(query=True)),
+        ExcelField(name="角色名称")
     ]
 
     role_key: Annotated[
         Optional[str],
-        Field(default=None, vo=VoAccess(query=True))
+        Field(default=None, vo=VoAccess(query=True)),
+        ExcelField(name="角色权限")
     ]
 
     role_sort: Annotated[
         Optional[int],
         BeforeValidator(str_to_int),
-        Field(default=None)
+        Field(default=None),
+        ExcelField(name="角色排序")
     ]
 
-    data_scope: Optional[str] = None
+    data_scope: Annotated[
+        Optional[str],
+        Field(default=None),
+        ExcelField(name="数据范围",
+                   converter="1=所有数据权限,2=自定义数据权限,3=本部门数据权限,4=本部门及以下数据权限,5=仅本人数据权限")
+    ]
 
     menu_check_strictly: Annotated[Optional[bool], Strict(False)] = None
 
@@ -216,7 +225,8 @@ class SysRole(AuditEntity):
 
     status: Annotated[
         Optional[str],
-        Field(default=None, vo=VoAccess(query=True))
+        Field(default=None, vo=VoAccess(query=True)),
+        ExcelField(name="角色状态", converter="0=正常,1=停用")
     ]
 
     del_flag: Annotated[
@@ -306,22 +316,26 @@ class SysDictType(AuditEntity):
     dict_id: Annotated[
         int,
         BeforeValidator(str_to_int),
-        Field(default=None, ge=0, vo=VoAccess(query=True))
+        Field(default=None, ge=0, vo=VoAccess(query=True)),
+        ExcelField(name="字典主键", cell_type="numeric")
     ]
 
     dict_name: Annotated[
         str,
-        Field(default=None, vo=VoAccess(query=True))
+        Field(default=None, vo=VoAccess(query=True)),
+        ExcelField(name="字典名称")
     ]
 
     dict_type: Annotated[
         str,
-        Field(default=None, vo=VoAccess(query=True))
+        Field(default=None, vo=VoAccess(query=True)),
+        ExcelField(name="字典类型")
     ]
 
     status: Annotated[
         str,
-        Field(default=None, vo=VoAccess(query=True))
+        Field(default=None, vo=VoAccess(query=True)),
+        ExcelField(name="状态", converter="0=正常,1=停用")
     ]
 
 
@@ -329,24 +343,28 @@ class SysDictData(AuditEntity):
     dict_code: Annotated[
         int,
         BeforeValidator(str_to_int),
-        Field(default=None, ge=0, vo=VoAccess(query=True))
+        Field(default=None, ge=0, vo=VoAccess(query=True)),
+        ExcelField(name="字典编码", cell_type="numeric")
     ]
 
-    dict_sort: Annotated[int, Field(default=None)]
+    dict_sort: Annotated[int, Field(default=None), ExcelField(name="字典排序", cell_type="numeric")]
 
     dict_label: Annotated[
         str,
-        Field(default=None, vo=VoAccess(query=True))
+        Field(default=None, vo=VoAccess(query=True)),
+        ExcelField(name="字典标签")
     ]
 
     dict_value: Annotated[
         str,
-        Field(default=None, vo=VoAccess(query=True))
+        Field(default=None, vo=VoAccess(query=True)),
+        ExcelField(name="字典键值")
     ]
 
     dict_type: Annotated[
         str,
-        Field(default=None, vo=VoAccess(query=True))
+        Field(default=None, vo=VoAccess(query=True)),
+        ExcelField(name="字典类型")
     ]
 
     css_class: Annotated[
@@ -359,11 +377,12 @@ class SysDictData(AuditEntity):
         Field(default=None)
     ]
 
-    is_default: Annotated[str, Field(default=None)]
+    is_default: Annotated[str, Field(default=None), ExcelField(name="是否默认", converter="Y=是,N=否")]
 
     status: Annotated[
         str,
-        Field(default=None, vo=VoAccess(query=True))
+        Field(default=None, vo=VoAccess(query=True)),
+        ExcelField(name="状态", converter="0=正常,1=停用")
     ]
 
 
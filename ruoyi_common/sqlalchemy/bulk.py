@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+# @Author  : YY
+# @FileName: bulk.py
+# @Time    : 2026-02-25 10:12:37
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.scoping import scoped_session
+
+from ruoyi_common.utils.base import LogUtil
+
+
+class BulkUpsert:
+    """
+    按自然键批量新增或更新
+
+    每批先一次查询已存在的记录，再在一个事务中 executemany 批量新增、按主键 bindparam 批量更新，每批提交一次；
+    同一批中自然键重复时从该条开始新的一批，保证与逐条处理的结果一致
+    """
+
+    # 更新语句中主键参数名
+    PK_PARAM = "_pk"
+
+    def __init__(self,
+                 session: scoped_session | Session,
+                 po_class: Any,
+                 key_columns: Sequence[str],
+                 insert_columns: Optional[Sequence[str]] = None,
+                 update_columns: Optional[Sequence[str]] = None,
+                 fetch_columns: Sequence[str] = (),
+                 insert_now: Sequence[str] = (),
+                 update_now: Sequence[str] = (),
+                 chunk_size: int = 500,
+                 ):
+        """
+        Args:
+            session: 数据库会话
+            po_class: 持久化对象类
+            key_columns: 自然键列名，判断记录是否已存在
+            insert_columns: 新增时写入的列，默认全部列
+            update_columns: 更新时写入的列，默认除主键外的全部列
+            fetch_columns: 查询已存在的记录时额外返回的列（主键、自然键列总会返回）
+            insert_now: 新增时值为空则取当前时间的列
+            update_now: 更新时值为空则取当前时间的列
+            chunk_size: 每批处理的条数
+        """
+        self.session = session
+        self.table = po_class.__table__
+        primary_keys = list(self.table.primary_key.columns)
+        if len(primary_keys) != 1:
+            raise ValueError(f"{self.table.name} 必须有且只有一个主键列")
+        self.pk_column = primary_keys[0]
+        self.key_columns = tuple(key_columns)
+        self.insert_columns = tuple(insert_columns) if insert_columns is not None \
+            else tuple(column.name for column in self.table.columns)
+        self.update_columns = tuple(update_columns) if update_columns is not None \
+            else tuple(column.name for column in self.table.columns if column is not self.pk_column)
+        self.fetch_columns = tuple(fetch_columns)
+        self.insert_now = tuple(insert_now)
+        self.update_now = tuple(update_now)
+        self.chunk_size = max(1, chunk_size)
+        self._insert_stmt = insert(self.table)
+        self._update_stmt = update(self.table) \
+            .where(self.pk_column == bindparam(self.PK_PARAM)) \
+            .values({name: bindparam(self._param(name)) for name in self.update_columns})
+
+    @staticmethod
+    def _param(name: str) -> str:
+        # bindparam 不能与 SET 中的列同名
+        return f"_{name}"
+
+    def key_of(self, item: Any) -> Optional[tuple]:
+        """
+        取数据的自然键，任一键列为空时返回 None，视为不存在的新记录
+        """
+        key = tuple(getattr(item, name, None) for name in self.key_columns)
+        return None if any(value is None for value in key) else key
+
+    def select_existing(self, keys: Sequence[tuple]) -> Dict[tuple, Any]:
+        """
+        按自然键分批查询已存在的记录，同一自然键有多条时取主键最小的一条
+
+        Returns:
+            Dict[tuple, Row]: 自然键 -> 记录（主键、自然键列和 fetch_columns）
+        """
+        key_columns = [self.table.c[name] for name in self.key_columns]
+        names = [self.pk_column.name, *self.key_columns,
+                 *(name for name in self.fetch_columns if name not in self.key_columns)]
+        columns = [self.table.c[name] for name in dict.fromkeys(names)]
+        unique_keys = list(dict.fromkeys(keys))
+        existing = {}
+        for offset in range(0, len(unique_keys), self.chunk_size):
+            chunk = unique_keys[offset:offset + self.chunk_size]
+            if len(key_columns) == 1:
+                condition = key_columns[0].in_([key[0] for key in chunk])
+            else:
+                condition = tuple_(*key_columns).in_(chunk)
+            stmt = select(*columns).where(condition).order_by(self.pk_column)
+            for row in self.session.execute(stmt):
+                existing.setdefault(tuple(getattr(row, name) for name in self.key_columns), row)
+        return existing
+
+    def write(self, insert_rows: List[Dict[str, Any]], update_rows: List[Dict[str, Any]]) -> None:
+        """
+        在一个事务中批量新增、更新并提交，出错时回滚并抛出异常
+
+        Args:
+            insert_rows: 新增的数据，键为列名
+            update_rows: 更新的数据，键为 bindparam 参数名，主键为 PK_PARAM
+        """
+        try:
+            if insert_rows:
+                self.session.execute(self._insert_stmt, insert_rows)
+            if update_rows:
+                self.session.execute(self._update_stmt, update_rows)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+    def run(self,
+            items: Sequence[Any],
+            resolve: Callable[[Any, Any], Optional[str]],
+            prepare: Optional[Callable[[Any], Optional[str]]] = None,
+            fallback: Optional[Callable[[Any, Any], Optional[str]]] = None,
+            ) -> List[Any]:
+        """
+        批量新增或更新数据
+
+        Args:
+            items: 待写入的数据
+            resolve: resolve(item, existing)，根据已存在的记录（不存在为 None）整理待写入的数据，返回失败信息，可写入返回 None
+            prepare: prepare(item)，查询已存在的记录前校验、整理数据，返回失败信息，通过返回 None
+            fallback: fallback(item, existing)，某批写入失败时逐条写入，返回失败信息，成功返回 None；
+                不指定时该批全部记为写入异常
+
+        Returns:
+            List: 每条数据的结果，None 表示成功，str 为失败信息，Exception 为出错的异常
+        """
+        start_time = time.time()
+        results: List[Any] = [None] * len(items)
+        pending: List[Tuple[int, Optional[tuple]]] = []
+        pending_keys = set()
+        for index, item in enumerate(items):
+            try:
+                error = prepare(item) if prepare else None
+                key = None if error else self.key_of(item)
+            except Exception as e:
+                results[index] = e
+                continue
+            if error:
+                results[index] = error
+                continue
+            if len(pending) >= self.chunk_size or (key is not None and key in pending_keys):
+                self._run_chunk(items, pending, resolve, fallback, results)
+                if len(pending) >= self.chunk_size:
+                    LogUtil.logger.info(f"[批量写入 {self.table.name}] 进度：{index}/{len(items)}，"
+                                        f"耗时={round(time.time() - start_time, 2)}s")
+                pending, pending_keys = [], set()
+            pending.append((index, key))
+            if key is not None:
+                pending_keys.add(key)
+        if pending:
+            self._run_chunk(items, pending, resolve, fallback, results)
+        LogUtil.logger.info(f"[批量写入 {self.table.name}] 完成：{len(items)}条，"
+                            f"失败：{sum(result is not None for result in results)}条，"
+                            f"耗时={round(time.time() - start_time, 2)}s")
+        return results
+
+    def _run_chunk(self, items: Sequence[Any], pending: List[Tuple[int, Optional[tuple]]],
+                   resolve: Callable, fallback: Optional[Callable], results: List[Any]) -> None:
+        """
+        处理一批自然键互不相同的数据
+        """
+        try:
+            keys = [key for _, key in pending if key is not None]
+            existing_map = self.select_existing(keys) if keys else {}
+        except Exception as e:
+            self.session.rollback()
+            for index, _ in pending:
+                results[index] = e
+            return
+
+        now = datetime.now()
+        insert_rows, update_rows = [], []
+        planned = []
+        for index, key in pending:
+            item = items[index]
+            existing = existing_map.get(key) if key is not None else None
+            try:
+                error = resolve(item, existing)
+                if error:
+                    results[index] = error
+                    continue
+                if existing is None:
+                    insert_rows.append(self._values(item, self.insert_columns, self.insert_now, now, str))
+                else:
+                    row = self._values(item, self.update_columns, self.update_now, now, self._param)
+                    row[self.PK_PARAM] = getattr(existing, self.pk_column.name)
+                    update_rows.append(row)
+                planned.append((index, existing))
+            except Exception as e:
+                results[index] = e
+
+        try:
+            self.write(insert_rows, update_rows)
+            return
+        except Exception as e:
+            LogUtil.logger.warning(f"[批量写入 {self.table.name}] 批量写入失败，逐条写入 {len(planned)} 条，原因：{e}")
+            if not fallback:
+                for index, _ in planned:
+                    results[index] = e
+                return
+        # 逐条写入时前面的数据可能已写入（如自增主键与后面指定的主键相同），每条重新查询已存在的记录
+        for index, _ in planned:
+            item = items[index]
+            try:
+                key = self.key_of(item)
+                existing = self.select_existing([key]).get(key) if key is not None else None
+                results[index] = resolve(item, existing) or fallback(item, existing)
+            except Exception as e:
+                self.session.rollback()
+                results[index] = e
+
+    @staticmethod
+    def _values(item: Any, columns: Sequence[str], now_columns: Sequence[str], now: datetime,
+                param: Callable[[str], str]) -> Dict[str, Any]:
+        values = {param(name): getattr(item, name, None) for name in columns}
+        for name in now_columns:
+            values[param(name)] = values[param(name)] or now
+        return values
@@ -2,32 +2,38 @@
 # @Author  : YY
 
 import base64
+import csv
+import gzip
 import ipaddress
+import itertools
 import json
 import math
 import os
 import psutil
 import re
 import socket
+import tempfile
 import threading
 import time
 from datetime import datetime
-from io import BytesIO
+from io import BytesIO, TextIOWrapper
 from logging import Logger
-from typing import Any, Callable, Dict, List, Literal, Optional, Type, \
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Literal, Optional, Tuple, Type, \
     get_args, get_origin
 
-from flask import Response, request
+from flask import Response, has_request_context, request
 from jwt import api_jwt
 from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import PatternFill
 from openpyxl.worksheet.worksheet import Worksheet
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from pydantic.alias_generators import to_camel
 from werkzeug.datastructures import FileStorage
-from werkzeug.exceptions import NotFound
+from werkzeug.exceptions import BadRequest, NotFound
 from werkzeug.utils import secure_filename
 
+from ruoyi_common.base.schema_excel import ExcelAccess
 from ruoyi_common.base.snippet import classproperty
 from ..constant import Constants
 
@@ -39,6 +45,16 @@ class UtilException(Exception):
         self.status = status
 
 
+class ExcelRowException(Exception):
+    """
+    导入的Excel数据行无法转换为数据模型，row_index 为该行在工作表中的行号
+    """
+
+    def __init__(self, row_index: int, message: str):
+        super().__init__(f"第{row_index}行数据格式不正确：{message}")
+        self.row_index = row_index
+
+
 class StringUtil:
 
     @classmethod
@@ -1136,6 +1152,17 @@ class ExcelUtil:
         "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     ]
     max_content_length = 600 * 1024 * 1024  # 6M
+    export_spool_max_size = 8 * 1024 * 1024  # 流式导出的临时文件超过该大小时写入磁盘
+    export_chunk_size = 64 * 1024  # 流式导出每次发送的字节数
+    export_csv_encoding = "utf-8-sig"  # 带 BOM，Excel 直接打开 csv 时中文不乱码
+    export_gzip_level = 6
+
+    # 导出格式 -> 响应类型，导出格式同时作为文件扩展名
+    export_formats = {
+        "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "csv": "text/csv",
+        "csv.gz": "application/gzip",
+    }
 
     def __init__(self, model: Type[BaseModel]):
         self.model = model
@@ -1228,17 +1255,21 @@ class ExcelUtil:
             self.render_row(sheet, row, row_index)
         self.render_footer(sheet)
 
-    def export_response(self, data: List[BaseModel], sheetname: str) -> Response:
+    def export_response(self, data: List[BaseModel], sheetname: str, export_format: Optional[str] = None) -> Response:
         """
         响应Excel文件
 
         Args:
             data(List[BaseModel]): 数据
             sheetname(str): 工作表名
+            export_format(str): 导出格式（xlsx、csv、csv.gz），默认取请求参数 format
 
         Returns:
             Response: 文件流响应
         """
+        export_format = self.resolve_export_format(export_format)
+        if export_format != "xlsx":
+            return self.export_stream_response(data, sheetname, export_format)
         output: BytesIO = self.write(data, sheetname)
         response = Response(
             response=output.getvalue(),
@@ -1248,6 +1279,200 @@ class ExcelUtil:
         )
         return response
 
+    @classmethod
+    def resolve_export_format(cls, export_format: Optional[str] = None) -> str:
+        """
+        解析导出格式，未指定时取请求参数 format，都没有时为 xlsx
+
+        Args:
+            export_format(str): 导出格式
+
+        Returns:
+            str: export_formats 中的导出格式
+        """
+        if export_format is None and has_request_context():
+            export_format = request.values.get("format")
+        export_format = (export_format or "xlsx").strip().lower()
+        if export_format not in cls.export_formats:
+            raise BadRequest(description=f"不支持的导出格式：{export_format}")
+        return export_format
+
+    def write_stream(self, data: Iterable[BaseModel], sheetname: str, export_format: str = "xlsx") -> IO[bytes]:
+        """
+        流式写入导出文件，写入临时文件，内存占用与数据量无关
+        xlsx 使用只写模式的工作表逐行写入；csv、csv.gz 使用与 xlsx 相同的列逐行写入，不设置单元格样式
+
+        Args:
+            data(Iterable[BaseModel]): 数据，如服务端游标查询的迭代器
+            sheetname(str): 工作表名
+            export_format(str): 导出格式（xlsx、csv、csv.gz）
+
+        Returns:
+            IO[bytes]: 已定位到开头的临时文件，由调用方关闭
+        """
+        if export_format not in self.export_formats:
+            raise BadRequest(description=f"不支持的导出格式：{export_format}")
+        # 字典标签须在打开服务端游标前查好：流式读取时游标未缓冲，同一连接上的其它查询会截断剩余数据
+        row_values = self._build_export_row_values()
+        rows = iter(data)
+        first = next(rows, None)
+        if first is None:
+            raise NotFound(description="无法导出excel,数据为空")
+        rows = itertools.chain((first,), rows)
+
+        output = tempfile.SpooledTemporaryFile(max_size=self.export_spool_max_size)
+        try:
+            if export_format == "xlsx":
+                self._write_xlsx_stream(output, rows, sheetname, row_values)
+            else:
+                self._write_csv_stream(output, rows, row_values, compress=export_format == "csv.gz")
+        except Exception:
+            output.close()
+            raise
+        output.seek(0)
+        return output
+
+    def _write_xlsx_stream(self, output: IO[bytes], rows: Iterable[BaseModel], sheetname: str,
+                           row_values: Callable[[BaseModel], List[Any]]):
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet(title=sheetname)
+        accesses = [access for _, access in self.model.generate_excel_schema()]
+        worksheet.append(self.render_write_only_header(worksheet, PatternFill(**self.default_header_fill)))
+        default_row_fill = PatternFill(**self.default_row_fill)
+        for row in rows:
+            worksheet.append(self.render_write_only_row(worksheet, row_values(row), accesses, default_row_fill))
+        workbook.save(output)
+
+    def _write_csv_stream(self, output: IO[bytes], rows: Iterable[BaseModel],
+                          row_values: Callable[[BaseModel], List[Any]], compress: bool):
+        binary = gzip.GzipFile(fileobj=output, mode="wb", compresslevel=self.export_gzip_level) \
+            if compress else output
+        text = TextIOWrapper(binary, encoding=self.export_csv_encoding, newline="")
+        try:
+            writer = csv.writer(text)
+            writer.writerow([access.name for _, access in self.model.generate_excel_schema()])
+            writer.writerows(row_values(row) for row in rows)
+            text.flush()
+        finally:
+            # 只刷新、不关闭临时文件
+            text.detach()
+            if compress:
+                binary.close()
+
+    def _build_export_row_values(self) -> Callable[[BaseModel], List[Any]]:
+        """
+        生成导出行的取值函数，与 generate_excel_data 的取值一致：导出字段只解析一次，
+        各字典类型的标签在此一次性预先加载，逐行取值时不再查询缓存或数据库
+        """
+        dict_label_maps = {}
+        fields = []
+        for field_path, access in self.model.generate_excel_schema():
+            dict_type = access.dict_type
+            if dict_type and dict_type not in dict_label_maps:
+                try:
+                    from ruoyi_system.service.sys_dict_type import DictCacheUtil
+                    dict_label_maps[dict_type] = DictCacheUtil.get_dict_label_map(dict_type)
+                except Exception:
+                    # 如果字典加载失败，导出原值
+                    dict_label_maps[dict_type] = {}
+            fields.append((field_path.split("."), dict_label_maps.get(dict_type) if dict_type else None))
+
+        def row_values(row: BaseModel) -> List[Any]:
+            data = row.model_dump()
+            values = []
+            for path, dict_labels in fields:
+                if len(path) > 1:
+                    sub_data = data.get(path[0], {})
+                    val = sub_data.get(path[1], None) if sub_data else None
+                else:
+                    val = data.get(path[0])
+                # 如果设置了字典类型，将字典值转换为标签（导出时显示标签）
+                if dict_labels is not None and val is not None:
+                    dict_label = dict_labels.get(str(val))
+                    if dict_label:
+                        val = dict_label
+                values.append(val)
+            return values
+
+        return row_values
+
+    def render_write_only_header(self, sheet: Worksheet, fill: PatternFill) -> List[WriteOnlyCell]:
+        """
+        渲染只写模式的Excel表头
+
+        Args:
+            sheet (Worksheet): 只写模式的工作表
+            fill(PatternFill): 表头填充
+
+        Returns:
+            List[WriteOnlyCell]: 表头单元格
+        """
+        cells = []
+        for _, access in self.model.generate_excel_schema():
+            cell = WriteOnlyCell(sheet, value=access.name)
+            cell.fill = fill
+            cell.font = access.header_font
+            cells.append(cell)
+        return cells
+
+    def render_write_only_row(self, sheet: Worksheet, values: List[Any], accesses: List[ExcelAccess],
+                              default_fill: PatternFill) -> List[WriteOnlyCell]:
+        """
+        渲染只写模式的Excel行数据
+
+        Args:
+            sheet (Worksheet): 只写模式的工作表
+            values (List[Any]): 行数据，与导出字段一一对应
+            accesses (List[ExcelAccess]): 导出字段
+            default_fill(PatternFill): 未设置填充时的默认填充
+
+        Returns:
+            List[WriteOnlyCell]: 行单元格
+        """
+        cells = []
+        for val, access in zip(values, accesses):
+            cell = WriteOnlyCell(sheet, value=val)
+            cell.alignment = access.alignment
+            cell.fill = access.fill if access.fill else default_fill
+            cell.font = access.row_font
+            cells.append(cell)
+        return cells
+
+    def export_stream_response(self, data: Iterable[BaseModel], sheetname: str,
+                               export_format: Optional[str] = None) -> Response:
+        """
+        流式响应导出文件：先写入临时文件，再分块发送
+
+        Args:
+            data(Iterable[BaseModel]): 数据，如服务端游标查询的迭代器
+            sheetname(str): 工作表名
+            export_format(str): 导出格式（xlsx、csv、csv.gz），默认取请求参数 format
+
+        Returns:
+            Response: 分块传输的文件流响应
+        """
+        export_format = self.resolve_export_format(export_format)
+        output = self.write_stream(data, sheetname, export_format)
+
+        def generate():
+            try:
+                while True:
+                    chunk = output.read(self.export_chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+            finally:
+                output.close()
+
+        response = Response(
+            response=generate(),
+            status=200,
+            mimetype=self.export_formats[export_format],
+            headers={"Content-Disposition": f"attachment; filename={time.time()}.{export_format}"},
+            direct_passthrough=True
+        )
+        return response
+
     def import_template_response(self, sheetname: str) -> Response:
         """
         响应导入模板
@@ -1312,12 +1537,29 @@ class ExcelUtil:
         Returns:
             List[BaseModel]: 导入数据模型列表
         """
+        data = []
+        for chunk in self.import_file_chunks(file, sheetname):
+            data.extend(chunk)
+        return data
+
+    def import_file_chunks(self, file: FileStorage, sheetname: Optional[str] = None,
+                           chunk_size: Optional[int] = None) -> Iterator[List[BaseModel]]:
+        """
+        流式导入数据，按块返回导入数据模型
+
+        Args:
+            file(FileStorage): 导入文件
+            sheetname(str): 工作表名
+            chunk_size(int): 每块的行数，默认 IMPORT_CHUNK_SIZE
+
+        Returns:
+            Iterator[List[BaseModel]]: 导入数据模型块
+        """
         self.check_file(file)
         # Read the file content into BytesIO buffer which is fully compatible with openpyxl
         file.stream.seek(0)
         buffer = BytesIO(file.stream.read())
-        data = self.read_buffer(buffer, sheetname)
-        return data
+        return self.iter_buffer(buffer, sheetname, chunk_size)
 
     def check_file(self, file: FileStorage):
         '''
@@ -1338,6 +1580,9 @@ class ExcelUtil:
 
     IMPORT_SAMPLE_ROW_LIMIT = 5
 
+    # 流式导入时每块的行数
+    IMPORT_CHUNK_SIZE = 500
+
     def read_buffer(self, buffer, sheetname: Optional[str] = None) -> List[BaseModel]:
         """
         读取文件流
@@ -1349,28 +1594,57 @@ class ExcelUtil:
         Returns:
             List[BaseModel]: 导入数据模型列表
         """
-        logger = self._get_logger()
+        data = []
+        for chunk in self.iter_buffer(buffer, sheetname):
+            data.extend(chunk)
+        return data
+
+    def iter_buffer(self, buffer, sheetname: Optional[str] = None,
+                    chunk_size: Optional[int] = None) -> Iterator[List[BaseModel]]:
+        """
+        流式读取文件流，按块返回导入数据模型
+        调用时即选择工作表并读取表头，表头缺失时直接抛出异常；数据行在迭代时逐行读取、转换，
+        转换失败时抛出带行号的 ExcelRowException，之前返回的数据块不受影响
+
+        Args:
+            buffer: 导入文件流 (can be BufferedReader or FileStorage stream)
+            sheetname(str): 工作表名
+            chunk_size(int): 每块的行数，默认 IMPORT_CHUNK_SIZE
+
+        Returns:
+            Iterator[List[BaseModel]]: 导入数据模型块
+        """
         try:
             workbook = load_workbook(buffer, read_only=True, data_only=True)
         except Exception as e:
             raise Exception("文件格式不正确")
+        try:
+            header_values, rows, header_row_index = self._open_worksheet_rows(workbook, sheetname)
+            convert_row = self._build_row_converter(header_values)
+        except Exception:
+            workbook.close()
+            raise
+        return self._iter_chunks(workbook, rows, header_row_index + 1, convert_row,
+                                 max(1, chunk_size or self.IMPORT_CHUNK_SIZE))
+
+    def _open_worksheet_rows(self, workbook, sheetname: Optional[str]) -> Tuple[List[Any], Iterator[tuple], int]:
+        """
+        按顺序尝试工作表，返回第一张有表头的工作表的表头、表头之后的行迭代器和表头的行号
+        """
+        logger = self._get_logger()
         worksheets = self._get_candidate_worksheets(workbook, sheetname, logger)
         if not worksheets:
             raise NotFound(description="工作表不存在")
         failures = []
-        column_meta = self._build_excel_column_meta()
         for worksheet in worksheets:
-            data, sample_rows = self._extract_rows_from_worksheet(
-                worksheet,
-                column_meta=column_meta
-            )
-            if data is not None:
+            header_values, rows, sample_rows, header_row_index = self._read_worksheet_header(worksheet)
+            if header_values is not None:
                 if logger:
                     logger.info(
                         "Excel导入：选择工作表",
                         extra={"sheet": worksheet.title, "sheetnames": workbook.sheetnames}
                     )
-                return data
+                return header_values, rows, header_row_index
             failures.append({
                 "sheet": worksheet.title,
                 "sample_rows": sample_rows
@@ -1423,32 +1697,74 @@ class ExcelUtil:
             )
         return ordered
 
-    def _extract_rows_from_worksheet(self, worksheet: Worksheet, column_meta: Dict[str, Dict[str, Any]]):
-        header_values = None
-        data = []
+    def _read_worksheet_header(self, worksheet: Worksheet):
+        """
+        读取工作表的第一行非空行作为表头，返回表头、表头之后的行迭代器、读取过的样例行和表头的行号；没有表头时表头为 None
+        """
+        rows = worksheet.iter_rows(min_row=1, values_only=True)
         sample_rows = []
-        for row_index, row in enumerate(worksheet.iter_rows(min_row=1, values_only=True), start=1):
-            row_values = list(row)
+        for row_index, row in enumerate(rows, start=1):
             if len(sample_rows) < self.IMPORT_SAMPLE_ROW_LIMIT:
                 sample_rows.append({
                     "row": row_index,
-                    "values": self._stringify_row(row_values)
+                    "values": self._stringify_row(list(row))
                 })
-            if header_values is None:
-                if not any(cell not in (None, "") for cell in row_values):
+            if any(cell not in (None, "") for cell in row):
+                return list(row), rows, sample_rows, row_index
+        return None, None, sample_rows, None
+
+    def _iter_chunks(self, workbook, rows: Iterator[tuple], start_row_index: int,
+                     convert_row: Callable[[tuple], BaseModel], chunk_size: int) -> Iterator[List[BaseModel]]:
+        try:
+            chunk = []
+            for row_index, row in enumerate(rows, start=start_row_index):
+                if not any(cell not in (None, "") for cell in row):
                     continue
-                header_values = list(row_values)
-                continue
-            if not any(cell not in (None, "") for cell in row_values):
-                continue
-            row_data = {}
-            for header, cell_value in zip(header_values, row_values):
-                row_data[header] = self._coerce_cell_value(header, cell_value, column_meta)
-            new_row = self.model.rebuild_excel_schema(row_data)
-            data.append(self.model(**new_row))
-        if header_values is None:
-            return None, sample_rows
-        return data, sample_rows
+                try:
+                    chunk.append(convert_row(row))
+                except ValidationError as e:
+                    raise ExcelRowException(row_index, "；".join(
+                        f"{'.'.join(str(loc) for loc in error['loc'])}：{error['msg']}" for error in e.errors()
+                    ))
+                except Exception as e:
+                    raise ExcelRowException(row_index, str(e))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            workbook.close()
+
+    def _build_row_converter(self, header_values: List[Any]) -> Callable[[tuple], BaseModel]:
+        """
+        根据表头生成行转换函数：每列的字段路径、目标类型和字典转换只解析一次
+        """
+        column_meta = self._build_excel_column_meta()
+        # 表头名 -> (列下标, 单元格转换函数)，表头重名时以最后一列为准
+        columns = {}
+        for index, header in enumerate(header_values):
+            columns[header] = (index, self._build_cell_coercer(header, column_meta))
+        # 与 rebuild_excel_schema 一致：每个导入字段取同名列的值，没有该列时为 None
+        fields = []
+        for field_path, access in self.model.generate_excel_schema():
+            fields.append((field_path.split("."), columns.get(access.name)))
+
+        def convert_row(row: tuple) -> BaseModel:
+            new_row = {}
+            for path, column in fields:
+                val = None
+                if column is not None:
+                    index, coerce = column
+                    if index < len(row):
+                        val = coerce(row[index])
+                if len(path) > 1:
+                    new_row.setdefault(path[0], {})[path[1]] = val
+                else:
+                    new_row[path[0]] = val
+            return self.model(**new_row)
+
+        return convert_row
 
     def _build_excel_column_meta(self) -> Dict[str, Dict[str, Any]]:
         if hasattr(self, "_excel_column_meta_cache"):
@@ -1463,30 +1779,43 @@ class ExcelUtil:
         self._excel_column_meta_cache = column_meta
         return column_meta
 
-    def _coerce_cell_value(self, header: str, value: Any, column_meta: Dict[str, Dict[str, Any]]):
+    def _build_cell_coercer(self, header: str, column_meta: Dict[str, Dict[str, Any]]) -> Callable[[Any], Any]:
+        """
+        生成一列的单元格转换函数
+        """
         meta = column_meta.get(header)
         if not meta:
-            return value
+            return lambda value: value
 
         access = meta.get("access")
-        # 如果设置了字典类型，将标签转换为字典值（导入时将标签转换为值）
-        if access and access.dict_type and value not in (None, ""):
-            try:
-                from ruoyi_system.service.sys_dict_type import DictCacheUtil
-                dict_value = DictCacheUtil.get_dict_value(access.dict_type, str(value))
-                if dict_value:
-                    value = dict_value
-            except Exception:
-                # 如果字典转换失败，使用原值
-                pass
-
         target_type = meta.get("target_type")
         if target_type is None:
             target_type = self._resolve_field_type(meta["path"])
             meta["target_type"] = target_type
-        if target_type is str and value not in (None, ""):
-            return str(value)
-        return value
+        dict_type = access.dict_type if access else None
+        # 同一列中相同标签的字典值只查询一次
+        dict_values = {}
+
+        def coerce(value: Any) -> Any:
+            # 如果设置了字典类型，将标签转换为字典值（导入时将标签转换为值）
+            if dict_type and value not in (None, ""):
+                label = str(value)
+                if label not in dict_values:
+                    dict_value = None
+                    try:
+                        from ruoyi_system.service.sys_dict_type import DictCacheUtil
+                        dict_value = DictCacheUtil.get_dict_value(dict_type, label)
+                    except Exception:
+                        # 如果字典转换失败，使用原值
+                        pass
+                    dict_values[label] = dict_value
+                if dict_values[label]:
+                    value = dict_values[label]
+            if target_type is str and value not in (None, ""):
+                return str(value)
+            return value
+
+        return coerce
 
     def _resolve_field_type(self, path: List[str]):
         current_model = self.model
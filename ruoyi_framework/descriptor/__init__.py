@@ -3,8 +3,9 @@
 descriptor 包用于存放与 AOP/注解语义相关的工具。
 """
 
-from .custom_cacheable import custom_cacheable
-from .custom_cache_evict import custom_cache_evict
+from .custom_cacheable import cache_stats, custom_cacheable
+from .custom_cache_evict import custom_cache_evict, evict_cache
+from .single_flight import RedisBuildLock, SingleFlight
 
-__all__ = ["custom_cacheable", "custom_cache_evict"]
+__all__ = ["custom_cacheable", "custom_cache_evict", "evict_cache", "cache_stats", "SingleFlight", "RedisBuildLock"]
 
@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 """
 自定义缓存清理装饰器，对应 Java 版本的 `@CustomCacheEvict`。
-执行目标函数后，根据前缀/字段路径/参数组合构造通配符 Key，并批量删除 Redis 缓存。
+执行目标函数后，根据前缀/字段路径/参数组合构造通配符 Key，并批量删除 Redis 缓存，
+同时清理各进程中匹配的一级缓存。
 """
 
 from __future__ import annotations
@@ -19,11 +20,12 @@ from .custom_cacheable import (
     _get_value_by_field_path,
     _hash_arguments,
     _resolve_redis_client,
+    invalidate_local_cache,
 )
 
 logger = logging.getLogger(__name__)
 
-__all__ = ["custom_cache_evict"]
+__all__ = ["custom_cache_evict", "evict_cache"]
 
 
 def custom_cache_evict(
@@ -56,6 +58,7 @@ def custom_cache_evict(
             params = _bind_arguments(signature, *args, **kwargs)
             args_hash = _hash_arguments(params) if use_query_params_as_key else None
 
+            patterns = []
             for idx, prefix in enumerate(key_prefixes):
                 if not prefix:
                     continue
@@ -69,9 +72,9 @@ def custom_cache_evict(
                 if use_query_params_as_key and args_hash:
                     pattern = f"{pattern}{COMMON_SEPARATOR}{ARGS_HASH_PREFIX}:{args_hash}"
 
-                pattern = f"{pattern}*"
-                _delete_keys_by_pattern(client, pattern)
+                patterns.append(f"{pattern}*")
 
+            _evict_patterns(client, patterns)
             return result
 
         return wrapper
@@ -79,6 +82,30 @@ def custom_cache_evict(
     return decorator
 
 
+def evict_cache(patterns: Iterable[str]) -> None:
+    """
+    按通配符删除 Redis 缓存并清理各进程中匹配的一级缓存，供需要按数据变更范围计算 Key 的场景直接调用。
+
+    Args:
+        patterns: 通配符 Key 列表，如 "car:statistics:map:sales:江苏省*"。
+    """
+
+    client = _resolve_redis_client()
+    if client is None:
+        return
+    _evict_patterns(client, [pattern for pattern in patterns if pattern])
+
+
+def _evict_patterns(client: LocalProxy, patterns: Sequence[str]) -> None:
+    """
+    逐个通配符删除 Redis 缓存，再清理一级缓存。
+    """
+
+    for pattern in patterns:
+        _delete_keys_by_pattern(client, pattern)
+    invalidate_local_cache(client, patterns)
+
+
 def _bind_arguments(signature: inspect.Signature, *args: Any, **kwargs: Any) -> MutableMapping[str, Any]:
     """
     对函数参数做一次绑定，得到“参数名 -> 值”的映射，便于后续取字段。
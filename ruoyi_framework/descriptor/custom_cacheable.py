@@ -2,21 +2,33 @@
 """
 自定义缓存装饰器，复刻 Java 版 `@CustomCacheable` 的核心能力：
 按照前缀、字段路径以及完整参数组合构造缓存 Key，并可选支持分页缓存。
+
+可选开启进程内一级缓存（L1）：以同一个缓存 Key 保存反序列化后的对象，按容量 LRU 淘汰并带过期时间，
+Redis 为二级缓存（L2）。`custom_cache_evict` 清理缓存时通过 Redis 发布订阅通知所有进程清理 L1。
+
+可选开启防击穿：缓存未命中时同一个 Key 只由一个调用方执行函数，进程内其他调用等待复用结果，
+其他进程等待持锁方写入缓存；同时保留一份更久的旧数据，重新构建期间直接返回旧数据。
 """
 
 from __future__ import annotations
 
+import fnmatch
 import functools
 import hashlib
 import inspect
 import json
 import logging
+import os
 import pickle
-from typing import Any, Callable, Mapping, MutableMapping
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Mapping, MutableMapping
 
 from werkzeug.local import LocalProxy
 
 from ruoyi_admin.ext import redis_cache
+from .single_flight import RedisBuildLock, SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -24,8 +36,19 @@ DEFAULT_PAGE_SIZE = 30
 DEFAULT_PAGE_NUM = 1
 COMMON_SEPARATOR = ":"
 ARGS_HASH_PREFIX = "args"
+# 一级缓存失效通知频道，消息内容为待清理 Key 的通配符
+LOCAL_CACHE_INVALIDATE_CHANNEL = "ruoyi:cache:local:invalidate"
+# 一级缓存默认过期时间（秒），失效通知丢失时最多读到这么久的旧数据
+DEFAULT_LOCAL_EXPIRE_TIME = 60
+# 订阅断开后的重连间隔（秒）
+SUBSCRIBE_RETRY_INTERVAL = 5
+# 构建锁、旧数据的 Key 前缀，不放在业务前缀下，按业务前缀清理缓存时保留
+BUILD_LOCK_PREFIX = "cache:build:lock"
+STALE_PREFIX = "cache:stale"
 
-__all__ = ["custom_cacheable"]
+__all__ = ["custom_cacheable", "cache_stats"]
+
+_MISSING = object()
 
 
 def custom_cacheable(
@@ -36,10 +59,24 @@ def custom_cacheable(
     paginate: bool = False,
     page_number_field: str = "page_num",
     page_size_field: str = "page_size",
+    local_max_size: int = 0,
+    local_expire_time: int | None = None,
+    single_flight: bool = False,
+    stale_expire_time: int = 0,
+    build_lock_timeout: int = 60,
 ) -> Callable:
     """
     Redis 缓存装饰器，参数含义与用户给出的 Java 版注解保持一致，便于迁移。
 
+    local_max_size 大于 0 时开启进程内一级缓存，最多保存 local_max_size 个结果，
+    过期时间 local_expire_time 默认取 expire_time 与 DEFAULT_LOCAL_EXPIRE_TIME 的较小值。
+    一级缓存命中时直接返回缓存中的同一个对象，调用方不应修改返回值。
+
+    single_flight 为 True 时缓存未命中只由一个调用方执行函数：进程内其他调用等待并复用其结果，
+    其他进程通过 Redis 构建锁（过期时间 build_lock_timeout）等待持锁方写入缓存。
+    stale_expire_time 大于 0 时另存一份多保留 stale_expire_time 秒的旧数据，
+    缓存过期或被清理后，重新构建期间其他调用直接返回旧数据。
+
     示例：
         @custom_cacheable(
             key_prefix="recruit:list",
@@ -54,6 +91,12 @@ def custom_cacheable(
 
     def decorator(func: Callable) -> Callable:
         signature = inspect.signature(func)
+        region = _CacheRegion(key_prefix or func.__qualname__)
+        if local_max_size > 0:
+            local_expire = local_expire_time if local_expire_time is not None \
+                else min(expire_time, DEFAULT_LOCAL_EXPIRE_TIME)
+            if local_expire > 0:
+                region.local = _LocalCache(local_max_size, local_expire)
 
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
@@ -91,31 +134,322 @@ def custom_cacheable(
             else:
                 page_number = page_size = None
 
-            cached = _safe_redis_get(client, cache_key)
-            if cached is not None:
+            if region.local is not None:
+                _invalidation_listener.ensure_started(client)
+                value = region.local.get(cache_key)
+                if value is not _MISSING:
+                    region.record("l1_hits")
+                    return value
+                region.record("l1_misses")
+
+            value = _load_cached(client, cache_key)
+            if value is not _MISSING:
+                region.record("l2_hits")
+                if region.local is not None:
+                    region.local.put(cache_key, value)
+                return value
+            region.record("l2_misses")
+
+            stale_key = f"{STALE_PREFIX}{COMMON_SEPARATOR}{cache_key}"
+
+            def build() -> Any:
+                result = func(*args, **kwargs)
+                region.record("builds")
+
+                # 开启分页时仅缓存列表或元组，避免单个对象导致缓存结构不一致。
+                if paginate and not isinstance(result, (list, tuple)):
+                    return result
+
                 try:
-                    return pickle.loads(cached)
+                    payload = pickle.dumps(result)
                 except Exception as exc:  # noqa: BLE001
-                    logger.debug("反序列化缓存数据失败 %s: %s", cache_key, exc)
+                    logger.warning("序列化缓存数据失败 %s: %s", cache_key, exc)
+                    return result
+
+                _safe_redis_setex(client, cache_key, int(expire_time), payload)
+                if stale_expire_time > 0:
+                    _safe_redis_setex(client, stale_key, int(expire_time + stale_expire_time), payload)
+                if region.local is not None:
+                    region.local.put(cache_key, result)
+                return result
 
-            result = func(*args, **kwargs)
+            if not single_flight:
+                return build()
+
+            def load_stale() -> Any:
+                if stale_expire_time <= 0:
+                    return _MISSING
+                stale = _load_cached(client, stale_key)
+                if stale is not _MISSING:
+                    region.record("stale_hits")
+                return stale
+
+            def build_exclusive() -> Any:
+                lock = RedisBuildLock(client, f"{BUILD_LOCK_PREFIX}{COMMON_SEPARATOR}{cache_key}",
+                                      build_lock_timeout)
+                if not lock.acquire():
+                    # 其他进程正在构建：有旧数据时直接返回，否则等待其写入缓存，等不到再自行构建
+                    stale = load_stale()
+                    if stale is not _MISSING:
+                        return stale
+                    cached = lock.wait(lambda: _none_if_missing(_load_cached(client, cache_key)),
+                                       build_lock_timeout)
+                    if cached is not None:
+                        if region.local is not None:
+                            region.local.put(cache_key, cached)
+                        return cached
+                    return build()
+                try:
+                    # 加锁前其他进程可能刚构建完成
+                    cached = _load_cached(client, cache_key)
+                    if cached is not _MISSING:
+                        if region.local is not None:
+                            region.local.put(cache_key, cached)
+                        return cached
+                    return build()
+                finally:
+                    lock.release()
+
+            # 本进程已在构建：有旧数据时直接返回
+            if region.flight.running(cache_key):
+                stale = load_stale()
+                if stale is not _MISSING:
+                    return stale
+            value, shared = region.flight.do(cache_key, build_exclusive, timeout=build_lock_timeout)
+            if shared:
+                region.record("shared")
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def cache_stats() -> Dict[str, Any]:
+    """
+    各级缓存的命中统计（当前进程），regions 按缓存前缀分别统计。
+
+    build 为未命中时的构建统计：builds 执行函数次数，shared 复用其他调用结果次数，stale_hits 返回旧数据次数。
+
+    Returns:
+        Dict[str, Any]: {"l1": {...}, "l2": {...}, "build": {...}, "regions": {前缀: {...}}}
+    """
+
+    totals = {
+        "l1": {"hits": 0, "misses": 0, "size": 0, "evictions": 0},
+        "l2": {"hits": 0, "misses": 0},
+        "build": {"builds": 0, "shared": 0, "stale_hits": 0},
+    }
+    regions = {}
+    for region in list(_regions):
+        stats = region.stats()
+        regions[region.name] = stats
+        for tier in ("l1", "l2", "build"):
+            for name, value in stats.get(tier, {}).items():
+                if name in totals[tier]:
+                    totals[tier][name] += value
+    totals["l1"]["hit_rate"] = _hit_rate(totals["l1"])
+    totals["l2"]["hit_rate"] = _hit_rate(totals["l2"])
+    totals["regions"] = regions
+    return totals
+
+
+def invalidate_local_cache(client: LocalProxy | None, patterns: Iterable[str]) -> None:
+    """
+    清理当前进程中匹配通配符的一级缓存，并通过 Redis 发布订阅通知其他进程清理。
+    """
+
+    patterns = [pattern for pattern in patterns if pattern]
+    if not patterns:
+        return
+    for pattern in patterns:
+        _evict_local(pattern)
+    if client is None:
+        return
+    try:
+        for pattern in patterns:
+            client.publish(LOCAL_CACHE_INVALIDATE_CHANNEL, pattern)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("发布一级缓存失效通知失败 %s: %s", patterns, exc)
 
-            # 开启分页时仅缓存列表或元组，避免单个对象导致缓存结构不一致。
-            if paginate and not isinstance(result, (list, tuple)):
-                return result
 
+class _LocalCache:
+    """
+    进程内 LRU 缓存，按容量淘汰最久未使用的 Key，超过过期时间的 Key 读取时丢弃。
+    """
+
+    def __init__(self, max_size: int, expire_time: int):
+        self.max_size = max_size
+        self.expire_time = expire_time
+        self.evictions = 0
+        self._items: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return _MISSING
+            expire_at, value = item
+            if expire_at <= time.monotonic():
+                del self._items[key]
+                return _MISSING
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.expire_time, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def evict(self, pattern: str) -> int:
+        """
+        删除匹配 Redis 通配符（*、?、[...]）的 Key，返回删除数量
+        """
+        with self._lock:
+            keys = [key for key in self._items if fnmatch.fnmatchcase(key, pattern)]
+            for key in keys:
+                del self._items[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+class _CacheRegion:
+    """
+    一个被装饰函数的缓存：可选的一级缓存、进程内 single-flight 以及各级命中计数。
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.local: _LocalCache | None = None
+        self.flight = SingleFlight()
+        self._counters = {"l1_hits": 0, "l1_misses": 0, "l2_hits": 0, "l2_misses": 0,
+                          "builds": 0, "shared": 0, "stale_hits": 0}
+        self._lock = threading.Lock()
+        _regions.append(self)
+
+    def record(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        stats = {
+            "l2": {"hits": counters["l2_hits"], "misses": counters["l2_misses"]},
+            "build": {name: counters[name] for name in ("builds", "shared", "stale_hits")},
+        }
+        if self.local is not None:
+            stats["l1"] = {
+                "hits": counters["l1_hits"],
+                "misses": counters["l1_misses"],
+                "size": len(self.local),
+                "max_size": self.local.max_size,
+                "expire_time": self.local.expire_time,
+                "evictions": self.local.evictions,
+            }
+        return stats
+
+
+class _InvalidationListener:
+    """
+    每个进程一个后台线程订阅一级缓存失效通知，按消息中的通配符清理本进程的一级缓存。
+    订阅断开期间可能丢失通知，重新订阅后清空全部一级缓存。
+    """
+
+    def __init__(self):
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self, client: LocalProxy) -> None:
+        # 按进程号判断，fork 出的子进程不会继承父进程的订阅线程
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
             try:
-                payload = pickle.dumps(result)
+                connection = client._get_current_object() if isinstance(client, LocalProxy) else client
             except Exception as exc:  # noqa: BLE001
-                logger.warning("序列化缓存数据失败 %s: %s", cache_key, exc)
-                return result
+                logger.warning("获取 redis 连接失败，一级缓存失效通知未订阅: %s", exc)
+                return
+            self._pid = os.getpid()
+            thread = threading.Thread(target=self._listen, args=(connection,),
+                                      name="local-cache-invalidation", daemon=True)
+            thread.start()
+
+    @staticmethod
+    def _listen(connection: Any) -> None:
+        while True:
+            pubsub = None
+            try:
+                pubsub = connection.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(LOCAL_CACHE_INVALIDATE_CHANNEL)
+                _clear_local()
+                for message in pubsub.listen():
+                    pattern = message.get("data")
+                    if isinstance(pattern, bytes):
+                        pattern = pattern.decode("utf-8", "replace")
+                    if isinstance(pattern, str) and pattern:
+                        _evict_local(pattern)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("一级缓存失效通知订阅中断，%s 秒后重试: %s", SUBSCRIBE_RETRY_INTERVAL, exc)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:  # noqa: BLE001
+                        pass
+            time.sleep(SUBSCRIBE_RETRY_INTERVAL)
 
-            _safe_redis_setex(client, cache_key, int(expire_time), payload)
-            return result
 
-        return wrapper
+_regions: List[_CacheRegion] = []
+_invalidation_listener = _InvalidationListener()
 
-    return decorator
+
+def _evict_local(pattern: str) -> None:
+    for region in list(_regions):
+        if region.local is not None:
+            region.local.evict(pattern)
+
+
+def _clear_local() -> None:
+    for region in list(_regions):
+        if region.local is not None:
+            region.local.clear()
+
+
+def _load_cached(client: LocalProxy, cache_key: str) -> Any:
+    """
+    读取并反序列化 Redis 缓存，不存在或反序列化失败时返回 _MISSING。
+    """
+
+    cached = _safe_redis_get(client, cache_key)
+    if cached is None:
+        return _MISSING
+    try:
+        return pickle.loads(cached)
+    except Exception as exc:  # noqa: BLE001
+        logger.debug("反序列化缓存数据失败 %s: %s", cache_key, exc)
+        return _MISSING
+
+
+def _none_if_missing(value: Any) -> Any:
+    return None if value is _MISSING else value
+
+
+def _hit_rate(counters: Mapping[str, int]) -> float:
+    total = counters["hits"] + counters["misses"]
+    return round(counters["hits"] / total, 4) if total else 0.0
 
 
 def _resolve_redis_client() -> LocalProxy | None:
@@ -137,7 +137,8 @@ class Log:
             return
         if isinstance(response, BaseModel):
             self._oper_log.json_result = response.model_dump_json(exclude_none=True)[:2000]
-        elif isinstance(response, Response):
+        elif isinstance(response, Response) and not response.is_streamed:
+            # 流式响应（如流式导出）读取内容会一次性读入整个响应体，不记录
             json_result = response.get_data(as_text=False)
             if json_result:
                 self._oper_log.json_result = json_result[:2000]
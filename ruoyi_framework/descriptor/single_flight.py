@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+缓存构建防击穿工具：
+- SingleFlight：进程内同一 Key 同一时间只执行一次，其他调用等待并复用这次的结果；
+- RedisBuildLock：跨进程的构建锁，拿不到锁的进程等待持锁方写入缓存后直接读取。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["SingleFlight", "RedisBuildLock"]
+
+
+class SingleFlight:
+    """
+    进程内 single-flight。
+
+    第一个调用方执行函数，同一 Key 的并发调用等待其结果；函数抛出异常时等待方收到同一个异常。
+    等待超过 timeout 秒时不再等待，自行执行函数。
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def running(self, key: str) -> bool:
+        """
+        Key 是否正在执行
+        """
+
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key: str, func: Callable[[], Any], timeout: float | None = None) -> Tuple[Any, bool]:
+        """
+        Returns:
+            Tuple[Any, bool]: 结果、是否复用了其他调用方的结果
+        """
+
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            try:
+                return future.result(timeout=timeout), True
+            except FutureTimeoutError:
+                logger.warning("等待缓存构建超时，自行构建 %s", key)
+                return func(), False
+
+        try:
+            result = func()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                if self._calls.get(key) is future:
+                    del self._calls[key]
+
+
+class RedisBuildLock:
+    """
+    跨进程构建锁：SET NX EX 加锁，锁的值为本次随机 token，释放时用 Lua 脚本原子地比较并删除，只删除自己持有的锁。
+    Redis 不可用时视为加锁成功，不影响主流程。
+    """
+
+    # 等待持锁方写入缓存时的轮询间隔（秒）
+    POLL_INTERVAL = 0.2
+    # 值仍为本次 token 时才删除：GET、比较、DEL 分开执行时，锁可能在比较后过期并被其他进程获取
+    RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+    def __init__(self, client: Any, key: str, expire: int):
+        self.client = client
+        self.key = key
+        self.expire = expire
+        self._token: str | None = None
+
+    def acquire(self) -> bool:
+        token = uuid.uuid4().hex
+        try:
+            if not self.client.set(self.key, token, nx=True, ex=self.expire):
+                return False
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("获取构建锁失败，直接构建 %s: %s", self.key, exc)
+            return True
+        self._token = token
+        return True
+
+    def release(self) -> None:
+        if self._token is None:
+            return
+        try:
+            self.client.eval(self.RELEASE_SCRIPT, 1, self.key, self._token)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("释放构建锁失败 %s: %s", self.key, exc)
+        finally:
+            self._token = None
+
+    def wait(self, load: Callable[[], Any], timeout: float) -> Any:
+        """
+        等待持锁方构建完成：轮询 load()，返回非 None 的结果；锁已释放或超时仍没有结果时返回 None
+        """
+
+        deadline = time.monotonic() + timeout
+        while True:
+            value = load()
+            if value is not None:
+                return value
+            try:
+                locked = self.client.exists(self.key)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("读取构建锁失败 %s: %s", self.key, exc)
+                return None
+            if not locked:
+                return load()
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.POLL_INTERVAL)
@@ -379,6 +379,9 @@ class RedisCache(BaseModel):
     
     command_stats: List[RedisCommandStatsOption]
     
+    # 自定义缓存装饰器的各级命中统计（当前进程）
+    cacheable_stats: Dict = {}
+    
     @classmethod
     def from_connection(cls, connection) -> "RedisCache":
         """
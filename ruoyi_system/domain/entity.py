@@ -11,6 +11,7 @@ from typing_extensions import Annotated
 from ruoyi_common.base.transformer import to_datetime, str_to_int
 from ruoyi_common.domain.entity import LoginUser
 from ruoyi_common.base.model import AuditEntity, BaseEntity, VoAccess
+from ruoyi_common.base.schema_excel import ExcelField
 
 
 class SysUserRole(BaseEntity):
@@ -101,28 +102,36 @@ class SysPost(AuditEntity):
     post_id: Annotated[
         Optional[int],
         BeforeValidator(str_to_int),
-        Field(gt=0,default=None)
+        Field(gt=0,default=None),
+        ExcelField(name="岗位序号", cell_type="numeric")
     ]
     
     # 岗位编码 
     post_code: Annotated[
         Optional[str],
-        Field(default=None,vo=VoAccess(query=True))
+        Field(default=None,vo=VoAccess(query=True)),
+        ExcelField(name="岗位编码")
     ]
     
     # 岗位名称 
     post_name: Annotated[
         Optional[str],
-        Field(default=None,vo=VoAccess(query=True))
+        Field(default=None,vo=VoAccess(query=True)),
+        ExcelField(name="岗位名称")
     ]
     
     # 岗位排序 
-    post_sort: Optional[int] = None
+    post_sort: Annotated[
+        Optional[int],
+        Field(default=None),
+        ExcelField(name="岗位排序")
+    ]
     
     # 状态（0正常 1停用） 
     status: Annotated[
         Optional[str],
-        Field(default=None,vo=VoAccess(query=True))
+        Field(default=None,vo=VoAccess(query=True)),
+        ExcelField(name="状态", converter="0=正常,1=停用")
     ]
     
     # 标识 默认不存在 
@@ -292,28 +301,39 @@ class SysLogininfor(AuditEntity):
 class SysConfig(AuditEntity):
     
     # 参数主键
-    config_id: Optional[int] = None   # @Excel(name = "参数主键")
+    config_id: Annotated[
+        Optional[int],
+        Field(default=None),
+        ExcelField(name="参数主键", cell_type="numeric")
+    ]
     
     # 参数名称
     config_name: Annotated[
         Optional[str],
-        Field(default=None,vo=VoAccess(query=True))
+        Field(default=None,vo=VoAccess(query=True)),
+        ExcelField(name="参数名称")
     ]
     
     # 参数键名
     config_key: Annotated[
         Optional[str],
-        Field(default=None,vo=VoAccess(query=True))
+        Field(default=None,vo=VoAccess(query=True)),
+        ExcelField(name="参数键名")
     ]
 
     # 系统内置（Y是 N否）
     config_type: Annotated[
         Optional[str],
-        Field(default=None,vo=VoAccess(query=True))
+        Field(default=None,vo=VoAccess(query=True)),
+        ExcelField(name="系统内置", converter="Y=是,N=否")
     ]
     
     # 参数键值
-    config_value: Optional[str] = None   # @Excel(name = "参数键值")
+    config_value: Annotated[
+        Optional[str],
+        Field(default=None),
+        ExcelField(name="参数键值")
+    ]
 
     
 
@@ -105,6 +105,7 @@ class SysConfigService:
         flag = SysConfigMapper.insert_config(config)
         if flag and flag > 0:
             redis_cache.set(cls.get_cache_key(config.config_key), config.config_value.encode("utf-8"))
+            cls.bump_config_version()
             return True
         return False
 
@@ -122,6 +123,7 @@ class SysConfigService:
         flag = SysConfigMapper.update_config(config)
         if flag and flag > 0:
             redis_cache.set(cls.get_cache_key(config.config_key), config.config_value.encode("utf-8"))
+            cls.bump_config_version()
             return True
         return False
 
@@ -146,6 +148,7 @@ class SysConfigService:
             redis_cache.delete(cls.get_cache_key(config.config_key))
             deleting_ids.append(id)
         flag = SysConfigMapper.delete_configs_by_ids(deleting_ids)
+        cls.bump_config_version()
         return True if flag and flag > 0 else False
 
     @classmethod
@@ -166,6 +169,14 @@ class SysConfigService:
         # redis-py 的 delete 需要 *names 形式的参数，不能直接传 list
         if keys:
             redis_cache.delete(*keys)
+        cls.bump_config_version()
+
+    @classmethod
+    def bump_config_version(cls):
+        """
+        递增配置版本号，缓存了配置解析结果的模块据此判断是否需要重新加载
+        """
+        redis_cache.incr(Constants.SYS_CONFIG_VERSION_KEY)
 
     @classmethod
     def reset_config_cache(cls):
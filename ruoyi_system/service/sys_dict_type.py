@@ -3,7 +3,7 @@
 
 from itertools import groupby
 from types import NoneType
-from typing import List, Optional
+from typing import Dict, List, Optional
 from flask import Flask
 from pydantic_core import to_json, from_json
 
@@ -290,6 +290,24 @@ class DictCacheUtil:
                 return dict_data.dict_label
         return None
     
+    @classmethod
+    def get_dict_label_map(cls, dict_type: str) -> Dict[str, str]:
+        """
+        根据字典类型，一次性获取全部字典值到标签的映射
+
+        Args:
+            dict_type: 字典类型
+
+        Returns:
+            Dict[str, str]: 字典值到标签的映射，找不到字典数据时为空
+        """
+        if not dict_type:
+            return {}
+        return {
+            str(dict_data.dict_value): dict_data.dict_label
+            for dict_data in cls._get_dict_data_list(dict_type) or []
+        }
+
     @classmethod
     def _get_dict_data_list(cls, dict_type: str) -> List[SysDictData]:
         """
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# @Author  : YY
+# @FileName: test_excel_export.py
+# @Time    : 2026-03-04 09:40:12
+"""
+ExcelUtil 流式导出：字典标签须在读取第一行（打开服务端游标）之前加载完毕
+"""
+
+import csv
+import io
+import os
+import sys
+import types
+
+import pytest
+from openpyxl import load_workbook
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from ruoyi_car.domain.entity import Sales
+from ruoyi_common.utils.base import ExcelUtil
+
+DICT_LABELS = {
+    "country": {"1": "中国"},
+    "model_type": {"2": "SUV"},
+    "energy_type": {"3": "纯电"},
+}
+
+
+@pytest.fixture
+def dict_lookups(monkeypatch):
+    """
+    以进程内的字典数据代替 Redis、数据库中的字典缓存，记录每次加载
+    """
+    lookups = []
+
+    class DictCacheUtil:
+        @classmethod
+        def get_dict_label_map(cls, dict_type):
+            lookups.append(dict_type)
+            return DICT_LABELS.get(dict_type, {})
+
+    module = types.ModuleType("ruoyi_system.service.sys_dict_type")
+    module.DictCacheUtil = DictCacheUtil
+    monkeypatch.setitem(sys.modules, "ruoyi_system.service.sys_dict_type", module)
+    return lookups
+
+
+def _rows(lookups, count):
+    # 模拟服务端游标：开始取数后不允许再有字典查询
+    loaded = len(lookups)
+    assert loaded > 0
+    for i in range(count):
+        yield Sales(id=i + 1, country="1", model_type="2", energy_type="3")
+    assert len(lookups) == loaded
+
+
+def test_write_stream_loads_dict_labels_before_first_row(dict_lookups):
+    output = ExcelUtil(Sales).write_stream(_rows(dict_lookups, 3), "销量数据", "csv")
+    try:
+        text = output.read().decode(ExcelUtil.export_csv_encoding)
+    finally:
+        output.close()
+    records = list(csv.reader(io.StringIO(text)))
+    header, body = records[0], records[1:]
+    assert len(body) == 3
+    assert {row[header.index("国家")] for row in body} == {"中国"}
+    assert {row[header.index("车型")] for row in body} == {"SUV"}
+    assert sorted(dict_lookups) == sorted(set(dict_lookups))
+
+
+def test_write_stream_xlsx_keeps_raw_value_without_label(dict_lookups):
+    unlabeled = Sales(id=1, country="9")
+    output = ExcelUtil(Sales).write_stream(iter([unlabeled]), "销量数据", "xlsx")
+    try:
+        worksheet = load_workbook(output, read_only=True).active
+        header, row = list(worksheet.iter_rows(values_only=True))[:2]
+    finally:
+        output.close()
+    assert row[header.index("国家")] == "9"
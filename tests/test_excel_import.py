@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# @Author  : YY
+# @FileName: test_excel_import.py
+# @Time    : 2026-03-02 10:12:45
+"""
+ExcelUtil 流式导入：用真实的 xlsx 文件经过 iter_buffer、import_file_chunks 读取
+"""
+
+import os
+import sys
+from io import BytesIO
+
+import pytest
+from openpyxl import Workbook
+from werkzeug.datastructures import FileStorage
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from ruoyi_car.domain.entity import Like
+from ruoyi_common.utils.base import ExcelRowException, ExcelUtil
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _headers():
+    return [access.name for _, access in Like.generate_excel_schema()]
+
+
+def _build_xlsx(sheets) -> BytesIO:
+    """
+    按 {工作表名: 行列表} 生成 xlsx 文件
+    """
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for title, rows in sheets.items():
+        worksheet = workbook.create_sheet(title)
+        for row in rows:
+            worksheet.append(row)
+    buffer = BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def _like_row(like_id, user_id="2", user_name="user"):
+    headers = _headers()
+    row = [None] * len(headers)
+    row[headers.index("编号")] = like_id
+    row[headers.index("用户")] = user_id
+    row[headers.index("用户名")] = user_name
+    row[headers.index("车系ID")] = 100 + like_id
+    return row
+
+
+def test_iter_buffer_reads_chunks():
+    buffer = _build_xlsx({"点赞数据": [_headers()] + [_like_row(i) for i in range(1, 6)]})
+    chunks = list(ExcelUtil(Like).iter_buffer(buffer, "点赞数据", chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    likes = [like for chunk in chunks for like in chunk]
+    assert [like.id for like in likes] == [1, 2, 3, 4, 5]
+    assert likes[0].user_id == 2 and likes[0].series_id == 101
+
+
+def test_iter_buffer_skips_sheet_without_header_and_blank_rows():
+    buffer = _build_xlsx({
+        "空白": [],
+        "点赞数据": [[None], _headers(), _like_row(1), [None, None], _like_row(2)],
+    })
+    likes = ExcelUtil(Like).read_buffer(buffer, "不存在的工作表")
+    assert [like.id for like in likes] == [1, 2]
+
+
+def test_iter_buffer_reports_failing_row():
+    buffer = _build_xlsx({"点赞数据": [_headers(), _like_row(1), _like_row(2, user_id="abc")]})
+    chunks = ExcelUtil(Like).iter_buffer(buffer, "点赞数据", chunk_size=1)
+    assert [like.id for like in next(chunks)] == [1]
+    with pytest.raises(ExcelRowException) as excinfo:
+        next(chunks)
+    assert excinfo.value.row_index == 3
+    assert "第3行" in str(excinfo.value)
+
+
+def test_import_file_chunks_from_upload():
+    buffer = _build_xlsx({"点赞数据": [_headers(), _like_row(1), _like_row(2)]})
+    file = FileStorage(stream=buffer, filename="like.xlsx", content_type=XLSX_CONTENT_TYPE)
+    likes = [like for chunk in ExcelUtil(Like).import_file_chunks(file, "点赞数据") for like in chunk]
+    assert [like.user_name for like in likes] == ["user", "user"]
+
+
+def test_iter_buffer_without_header_raises():
+    buffer = _build_xlsx({"点赞数据": [[None], [None]]})
+    with pytest.raises(Exception, match="缺少表头"):
+        ExcelUtil(Like).iter_buffer(buffer, "点赞数据")